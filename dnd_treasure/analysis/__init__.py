@@ -0,0 +1 @@
+"""Statistical analysis tools for charts and generators."""
@@ -0,0 +1,354 @@
+"""Statistical conformance checks for charts, dice and coin tables."""
+
+import sys
+import time
+from collections import Counter
+from fractions import Fraction
+from typing import Dict, List, NamedTuple, Optional, Union
+
+import click
+
+from dnd_treasure.analysis.stats import chi_square, ks_discrete
+from dnd_treasure.core.coins import CoinGenerator, coin_bands
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.expressions import compile_expression
+from dnd_treasure.core.flatten import ChartFlattener
+from dnd_treasure.core.keywords import KeywordReplacer
+from dnd_treasure.core.models import TreasureType
+from dnd_treasure.data.compact import CompactChart
+from dnd_treasure.data.loader import ChartLoader
+from dnd_treasure.data.models import Chart
+
+
+AnyChart = Union[Chart, CompactChart]
+
+# Outcomes expected fewer times than this are pooled for the chi-square test
+MIN_EXPECTED = 5
+
+# Label of the pooled rare outcomes
+RARE = "(rare outcomes)"
+
+
+class ConformanceResult(NamedTuple):
+    """Outcome of one statistical check."""
+    name: str
+    test: str
+    statistic: float
+    p_value: float
+    samples: int
+
+
+class ConformanceReport(NamedTuple):
+    """All checks of a run, judged at a Bonferroni-corrected threshold."""
+    results: List[ConformanceResult]
+    alpha: float
+
+    @property
+    def threshold(self) -> float:
+        """Per-check significance level."""
+        return self.alpha / max(len(self.results), 1)
+
+    @property
+    def failures(self) -> List[ConformanceResult]:
+        """Checks whose p-value falls below the threshold."""
+        return [result for result in self.results if result.p_value < self.threshold]
+
+    @property
+    def passed(self) -> bool:
+        return not self.failures
+
+
+def check_bands(chart: AnyChart, name: str) -> ConformanceResult:
+    """
+    Check that a chart's bands cover every roll of its die exactly once.
+
+    Gaps, overlaps and bands outside the die are reported with p-value 0.
+    """
+    covered = Counter()
+    for entry in chart.rows():
+        for roll in range(entry.min_roll, entry.max_roll + 1):
+            covered[roll] += 1
+    die_rolls = range(1, chart.die_size + 1)
+    problems = sum(1 for roll in die_rolls if covered[roll] != 1)
+    problems += sum(1 for roll in covered if roll not in die_rolls)
+    return ConformanceResult(name, "bands", float(problems), 0.0 if problems else 1.0, chart.die_size)
+
+
+def check_chart(
+    name: str,
+    replacer: KeywordReplacer,
+    flattener: ChartFlattener,
+    samples: int
+) -> ConformanceResult:
+    """
+    Chi-square test of generated chart results against the chart's exact odds.
+
+    The chart is rolled `samples` times through KeywordReplacer.roll_chart,
+    the scalar path item generation takes (die roll, entry lookup and every
+    placeholder of the chain), and the final results are compared with the
+    distribution the ChartFlattener enumerates from the bands. A band
+    shifted into its neighbour, a lookup bug or a sub-chart that is rolled
+    wrongly all show up as a mismatch. Rolling one call at a time is slow,
+    so this is the small cross-check next to check_flattened().
+
+    Args:
+        name: Chart name (e.g. 'dmg/rings_minor').
+        replacer: Replacer whose dice roll the chart.
+        flattener: Flattener giving the exact distribution.
+        samples: Number of rolls.
+
+    Returns:
+        The check's result.
+    """
+    counts = Counter(replacer.roll_chart(name) for _ in range(samples))
+    return _chart_result(name, "scalar", flattener.distribution(name), counts, samples)
+
+
+def check_flattened(name: str, flattener: ChartFlattener, dice: Dice, samples: int) -> ConformanceResult:
+    """
+    Chi-square test of a chart's flattened alias table in bulk.
+
+    FlattenedChart.sample_counts() draws `samples` results from the alias
+    table the flattened generation path samples, millions in well under a
+    second, and they are compared with the distribution enumerated from
+    the bands, so a table built with the wrong thresholds or aliases fails.
+
+    Args:
+        name: Chart name (e.g. 'dmg/rings_minor').
+        flattener: Flattener giving the table and the exact distribution.
+        dice: Dice drawing from the table.
+        samples: Number of draws.
+
+    Returns:
+        The check's result.
+    """
+    counts = flattener.flatten(name).sample_counts(dice, samples)
+    return _chart_result(name, "bulk", flattener.distribution(name), counts, samples)
+
+
+def _chart_result(
+    name: str,
+    path: str,
+    distribution: Dict,
+    counts: Dict,
+    samples: int
+) -> ConformanceResult:
+    """
+    Chi-square test of chart result counts against their exact odds.
+
+    Rare outcomes are pooled; a result the chart cannot give is not, so it
+    always fails.
+    """
+    pooled = {
+        result: result if probability * samples >= MIN_EXPECTED else RARE
+        for result, probability in distribution.items()
+    }
+    expected: Dict = Counter()
+    for result, probability in distribution.items():
+        expected[pooled[result]] += probability
+    observed = Counter()
+    for result, hits in counts.items():
+        observed[pooled.get(result, result)] += hits
+    statistic, _, p_value = chi_square(observed, expected)
+    return ConformanceResult(name, f"{path} chi-square", statistic, p_value, samples)
+
+
+def check_die(die_size: int, roll_counts: Counter, path: str = "bulk") -> List[ConformanceResult]:
+    """
+    Chi-square and KS tests of die rolls against a fair die.
+
+    Args:
+        die_size: Number of faces.
+        roll_counts: Number of rolls of each face.
+        path: How the rolls were made ('bulk' or 'scalar'), for the report.
+
+    Returns:
+        The chi-square and KS results.
+    """
+    fair = {face: Fraction(1, die_size) for face in range(1, die_size + 1)}
+    samples = sum(roll_counts.values())
+    name = f"d{die_size}"
+    statistic, _, p_value = chi_square(roll_counts, fair)
+    distance, ks_p_value = ks_discrete(roll_counts, fair)
+    return [
+        ConformanceResult(name, f"{path} chi-square", statistic, p_value, samples),
+        ConformanceResult(name, f"{path} ks", distance, ks_p_value, samples),
+    ]
+
+
+def check_coins(level: int, dice: Dice, samples: int) -> List[ConformanceResult]:
+    """
+    Check a CoinGenerator level: coin types by chi-square, amounts by KS.
+
+    Every coin set is a CoinGenerator.generate() call for a standard hoard,
+    so the checked rolls are the ones hoards are made of. This is the small
+    cross-check next to check_coins_bulk().
+
+    Args:
+        level: Encounter level (1-20).
+        dice: Dice rolling the coin sets.
+        samples: Number of coin sets.
+
+    Returns:
+        One coin type result plus one amount result per coin type.
+    """
+    generator = CoinGenerator(dice)
+    amounts: Dict[Optional[str], Counter] = {}
+    for _ in range(samples):
+        coins, = generator.generate(level, TreasureType.STANDARD)
+        amount, _, coin_type = coins.partition(" ")
+        if coins == "No Coins":
+            coin_type, amount = None, "0"
+        amounts.setdefault(coin_type, Counter())[int(amount)] += 1
+    return _coin_results(level, "scalar", amounts, samples)
+
+
+def check_coins_bulk(level: int, dice: Dice, samples: int) -> List[ConformanceResult]:
+    """
+    Check a coin table level in bulk: coin types by chi-square, amounts by KS.
+
+    The d100 rolls come from Dice.roll_many() and each coin type's amounts
+    from its compiled expression's sample(), so hundreds of thousands of
+    coin sets take a fraction of a second.
+
+    Args:
+        level: Encounter level (1-20).
+        dice: Dice rolling the coin sets.
+        samples: Number of coin sets.
+
+    Returns:
+        One coin type result plus one amount result per coin type.
+    """
+    rolls = Counter(dice.roll_many(100, samples))
+    amounts: Dict[Optional[str], Counter] = {}
+    for min_roll, max_roll, amount, coin_type in coin_bands(level):
+        hits = sum(rolls[roll] for roll in range(min_roll, max_roll + 1))
+        found = amounts.setdefault(coin_type, Counter())
+        if coin_type is None:
+            found[0] += hits
+        else:
+            found.update(compile_expression(amount).sample(dice, hits))
+    return _coin_results(level, "bulk", amounts, samples)
+
+
+def _coin_results(
+    level: int,
+    path: str,
+    amounts: Dict[Optional[str], Counter],
+    samples: int
+) -> List[ConformanceResult]:
+    """Test coin sets, counted by coin type and amount, against a level's bands."""
+    bands = coin_bands(level)
+    name = f"coins level {level}"
+
+    types = Counter({coin_type: sum(found.values()) for coin_type, found in amounts.items()})
+    expected_types = Counter()
+    for min_roll, max_roll, _, coin_type in bands:
+        expected_types[coin_type] += Fraction(max_roll - min_roll + 1, 100)
+    statistic, _, p_value = chi_square(types, expected_types)
+    results = [ConformanceResult(name, f"{path} chi-square", statistic, p_value, samples)]
+
+    for _, _, amount, coin_type in bands:
+        if coin_type is None:
+            continue
+        found = amounts.get(coin_type, Counter())
+        distance, ks_p_value = ks_discrete(found, compile_expression(amount).distribution())
+        results.append(ConformanceResult(
+            f"{name} {coin_type}", f"{path} ks", distance, ks_p_value, sum(found.values())
+        ))
+    return results
+
+
+def run_conformance(
+    loader: Optional[ChartLoader] = None,
+    samples: int = 200_000,
+    coin_samples: int = 50_000,
+    seed: int = 1,
+    alpha: float = 0.001,
+    chart_samples: int = 1_000_000,
+    scalar_samples: int = 1_000
+) -> ConformanceReport:
+    """
+    Check every chart, the dice behind them and every coin table level.
+
+    The bulk checks draw from the same tables generation uses, many at a
+    time: Dice.roll_many for each die size the charts use, each chart's
+    flattened alias table and the coin table levels. A small scalar
+    cross-check rolls each one call at a time through the code hoards are
+    generated with (Dice.roll, KeywordReplacer.roll_chart and
+    CoinGenerator.generate). The default run takes about 8s.
+
+    Args:
+        loader: Chart loader (defaults to the packaged charts).
+        samples: Bulk rolls per die size.
+        coin_samples: Bulk coin sets per level.
+        seed: Seed of the rolls, so runs are reproducible.
+        alpha: Family-wise significance level (Bonferroni-corrected).
+        chart_samples: Bulk draws per chart.
+        scalar_samples: Rolls per die size, chart and coin level of the
+            scalar cross-check.
+
+    Returns:
+        ConformanceReport of every check.
+    """
+    if loader is None:
+        loader = ChartLoader()
+    dice = Dice(seed)
+    replacer = KeywordReplacer(loader, dice)
+    flattener = ChartFlattener(loader, Dice(seed))
+    results: List[ConformanceResult] = []
+    die_sizes = set()
+
+    paths = sorted(loader.charts_base_path.rglob("*.yaml"))
+    for path in paths:
+        name = path.relative_to(loader.charts_base_path).with_suffix("").as_posix()
+        chart = loader.load_chart(path)
+        if chart.die_size not in die_sizes:
+            die_sizes.add(chart.die_size)
+            results.extend(check_die(chart.die_size, Counter(dice.roll_many(chart.die_size, samples))))
+            counts = Counter(dice.roll(chart.die_size) for _ in range(scalar_samples))
+            results.extend(check_die(chart.die_size, counts, "scalar"))
+        results.append(check_bands(chart, name))
+        results.append(check_flattened(name, flattener, dice, chart_samples))
+        results.append(check_chart(name, replacer, flattener, scalar_samples))
+
+    for level in range(1, 21):
+        results.extend(check_coins_bulk(level, dice, coin_samples))
+        results.extend(check_coins(level, dice, scalar_samples))
+
+    return ConformanceReport(results, alpha)
+
+
+@click.command()
+@click.option('--samples', type=int, default=200_000, help='Bulk rolls per die size')
+@click.option('--chart-samples', type=int, default=1_000_000, help='Bulk draws per chart')
+@click.option('--coin-samples', type=int, default=50_000, help='Bulk coin sets per level')
+@click.option('--scalar-samples', type=int, default=1_000, help='Scalar cross-check rolls per die, chart and coin level')
+@click.option('--seed', type=int, default=1, help='Seed of the rolls')
+@click.option('--alpha', type=float, default=0.001, help='Family-wise significance level')
+@click.option('--charts', type=click.Path(exists=True, file_okay=False), help='Charts directory')
+@click.option('--verbose', '-v', is_flag=True, help='List every check, not just failures')
+def main(samples, chart_samples, coin_samples, scalar_samples, seed, alpha, charts, verbose):
+    """Run the conformance checks and exit non-zero on any failure."""
+    started = time.perf_counter()
+    report = run_conformance(
+        ChartLoader(charts), samples, coin_samples, seed, alpha, chart_samples, scalar_samples
+    )
+    elapsed = time.perf_counter() - started
+
+    failures = report.failures
+    for result in report.results if verbose else failures:
+        status = "FAIL" if result in failures else "ok"
+        click.echo(
+            f"{status:4} {result.name:40} {result.test:17} "
+            f"stat={result.statistic:.4g} p={result.p_value:.3g} n={result.samples}"
+        )
+    click.echo(
+        f"{len(report.results)} checks, {len(failures)} failed "
+        f"(threshold p < {report.threshold:.2g}) in {elapsed:.1f}s"
+    )
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
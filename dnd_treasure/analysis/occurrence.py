@@ -0,0 +1,344 @@
+"""Exact item occurrence odds of hoards, computed from the charts."""
+
+import re
+import threading
+from fractions import Fraction
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from dnd_treasure.analysis.patterns import ALL, NONE, NameLanguage
+from dnd_treasure.core.arms import (
+    ARMOR,
+    ARMS_ENTRIES,
+    BANE_CHART,
+    BASE_CHARTS,
+    BONUS_PRICE,
+    BONUS_TABLE,
+    COMMON_SHARE,
+    MELEE,
+    MELEE_DIE,
+    MELEE_SHARE,
+    RANGED,
+    MagicArms,
+)
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.flatten import ChartFlattener, Distribution
+from dnd_treasure.core.items import ITEM_TABLE, ItemGenerator
+from dnd_treasure.core.models import Source, TreasureType
+from dnd_treasure.core.scrolls import (
+    ARCANE,
+    ARCANE_SHARE,
+    DIVINE,
+    SCROLL_CHARTS,
+    SCROLL_ENTRIES,
+    SCROLL_TABLE,
+)
+from dnd_treasure.core.sources import SourceSelector
+from dnd_treasure.data.loader import ChartLoader, ChartNamespace
+from dnd_treasure.data.models import ChartResult
+
+
+# Tells whether an item counts; gets the item's final chart result
+Predicate = Callable[[ChartResult], bool]
+
+# Item sets rolled per treasure type
+SETS = {TreasureType.NONE: 0, TreasureType.DOUBLE: 2, TreasureType.TRIPLE: 3}
+
+
+class NameMatch(NamedTuple):
+    """
+    Predicate matching items whose name contains a regular expression.
+
+    Equal patterns are equal predicates, so they share memoized results.
+    """
+    pattern: str
+
+    def __call__(self, result: ChartResult) -> bool:
+        return re.search(self.pattern, result.name, re.IGNORECASE) is not None
+
+
+class Occurrence(NamedTuple):
+    """Odds of matching items in a slot, set or hoard."""
+    probability: Fraction
+    expected: Fraction
+
+    @property
+    def none(self) -> Fraction:
+        """Probability of no matching item."""
+        return 1 - self.probability
+
+
+class OccurrenceEngine:
+    """
+    Computes the exact odds of items in a hoard.
+
+    Every answer is a dynamic program over the generator's own tables: the
+    d100 bands of the level's items row, the count die of each band, the
+    source shares of each set, and the chart chain of each item slot, whose
+    exact distribution comes from a ChartFlattener (memoized per chart, so
+    sub-charts such as wand or potion lists are expanded once). Scroll
+    entries are expanded into their 1dN spells from the spell charts.
+
+    The odds of one slot are memoized per (chart, predicate), so after the
+    first query touching a chart, a query costs a few hundred Fraction
+    operations.
+
+    Magic armor and weapon entries count as the items they become. Those
+    without special abilities are enumerated by enhancement bonus and base
+    item. Those with abilities have too many outcomes to enumerate (over a
+    million for medium armor), so a NameMatch is checked against every
+    name they can have instead: it must match all of them or none of them
+    for each base item, and a pattern whose answer depends on the
+    abilities or the enhancement bonus (e.g. 'Flaming' or '^\\+2 ') is
+    refused with a ValueError rather than answered wrongly.
+    """
+
+    def __init__(
+        self,
+        chart_loader: Optional[ChartLoader] = None,
+        sources: Optional[Dict[Source, int]] = None,
+        flattener: Optional[ChartFlattener] = None
+    ):
+        """
+        Initialize occurrence engine.
+
+        Args:
+            chart_loader: Chart loader (defaults to the packaged charts).
+            sources: Percentage share of each source, as for generation.
+                Defaults to DMG only.
+            flattener: Flattener whose chart distributions to reuse, e.g. a
+                generator's; one is made otherwise.
+        """
+        if chart_loader is None:
+            chart_loader = flattener.loader if flattener is not None else ChartLoader()
+        self.loader = chart_loader
+        self.flattener = flattener if flattener is not None else ChartFlattener(chart_loader, Dice(0))
+
+        selector = SourceSelector(chart_loader, Dice(0), sources)
+        # Resolves charts the way the generator does, never rolling
+        self._items = ItemGenerator(Dice(0), self.flattener, selector)
+        shares = sources if sources is not None else {Source.DMG: 100}
+        self._shares: List[Tuple[Fraction, ChartNamespace]] = [
+            (Fraction(percent, 100), selector.namespaces[source])
+            for source, percent in shares.items() if percent > 0
+        ]
+
+        self._arms_tables = MagicArms(chart_loader)
+        self._slots: Dict[Tuple[str, Predicate], Tuple[Fraction, Fraction]] = {}
+        self._arms: Dict[Tuple[str, str, Predicate], Fraction] = {}
+        self._bases: Dict[str, List[Tuple[ChartResult, Fraction]]] = {}
+        self._enchanted: Dict[Tuple[str, str], NameLanguage] = {}
+        self._scrolls: Dict[Tuple[str, Predicate], Fraction] = {}
+        self._spell_charts: Dict[Tuple[str, int], Distribution] = {}
+        self._lock = threading.RLock()
+
+    def hoard(self, level: int, treasure_type: TreasureType, predicate: Predicate) -> Occurrence:
+        """
+        Odds of matching items in a hoard's items section.
+
+        Args:
+            level: Encounter level (1-20).
+            treasure_type: Items type (NONE, STANDARD, DOUBLE, TRIPLE).
+            predicate: Tells whether an item counts, e.g. NameMatch('^Ring of').
+
+        Returns:
+            Probability of at least one matching item, and the expected
+            number of them.
+
+        Raises:
+            ValueError: If the level's items include magic armor or weapons
+                and the predicate's answer for them is not modeled (see the
+                class docstring).
+        """
+        sets = SETS.get(treasure_type, 1)
+        single = self.item_set(level, predicate)
+        return Occurrence(1 - single.none ** sets, single.expected * sets)
+
+    def item_set(self, level: int, predicate: Predicate) -> Occurrence:
+        """
+        Odds of matching items in one set of items (one d100 roll on Table 3-5).
+
+        Args:
+            level: Encounter level (1-20).
+            predicate: Tells whether an item counts.
+
+        Returns:
+            Occurrence for the set.
+        """
+        none = Fraction(1)
+        expected = Fraction(0)
+        for min_roll, max_roll, count_die, kind in ITEM_TABLE[min(max(level, 1), 20)]:
+            band = Fraction(max_roll - min_roll + 1, 100)
+            for share, namespace in self._shares:
+                miss, mean = self._slot(self._items.chart_name(kind, namespace), predicate)
+                # Slots of a set are independent: no match in n slots is miss ** n
+                counts = range(1, count_die + 1) if count_die else (1,)
+                none -= band * share * (1 - sum(miss ** n for n in counts) / len(counts))
+                expected += band * share * mean * Fraction(sum(counts), len(counts))
+        return Occurrence(1 - none, expected)
+
+    def slot(self, chart_name: str, predicate: Predicate) -> Occurrence:
+        """
+        Odds of matching items from one item slot.
+
+        Args:
+            chart_name: Item chart rolled for the slot (e.g. 'dmg/magic_items_minor').
+            predicate: Tells whether an item counts.
+
+        Returns:
+            Occurrence for the slot; a scroll entry's set can hold several.
+        """
+        miss, mean = self._slot(chart_name, predicate)
+        return Occurrence(1 - miss, mean)
+
+    def _slot(self, chart_name: str, predicate: Predicate) -> Tuple[Fraction, Fraction]:
+        """(Probability of no match, expected matches) of a slot, memoized."""
+        key = (chart_name, predicate)
+        odds = self._slots.get(key)
+        if odds is not None:
+            return odds
+        with self._lock:
+            odds = self._slots.get(key)
+            if odds is None:
+                odds = self._slots[key] = self._compute_slot(chart_name, predicate)
+        return odds
+
+    def _compute_slot(self, chart_name: str, predicate: Predicate) -> Tuple[Fraction, Fraction]:
+        """Sum a slot's odds over the final results of its chart chain."""
+        miss = Fraction(0)
+        expected = Fraction(0)
+        for result, probability in self.flattener.distribution(chart_name).items():
+            if result is None:
+                miss += probability
+            elif result.name in SCROLL_ENTRIES:
+                power = SCROLL_ENTRIES[result.name]
+                count_die, _ = SCROLL_TABLE[power]
+                hit = self._scroll(power, predicate)
+                counts = range(1, count_die + 1)
+                miss += probability * sum((1 - hit) ** n for n in counts) / count_die
+                expected += probability * hit * Fraction(sum(counts), count_die)
+            elif result.name in ARMS_ENTRIES:
+                hit = self._arms_hit(*ARMS_ENTRIES[result.name], predicate)
+                miss += probability * (1 - hit)
+                expected += probability * hit
+            elif predicate(result):
+                expected += probability
+            else:
+                miss += probability
+        return miss, expected
+
+    def _arms_hit(self, kind: str, power: str, predicate: Predicate) -> Fraction:
+        """Probability that a magic armor or weapon matches, memoized."""
+        key = (kind, power, predicate)
+        hit = self._arms.get(key)
+        if hit is None:
+            bonuses = BONUS_TABLE[kind][power]
+            shares = {}
+            previous = 0
+            for max_roll, bonus in bonuses:
+                shares[bonus] = Fraction(max_roll - previous, 100)
+                previous = max_roll
+            # The first bonus roll either settles an item without abilities
+            # or adds abilities, with the bonus rolled after them
+            abilities_share = shares.pop(None)
+            base_kinds = [(ARMOR, Fraction(1))] if kind == ARMOR else [
+                (MELEE, Fraction(MELEE_SHARE, 100)), (RANGED, Fraction(100 - MELEE_SHARE, 100))
+            ]
+            hit = Fraction(0)
+            for base_kind, kind_share in base_kinds:
+                bases = self._base_items(base_kind)
+                for base, base_share in bases:
+                    for bonus, bonus_share in shares.items():
+                        value = bonus * bonus * BONUS_PRICE[base_kind] + base.value
+                        if predicate(ChartResult(f"+{bonus} {base.name}", value, 0)):
+                            hit += kind_share * base_share * bonus_share
+                hit += kind_share * abilities_share * self._enchanted_hit(base_kind, power, list(shares), bases, predicate)
+            self._arms[key] = hit
+        return hit
+
+    def _enchanted_hit(
+        self,
+        base_kind: str,
+        power: str,
+        bonuses: List[int],
+        bases: List[Tuple[ChartResult, Fraction]],
+        predicate: Predicate
+    ) -> Fraction:
+        """Probability that an item with special abilities matches, if it does not depend on them."""
+        if not isinstance(predicate, NameMatch):
+            raise ValueError("Odds of magic armor and weapons with special abilities need a NameMatch predicate")
+        language = self._enchanted.get((base_kind, power))
+        if language is None:
+            abilities = []
+            for ability in self._arms_tables.table(base_kind, power).abilities:
+                if ability.name == "Bane":
+                    creatures = self.loader.load_chart_by_name(BANE_CHART).rows()
+                    abilities.extend(f"Bane ({creature.name})" for creature in creatures)
+                else:
+                    abilities.append(ability.name)
+            # Every name up to the base item: bonus, then abilities in any order
+            language = NameLanguage().then([f"+{bonus} " for bonus in bonuses]).then(abilities, separator=", ")
+            self._enchanted[(base_kind, power)] = language
+        answers = language.extents(predicate.pattern, [f" {base.name}" for base, _ in bases], re.IGNORECASE)
+        hit = Fraction(0)
+        for (base, share), answer in zip(bases, answers):
+            if answer == ALL:
+                hit += share
+            elif answer != NONE:
+                raise ValueError(
+                    f"'{predicate.pattern}' matches some magic {base.name.lower()} names with special "
+                    f"abilities but not others; odds by ability or enhancement bonus are not modeled"
+                )
+        return hit
+
+    def _base_items(self, base_kind: str) -> List[Tuple[ChartResult, Fraction]]:
+        """Base armor or weapons of a kind with their probabilities, memoized."""
+        bases = self._bases.get(base_kind)
+        if bases is None:
+            charts = BASE_CHARTS[base_kind]
+            chart_shares = [Fraction(1)] if len(charts) == 1 else [
+                Fraction(COMMON_SHARE, MELEE_DIE), Fraction(MELEE_DIE - COMMON_SHARE, MELEE_DIE)
+            ]
+            odds: Dict[ChartResult, Fraction] = {}
+            for chart_name, chart_share in zip(charts, chart_shares):
+                chart = self.loader.load_chart_by_name(chart_name)
+                for roll in range(1, 101):
+                    entry = chart.find_entry(roll)
+                    if entry is None:
+                        raise ValueError(f"{chart_name} has no entry for {roll}")
+                    result = ChartResult(entry.name, entry.value, entry.flag)
+                    odds[result] = odds.get(result, 0) + chart_share / 100
+            bases = self._bases[base_kind] = list(odds.items())
+        return bases
+
+    def _scroll(self, power: str, predicate: Predicate) -> Fraction:
+        """Probability that one scroll of a set matches, memoized."""
+        key = (power, predicate)
+        hit = self._scrolls.get(key)
+        if hit is None:
+            _, bands = SCROLL_TABLE[power]
+            hit = Fraction(0)
+            for magic_type, type_percent in ((ARCANE, ARCANE_SHARE), (DIVINE, 100 - ARCANE_SHARE)):
+                type_share = Fraction(type_percent, 100)
+                previous = 0
+                for max_roll, level in bands:
+                    level_share = Fraction(max_roll - previous, 100)
+                    previous = max_roll
+                    spells = self._spells(magic_type, level)
+                    hit += type_share * level_share * sum(
+                        probability for result, probability in spells.items() if predicate(result)
+                    )
+            self._scrolls[key] = hit
+        return hit
+
+    def _spells(self, magic_type: str, level: int) -> Distribution:
+        """Distribution of the scroll items of a spell chart, memoized."""
+        spells = self._spell_charts.get((magic_type, level))
+        if spells is None:
+            prefix = f"{magic_type.capitalize()} Scroll of "
+            chart_name = SCROLL_CHARTS.format(magic_type, level)
+            spells = self._spell_charts[(magic_type, level)] = {
+                ChartResult(prefix + result.name, result.value, result.flag): probability
+                for result, probability in self.flattener.distribution(chart_name).items()
+                if result is not None
+            }
+        return spells
@@ -0,0 +1,296 @@
+"""Whether a regular expression finds every, some or none of a set of names."""
+
+import re
+from itertools import count
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python before 3.11
+    import sre_parse
+
+
+# Answers of NameLanguage.extent()
+ALL = "all"
+NONE = "none"
+SOME = "some"
+
+# Longest counted repeat ({m,n}) expanded; longer ones are not analysed
+MAX_COUNTED = 64
+
+# Position assertions of a regex edge
+_BEGIN = "begin"
+_END = "end"
+
+
+class _Unsupported(Exception):
+    """A regex construct the analysis does not model."""
+
+
+class _Program:
+    """
+    A regex as a nondeterministic automaton over characters.
+
+    Edges test one character, are free (epsilon), or are free only at the
+    start or end of the string. Lookarounds, backreferences, word
+    boundaries and atomic groups have no edge and are refused.
+    """
+
+    def __init__(self, pattern: str, flags: int = 0):
+        """
+        Compile a pattern.
+
+        Args:
+            pattern: Regular expression, as for re.search().
+            flags: re flags.
+
+        Raises:
+            _Unsupported: If the pattern uses a construct that is not modeled.
+        """
+        parsed = sre_parse.parse(pattern, flags)
+        self._ids = count()
+        self.chars: Dict[int, List[Tuple[Callable[[str], bool], int]]] = {}
+        self.free: Dict[int, List[Tuple[Optional[str], int]]] = {}
+        self.start = self._node()
+        self.accept = self._build(parsed, self.start, bool(parsed.state.flags & re.IGNORECASE))
+
+    def _node(self) -> int:
+        node = next(self._ids)
+        self.chars[node] = []
+        self.free[node] = []
+        return node
+
+    def _build(self, items: Iterable, node: int, ignore_case: bool) -> int:
+        """Add the automaton of a parsed sequence from node; returns its end node."""
+        for op, av in items:
+            if op in (sre_parse.LITERAL, sre_parse.NOT_LITERAL, sre_parse.ANY, sre_parse.IN):
+                test = _char_test(op, av, ignore_case)
+                end = self._node()
+                self.chars[node].append((test, end))
+                node = end
+            elif op is sre_parse.SUBPATTERN:
+                _, add_flags, del_flags, body = av
+                case = (ignore_case or bool(add_flags & re.IGNORECASE)) and not del_flags & re.IGNORECASE
+                node = self._build(body, node, case)
+            elif op is sre_parse.BRANCH:
+                end = self._node()
+                for alternative in av[1]:
+                    self.free[self._build(alternative, node, ignore_case)].append((None, end))
+                node = end
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+                low, high, body = av
+                unbounded = high == sre_parse.MAXREPEAT
+                if low > MAX_COUNTED or (not unbounded and high - low > MAX_COUNTED):
+                    raise _Unsupported("counted repeat")
+                for _ in range(low):
+                    node = self._build(body, node, ignore_case)
+                if unbounded:
+                    loop = self._node()
+                    self.free[node].append((None, loop))
+                    self.free[self._build(body, loop, ignore_case)].append((None, loop))
+                    node = loop
+                else:
+                    end = self._node()
+                    for _ in range(high - low):
+                        self.free[node].append((None, end))
+                        node = self._build(body, node, ignore_case)
+                    self.free[node].append((None, end))
+                    node = end
+            elif op is sre_parse.AT and av in (sre_parse.AT_BEGINNING, sre_parse.AT_BEGINNING_STRING):
+                end = self._node()
+                self.free[node].append((_BEGIN, end))
+                node = end
+            elif op is sre_parse.AT and av in (sre_parse.AT_END, sre_parse.AT_END_STRING):
+                end = self._node()
+                self.free[node].append((_END, end))
+                node = end
+            else:
+                raise _Unsupported(str(op))
+        return node
+
+    def closure(self, nodes: Iterable[int], begin: bool, end: bool) -> FrozenSet[int]:
+        """Nodes reachable over free edges, given whether the position is the start or end."""
+        reached: Set[int] = set(nodes)
+        stack = list(reached)
+        while stack:
+            for condition, target in self.free[stack.pop()]:
+                if target in reached:
+                    continue
+                if condition is None or (condition == _BEGIN and begin) or (condition == _END and end):
+                    reached.add(target)
+                    stack.append(target)
+        return frozenset(reached)
+
+    def step(self, nodes: FrozenSet[int], char: str) -> Set[int]:
+        """Nodes reached by reading a character."""
+        return {target for node in nodes for test, target in self.chars[node] if test(char)}
+
+
+def _char_test(op, av, ignore_case: bool) -> Callable[[str], bool]:
+    """Test of one character for a parsed LITERAL, NOT_LITERAL, ANY or IN item."""
+    def fold(char: str) -> Tuple[str, ...]:
+        return (char, char.lower(), char.upper()) if ignore_case else (char,)
+
+    if op is sre_parse.LITERAL:
+        return lambda char: chr(av) in fold(char)
+    if op is sre_parse.NOT_LITERAL:
+        return lambda char: chr(av) not in fold(char)
+    if op is sre_parse.ANY:
+        return lambda char: char != "\n"
+
+    negate = False
+    tests = []
+    for item, value in av:
+        if item is sre_parse.NEGATE:
+            negate = True
+        elif item is sre_parse.LITERAL:
+            tests.append(lambda char, value=value: chr(value) == char)
+        elif item is sre_parse.RANGE:
+            tests.append(lambda char, low=value[0], high=value[1]: low <= ord(char) <= high)
+        elif item is sre_parse.CATEGORY and value in _CATEGORIES:
+            tests.append(_CATEGORIES[value])
+        else:
+            raise _Unsupported(str(item))
+    return lambda char: negate != any(test(variant) for variant in fold(char) for test in tests)
+
+
+_CATEGORIES: Dict = {
+    sre_parse.CATEGORY_DIGIT: str.isdigit,
+    sre_parse.CATEGORY_NOT_DIGIT: lambda char: not char.isdigit(),
+    sre_parse.CATEGORY_SPACE: str.isspace,
+    sre_parse.CATEGORY_NOT_SPACE: lambda char: not char.isspace(),
+    sre_parse.CATEGORY_WORD: lambda char: char.isalnum() or char == "_",
+    sre_parse.CATEGORY_NOT_WORD: lambda char: not (char.isalnum() or char == "_"),
+}
+
+
+class NameLanguage:
+    """
+    A set of names built from tokens, as an automaton over their characters.
+
+    Each stage appends one of its strings; a repeated stage may append
+    further strings, each after a separator. '+2 ' then one or more
+    abilities separated by ', ' then ' Longsword' describes every magic
+    longsword of some abilities, without listing their combinations.
+    """
+
+    def __init__(self):
+        """Start with the empty name."""
+        self._edges: List[List[Tuple[str, int]]] = [[]]
+        self.final = 0
+
+    def then(self, strings: Sequence[str], separator: Optional[str] = None) -> "NameLanguage":
+        """
+        Append a stage.
+
+        Args:
+            strings: Non-empty strings one of which the stage appends.
+            separator: Repeat the stage, with this between repetitions.
+
+        Returns:
+            This language.
+        """
+        start = self.final
+        end = self._new()
+        for text in strings:
+            self._chain(start, text, end)
+        if separator is not None:
+            self._chain(end, separator, start)
+        self.final = end
+        return self
+
+    def _new(self) -> int:
+        self._edges.append([])
+        return len(self._edges) - 1
+
+    def _chain(self, start: int, text: str, end: int) -> None:
+        """Add a path spelling text from start to end."""
+        if not text:
+            raise ValueError("Name language strings must not be empty")
+        node = start
+        for char in text[:-1]:
+            following = self._new()
+            self._edges[node].append((char, following))
+            node = following
+        self._edges[node].append((text[-1], end))
+
+    def extent(self, pattern: str, flags: int = 0) -> str:
+        """
+        Tell whether re.search(pattern, name, flags) finds every name, some or none.
+
+        The answer is exact for the constructs the analysis models. Patterns
+        with lookarounds, backreferences, word boundaries, atomic groups or
+        long counted repeats give SOME.
+
+        Args:
+            pattern: Regular expression.
+            flags: re flags.
+
+        Returns:
+            ALL, NONE or SOME.
+        """
+        return self.extents(pattern, [""], flags)[0]
+
+    def extents(self, pattern: str, endings: Sequence[str], flags: int = 0) -> List[str]:
+        """
+        Tell extent() of the names followed by each of several endings.
+
+        The language is explored once; each ending is then read from every
+        state the search can be in at the end of a name, so many endings
+        (e.g. one per base item) cost little more than one.
+
+        Args:
+            pattern: Regular expression.
+            endings: Strings appended to every name.
+            flags: re flags.
+
+        Returns:
+            ALL, NONE or SOME per ending.
+        """
+        try:
+            program = _Program(pattern, flags)
+        except _Unsupported:
+            return [SOME] * len(endings)
+        restart = program.closure([program.start], begin=False, end=False)
+
+        moves: Dict[Tuple[FrozenSet[int], str], FrozenSet[int]] = {}
+
+        def read(threads: FrozenSet[int], char: str) -> FrozenSet[int]:
+            following = moves.get((threads, char))
+            if following is None:
+                following = moves[(threads, char)] = program.closure(program.step(threads, char), False, False) | restart
+            return following
+
+        # Search states at the end of a name, unless found before it
+        initial = (0, program.closure([program.start], begin=True, end=False))
+        found = False
+        frontier: Set[FrozenSet[int]] = set()
+        seen = {initial}
+        stack = [initial]
+        while stack:
+            node, threads = stack.pop()
+            if program.accept in threads:
+                # Found in a prefix: every completion is found
+                found = True
+                continue
+            if node == self.final:
+                frontier.add(threads)
+            for char, following in self._edges[node]:
+                state = (following, read(threads, char))
+                if state not in seen:
+                    seen.add(state)
+                    stack.append(state)
+
+        answers = []
+        for ending in endings:
+            outcomes = {True} if found else set()
+            for threads in frontier:
+                for char in ending:
+                    threads = read(threads, char)
+                    if program.accept in threads:
+                        break
+                else:
+                    threads = program.closure(threads, begin=False, end=True)
+                outcomes.add(program.accept in threads)
+            answers.append(SOME if len(outcomes) > 1 else ALL if outcomes == {True} else NONE)
+        return answers
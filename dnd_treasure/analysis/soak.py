@@ -0,0 +1,216 @@
+"""Long-running soak benchmark catching memory growth and throughput drift."""
+
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from dnd_treasure.core.generator import TreasureGenerator
+
+
+# Hoards generated between clock checks
+BLOCK_SIZE = 50
+
+# Growth of traced memory past the baseline that fails a soak
+MAX_GROWTH = 1024 * 1024
+
+# Relative throughput loss between the first and last third that fails a soak
+MAX_DRIFT = 0.25
+
+# Package root, for naming the subsystem an allocation belongs to
+_PACKAGE = Path(__file__).resolve().parent.parent
+
+
+class SoakSample(NamedTuple):
+    """Measurements taken at one sampling point."""
+    elapsed: float
+    hoards: int
+    rss: Optional[int]
+    traced: int
+    rate: float
+
+
+@dataclass
+class SoakReport:
+    """Outcome of a soak run."""
+    warmup: int
+    samples: List[SoakSample] = field(default_factory=list)
+    subsystems: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def hoards(self) -> int:
+        """Hoards generated after the warm-up."""
+        return self.samples[-1].hoards if self.samples else 0
+
+    @property
+    def growth(self) -> int:
+        """Bytes of traced memory gained since the baseline sample."""
+        if not self.samples:
+            return 0
+        return self.samples[-1].traced - self.samples[0].traced
+
+    @property
+    def rss_growth(self) -> Optional[int]:
+        """Bytes of resident memory gained since the baseline sample."""
+        if not self.samples or self.samples[0].rss is None or self.samples[-1].rss is None:
+            return None
+        return self.samples[-1].rss - self.samples[0].rss
+
+    @property
+    def drift(self) -> float:
+        """
+        Relative throughput change from the first to the last third of the run.
+
+        Negative values mean the generator got slower.
+        """
+        rates = [sample.rate for sample in self.samples[1:]]
+        if len(rates) < 3:
+            return 0.0
+        third = len(rates) // 3
+        first = sum(rates[:third]) / third
+        last = sum(rates[-third:]) / third
+        return (last - first) / first if first else 0.0
+
+    def failures(self, max_growth: int = MAX_GROWTH, max_drift: float = MAX_DRIFT) -> List[str]:
+        """
+        Check the run against growth and drift limits.
+
+        Args:
+            max_growth: Allowed traced memory growth in bytes.
+            max_drift: Allowed relative throughput loss.
+
+        Returns:
+            A message per exceeded limit; empty if the run passed.
+        """
+        failures = []
+        if self.growth > max_growth:
+            failures.append(f"traced memory grew by {self.growth} bytes (limit {max_growth})")
+        if -self.drift > max_drift:
+            failures.append(f"throughput fell by {-self.drift:.0%} (limit {max_drift:.0%})")
+        return failures
+
+
+def rss_bytes() -> Optional[int]:
+    """
+    Resident set size of this process.
+
+    Read from /proc on Linux; elsewhere the peak RSS from getrusage() is
+    the closest portable figure. None if neither is available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def subsystem(filename: str) -> str:
+    """
+    Name the subsystem a source file belongs to.
+
+    Package modules are named by their dotted path ('core.generator');
+    anything else by its top-level module or file name.
+    """
+    path = Path(filename)
+    try:
+        return ".".join(path.resolve().relative_to(_PACKAGE).with_suffix("").parts)
+    except ValueError:
+        pass
+    parts = path.parts
+    if "site-packages" in parts:
+        return parts[parts.index("site-packages") + 1].split(".")[0]
+    return path.stem
+
+
+def run_soak(
+    generator: TreasureGenerator,
+    duration: Optional[float] = None,
+    count: Optional[int] = None,
+    interval: float = 10.0,
+    levels: Sequence[int] = range(1, 21),
+    warmup: int = 1000,
+    progress=None
+) -> SoakReport:
+    """
+    Generate hoards continuously while sampling memory and throughput.
+
+    The first sample is taken after the warm-up hoards, once the chart
+    caches are filled; growth is measured against it. Tracing memory slows
+    generation down, but evenly, so drift stays comparable.
+
+    Args:
+        generator: Generator to exercise.
+        duration: Seconds to run after the warm-up.
+        count: Hoards to generate after the warm-up.
+        interval: Seconds between samples.
+        levels: Levels to cycle through.
+        warmup: Hoards generated before the baseline sample.
+        progress: Optional callback receiving each SoakSample.
+
+    Returns:
+        SoakReport with every sample and the traced growth per subsystem.
+    """
+    if duration is None and count is None:
+        raise ValueError("A soak needs a duration or a count")
+    levels = list(levels)
+    if not levels:
+        raise ValueError("A soak needs at least one level")
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        for i in range(warmup):
+            generator.generate(levels[i % len(levels)])
+
+        report = SoakReport(warmup=warmup)
+        baseline = tracemalloc.take_snapshot()
+        start = last_time = time.perf_counter()
+        hoards = last_hoards = 0
+        report.samples.append(SoakSample(0.0, 0, rss_bytes(), tracemalloc.get_traced_memory()[0], 0.0))
+
+        while True:
+            block = BLOCK_SIZE if count is None else min(BLOCK_SIZE, count - hoards)
+            for _ in range(block):
+                generator.generate(levels[(warmup + hoards) % len(levels)])
+                hoards += 1
+            now = time.perf_counter()
+            done = (count is not None and hoards >= count) or (
+                duration is not None and now - start >= duration
+            )
+            if done or now - last_time >= interval:
+                sample = SoakSample(
+                    elapsed=now - start,
+                    hoards=hoards,
+                    rss=rss_bytes(),
+                    traced=tracemalloc.get_traced_memory()[0],
+                    rate=(hoards - last_hoards) / (now - last_time) if now > last_time else 0.0,
+                )
+                report.samples.append(sample)
+                if progress is not None:
+                    progress(sample)
+                last_time, last_hoards = now, hoards
+            if done:
+                break
+
+        growth: Dict[str, int] = defaultdict(int)
+        ignored = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        final = tracemalloc.take_snapshot().filter_traces(ignored)
+        for difference in final.compare_to(baseline.filter_traces(ignored), "filename"):
+            if difference.size_diff:
+                growth[subsystem(difference.traceback[0].filename)] += difference.size_diff
+        report.subsystems = dict(sorted(growth.items(), key=lambda item: -item[1]))
+        return report
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
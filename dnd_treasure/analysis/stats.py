@@ -0,0 +1,167 @@
+"""Goodness-of-fit statistics without third-party dependencies."""
+
+import math
+from fractions import Fraction
+from typing import Dict, Hashable, List, Mapping, Tuple, Union
+
+
+Probability = Union[float, Fraction]
+
+
+def chi2_sf(statistic: float, dof: int) -> float:
+    """
+    Survival function of the chi-square distribution.
+
+    Computed as the regularized upper incomplete gamma function Q(dof/2, x/2),
+    by series expansion below a + 1 and continued fraction above.
+
+    Args:
+        statistic: Chi-square statistic.
+        dof: Degrees of freedom.
+
+    Returns:
+        P(X >= statistic).
+    """
+    if math.isinf(statistic):
+        return 0.0
+    if statistic <= 0 or dof <= 0:
+        return 1.0
+    a = dof / 2.0
+    x = statistic / 2.0
+    log_prefix = a * math.log(x) - x - math.lgamma(a)
+
+    if x < a + 1:
+        term = total = 1.0 / a
+        n = a
+        for _ in range(10000):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefix))
+
+    # Lentz's continued fraction for Q
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 10000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return min(1.0, math.exp(log_prefix) * h)
+
+
+def kolmogorov_sf(t: float) -> float:
+    """
+    Asymptotic Kolmogorov survival function P(sqrt(n) * D > t).
+
+    Args:
+        t: Scaled KS statistic sqrt(n) * D.
+
+    Returns:
+        Asymptotic p-value (conservative for discrete distributions).
+    """
+    if t <= 0:
+        return 1.0
+    total = 0.0
+    for j in range(1, 101):
+        term = (-1) ** (j - 1) * math.exp(-2 * j * j * t * t)
+        total += term
+        if abs(term) < 1e-16:
+            break
+    return min(1.0, max(0.0, 2 * total))
+
+
+def chi_square(
+    observed: Mapping[Hashable, int],
+    expected: Mapping[Hashable, Probability]
+) -> Tuple[float, int, float]:
+    """
+    Pearson chi-square test of observed counts against probabilities.
+
+    Outcomes observed but given zero probability make the statistic infinite,
+    so impossible results always fail.
+
+    Args:
+        observed: Count of each outcome.
+        expected: Probability of each outcome.
+
+    Returns:
+        (statistic, degrees of freedom, p-value).
+    """
+    samples = sum(observed.values())
+    statistic = 0.0
+    categories = 0
+    for outcome in set(observed) | set(expected):
+        count = observed.get(outcome, 0)
+        probability = float(expected.get(outcome, 0))
+        if probability <= 0:
+            if count:
+                return math.inf, max(categories, 1), 0.0
+            continue
+        categories += 1
+        mean = samples * probability
+        statistic += (count - mean) ** 2 / mean
+    dof = max(categories - 1, 1)
+    return statistic, dof, chi2_sf(statistic, dof)
+
+
+def ks_discrete(
+    observed: Mapping[int, int],
+    expected: Mapping[int, Probability]
+) -> Tuple[float, float]:
+    """
+    Kolmogorov-Smirnov test of integer samples against a discrete distribution.
+
+    Args:
+        observed: Count of each value.
+        expected: Probability of each value.
+
+    Returns:
+        (D statistic, asymptotic p-value).
+    """
+    samples = sum(observed.values())
+    if not samples:
+        return 0.0, 1.0
+    empirical = 0
+    theoretical = 0.0
+    distance = 0.0
+    for value in sorted(set(observed) | set(expected)):
+        empirical += observed.get(value, 0)
+        theoretical += float(expected.get(value, 0))
+        distance = max(distance, abs(empirical / samples - theoretical))
+    return distance, kolmogorov_sf(math.sqrt(samples) * distance)
+
+
+def dice_sum_distribution(num_dice: int, die_size: int) -> Dict[int, Fraction]:
+    """
+    Exact distribution of the sum of num_dice dice with die_size sides.
+
+    Args:
+        num_dice: Number of dice.
+        die_size: Sides per die.
+
+    Returns:
+        Mapping of sum to probability.
+    """
+    ways: List[int] = [1]
+    for _ in range(num_dice):
+        next_ways = [0] * (len(ways) + die_size)
+        for total, count in enumerate(ways):
+            if count:
+                for face in range(1, die_size + 1):
+                    next_ways[total + face] += count
+        ways = next_ways
+    outcomes = die_size ** num_dice
+    return {total: Fraction(count, outcomes) for total, count in enumerate(ways) if count}
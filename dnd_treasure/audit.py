@@ -0,0 +1,354 @@
+"""Append-only audit log of generated hoards, replayable on demand."""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks (Windows): one writer process per log
+    fcntl = None
+
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.models import HoardOrigin, Source, Treasure, TreasureType
+
+
+MAGIC = b"DNDAUDIT"
+VERSION = 1
+
+# magic, version, header length; the JSON header follows, then the frames
+_PREAMBLE = struct.Struct("<8sII")
+
+# timestamp (seconds), stream index, level and treasure types, check
+FRAME = struct.Struct("<IIHH")
+
+# Low 16 bits of the CRC-32 of the rest of a frame, to catch torn writes
+_CHECK = struct.Struct("<H")
+
+# Treasure type codes, 3 bits each in a frame
+TYPE_CODES = tuple(TreasureType)
+
+PathLike = Union[str, Path]
+
+
+class AuditRecord(NamedTuple):
+    """One logged hoard."""
+    index: int
+    timestamp: int
+    level: int
+    coins: TreasureType
+    goods: TreasureType
+    items: TreasureType
+
+
+def log_header(generator: TreasureGenerator) -> Dict[str, Any]:
+    """
+    Describe what a generator's hoards depend on besides their record.
+
+    Args:
+        generator: Generator whose hoards are logged.
+
+    Returns:
+        Header with the log seed, RNG backend, chart-set hash and options.
+    """
+    sources = generator.sources
+    return {
+        "version": VERSION,
+        "seed": generator.dice.seed,
+        "backend": Dice.BACKEND,
+        "chart_hash": generator.chart_loader.content_hash(),
+        "flattened": generator.flattened,
+        "sources": None if sources is None else {
+            source.name: percent for source, percent in sorted(sources.items(), key=lambda s: s[0].value)
+        },
+    }
+
+
+def _read_header(data: bytes, path: Path) -> Dict[str, Any]:
+    """Parse the header at the start of a log."""
+    if len(data) < _PREAMBLE.size:
+        raise ValueError(f"{path} is not an audit log")
+    magic, version, length = _PREAMBLE.unpack_from(data)
+    if magic != MAGIC or version != VERSION or len(data) < _PREAMBLE.size + length:
+        raise ValueError(f"{path} is not a version {VERSION} audit log")
+    header = json.loads(bytes(data[_PREAMBLE.size:_PREAMBLE.size + length]))
+    header["_frames"] = _PREAMBLE.size + length
+    return header
+
+
+def _pack(record: AuditRecord) -> bytes:
+    """Encode a record as a frame."""
+    if not 1 <= record.level <= 31:
+        raise ValueError(f"level {record.level} does not fit an audit frame")
+    fields = (record.level
+              | TYPE_CODES.index(record.coins) << 5
+              | TYPE_CODES.index(record.goods) << 8
+              | TYPE_CODES.index(record.items) << 11)
+    body = FRAME.pack(record.timestamp, record.index, fields, 0)[:-2]
+    return body + _CHECK.pack(zlib.crc32(body) & 0xFFFF)
+
+
+def _unpack(frame: bytes, position: int) -> AuditRecord:
+    """Decode a frame."""
+    timestamp, index, fields, check = FRAME.unpack(frame)
+    if zlib.crc32(frame[:-2]) & 0xFFFF != check:
+        raise ValueError(f"Audit record {position} is corrupt")
+    return AuditRecord(
+        index=index,
+        timestamp=timestamp,
+        level=fields & 0x1F,
+        coins=TYPE_CODES[fields >> 5 & 7],
+        goods=TYPE_CODES[fields >> 8 & 7],
+        items=TYPE_CODES[fields >> 11 & 7],
+    )
+
+
+def record_origin(header: Dict[str, Any], record: AuditRecord) -> HoardOrigin:
+    """Origin of the hoard a record was generated from."""
+    return HoardOrigin(
+        seed=Dice.derive_seed(header["seed"], "audit", record.index),
+        coins=record.coins,
+        goods=record.goods,
+        items=record.items,
+    )
+
+
+class AuditWriter:
+    """
+    Generates hoards and appends a fixed-size frame for each to a log.
+
+    A frame holds only the timestamp, the hoard's stream index, the level
+    and the treasure types. The seed the streams derive from, the RNG
+    backend, the chart-set hash and the generator options are the same for
+    every record of a log, so they are written once in its header, and
+    appending to a log made under other settings is refused.
+
+    Several writers, in threads or processes, may append to one log: each
+    record's index is the frame's position, reserved under an exclusive
+    lock on the file (fcntl.flock) together with the append. Without
+    fcntl only one process may write a log at a time.
+    """
+
+    def __init__(self, path: PathLike, generator: TreasureGenerator, sync: bool = False):
+        """
+        Open a log for appending, creating it if needed.
+
+        A frame left half-written by a crash is dropped.
+
+        Args:
+            path: Log file.
+            generator: Generator providing the charts and options. A new log
+                takes its seed; an existing log keeps its own.
+            sync: fsync after every record.
+
+        Raises:
+            ValueError: If the log was written with other settings.
+        """
+        self.path = Path(path)
+        self.generator = generator
+        self.sync = sync
+        self._lock = threading.Lock()
+
+        header = log_header(generator)
+        self._file = open(self.path, "a+b")
+        try:
+            with self._locked():
+                self._file.seek(0)
+                existing = self._file.read()
+                if existing:
+                    stored = _read_header(existing, self.path)
+                    mismatched = [
+                        key for key in header if key not in ("seed", "version") and stored.get(key) != header[key]
+                    ]
+                    if mismatched:
+                        raise ValueError(
+                            f"{self.path} was written with a different {', '.join(mismatched)}; start a new log"
+                        )
+                    header["seed"] = stored["seed"]
+                    self._start = stored["_frames"]
+                else:
+                    encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+                    self._file.write(_PREAMBLE.pack(MAGIC, VERSION, len(encoded)) + encoded)
+                    self._file.flush()
+                    self._start = _PREAMBLE.size + len(encoded)
+        except BaseException:
+            self._file.close()
+            raise
+        self.header = header
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold this writer's thread lock and an exclusive lock on the file."""
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None and not self._file.closed:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def _append(self, record: AuditRecord) -> AuditRecord:
+        """
+        Append a record as the log's next frame, with its index set to it.
+
+        A frame left half-written by a crashed writer is dropped first.
+        """
+        with self._locked():
+            size = os.fstat(self._file.fileno()).st_size
+            count = (size - self._start) // FRAME.size
+            complete = self._start + count * FRAME.size
+            if complete != size:
+                self._file.truncate(complete)
+            record = record._replace(index=count)
+            self._file.write(_pack(record))
+            self._file.flush()
+            if self.sync:
+                os.fsync(self._file.fileno())
+        return record
+
+    def generate(
+        self,
+        level: int,
+        coins: TreasureType = TreasureType.STANDARD,
+        goods: TreasureType = TreasureType.STANDARD,
+        items: TreasureType = TreasureType.STANDARD,
+        timestamp: Optional[float] = None,
+    ) -> Treasure:
+        """
+        Generate a hoard on the log's next stream and record it.
+
+        Args:
+            level: Encounter level (1-20).
+            coins: Coin generation type.
+            goods: Goods generation type.
+            items: Items generation type.
+            timestamp: Time to record (default: now).
+
+        Returns:
+            Generated Treasure object.
+        """
+        record = self._append(AuditRecord(
+            index=0,
+            timestamp=int(time.time() if timestamp is None else timestamp),
+            level=level,
+            coins=coins,
+            goods=goods,
+            items=items,
+        ))
+        return self.generator.regenerate(level, record_origin(self.header, record))
+
+    def close(self) -> None:
+        """Close the log file."""
+        self._file.close()
+
+    def __enter__(self) -> "AuditWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class AuditLog:
+    """
+    Read-only view of a log, mapped into memory for random access.
+
+    Records are decoded on access, so opening a log of any size costs only
+    the header parse. refresh() picks up records appended since.
+    """
+
+    def __init__(self, path: PathLike, charts_path: Optional[Path] = None):
+        """
+        Map a log.
+
+        Args:
+            path: Log written by AuditWriter.
+            charts_path: Charts to replay from (default: the package charts).
+
+        Raises:
+            ValueError: If the file is not an audit log.
+        """
+        self.path = Path(path)
+        self.charts_path = charts_path
+        self._map: Optional[mmap.mmap] = None
+        self._generator: Optional[TreasureGenerator] = None
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Re-map the file to see records appended since it was opened."""
+        if self._map is not None:
+            self._map.close()
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.header = _read_header(self._map, self.path)
+        self._start = self.header["_frames"]
+        self._count = (len(self._map) - self._start) // FRAME.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position: int) -> AuditRecord:
+        """Decode the record at a position (negative positions count from the end)."""
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError(f"Audit record {position} out of range (log has {self._count})")
+        offset = self._start + position * FRAME.size
+        return _unpack(self._map[offset:offset + FRAME.size], position)
+
+    def __iter__(self) -> Iterator[AuditRecord]:
+        for position in range(self._count):
+            yield self[position]
+
+    def records(self, start: int = 0, stop: Optional[int] = None) -> List[AuditRecord]:
+        """Records at positions start to stop (exclusive), clamped to the log."""
+        return [self[position] for position in range(*slice(start, stop).indices(self._count))]
+
+    def replay(self, record: AuditRecord) -> Treasure:
+        """
+        Regenerate the hoard a record was logged for.
+
+        Args:
+            record: Record of this log.
+
+        Returns:
+            The hoard exactly as it was handed out.
+
+        Raises:
+            ValueError: If the RNG backend or charts differ from the log's.
+        """
+        if self._generator is None:
+            if self.header["backend"] != Dice.BACKEND:
+                raise ValueError(f"Log was written with the {self.header['backend']} RNG backend, not {Dice.BACKEND}")
+            sources = self.header["sources"]
+            generator = TreasureGenerator(
+                seed=self.header["seed"],
+                charts_path=self.charts_path,
+                flattened=self.header["flattened"],
+                sources=None if sources is None else {Source[name]: percent for name, percent in sources.items()},
+                compact=True,
+            )
+            if self.header["chart_hash"] != generator.chart_loader.content_hash():
+                raise ValueError("Log was written with a different chart set")
+            self._generator = generator
+        return self._generator.regenerate(record.level, record_origin(self.header, record))
+
+    def close(self) -> None:
+        """Unmap the log."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self) -> "AuditLog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
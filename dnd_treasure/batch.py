@@ -0,0 +1,174 @@
+"""Streaming generation for lists of encounters."""
+
+import csv
+import json
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.models import Treasure, TreasureType
+from dnd_treasure.formatters.json import JsonFormatter
+
+
+INPUT_FORMATS = ("csv", "jsonl")
+
+# Treasure types accepted in the coins, goods and items fields
+TREASURE_TYPES = {
+    treasure_type.name.lower(): treasure_type
+    for treasure_type in (TreasureType.NONE, TreasureType.STANDARD, TreasureType.DOUBLE, TreasureType.TRIPLE)
+}
+
+# Requests generated per chunk; memory is bounded by one chunk of hoards
+CHUNK_SIZE = 1000
+
+
+class EncounterRequest(NamedTuple):
+    """One encounter of a batch input."""
+    index: int
+    level: int
+    coins: TreasureType = TreasureType.STANDARD
+    goods: TreasureType = TreasureType.STANDARD
+    items: TreasureType = TreasureType.STANDARD
+    id: Optional[str] = None
+
+    @property
+    def group(self) -> Tuple[int, TreasureType, TreasureType, TreasureType]:
+        """Requests with the same group are generated together."""
+        return self.level, self.coins, self.goods, self.items
+
+
+def input_format(path: str) -> str:
+    """Guess the input format from a file name ('csv' or 'jsonl')."""
+    suffix = path.rsplit(".", 1)[-1].lower()
+    if suffix in ("jsonl", "ndjson"):
+        return "jsonl"
+    if suffix == "csv":
+        return "csv"
+    raise ValueError(f"Cannot tell the format of '{path}', expected .csv or .jsonl")
+
+
+def read_requests(stream: TextIO, fmt: str) -> Iterator[EncounterRequest]:
+    """
+    Read encounter requests one at a time.
+
+    CSV input needs a header row; JSON Lines input holds one object per
+    line. Both use the fields level (required), coins, goods and items
+    (none/standard/double/triple, default standard) and an optional id that
+    is copied to the output.
+
+    Args:
+        stream: Open text input.
+        fmt: 'csv' or 'jsonl'.
+
+    Yields:
+        Requests in input order.
+
+    Raises:
+        ValueError: On a malformed row, naming its line.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        rows: Iterable[Tuple[int, Any]] = ((reader.line_num, row) for row in reader)
+    elif fmt == "jsonl":
+        rows = ((number, line) for number, line in enumerate(stream, 1) if line.strip())
+    else:
+        raise ValueError(f"Unknown input format '{fmt}', expected one of {INPUT_FORMATS}")
+
+    for index, (line, row) in enumerate(rows):
+        try:
+            if fmt == "jsonl":
+                row = json.loads(row)
+            request = _parse_request(index, row)
+        except ValueError as e:
+            raise ValueError(f"line {line}: {e}") from None
+        yield request
+
+
+def generate_stream(
+    requests: Iterable[EncounterRequest],
+    generator: TreasureGenerator,
+    chunk_size: int = CHUNK_SIZE,
+    threads: int = 1
+) -> Iterator[Tuple[EncounterRequest, Treasure]]:
+    """
+    Generate hoards for a stream of requests.
+
+    Requests are read a chunk at a time and grouped by (level, types), so
+    each group is one generate_many() call; results are yielded in input
+    order. Every hoard rolls the stream keyed by its input position, so the
+    output does not depend on chunk_size, grouping or threads.
+
+    Args:
+        requests: Encounter requests in input order.
+        generator: Generator to spawn the hoard streams from.
+        chunk_size: Requests held in memory at once.
+        threads: Worker threads per group.
+
+    Yields:
+        (request, hoard) pairs in input order.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    requests = iter(requests)
+    while True:
+        chunk = list(islice(requests, chunk_size))
+        if not chunk:
+            return
+        groups: Dict[Tuple, List[EncounterRequest]] = {}
+        for request in chunk:
+            groups.setdefault(request.group, []).append(request)
+
+        hoards: Dict[int, Treasure] = {}
+        for (level, coins, goods, items), members in groups.items():
+            keys = [("row", request.index, 0) for request in members]
+            generated = generator.generate_many(
+                level, len(members), coins, goods, items, threads=threads, keys=keys
+            )
+            hoards.update((request.index, hoard) for request, hoard in zip(members, generated))
+        for request in chunk:
+            yield request, hoards[request.index]
+
+
+def to_record(request: EncounterRequest, treasure: Treasure) -> Dict[str, Any]:
+    """JSON output record of a generated request."""
+    record: Dict[str, Any] = {"index": request.index}
+    if request.id is not None:
+        record["id"] = request.id
+    record.update(JsonFormatter.to_dict(treasure))
+    return record
+
+
+def _parse_level(value: Any) -> int:
+    """Read a level given as an int, an integral float or an integral string."""
+    if isinstance(value, str) and value.strip().lstrip("+-").isdigit():
+        return int(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise ValueError(f"level {value!r} is not a whole number")
+
+
+def _parse_request(index: int, row: Dict[str, Any]) -> EncounterRequest:
+    """Validate one input row."""
+    if not isinstance(row, dict):
+        raise ValueError("expected an object with a level")
+    if row.get("level") in (None, ""):
+        raise ValueError("missing level")
+    level = _parse_level(row["level"])
+    if not 1 <= level <= 20:
+        raise ValueError(f"level {level} is not between 1 and 20")
+    types = {}
+    for section in ("coins", "goods", "items"):
+        value = row.get(section) or "standard"
+        treasure_type = TREASURE_TYPES.get(str(value).strip().lower())
+        if treasure_type is None:
+            raise ValueError(f"unknown {section} type '{value}'")
+        types[section] = treasure_type
+    encounter_id = row.get("id")
+    return EncounterRequest(
+        index=index,
+        level=level,
+        id=None if encounter_id in (None, "") else str(encounter_id),
+        **types,
+    )
@@ -1,9 +1,23 @@
 """Command-line interface for D&D treasure generator."""
 
+import json
+import re
+from datetime import datetime, timezone
+
 import click
+from dnd_treasure import batch as batch_mode
+from dnd_treasure import jobs
+from dnd_treasure.analysis import soak as soak_mode
+from dnd_treasure.analysis.occurrence import NameMatch, OccurrenceEngine
+from dnd_treasure.audit import AuditLog, AuditWriter
 from dnd_treasure.core.generator import TreasureGenerator
-from dnd_treasure.core.models import TreasureType
+from dnd_treasure.core.models import Source, TreasureType
+from dnd_treasure.data.loader import ChartLoader
+from dnd_treasure.data.pack import write_pack
+from dnd_treasure.data.search import default_index_path
+from dnd_treasure.formatters.json import JsonFormatter
 from dnd_treasure.formatters.text import TextFormatter
+from dnd_treasure.planner import CampaignPlan
 
 
 TREASURE_TYPE_MAP = {
@@ -13,30 +27,89 @@ TREASURE_TYPE_MAP = {
     'triple': TreasureType.TRIPLE,
 }
 
+SOURCE_MAP = {
+    'dmg': Source.DMG,
+    'eph': Source.EPH,
+    'mic': Source.MIC,
+}
+
+FORMATTERS = {
+    'text': TextFormatter,
+    'json': JsonFormatter,
+}
+
+TREASURE_TYPE_CHOICE = click.Choice(['none', 'standard', 'double', 'triple'], case_sensitive=False)
+
+
+def parse_sources(values):
+    """
+    Parse --source values of the form NAME or NAME=PERCENT.
+
+    A single source without a percentage gets 100%.
+    """
+    if not values:
+        return None
+    sources = {}
+    for value in values:
+        name, _, percent = value.partition('=')
+        source = SOURCE_MAP.get(name.strip().lower())
+        if source is None:
+            raise click.BadParameter(f"unknown source '{name}'", param_hint='--source')
+        try:
+            sources[source] = int(percent) if percent else 100
+        except ValueError:
+            raise click.BadParameter(f"invalid percentage in '{value}'", param_hint='--source')
+        if not 0 <= sources[source] <= 100:
+            raise click.BadParameter(f"percentage in '{value}' must be from 0 to 100", param_hint='--source')
+    if sum(sources.values()) != 100:
+        raise click.BadParameter("source percentages must add up to 100", param_hint='--source')
+    return sources
+
+
+def parse_levels(values):
+    """
+    Parse --level values of the form LEVEL or LEVEL=WEIGHT into a level mix.
+
+    A level without a weight gets weight 1.
+    """
+    levels = {}
+    for value in values:
+        level, _, weight = value.partition('=')
+        try:
+            level = int(level)
+            weight = int(weight) if weight else 1
+        except ValueError:
+            raise click.BadParameter(f"invalid level '{value}'", param_hint='--level')
+        if not 1 <= level <= 20 or weight < 1:
+            raise click.BadParameter(
+                f"'{value}' needs a level from 1 to 20 and a positive weight", param_hint='--level'
+            )
+        levels[level] = levels.get(level, 0) + weight
+    return levels
+
 
-@click.command()
+@click.group(invoke_without_command=True)
 @click.option(
     '--level',
     '-l',
     type=click.IntRange(1, 20),
-    required=True,
-    help='Encounter level (1-20)'
+    help='Encounter level (1-20) [required]'
 )
 @click.option(
     '--coins',
-    type=click.Choice(['none', 'standard', 'double', 'triple'], case_sensitive=False),
+    type=TREASURE_TYPE_CHOICE,
     default='standard',
     help='Coin generation type (default: standard)'
 )
 @click.option(
     '--goods',
-    type=click.Choice(['none', 'standard', 'double', 'triple'], case_sensitive=False),
+    type=TREASURE_TYPE_CHOICE,
     default='standard',
     help='Goods generation type (default: standard)'
 )
 @click.option(
     '--items',
-    type=click.Choice(['none', 'standard', 'double', 'triple'], case_sensitive=False),
+    type=TREASURE_TYPE_CHOICE,
     default='standard',
     help='Items generation type (default: standard)'
 )
@@ -45,13 +118,34 @@ TREASURE_TYPE_MAP = {
     type=int,
     help='Random seed for reproducible results'
 )
+@click.option(
+    '--source',
+    'sources',
+    multiple=True,
+    help='Source book, optionally with a share: dmg, eph, mic or e.g. '
+         '--source dmg=70 --source eph=30 (default: dmg)'
+)
+@click.option(
+    '--format',
+    'output_format',
+    type=click.Choice(sorted(FORMATTERS), case_sensitive=False),
+    default='text',
+    help='Output format (default: text)'
+)
 @click.option(
     '--output',
     '-o',
     type=click.Path(),
     help='Output file (default: stdout)'
 )
-def main(level, coins, goods, items, seed, output):
+@click.option(
+    '--audit-log',
+    type=click.Path(dir_okay=False),
+    help='Append a record of the hoard to this audit log (see replay); a new log takes --seed'
+)
+@click.option('--provenance', is_flag=True, help='Show the chart rolls behind each item')
+@click.pass_context
+def main(ctx, level, coins, goods, items, seed, sources, output_format, output, audit_log, provenance):
     """
     Generate random treasure for D&D 3.5 encounters.
 
@@ -60,20 +154,36 @@ def main(level, coins, goods, items, seed, output):
         dnd-treasure --level 5
 
         dnd-treasure --level 10 --coins double --items triple
+
+        dnd-treasure --level 8 --source dmg=70 --source eph=30
+
+        dnd-treasure --level 5 --format json
     """
+    if ctx.invoked_subcommand is not None:
+        return
+    if level is None:
+        raise click.UsageError("Missing option '--level' / '-l'.")
+
     # Create generator
-    generator = TreasureGenerator(seed=seed)
+    generator = TreasureGenerator(seed=seed, sources=parse_sources(sources), provenance=provenance)
 
     # Generate treasure
-    treasure = generator.generate(
-        level=level,
+    types = dict(
         coins=TREASURE_TYPE_MAP[coins.lower()],
         goods=TREASURE_TYPE_MAP[goods.lower()],
         items=TREASURE_TYPE_MAP[items.lower()],
     )
+    if audit_log:
+        try:
+            with AuditWriter(audit_log, generator) as writer:
+                treasure = writer.generate(level, **types)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    else:
+        treasure = generator.generate(level=level, **types)
 
     # Format output
-    formatter = TextFormatter()
+    formatter = FORMATTERS[output_format.lower()]()
     output_text = formatter.format(treasure)
 
     # Write output
@@ -85,5 +195,433 @@ def main(level, coins, goods, items, seed, output):
         click.echo(output_text)
 
 
+@main.command()
+@click.option('--input', '-i', 'input_path', type=click.Path(allow_dash=True), required=True,
+              help='Encounter list (.csv or .jsonl, - for stdin)')
+@click.option('--input-format', type=click.Choice(batch_mode.INPUT_FORMATS),
+              help='Input format (default: from the file extension)')
+@click.option('--seed', type=int, help='Random seed for reproducible results')
+@click.option('--source', 'sources', multiple=True, help='Source book share, as for generation')
+@click.option('--chunk-size', type=click.IntRange(1), default=batch_mode.CHUNK_SIZE,
+              help=f'Encounters held in memory at once (default: {batch_mode.CHUNK_SIZE})')
+@click.option('--threads', type=click.IntRange(1), default=1, help='Worker threads (default: 1)')
+@click.option('--output', '-o', type=click.Path(), help='Output file (default: stdout)')
+def batch(input_path, input_format, seed, sources, chunk_size, threads, output):
+    """
+    Generate a hoard for every encounter in a CSV or JSON Lines file.
+
+    Each row has a level and optionally coins, goods and items types and an
+    id. Hoards are written as JSON Lines in input order.
+
+    Example usage:
+
+        dnd-treasure batch --input encounters.csv --seed 7 -o hoards.jsonl
+    """
+    if input_format is None:
+        if input_path == '-':
+            raise click.UsageError("Reading stdin needs --input-format.")
+        try:
+            input_format = batch_mode.input_format(input_path)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+
+    generator = TreasureGenerator(seed=seed, sources=parse_sources(sources), compact=True)
+    count = 0
+    with click.open_file(input_path, 'r') as stream, click.open_file(output or '-', 'w') as out:
+        requests = batch_mode.read_requests(stream, input_format)
+        try:
+            for request, treasure in batch_mode.generate_stream(requests, generator, chunk_size, threads):
+                out.write(json.dumps(batch_mode.to_record(request, treasure), separators=(",", ":")) + "\n")
+                count += 1
+        except ValueError as e:
+            raise click.ClickException(f"{input_path}: {e}")
+    if output:
+        click.echo(f"{count} hoards written to {output}")
+
+
+def parse_targets(values):
+    """Parse --target values of the form LEVEL=GP into wealth targets."""
+    targets = {}
+    for value in values:
+        level, _, gp = value.partition('=')
+        try:
+            targets[int(level)] = float(gp)
+        except ValueError:
+            raise click.BadParameter(f"invalid target '{value}', expected LEVEL=GP", param_hint='--target')
+    return targets
+
+
+@main.command()
+@click.option('--input', '-i', 'input_path', type=click.Path(allow_dash=True), required=True,
+              help='Encounter list (.csv or .jsonl, - for stdin)')
+@click.option('--input-format', type=click.Choice(batch_mode.INPUT_FORMATS),
+              help='Input format (default: from the file extension)')
+@click.option('--target', 'targets', multiple=True, required=True,
+              help='Party wealth in gp after a level, repeatable (e.g. --target 5=52000)')
+@click.option('--tolerance', type=click.FloatRange(0), default=0.25,
+              help='Regenerate hoards of levels off budget by more than this share (default: 0.25)')
+@click.option('--no-rebalance', is_flag=True, help='Only report the wealth curve')
+@click.option('--seed', type=int, help='Random seed for reproducible results')
+@click.option('--source', 'sources', multiple=True, help='Source book share, as for generation')
+@click.option('--threads', type=click.IntRange(1), default=1, help='Worker threads (default: 1)')
+@click.option('--output', '-o', type=click.Path(), help='Write the hoards as JSON Lines to this file')
+def plan(input_path, input_format, targets, tolerance, no_rebalance, seed, sources, threads, output):
+    """
+    Plan the hoards of a campaign against party wealth targets.
+
+    Generates a hoard per encounter, regenerates hoards of levels that are
+    off budget, and prints the wealth curve.
+
+    Example usage:
+
+        dnd-treasure plan --input campaign.csv --seed 7 --target 1=3600 --target 2=10800 -o hoards.jsonl
+    """
+    if input_format is None:
+        if input_path == '-':
+            raise click.UsageError("Reading stdin needs --input-format.")
+        try:
+            input_format = batch_mode.input_format(input_path)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+
+    generator = TreasureGenerator(seed=seed, sources=parse_sources(sources), compact=True)
+    with click.open_file(input_path, 'r') as stream:
+        try:
+            campaign = CampaignPlan(
+                batch_mode.read_requests(stream, input_format), parse_targets(targets), generator, threads
+            )
+        except ValueError as e:
+            raise click.ClickException(f"{input_path}: {e}")
+    changed = [] if no_rebalance else campaign.rebalance(tolerance)
+
+    for entry in campaign.curve():
+        click.echo(
+            f"level {entry.level:2}: {entry.encounters:3} encounters, {entry.wealth:12,.0f} gp "
+            f"(budget {entry.budget:12,.0f}, {entry.deviation:+.0%}), "
+            f"total {entry.cumulative:12,.0f} / {entry.target:12,.0f} gp"
+        )
+    click.echo(f"{len(changed)} hoards regenerated")
+    if output:
+        with open(output, 'w') as out:
+            for position, (request, treasure) in enumerate(zip(campaign.encounters, campaign.hoards)):
+                record = batch_mode.to_record(request, treasure)
+                record["revision"] = campaign.revisions[position]
+                out.write(json.dumps(record, separators=(",", ":")) + "\n")
+        click.echo(f"{len(campaign.hoards)} hoards written to {output}")
+
+
+@main.command()
+@click.argument('words', nargs=-1)
+@click.option('--source', type=click.Choice(sorted(SOURCE_MAP), case_sensitive=False), help='Only this source book')
+@click.option('--chart', help='Only charts whose name contains this text (e.g. rings)')
+@click.option('--flag', type=int, help='Only entries with this flag')
+@click.option('--min-value', type=int, help='Only entries worth at least this many gp')
+@click.option('--max-value', type=int, help='Only entries worth at most this many gp')
+@click.option('--limit', type=click.IntRange(1), default=50, help='Show at most this many results (default: 50)')
+@click.option(
+    '--format',
+    'output_format',
+    type=click.Choice(['text', 'json'], case_sensitive=False),
+    default='text',
+    help='Output format (default: text)'
+)
+def search(words, source, chart, flag, min_value, max_value, limit, output_format):
+    """
+    Find the chart entries whose names contain WORDS.
+
+    Example usage:
+
+        dnd-treasure search ring of protection
+
+        dnd-treasure search --source dmg --max-value 500 potion
+    """
+    loader = ChartLoader()
+    index = loader.search_index(default_index_path(loader.charts_base_path))
+    hits = index.search(
+        ' '.join(words),
+        source=source,
+        chart=chart,
+        flag=flag,
+        min_value=min_value,
+        max_value=max_value,
+    )
+    shown = hits[:limit]
+
+    if output_format.lower() == 'json':
+        click.echo(json.dumps([
+            {
+                "chart": hit.chart,
+                "source": hit.source,
+                "rolls": hit.roll_range,
+                "die": hit.roll_die,
+                "name": hit.name,
+                "value": hit.value,
+                "flag": hit.flag,
+                "path": str(hit.path),
+            }
+            for hit in shown
+        ], indent=2))
+        return
+
+    for hit in shown:
+        click.echo(f"{hit.chart} {hit.roll_die} {hit.roll_range}: {hit.name} ({hit.value} gp)  [{hit.path}]")
+    if len(hits) > len(shown):
+        click.echo(f"... {len(hits) - len(shown)} more, raise --limit to see them")
+    elif not hits:
+        click.echo("No matching entries")
+
+
+@main.command()
+@click.argument('pattern')
+@click.option('--level', '-l', 'levels', type=click.IntRange(1, 20), multiple=True, required=True,
+              help='Encounter level, repeatable')
+@click.option('--items', type=TREASURE_TYPE_CHOICE, default='standard', help='Items generation type (default: standard)')
+@click.option('--source', 'sources', multiple=True, help='Source book share, as for generation')
+def odds(pattern, levels, items, sources):
+    """
+    Show the exact odds of items whose names match PATTERN (a regular expression).
+
+    Example usage:
+
+        dnd-treasure odds '^Ring of' --level 12
+
+        dnd-treasure odds 'Scroll of fireball' --level 10 --level 15 --items triple
+    """
+    try:
+        re.compile(pattern)
+    except re.error as e:
+        raise click.BadParameter(f"invalid regular expression: {e}", param_hint='PATTERN')
+    engine = OccurrenceEngine(sources=parse_sources(sources))
+    predicate = NameMatch(pattern)
+    treasure_type = TREASURE_TYPE_MAP[items.lower()]
+    for level in levels:
+        try:
+            occurrence = engine.hoard(level, treasure_type, predicate)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+        click.echo(
+            f"level {level}: P(at least one) = {float(occurrence.probability):.6f}, "
+            f"expected = {float(occurrence.expected):.6f}"
+        )
+
+
+@main.command()
+@click.option('--duration', type=click.FloatRange(0, min_open=True), help='Seconds to run after the warm-up')
+@click.option('--count', type=click.IntRange(1), help='Hoards to generate after the warm-up')
+@click.option('--interval', type=click.FloatRange(0), default=10.0, help='Seconds between samples (default: 10)')
+@click.option('--warmup', type=click.IntRange(0), default=1000, help='Hoards before the baseline sample (default: 1000)')
+@click.option('--level', 'levels', type=click.IntRange(1, 20), multiple=True,
+              help='Levels to cycle through (default: 1-20)')
+@click.option('--seed', type=int, help='Random seed for reproducible results')
+@click.option('--source', 'sources', multiple=True, help='Source book share, as for generation')
+@click.option('--compact', is_flag=True, help='Use compact charts')
+@click.option('--flattened', is_flag=True, help='Sample chart chains with a single draw')
+@click.option('--max-growth', type=click.IntRange(0), default=soak_mode.MAX_GROWTH // 1024,
+              help=f'Allowed traced memory growth in KiB (default: {soak_mode.MAX_GROWTH // 1024})')
+@click.option('--max-drift', type=click.FloatRange(0), default=soak_mode.MAX_DRIFT,
+              help=f'Allowed relative throughput loss (default: {soak_mode.MAX_DRIFT})')
+def soak(duration, count, interval, warmup, levels, seed, sources, compact, flattened, max_growth, max_drift):
+    """
+    Generate hoards continuously and fail if memory grows or throughput drops.
+
+    RSS and traced memory are sampled every --interval seconds. The command
+    exits with status 1 when traced memory grows past --max-growth or the
+    last third of the run is more than --max-drift slower than the first.
+
+    Example usage:
+
+        dnd-treasure soak --duration 3600 --interval 60
+    """
+    if duration is None and count is None:
+        raise click.UsageError("Give --duration or --count.")
+    generator = TreasureGenerator(
+        seed=seed, sources=parse_sources(sources), compact=compact, flattened=flattened
+    )
+
+    def progress(sample):
+        rss = "n/a" if sample.rss is None else f"{sample.rss / 1048576:.1f} MiB"
+        click.echo(
+            f"{sample.elapsed:9.1f}s {sample.hoards:>10} hoards {sample.rate:9.0f}/s "
+            f"rss {rss:>10} traced {sample.traced / 1024:9.1f} KiB"
+        )
+
+    report = soak_mode.run_soak(
+        generator, duration=duration, count=count, interval=interval,
+        levels=levels or range(1, 21), warmup=warmup, progress=progress,
+    )
+
+    click.echo(f"\nTraced growth: {report.growth / 1024:.1f} KiB")
+    if report.rss_growth is not None:
+        click.echo(f"RSS growth: {report.rss_growth / 1024:.1f} KiB")
+    click.echo(f"Throughput drift: {report.drift:+.1%}")
+    grown = [(name, size) for name, size in report.subsystems.items() if size > 0]
+    if grown:
+        click.echo("Growth by subsystem:")
+        for name, size in grown[:10]:
+            click.echo(f"  {name:<24} {size / 1024:9.1f} KiB")
+
+    failures = report.failures(max_growth * 1024, max_drift)
+    if failures:
+        raise click.ClickException("; ".join(failures))
+
+
+@main.command()
+@click.argument('log', type=click.Path(exists=True, dir_okay=False))
+@click.argument('records', nargs=-1)
+@click.option(
+    '--format',
+    'output_format',
+    type=click.Choice(['text', 'json'], case_sensitive=False),
+    default='text',
+    help='Output format (default: text)'
+)
+def replay(log, records, output_format):
+    """
+    Regenerate hoards recorded in an audit log.
+
+    RECORDS are record positions (N) or ranges (START:END, END exclusive;
+    either may be left out). Without RECORDS every record is replayed.
+
+    Example usage:
+
+        dnd-treasure replay hoards.audit 41
+
+        dnd-treasure replay hoards.audit 100:200 --format json
+    """
+    try:
+        audit_log = AuditLog(log)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    with audit_log:
+        selected = []
+        for value in records or [':']:
+            start, colon, stop = value.partition(':')
+            try:
+                if colon:
+                    selected.extend(audit_log.records(int(start) if start else 0, int(stop) if stop else None))
+                else:
+                    selected.append(audit_log[int(value)])
+            except ValueError:
+                raise click.BadParameter(f"'{value}' is not a record or range", param_hint='RECORDS')
+            except IndexError as e:
+                raise click.BadParameter(str(e), param_hint='RECORDS')
+
+        formatter = FORMATTERS[output_format.lower()]()
+        for record in selected:
+            try:
+                treasure = audit_log.replay(record)
+            except ValueError as e:
+                raise click.ClickException(str(e))
+            if output_format.lower() == 'json':
+                data = {"record": record.index, "timestamp": record.timestamp}
+                data.update(JsonFormatter.to_dict(treasure))
+                click.echo(json.dumps(data, separators=(",", ":")))
+            else:
+                stamp = datetime.fromtimestamp(record.timestamp, timezone.utc).isoformat()
+                click.echo(f"Record {record.index} ({stamp})")
+                click.echo(formatter.format(treasure))
+
+
+@main.command()
+@click.argument('path', type=click.Path(dir_okay=False))
+def pack(path):
+    """
+    Compile every chart into a chart pack at PATH.
+
+    Worker processes given the pack (TreasureGenerator(pack=PATH)) map it
+    read-only and share one copy of the charts.
+    """
+    header = write_pack(ChartLoader(compact=True), path)
+    click.echo(f"Packed {len(header['charts'])} charts into {path}")
+
+
+@main.group()
+def job():
+    """Resumable, sharded batch jobs (plan, run, merge)."""
+
+
+@job.command('plan')
+@click.argument('directory', type=click.Path(file_okay=False))
+@click.option('--seed', type=int, required=True, help='Job seed')
+@click.option('--count', type=click.IntRange(1), required=True, help='Total number of hoards')
+@click.option(
+    '--level',
+    '-l',
+    'levels',
+    multiple=True,
+    required=True,
+    help='Level, repeatable with weights for a mix, e.g. --level 5=3 --level 10=1'
+)
+@click.option('--shard-size', type=click.IntRange(1), default=10_000, help='Hoards per shard (default: 10000)')
+@click.option('--coins', type=TREASURE_TYPE_CHOICE, default='standard', help='Coin generation type')
+@click.option('--goods', type=TREASURE_TYPE_CHOICE, default='standard', help='Goods generation type')
+@click.option('--items', type=TREASURE_TYPE_CHOICE, default='standard', help='Items generation type')
+@click.option('--flattened', is_flag=True, help='Sample chart chains with a single draw')
+@click.option('--source', 'sources', multiple=True, help='Source book share, as for generation')
+def job_plan(directory, seed, count, levels, shard_size, coins, goods, items, flattened, sources):
+    """Write the manifest of a new job to DIRECTORY."""
+    try:
+        manifest = jobs.plan_job(
+            directory,
+            seed=seed,
+            count=count,
+            levels=parse_levels(levels),
+            shard_size=shard_size,
+            coins=TREASURE_TYPE_MAP[coins.lower()],
+            goods=TREASURE_TYPE_MAP[goods.lower()],
+            items=TREASURE_TYPE_MAP[items.lower()],
+            flattened=flattened,
+            sources=parse_sources(sources),
+        )
+    except FileExistsError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Planned {count} hoards in {len(manifest['shards'])} shards in {directory}")
+
+
+@job.command('run')
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--workers', '-w', type=click.IntRange(1), default=1, help='Local worker processes')
+@click.option('--shard', 'shard_ids', type=int, multiple=True, help='Only run these shards')
+@click.option(
+    '--stale-after',
+    type=float,
+    default=3600.0,
+    help='Take over claims older than this many seconds (default: 3600)'
+)
+def job_run(directory, workers, shard_ids, stale_after):
+    """Process the pending shards of the job in DIRECTORY."""
+    try:
+        completed = jobs.run_job(directory, workers, list(shard_ids) or None, stale_after)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    remaining = len(jobs.pending_shards(directory))
+    click.echo(f"Completed {len(completed)} shards, {remaining} remaining")
+
+
+@job.command('merge')
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--aggregate', is_flag=True, help='Write summary totals instead of every hoard')
+@click.option('--output', '-o', type=click.Path(), help='Output file (default: stdout)')
+def job_merge(directory, aggregate, output):
+    """Combine the shards of a finished job into JSON Lines or totals."""
+    missing = jobs.pending_shards(directory)
+    if missing:
+        raise click.ClickException(f"{len(missing)} shard(s) not finished, run the job first")
+
+    try:
+        records = jobs.merge_job(directory)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    stream = click.open_file(output or '-', 'w')
+    with stream:
+        if aggregate:
+            stream.write(json.dumps(jobs.aggregate(records), indent=2) + "\n")
+        else:
+            for record in records:
+                stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+    if output:
+        click.echo(f"Merged job written to {output}")
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,471 @@
+"""Magic armor and weapons with DMG special abilities."""
+
+import threading
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.models import Item
+from dnd_treasure.core.provenance import NO_ENTRY, Provenance
+from dnd_treasure.data.compact import EntryView
+from dnd_treasure.data.loader import ChartLoader
+from dnd_treasure.data.models import ChartEntry
+
+
+ARMOR = "armor"
+WEAPON = "weapon"
+MELEE = "melee_weapon"
+RANGED = "ranged_weapon"
+
+# Magic item chart entries standing for a magic armor or weapon: (kind, power)
+ARMS_ENTRIES: Dict[str, Tuple[str, str]] = {
+    f"{power.capitalize()} magic {kind}": (kind, power)
+    for kind in (ARMOR, WEAPON)
+    for power in ("minor", "medium", "major")
+}
+
+# Special ability charts of each kind: dmg/armor_abilities_minor ... dmg/ranged_weapon_abilities_major
+ABILITY_CHARTS = "dmg/{}_abilities_{}"
+
+# Ability chart row standing for "roll again twice"
+ROLL_AGAIN = "ROLLTWICE"
+
+# Highest total bonus (enhancement plus ability bonus equivalents) of an item
+MAX_BONUS = 10
+
+# Weapons are melee on d100 1-80 and ranged on 81-100
+MELEE_SHARE = 80
+WEAPON_TABLE = "magic weapon"
+
+# Melee weapons are common on d80 1-70 and uncommon on 71-80
+COMMON_SHARE = 70
+MELEE_DIE = 80
+MELEE_TABLE = "melee weapon"
+
+# Base item charts of each kind; melee weapons use the first chart on a common roll
+BASE_CHARTS: Dict[str, Tuple[str, ...]] = {
+    ARMOR: ("dmg/armor",),
+    MELEE: ("dmg/common_melee_weapons", "dmg/uncommon_melee_weapons"),
+    RANGED: ("dmg/ranged_weapons",),
+}
+
+BANE_CHART = "dmg/bane_creature_type"
+
+# Charts MagicArms reads
+ARMS_CHART_NAMES = frozenset(
+    [ABILITY_CHARTS.format(kind, power) for kind in (ARMOR, MELEE, RANGED) for power in ("minor", "medium", "major")]
+    + [chart for charts in BASE_CHARTS.values() for chart in charts]
+    + [BANE_CHART]
+)
+
+# Gold pieces per squared point of total bonus
+BONUS_PRICE: Dict[str, int] = {ARMOR: 1000, MELEE: 2000, RANGED: 2000}
+
+# Enhancement bonus by power: [(max d100 roll, bonus)]; a bonus of None is
+# "special ability and roll again". The legacy generator's armor column
+# leaves out the shield and specific armor rows of DMG Table 7-2.
+BONUS_TABLE: Dict[str, Dict[str, List[Tuple[int, Optional[int]]]]] = {
+    ARMOR: {
+        "minor": [(65, 1), (80, 2), (100, None)],
+        "medium": [(10, 1), (30, 2), (50, 3), (60, 4), (100, None)],
+        "major": [(16, 3), (38, 4), (57, 5), (100, None)],
+    },
+    WEAPON: {
+        "minor": [(70, 1), (85, 2), (100, None)],
+        "medium": [(10, 1), (29, 2), (58, 3), (62, 4), (100, None)],
+        "major": [(20, 3), (38, 4), (49, 5), (100, None)],
+    },
+}
+
+# Damage types, as in the weapon charts' flags
+SLASHING = 1
+BLUDGEONING = 2
+PIERCING = 4
+
+
+class Ability(NamedTuple):
+    """
+    A special ability.
+
+    Abilities of one group do not stack: one of a higher tier replaces one
+    of a lower tier (Flaming Burst replaces Flaming), and abilities of the
+    same tier exclude each other (Holy and Unholy).
+    """
+    name: str
+    bonus: int
+    price: int
+    group: str
+    tier: int = 1
+    damage: int = 0  # damage types of which the weapon needs one (0: any)
+
+
+def _tiers(group: str, abilities: Sequence[Tuple[str, str, int, int]]) -> Dict[str, Ability]:
+    """Build the abilities of a group from (key, name, bonus, price) in tier order."""
+    return {
+        key: Ability(name, bonus, price, group, tier)
+        for tier, (key, name, bonus, price) in enumerate(abilities, 1)
+    }
+
+
+def _energy_resistances() -> Dict[str, Ability]:
+    """The resistance abilities of every energy type."""
+    abilities = {}
+    for energy in ("Acid", "Cold", "Electricity", "Fire", "Sonic"):
+        abilities.update(_tiers(energy.lower(), [
+            (f"{energy}Resistance", f"{energy} Resistance", 0, 18000),
+            (f"Improved{energy}Resistance", f"Improved {energy} Resistance", 0, 42000),
+            (f"Greater{energy}Resistance", f"Greater {energy} Resistance", 0, 66000),
+        ]))
+    return abilities
+
+
+def _stealth(key: str, name: str) -> Dict[str, Ability]:
+    """The three tiers of Slick, Shadow and Silent Moves."""
+    return _tiers(key.lower(), [
+        (key, name, 0, 3750),
+        (f"Improved{key}", f"Improved {name}", 0, 15000),
+        (f"Greater{key}", f"Greater {name}", 0, 33750),
+    ])
+
+
+# DMG Table 7-6 armor special ability prices, by chart row name
+ARMOR_ABILITIES: Dict[str, Ability] = {
+    "Glamered": Ability("Glamered", 0, 2700, "glamered"),
+    "GhostTouch": Ability("Ghost Touch", 3, 0, "ghost_touch"),
+    "Invulnerability": Ability("Invulnerability", 3, 0, "invulnerability"),
+    "Wild": Ability("Wild", 3, 0, "wild"),
+    "Etherealness": Ability("Etherealness", 0, 49000, "etherealness"),
+    "UndeadControlling": Ability("Undead Controlling", 0, 49000, "undead_controlling"),
+    **_tiers("fortification", [
+        ("FortificationLight", "Light Fortification", 1, 0),
+        ("FortificationModerate", "Moderate Fortification", 3, 0),
+        ("FortificationHeavy", "Heavy Fortification", 5, 0),
+    ]),
+    **_tiers("spell_resistance", [
+        (f"SpellResistance{sr}", f"Spell Resistance ({sr})", bonus, 0)
+        for sr, bonus in ((13, 2), (15, 3), (17, 4), (19, 5))
+    ]),
+    **_stealth("Slick", "Slick"),
+    **_stealth("Shadow", "Shadow"),
+    **_stealth("SilentMoves", "Silent Moves"),
+    **_energy_resistances(),
+}
+
+# DMG Table 7-16 weapon special ability prices, by chart row name
+WEAPON_ABILITIES: Dict[str, Ability] = {
+    "Bane": Ability("Bane", 1, 0, "bane"),
+    "Defending": Ability("Defending", 1, 0, "defending"),
+    "Distance": Ability("Distance", 1, 0, "distance"),
+    "GhostTouch": Ability("Ghost Touch", 1, 0, "ghost_touch"),
+    "Keen": Ability("Keen", 1, 0, "keen", damage=SLASHING | PIERCING),
+    "KiFocus": Ability("Ki Focus", 1, 0, "ki_focus"),
+    "Merciful": Ability("Merciful", 1, 0, "merciful"),
+    "MightyCleaving": Ability("Mighty Cleaving", 1, 0, "mighty_cleaving"),
+    "Returning": Ability("Returning", 1, 0, "returning"),
+    "Seeking": Ability("Seeking", 1, 0, "seeking"),
+    "SpellStoring": Ability("Spell Storing", 1, 0, "spell_storing"),
+    "Throwing": Ability("Throwing", 1, 0, "throwing"),
+    "Thundering": Ability("Thundering", 1, 0, "thundering"),
+    "Vicious": Ability("Vicious", 1, 0, "vicious"),
+    "Anarchic": Ability("Anarchic", 2, 0, "law"),
+    "Axiomatic": Ability("Axiomatic", 2, 0, "law"),
+    "Holy": Ability("Holy", 2, 0, "good"),
+    "Unholy": Ability("Unholy", 2, 0, "good"),
+    "Disruption": Ability("Disruption", 2, 0, "disruption", damage=BLUDGEONING),
+    "Wounding": Ability("Wounding", 2, 0, "wounding"),
+    "Speed": Ability("Speed", 3, 0, "speed"),
+    "BrilliantEnergy": Ability("Brilliant Energy", 4, 0, "brilliant_energy"),
+    "Dancing": Ability("Dancing", 4, 0, "dancing"),
+    "Vorpal": Ability("Vorpal", 5, 0, "vorpal", damage=SLASHING),
+    **_tiers("fire", [("Flaming", "Flaming", 1, 0), ("FlamingBurst", "Flaming Burst", 2, 0)]),
+    **_tiers("cold", [("Frost", "Frost", 1, 0), ("IcyBurst", "Icy Burst", 2, 0)]),
+    **_tiers("electricity", [("Shock", "Shock", 1, 0), ("ShockingBurst", "Shocking Burst", 2, 0)]),
+}
+
+
+class AbilityTable:
+    """The rows of one special ability chart, with their d100 weights."""
+
+    def __init__(self, rows: List[Tuple[Ability, int]], roll_again: int):
+        """
+        Initialize ability table.
+
+        Args:
+            rows: (ability, weight) per ability row, in chart order.
+            roll_again: Weight of the "roll again twice" row (0 if none).
+        """
+        self.abilities = [ability for ability, _ in rows]
+        self.weights = [weight for _, weight in rows] + [roll_again]
+        self.roll_again = len(rows) if roll_again else None
+
+
+class Enchantment:
+    """The special abilities an item has gathered so far."""
+
+    def __init__(self, damage: int = 0):
+        """
+        Initialize an item without abilities.
+
+        Args:
+            damage: Damage types of the weapon (0 for armor).
+        """
+        self.damage = damage
+        self.bonus = 0
+        self.price = 0
+        self.chosen: Dict[str, Tuple[int, Ability]] = {}
+
+    def fits(self, ability: Ability, min_bonus: int) -> bool:
+        """
+        Check whether an ability can still be added.
+
+        Args:
+            ability: Ability to add.
+            min_bonus: Lowest enhancement bonus the item can end up with.
+
+        Returns:
+            False for a duplicate or lower tier, an excluded ability, a
+            damage type the weapon lacks, or a total bonus past MAX_BONUS.
+        """
+        current = self.chosen.get(ability.group)
+        replaced = 0
+        if current is not None:
+            if current[1].tier >= ability.tier:
+                return False
+            replaced = current[1].bonus
+        if ability.damage and not ability.damage & self.damage:
+            return False
+        return self.bonus - replaced + ability.bonus + min_bonus <= MAX_BONUS
+
+    def add(self, row: int, ability: Ability) -> None:
+        """Add an ability that fits, replacing a lower tier of its group."""
+        current = self.chosen.get(ability.group)
+        if current is not None:
+            self.bonus -= current[1].bonus
+            self.price -= current[1].price
+        self.chosen[ability.group] = (row, ability)
+        self.bonus += ability.bonus
+        self.price += ability.price
+
+    def names(self) -> List[str]:
+        """Ability names in chart order."""
+        return [ability.name for _, ability in sorted(self.chosen.values())]
+
+
+class MagicArms:
+    """
+    Draws magic armor and weapons.
+
+    The DMG resolves a special ability that cannot be added (a duplicate,
+    Holy on an Unholy weapon, Keen on a mace, a total bonus past +10) by
+    rolling again, which has no bound on the number of rolls. Rolling again
+    until a compatible row comes up picks each compatible row with its
+    weight over the total weight of the compatible rows, so this draws once
+    from that conditional table instead; the same goes for the enhancement
+    bonus and its "special ability and roll again" row, which is left out
+    once no ability fits. "Roll again twice" is left out once the pending
+    rolls are enough to add every ability that still fits, after which more
+    rolls cannot change the item. Every accepted draw therefore removes a
+    row for good, so an item costs at most a few draws per chart row.
+
+    Conditional tables are cached by the set of compatible rows. Tables are
+    immutable once built and shared by every generator spawned from the one
+    that made them.
+    """
+
+    def __init__(self, chart_loader: ChartLoader):
+        """
+        Initialize magic arms.
+
+        Args:
+            chart_loader: Chart loader holding the ability and base item charts.
+        """
+        self.loader = chart_loader
+        self._tables: Dict[Tuple[str, str], AbilityTable] = {}
+        self._conditional: Dict[Tuple, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def roll(self, kind: str, power: str, dice: Dice, trace: Optional[Provenance] = None) -> Item:
+        """
+        Draw a magic armor or weapon.
+
+        Args:
+            kind: ARMOR or WEAPON.
+            power: 'minor', 'medium' or 'major'.
+            dice: Dice roller.
+            trace: Records the base item, bonus, ability and bane rolls.
+
+        Returns:
+            Item named like '+2 Flaming, Keen Longsword', priced from its
+            total bonus, base item and abilities.
+        """
+        base_kind = kind
+        if kind == WEAPON:
+            roll = dice.d100()
+            base_kind = MELEE if roll <= MELEE_SHARE else RANGED
+            if trace is not None:
+                trace.record(trace.charts.table(WEAPON_TABLE, ("melee", "ranged")), roll, int(base_kind == RANGED))
+        charts = BASE_CHARTS[base_kind]
+        chart = charts[0]
+        if len(charts) > 1:
+            roll = dice.roll(MELEE_DIE)
+            chart = charts[0] if roll <= COMMON_SHARE else charts[1]
+            if trace is not None:
+                trace.record(trace.charts.table(MELEE_TABLE, ("common", "uncommon")), roll, int(chart == charts[1]))
+        base = self._roll_chart(chart, dice, trace)
+        if base is None:
+            raise ValueError(f"{chart} has no entry for the roll")
+
+        enchantment = Enchantment(base.flag if base_kind != ARMOR else 0)
+        bonus = self.enchant(base_kind, power, enchantment, dice, trace)
+
+        names = enchantment.names()
+        if "bane" in enchantment.chosen:
+            creature = self._roll_chart(BANE_CHART, dice, trace)
+            names[names.index("Bane")] = f"Bane ({creature.name})"
+        total = bonus + enchantment.bonus
+        abilities = f"{', '.join(names)} " if names else ""
+        return Item(
+            name=f"+{bonus} {abilities}{base.name}",
+            value=total * total * BONUS_PRICE[base_kind] + base.value + enchantment.price,
+            item_type=power,
+        )
+
+    def _roll_chart(
+        self, chart_name: str, dice: Dice, trace: Optional[Provenance]
+    ) -> Optional[Union[ChartEntry, EntryView]]:
+        """Roll d100 on a chart, recording the roll in a trace if given."""
+        chart = self.loader.load_chart_by_name(chart_name)
+        roll = dice.d100()
+        if trace is None:
+            return chart.find_entry(roll)
+        index = chart.find_index(roll)
+        trace.record(trace.charts.chart(chart_name), roll, NO_ENTRY if index is None else index)
+        return None if index is None else chart.view(index)
+
+    def enchant(
+        self,
+        kind: str,
+        power: str,
+        enchantment: Enchantment,
+        dice: Dice,
+        trace: Optional[Provenance] = None
+    ) -> int:
+        """
+        Roll an item's enhancement bonus, adding special abilities on the way.
+
+        Args:
+            kind: ARMOR, MELEE or RANGED.
+            power: 'minor', 'medium' or 'major'.
+            enchantment: Abilities of the item, updated in place.
+            dice: Dice roller.
+            trace: Records the bonus and ability draws.
+
+        Returns:
+            Enhancement bonus.
+        """
+        table = self.table(kind, power)
+        bonuses = BONUS_TABLE[ARMOR if kind == ARMOR else WEAPON][power]
+        weights = []
+        previous = 0
+        for max_roll, _ in bonuses:
+            weights.append(max_roll - previous)
+            previous = max_roll
+        min_bonus = min(bonus for _, bonus in bonuses if bonus is not None)
+        bonus_table = ability_table = None
+        if trace is not None:
+            bonus_table = trace.charts.table(
+                f"{power} {ARMOR if kind == ARMOR else WEAPON} bonus",
+                [f"+{bonus}" if bonus is not None else "special ability" for _, bonus in bonuses],
+            )
+            ability_table = trace.charts.table(
+                f"{power} {kind.replace('_', ' ')} ability",
+                [ability.name for ability in table.abilities] + ["roll again twice"],
+            )
+
+        while True:
+            compatible = self._compatible(table, enchantment, min_bonus)
+            allowed = tuple(
+                i for i, (_, bonus) in enumerate(bonuses)
+                if (compatible if bonus is None else enchantment.bonus + bonus <= MAX_BONUS)
+            )
+            bonus = bonuses[self._draw(("bonus", kind, power), weights, allowed, dice, trace, bonus_table)][1]
+            if bonus is not None:
+                return bonus
+
+            pending = 1
+            while pending and compatible:
+                allowed = compatible
+                if table.roll_again is not None and pending < len(compatible):
+                    allowed += (table.roll_again,)
+                row = self._draw(("ability", kind, power), table.weights, allowed, dice, trace, ability_table)
+                if row == table.roll_again:
+                    pending += 1
+                    continue
+                enchantment.add(row, table.abilities[row])
+                pending -= 1
+                compatible = self._compatible(table, enchantment, min_bonus)
+
+    @staticmethod
+    def _compatible(table: AbilityTable, enchantment: Enchantment, min_bonus: int) -> Tuple[int, ...]:
+        """Rows of the abilities that can still be added."""
+        return tuple(i for i, ability in enumerate(table.abilities) if enchantment.fits(ability, min_bonus))
+
+    def _draw(
+        self,
+        key: Tuple,
+        weights: List[int],
+        allowed: Tuple[int, ...],
+        dice: Dice,
+        trace: Optional[Provenance] = None,
+        table_id: Optional[int] = None
+    ) -> int:
+        """Draw one of the allowed rows with its share of their total weight, recording it in a trace if given."""
+        key += allowed
+        cumulative = self._conditional.get(key)
+        if cumulative is None:
+            cumulative = self._conditional.setdefault(key, list(accumulate(weights[i] for i in allowed)))
+        roll = dice.roll(cumulative[-1])
+        row = allowed[bisect_left(cumulative, roll)]
+        if trace is not None:
+            trace.record(table_id, roll, row)
+        return row
+
+    def table(self, kind: str, power: str) -> AbilityTable:
+        """
+        Get the special ability table of a kind and power.
+
+        Args:
+            kind: ARMOR, MELEE or RANGED.
+            power: 'minor', 'medium' or 'major'.
+
+        Returns:
+            AbilityTable read from the kind's ability chart.
+
+        Raises:
+            ValueError: If the chart has a row that is not a known ability.
+        """
+        table = self._tables.get((kind, power))
+        if table is not None:
+            return table
+        with self._lock:
+            table = self._tables.get((kind, power))
+            if table is None:
+                table = self._tables[(kind, power)] = self._read_table(kind, power)
+        return table
+
+    def _read_table(self, kind: str, power: str) -> AbilityTable:
+        """Read the weights of an ability chart's rows."""
+        chart_name = ABILITY_CHARTS.format(kind, power)
+        chart = self.loader.load_chart_by_name(chart_name)
+        abilities = ARMOR_ABILITIES if kind == ARMOR else WEAPON_ABILITIES
+        weights: Dict[str, int] = {}
+        for roll in range(1, 101):
+            entry = chart.find_entry(roll)
+            if entry is None:
+                raise ValueError(f"{chart_name} has no entry for {roll}")
+            if entry.name != ROLL_AGAIN and entry.name not in abilities:
+                raise ValueError(f"{chart_name} has an unknown ability '{entry.name}'")
+            weights[entry.name] = weights.get(entry.name, 0) + 1
+        roll_again = weights.pop(ROLL_AGAIN, 0)
+        return AbilityTable([(abilities[name], weight) for name, weight in weights.items()], roll_again)
@@ -0,0 +1,247 @@
+"""Bounded cache of seeded treasure results."""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.models import HoardOrigin, Item, Source, Treasure, TreasureType
+from dnd_treasure.formatters.base import BaseFormatter
+
+
+# Treasure stored as plain tuples: (level, coins, goods, (name, value, item_type, flag)...,
+# origin as (seed, coins type, goods type, items type, rerolls) or None)
+CompactTreasure = Tuple[
+    int,
+    Tuple[str, ...],
+    Tuple[str, ...],
+    Tuple[Tuple[str, int, str, int], ...],
+    Optional[Tuple[int, str, str, str, Tuple[Tuple[str, int], ...]]],
+]
+
+
+class CacheStats(NamedTuple):
+    """Hit and miss counters of a ResultCache."""
+    hits: int
+    misses: int
+    size: int
+    max_size: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def compact_treasure(treasure: Treasure) -> CompactTreasure:
+    """Pack a Treasure into immutable tuples."""
+    origin = treasure.origin
+    return (
+        treasure.level,
+        tuple(treasure.coins),
+        tuple(treasure.goods),
+        tuple((item.name, item.value, item.item_type, item.flag) for item in treasure.items),
+        None if origin is None else (
+            origin.seed,
+            origin.coins.name,
+            origin.goods.name,
+            origin.items.name,
+            tuple(sorted(origin.rerolls.items())),
+        ),
+    )
+
+
+def expand_treasure(compact: CompactTreasure) -> Treasure:
+    """Rebuild a Treasure from compact_treasure() output."""
+    level, coins, goods, items, origin = compact
+    return Treasure(
+        level=level,
+        coins=list(coins),
+        goods=list(goods),
+        items=[Item(name, value, item_type, flag) for name, value, item_type, flag in items],
+        origin=None if origin is None else HoardOrigin(
+            seed=origin[0],
+            coins=TreasureType[origin[1]],
+            goods=TreasureType[origin[2]],
+            items=TreasureType[origin[3]],
+            rerolls=dict(origin[4]),
+        ),
+    )
+
+
+class ResultCache:
+    """
+    LRU cache of seeded hoards.
+
+    A seeded hoard is fully determined by the seed, the request, the generator
+    options, the RNG backend and the chart files. All of them are part of the
+    key; the charts through a content hash of the chart set. Each lookup
+    compares the files' paths, modification times and sizes with those
+    taken when the set was hashed, and on any change re-hashes the set and
+    loads a fresh generator, so edited charts make earlier entries
+    unreachable instead of stale. A hit costs that directory walk, a
+    dictionary lookup and a hoard rebuild; generation is skipped entirely.
+    Misses generate on the loader the key was hashed from. Unseeded
+    requests are always generated and never cached.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        """
+        Initialize result cache.
+
+        Args:
+            max_size: Maximum number of cached hoards.
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self._entries: "OrderedDict[tuple, CompactTreasure]" = OrderedDict()
+        self._generators: Dict[tuple, TreasureGenerator] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def generate(
+        self,
+        seed: Optional[int],
+        level: int,
+        coins: TreasureType = TreasureType.STANDARD,
+        goods: TreasureType = TreasureType.STANDARD,
+        items: TreasureType = TreasureType.STANDARD,
+        charts_path: Optional[Path] = None,
+        flattened: bool = False,
+        sources: Optional[Dict[Source, int]] = None
+    ) -> Treasure:
+        """
+        Get a hoard, generating it only if it is not cached.
+
+        Takes the same arguments as TreasureGenerator(...).generate(...).
+
+        Returns:
+            The hoard TreasureGenerator(seed=seed, ...).generate(...) returns.
+        """
+        generator = self._generator(charts_path, flattened, sources)
+        if seed is None:
+            return generator.with_seed(None).generate(level, coins, goods, items)
+
+        key = self._key(generator, seed, level, coins, goods, items)
+        with self._lock:
+            compact = self._entries.get(key)
+            if compact is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return expand_treasure(compact)
+            self._misses += 1
+
+        treasure = generator.with_seed(seed).generate(level, coins, goods, items)
+        if generator.chart_loader.stale():
+            # Charts changed while generating: the hoard may mix both versions
+            return treasure
+        with self._lock:
+            self._entries[key] = compact_treasure(treasure)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return treasure
+
+    def render(self, formatter: BaseFormatter, seed: Optional[int], level: int, **options) -> str:
+        """
+        Get a hoard and format it.
+
+        Only the hoard is cached, so one entry serves every output format.
+
+        Args:
+            formatter: Formatter to render the hoard with.
+            seed: Random seed.
+            level: Encounter level (1-20).
+            options: Further generate() arguments.
+
+        Returns:
+            Formatted hoard.
+        """
+        return formatter.format(self.generate(seed, level, **options))
+
+    def key(
+        self,
+        seed: int,
+        level: int,
+        coins: TreasureType,
+        goods: TreasureType,
+        items: TreasureType,
+        charts_path: Optional[Path] = None,
+        flattened: bool = False,
+        sources: Optional[Dict[Source, int]] = None
+    ) -> tuple:
+        """Build the cache key of a seeded request, re-hashing edited charts."""
+        return self._key(self._generator(charts_path, flattened, sources), seed, level, coins, goods, items)
+
+    @staticmethod
+    def _key(
+        generator: TreasureGenerator,
+        seed: int,
+        level: int,
+        coins: TreasureType,
+        goods: TreasureType,
+        items: TreasureType
+    ) -> tuple:
+        """Cache key of a seeded request to a generator."""
+        return (
+            seed, level, coins, goods, items,
+            Dice.BACKEND, generator.flattened, _source_key(generator.sources),
+            generator.chart_loader.content_hash(),
+        )
+
+    @property
+    def stats(self) -> CacheStats:
+        """Current hit and miss counters."""
+        with self._lock:
+            return CacheStats(self._hits, self._misses, len(self._entries), self.max_size)
+
+    def clear(self) -> None:
+        """Drop every cached hoard and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def invalidate(self) -> None:
+        """Re-hash the chart sets on the next request (edits are also noticed without it)."""
+        with self._lock:
+            self._generators.clear()
+
+    def _generator(
+        self,
+        charts_path: Optional[Path],
+        flattened: bool,
+        sources: Optional[Dict[Source, int]]
+    ) -> TreasureGenerator:
+        """
+        Generator of the options, over charts matching their files.
+
+        Generators are kept per options and replaced once their chart
+        files change; cache misses roll on them with the request's seed.
+        """
+        path_key = None if charts_path is None else str(Path(charts_path).resolve())
+        options = (path_key, flattened, _source_key(sources))
+        with self._lock:
+            generator = self._generators.get(options)
+        if generator is None or generator.chart_loader.stale():
+            generator = TreasureGenerator(
+                charts_path=charts_path,
+                flattened=flattened,
+                sources=sources,
+                compact=True,
+            )
+            with self._lock:
+                self._generators[options] = generator
+        return generator
+
+
+def _source_key(sources: Optional[Dict[Source, int]]) -> Optional[Tuple[Tuple[str, int], ...]]:
+    """Hashable form of source shares, ignoring sources with no share."""
+    if sources is None:
+        return None
+    return tuple(sorted((source.name, percent) for source, percent in sources.items() if percent > 0))
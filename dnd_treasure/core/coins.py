@@ -1,11 +1,48 @@
 """Coin generation logic for treasure hoards."""
 
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.expressions import compile_expression
 from dnd_treasure.core.models import TreasureType, CoinType
 
 
+# d100 bands of the coin tables: (min_roll, max_roll, amount dice expression,
+# coin type), both None for no coins.
+# This is a simplified version - levels 2-4 and 5-20 share one table each.
+COIN_TABLE: Dict[str, List[Tuple[int, int, Optional[str], Optional[str]]]] = {
+    "level 1": [
+        (1, 14, None, None),
+        (15, 29, "1d6×1000", "cp"),
+        (30, 52, "1d8×100", "sp"),
+        (53, 95, "2d8×10", "gp"),
+        (96, 100, "1d4×10", "pp"),
+    ],
+    "levels 2-4": [
+        (1, 10, None, None),
+        (11, 30, "2d10×1000", "cp"),
+        (31, 60, "4d8×100", "sp"),
+        (61, 95, "4d10×10", "gp"),
+        (96, 100, "2d8×10", "pp"),
+    ],
+    "levels 5-20": [
+        (1, 10, None, None),
+        (11, 25, "2d10×1000", "sp"),
+        (26, 75, "6d4×100", "gp"),
+        (76, 100, "5d6×10", "pp"),
+    ],
+}
+
+
+def coin_bands(level: int) -> List[Tuple[int, int, Optional[str], Optional[str]]]:
+    """Get the coin table bands used for an encounter level."""
+    if level == 1:
+        return COIN_TABLE["level 1"]
+    if level <= 4:
+        return COIN_TABLE["levels 2-4"]
+    return COIN_TABLE["levels 5-20"]
+
+
 class CoinGenerator:
     """Generates coins based on treasure level and type."""
 
@@ -72,72 +109,24 @@ class CoinGenerator:
             Coin string (e.g., "100 gp") or "No Coins".
         """
         roll = self.dice.d100()
-        value = 0
-        coin_type = None
-
-        # Implement DMG coin tables by level
-        # This is a simplified version - full implementation would have all 20 levels
-        if level == 1:
-            if 1 <= roll <= 14:
+        for min_roll, max_roll, amount, coin_type in coin_bands(level):
+            if min_roll <= roll <= max_roll:
+                if coin_type is None:
+                    return "No Coins"
+                value = self._roll_coins(amount)
+                if value > 0:
+                    return f"{int(value * percentage)} {coin_type}"
                 return "No Coins"
-            elif 15 <= roll <= 29:
-                value = self._roll_coins(1, 6, 1000)
-                coin_type = "cp"
-            elif 30 <= roll <= 52:
-                value = self._roll_coins(1, 8, 100)
-                coin_type = "sp"
-            elif 53 <= roll <= 95:
-                value = self._roll_coins(2, 8, 10)
-                coin_type = "gp"
-            else:  # 96-100
-                value = self._roll_coins(1, 4, 10)
-                coin_type = "pp"
-        elif level <= 4:
-            # Simplified - higher levels would have similar tables
-            if 1 <= roll <= 10:
-                return "No Coins"
-            elif 11 <= roll <= 30:
-                value = self._roll_coins(2, 10, 1000)
-                coin_type = "cp"
-            elif 31 <= roll <= 60:
-                value = self._roll_coins(4, 8, 100)
-                coin_type = "sp"
-            elif 61 <= roll <= 95:
-                value = self._roll_coins(4, 10, 10)
-                coin_type = "gp"
-            else:
-                value = self._roll_coins(2, 8, 10)
-                coin_type = "pp"
-        else:
-            # Higher levels (simplified)
-            if 1 <= roll <= 10:
-                return "No Coins"
-            elif 11 <= roll <= 25:
-                value = self._roll_coins(2, 10, 1000)
-                coin_type = "sp"
-            elif 26 <= roll <= 75:
-                value = self._roll_coins(6, 4, 100)
-                coin_type = "gp"
-            else:
-                value = self._roll_coins(5, 6, 10)
-                coin_type = "pp"
-
-        if value > 0 and coin_type:
-            value = int(value * percentage)
-            return f"{value} {coin_type}"
-
         return "No Coins"
 
-    def _roll_coins(self, num_dice: int, die_size: int, multiplier: int) -> int:
+    def _roll_coins(self, amount: str) -> int:
         """
         Roll dice for coin generation.
 
         Args:
-            num_dice: Number of dice to roll.
-            die_size: Size of each die.
-            multiplier: Multiply result by this value.
+            amount: Dice expression of the amount (e.g. '2d8×10').
 
         Returns:
             Total coins rolled.
         """
-        return self.dice.roll(die_size, num_dice) * multiplier
+        return compile_expression(amount).evaluate(self.dice)
@@ -1,21 +1,78 @@
 """Dice rolling utilities for D&D treasure generation."""
 
+import hashlib
 import random
-from typing import Optional
+from typing import List, Optional, Union
 
 
 class Dice:
     """Handles all dice rolling operations."""
 
+    # Random number generator behind the rolls; seeded results are only
+    # reproducible with the same backend
+    BACKEND = "random.Random"
+
     def __init__(self, seed: Optional[int] = None):
         """
         Initialize dice roller.
 
         Args:
             seed: Optional random seed for reproducible results in tests.
+                Without one a seed is drawn from the OS, so derived streams
+                still have a base to derive from.
         """
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(63)
+        self.seed = seed
         self._random = random.Random(seed)
 
+    @staticmethod
+    def derive_seed(seed: int, *labels: Union[int, str]) -> int:
+        """
+        Derive an independent seed from a base seed and labels.
+
+        The derivation is a hash, so it is stable across runs, platforms and
+        Python versions, and neighbouring labels give unrelated streams.
+
+        Args:
+            seed: Base seed.
+            labels: Labels naming the stream (e.g. "task", 3).
+
+        Returns:
+            63-bit derived seed.
+        """
+        key = "/".join(str(part) for part in (seed, *labels))
+        digest = hashlib.sha256(key.encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") >> 1
+
+    def spawn(self, *labels: Union[int, str]) -> "Dice":
+        """
+        Create an independent dice roller for a named sub-stream.
+
+        Spawning does not consume rolls from this roller, and the same labels
+        always give the same stream for the same seed.
+
+        Args:
+            labels: Labels naming the stream.
+
+        Returns:
+            New Dice seeded from this roller's seed and the labels.
+        """
+        return Dice(self.derive_seed(self.seed, *labels))
+
+    def reseed(self, seed: int) -> None:
+        """
+        Restart this roller on another seed.
+
+        The rolls that follow are those of Dice(seed), without building a
+        new roller, so objects holding this one roll the new stream.
+
+        Args:
+            seed: New seed.
+        """
+        self.seed = seed
+        self._random.seed(seed)
+
     def roll(self, num_sides: int, num_dice: int = 1) -> int:
         """
         Roll dice and return the sum.
@@ -29,6 +86,43 @@ class Dice:
         """
         return sum(self._random.randint(1, num_sides) for _ in range(num_dice))
 
+    def roll_many(self, num_sides: int, count: int, num_dice: int = 1) -> List[int]:
+        """
+        Roll the same dice many times in one call.
+
+        A bulk path for statistical checks and batch work: it is much faster
+        than calling roll() in a loop, but draws from the stream differently,
+        so it does not reproduce the rolls of repeated roll() calls.
+
+        Args:
+            num_sides: Number of sides on each die.
+            count: Number of rolls.
+            num_dice: Dice summed per roll (default 1).
+
+        Returns:
+            List of count sums.
+        """
+        faces = range(1, num_sides + 1)
+        if num_dice == 1:
+            return self._random.choices(faces, k=count)
+        dice = self._random.choices(faces, k=count * num_dice)
+        return [sum(dice[i:i + num_dice]) for i in range(0, len(dice), num_dice)]
+
+    def random_bits(self, bits: int) -> int:
+        """
+        Draw uniformly random bits in one call.
+
+        The bulk source of AliasTable.sample_counts(); like roll_many(), it
+        does not reproduce the rolls of repeated roll() calls.
+
+        Args:
+            bits: Number of bits.
+
+        Returns:
+            Non-negative int below 2**bits.
+        """
+        return self._random.getrandbits(bits) if bits > 0 else 0
+
     def d100(self, num_dice: int = 1) -> int:
         """Roll d100 (1-100)."""
         return self.roll(100, num_dice)
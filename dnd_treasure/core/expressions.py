@@ -0,0 +1,331 @@
+"""Dice expressions such as '2d8×10', '1d4+1 scrolls' or '50−(1d10)'."""
+
+import re
+from collections import defaultdict
+from fractions import Fraction
+from functools import lru_cache
+from typing import Callable, Dict, List, NoReturn, Optional, Set, Tuple
+
+from dnd_treasure.core.dice import Dice
+
+
+# Chart variables holding an expression instead of a chart name start with
+# this, e.g. variables: {charges: "=50-(1d10)"}
+EXPRESSION_PREFIX = "="
+
+# Compiled expressions kept by compile_expression()
+CACHE_SIZE = 512
+
+_NUMBER = re.compile(r"\s*(\d+)")
+_DIE = re.compile(r"\s*d(\d+|%)")
+_OPERATOR = re.compile(r"\s*([+\-−*×/]|x(?=\s*[\d(]))")
+_OPEN = re.compile(r"\s*\(")
+_CLOSE = re.compile(r"\s*\)")
+_LABEL = re.compile(r"\s+([^\W\d].*?)\s*$")
+
+# Operators by precedence level, with their unicode spellings folded
+_ADDITIVE = {"+": "+", "-": "-", "−": "-"}
+_MULTIPLICATIVE = {"*": "*", "×": "*", "x": "*", "/": "/"}
+
+# Parsed expressions: ("const", n), ("dice", count, sides), ("neg", node)
+# or (operator, left, right)
+Node = Tuple
+
+Scalar = Callable[[Dice], int]
+Batch = Callable[[Dice, int], List[int]]
+
+
+class DiceExpression:
+    """
+    A parsed and compiled dice expression.
+
+    Evaluating runs a tree of closures built once at compile time, with
+    constant parts folded, so a roll costs only its dice. Dice are rolled
+    left to right with Dice.roll(), so an expression like '2d8×10' draws
+    exactly what dice.roll(8, 2) * 10 would.
+    """
+
+    def __init__(self, text: str):
+        """
+        Parse and compile an expression.
+
+        Args:
+            text: Expression, optionally followed by a label ('1d4+1 scrolls').
+
+        Raises:
+            ValueError: If the text is not a valid expression.
+        """
+        self.text = text
+        node, self.label = _Parser(text).parse()
+        self._node = _fold(node)
+        self._scalar = _compile_scalar(self._node)
+        self._batch = _compile_batch(self._node)
+        self._distribution: Optional[Dict[int, Fraction]] = None
+
+    def __repr__(self) -> str:
+        return f"DiceExpression({self.text!r})"
+
+    @property
+    def is_constant(self) -> bool:
+        """Whether the expression rolls no dice."""
+        return self._node[0] == "const"
+
+    def evaluate(self, dice: Dice) -> int:
+        """Roll the expression once."""
+        return self._scalar(dice)
+
+    def sample(self, dice: Dice, count: int) -> List[int]:
+        """
+        Roll the expression many times in bulk.
+
+        Uses Dice.roll_many(), so it is much faster than count evaluate()
+        calls but does not reproduce their rolls.
+
+        Args:
+            dice: Dice roller.
+            count: Number of rolls.
+
+        Returns:
+            count results.
+        """
+        return self._batch(dice, count)
+
+    def distribution(self) -> Dict[int, Fraction]:
+        """Exact probability of every result, computed on first use."""
+        if self._distribution is None:
+            self._distribution = _distribution(self._node)
+        return self._distribution
+
+    def mean(self) -> Fraction:
+        """Exact expected result."""
+        return sum((value * p for value, p in self.distribution().items()), Fraction(0))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(text: str) -> DiceExpression:
+    """
+    Get the compiled form of an expression, parsing it only once.
+
+    Args:
+        text: Dice expression.
+
+    Returns:
+        DiceExpression, shared by every caller asking for the same text.
+    """
+    return DiceExpression(text)
+
+
+def roll_expression(text: str, dice: Dice) -> int:
+    """Roll an expression once (compiled and cached on first use)."""
+    return compile_expression(text).evaluate(dice)
+
+
+def chart_expression(reference: str) -> Optional[DiceExpression]:
+    """
+    Get the expression a chart variable holds, if it holds one.
+
+    Args:
+        reference: Chart variable value, a chart name or '=<expression>'.
+
+    Returns:
+        Compiled expression, or None for a chart name.
+    """
+    if reference.startswith(EXPRESSION_PREFIX):
+        return compile_expression(reference[len(EXPRESSION_PREFIX):])
+    return None
+
+
+class _Parser:
+    """Recursive descent parser producing Node tuples."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.position = 0
+
+    def parse(self) -> Tuple[Node, Optional[str]]:
+        """Parse the whole text into (node, label)."""
+        node = self._sum()
+        rest = self.text[self.position:]
+        if not rest.strip():
+            return node, None
+        label = _LABEL.match(rest)
+        if label is None:
+            self._fail("unexpected text")
+        return node, label.group(1)
+
+    def _sum(self) -> Node:
+        node = self._product()
+        while True:
+            operator = self._operator(_ADDITIVE)
+            if operator is None:
+                return node
+            node = (operator, node, self._product())
+
+    def _product(self) -> Node:
+        node = self._unary()
+        while True:
+            operator = self._operator(_MULTIPLICATIVE)
+            if operator is None:
+                return node
+            right = self._unary()
+            if operator == "/" and 0 in _support(right):
+                self._fail("division by zero" if right == ("const", 0) else "divisor can roll zero")
+            node = (operator, node, right)
+
+    def _unary(self) -> Node:
+        if self._operator({"-": "-", "−": "-"}) is not None:
+            return ("neg", self._unary())
+        return self._atom()
+
+    def _atom(self) -> Node:
+        if self._match(_OPEN):
+            node = self._sum()
+            if not self._match(_CLOSE):
+                self._fail("missing ')'")
+            return node
+        number = self._match(_NUMBER)
+        die = self._match(_DIE)
+        if die:
+            count = int(number.group(1)) if number else 1
+            sides = 100 if die.group(1) == "%" else int(die.group(1))
+            if count < 1 or sides < 1:
+                self._fail("dice need at least one die of at least one side")
+            return ("dice", count, sides)
+        if number:
+            return ("const", int(number.group(1)))
+        self._fail("expected a number, dice or '('")
+
+    def _operator(self, operators: Dict[str, str]) -> Optional[str]:
+        match = _OPERATOR.match(self.text, self.position)
+        if match is None or match.group(1) not in operators:
+            return None
+        self.position = match.end()
+        return operators[match.group(1)]
+
+    def _match(self, pattern: re.Pattern) -> Optional[re.Match]:
+        match = pattern.match(self.text, self.position)
+        if match is not None:
+            self.position = match.end()
+        return match
+
+    def _fail(self, reason: str) -> NoReturn:
+        raise ValueError(f"Invalid dice expression '{self.text}' at position {self.position}: {reason}")
+
+
+def _apply(operator: str, left: int, right: int) -> int:
+    """Apply an integer operator."""
+    if operator == "+":
+        return left + right
+    if operator == "-":
+        return left - right
+    if operator == "*":
+        return left * right
+    return left // right
+
+
+def _support(node: Node) -> Set[int]:
+    """Every value a node can take; any divisor inside it was already checked."""
+    kind = node[0]
+    if kind == "const":
+        return {node[1]}
+    if kind == "dice":
+        _, count, sides = node
+        return set(range(count, count * sides + 1))
+    if kind == "neg":
+        return {-value for value in _support(node[1])}
+    right = _support(node[2])
+    return {_apply(kind, a, b) for a in _support(node[1]) for b in right}
+
+
+def _fold(node: Node) -> Node:
+    """Replace constant subtrees by their value."""
+    kind = node[0]
+    if kind == "neg":
+        inner = _fold(node[1])
+        return ("const", -inner[1]) if inner[0] == "const" else ("neg", inner)
+    if kind in ("const", "dice"):
+        return node
+    left, right = _fold(node[1]), _fold(node[2])
+    if left[0] == "const" and right[0] == "const":
+        return ("const", _apply(kind, left[1], right[1]))
+    return (kind, left, right)
+
+
+def _compile_scalar(node: Node) -> Scalar:
+    """Build a closure rolling a (folded) node once."""
+    kind = node[0]
+    if kind == "const":
+        value = node[1]
+        return lambda dice: value
+    if kind == "dice":
+        _, count, sides = node
+        return lambda dice: dice.roll(sides, count)
+    if kind == "neg":
+        inner = _compile_scalar(node[1])
+        return lambda dice: -inner(dice)
+
+    left, right = _compile_scalar(node[1]), _compile_scalar(node[2])
+    if node[2][0] == "const":
+        constant = node[2][1]
+        if kind == "+":
+            return lambda dice: left(dice) + constant
+        if kind == "-":
+            return lambda dice: left(dice) - constant
+        if kind == "*":
+            return lambda dice: left(dice) * constant
+        return lambda dice: left(dice) // constant
+    if kind == "+":
+        return lambda dice: left(dice) + right(dice)
+    if kind == "-":
+        return lambda dice: left(dice) - right(dice)
+    if kind == "*":
+        return lambda dice: left(dice) * right(dice)
+    return lambda dice: left(dice) // right(dice)
+
+
+def _compile_batch(node: Node) -> Batch:
+    """Build a closure rolling a (folded) node many times with bulk dice."""
+    kind = node[0]
+    if kind == "const":
+        value = node[1]
+        return lambda dice, count: [value] * count
+    if kind == "dice":
+        _, dice_count, sides = node
+        return lambda dice, count: dice.roll_many(sides, count, dice_count)
+    if kind == "neg":
+        inner = _compile_batch(node[1])
+        return lambda dice, count: [-value for value in inner(dice, count)]
+
+    left, right = _compile_batch(node[1]), _compile_batch(node[2])
+
+    def combine(dice: Dice, count: int) -> List[int]:
+        return [_apply(kind, a, b) for a, b in zip(left(dice, count), right(dice, count))]
+    return combine
+
+
+def _distribution(node: Node) -> Dict[int, Fraction]:
+    """Exact distribution of a (folded) node; its dice are independent of each other."""
+    kind = node[0]
+    if kind == "const":
+        return {node[1]: Fraction(1)}
+    if kind == "dice":
+        _, count, sides = node
+        totals = {0: Fraction(1)}
+        for _ in range(count):
+            rolled: Dict[int, Fraction] = defaultdict(Fraction)
+            for total, p in totals.items():
+                for face in range(1, sides + 1):
+                    rolled[total + face] += p / sides
+            totals = rolled
+        return dict(totals)
+    if kind == "neg":
+        return {-value: p for value, p in _distribution(node[1]).items()}
+
+    combined: Dict[int, Fraction] = defaultdict(Fraction)
+    right = _distribution(node[2])
+    for a, p in _distribution(node[1]).items():
+        for b, q in right.items():
+            if kind == "/" and b == 0:
+                raise ValueError("Dice expression can divide by zero")
+            combined[_apply(kind, a, b)] += p * q
+    return dict(combined)
@@ -0,0 +1,321 @@
+"""Flattened chart chains sampled with a single draw."""
+
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+from fractions import Fraction
+from math import lcm
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.expressions import chart_expression
+from dnd_treasure.core.keywords import KeywordReplacer
+from dnd_treasure.data.loader import ChartLoader
+from dnd_treasure.data.models import ChartResult
+
+
+Distribution = Dict[Optional[ChartResult], Fraction]
+
+
+class AliasTable:
+    """
+    Walker/Vose alias table over integer weights.
+
+    Thresholds are kept as integers, so a single die roll of size
+    ``len(weights) * sum(weights)`` samples the weights exactly.
+    """
+
+    def __init__(self, weights: Sequence[int]):
+        """
+        Build the alias table.
+
+        Args:
+            weights: Positive integer weight of each outcome.
+        """
+        if not weights or any(weight <= 0 for weight in weights):
+            raise ValueError("Alias table weights must be positive")
+
+        size = len(weights)
+        total = sum(weights)
+        scaled = [weight * size for weight in weights]
+        threshold = [total] * size
+        alias = list(range(size))
+
+        small = [i for i, weight in enumerate(scaled) if weight < total]
+        large = [i for i, weight in enumerate(scaled) if weight >= total]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            threshold[less] = scaled[less]
+            alias[less] = more
+            scaled[more] += scaled[less] - total
+            if scaled[more] < total:
+                small.append(more)
+            else:
+                large.append(more)
+
+        self.size = size
+        self.total = total
+        self._threshold = threshold
+        self._alias = alias
+        self._intervals: Optional[Tuple[List[int], List[int]]] = None
+
+    def sample(self, dice: Dice) -> int:
+        """
+        Draw an outcome index.
+
+        Args:
+            dice: Dice roller supplying the single draw.
+
+        Returns:
+            Index into the weights the table was built from.
+        """
+        column, offset = divmod(dice.roll(self.size * self.total) - 1, self.total)
+        if offset < self._threshold[column]:
+            return column
+        return self._alias[column]
+
+    def sample_counts(self, dice: Dice, count: int) -> List[int]:
+        """
+        Count the outcomes of many draws without making them one by one.
+
+        A draw of sample() is a roll r in [0, size * total), and each
+        outcome owns at most 2 * size intervals of that range, read off the
+        thresholds and aliases. Here a roll is read as a uniform integer of
+        enough random bits (values past the range are drawn again), and
+        the draws are split one bit at a time: of m draws sharing their top
+        bits, the number whose next bit is set is the popcount of m fresh
+        random bits. A group is credited as soon as its values fall inside
+        one interval, so only the groups on interval edges are split
+        further. The counts are distributed exactly as those of count
+        sample() calls, though not from the same rolls.
+
+        Args:
+            dice: Dice roller supplying the random bits.
+            count: Number of draws.
+
+        Returns:
+            Number of draws of each outcome index.
+        """
+        starts, owners = self._bulk_intervals()
+        counts = [0] * (self.size + 1)  # last: rejected draws
+        remaining = count
+        while remaining:
+            pending = [(0, self._bits(), remaining)]  # draws in [low, low + 2**bits)
+            while pending:
+                low, bits, hits = pending.pop()
+                interval = bisect_right(starts, low) - 1
+                if starts[interval + 1] >= low + (1 << bits):
+                    counts[owners[interval]] += hits
+                    continue
+                bits -= 1
+                upper = dice.random_bits(hits).bit_count()
+                if upper:
+                    pending.append((low | 1 << bits, bits, upper))
+                if hits > upper:
+                    pending.append((low, bits, hits - upper))
+            remaining = counts[-1]
+            counts[-1] = 0
+        return counts[:-1]
+
+    def _bits(self) -> int:
+        """Random bits of a bulk draw, enough for any roll."""
+        return (self.size * self.total - 1).bit_length()
+
+    def _bulk_intervals(self) -> Tuple[List[int], List[int]]:
+        """
+        Interval starts and owners in the range of bulk draws.
+
+        The owner of the last interval is size, standing for rejected
+        draws; a final start closes the range.
+        """
+        if self._intervals is None:
+            starts: List[int] = []
+            owners: List[int] = []
+            for column in range(self.size):
+                start = column * self.total
+                middle = start + self._threshold[column]
+                for low, high, owner in ((start, middle, column), (middle, start + self.total, self._alias[column])):
+                    if high > low:
+                        starts.append(low)
+                        owners.append(owner)
+            starts += [self.size * self.total, 1 << self._bits()]
+            owners.append(self.size)
+            self._intervals = (starts, owners)
+        return self._intervals
+
+
+class FlattenedChart:
+    """A whole chart chain collapsed into one distribution over final results."""
+
+    def __init__(self, name: str, distribution: Distribution):
+        """
+        Initialize flattened chart.
+
+        Args:
+            name: Relative name of the chart at the head of the chain.
+            distribution: Exact probability of every final result.
+        """
+        self.name = name
+        self.outcomes: List[Optional[ChartResult]] = list(distribution)
+        self.probabilities: List[Fraction] = [distribution[o] for o in self.outcomes]
+        scale = lcm(*(p.denominator for p in self.probabilities))
+        self.table = AliasTable([int(p * scale) for p in self.probabilities])
+
+    def sample(self, dice: Dice) -> Optional[ChartResult]:
+        """Draw a final result with a single roll."""
+        return self.outcomes[self.table.sample(dice)]
+
+    def sample_counts(self, dice: Dice, count: int) -> Dict[Optional[ChartResult], int]:
+        """
+        Count the final results of many draws in bulk (see AliasTable.sample_counts).
+
+        Args:
+            dice: Dice roller.
+            count: Number of draws.
+
+        Returns:
+            Number of draws of each final result that came up.
+        """
+        counts = self.table.sample_counts(dice, count)
+        return {outcome: hits for outcome, hits in zip(self.outcomes, counts) if hits}
+
+    def probability(self, outcome: Optional[ChartResult]) -> Fraction:
+        """Exact probability of a final result (0 if it cannot occur)."""
+        try:
+            return self.probabilities[self.outcomes.index(outcome)]
+        except ValueError:
+            return Fraction(0)
+
+
+class ChartFlattener:
+    """
+    Precomputes chart chains into alias tables.
+
+    Drop-in replacement for KeywordReplacer.roll_chart: the result of a whole
+    chain (category -> sub-chart -> keyword charts) is drawn with one roll and
+    follows exactly the distribution of rolling the chain step by step.
+
+    Tables are built once and never modified, so flatteners created with
+    spawn() share them while each samples from its own dice.
+    """
+
+    def __init__(self, chart_loader: ChartLoader, dice: Dice):
+        """
+        Initialize chart flattener.
+
+        Args:
+            chart_loader: Chart loader for accessing the chart graph.
+            dice: Dice roller for sampling.
+        """
+        self.loader = chart_loader
+        self.dice = dice
+        self._distributions: Dict[str, Distribution] = {}
+        self._flattened: Dict[str, FlattenedChart] = {}
+        self._lock = threading.RLock()
+
+    def spawn(self, dice: Dice) -> "ChartFlattener":
+        """
+        Create a flattener sharing this one's tables but rolling other dice.
+
+        Args:
+            dice: Dice roller for the new flattener.
+
+        Returns:
+            New ChartFlattener.
+        """
+        flattener = ChartFlattener(self.loader, dice)
+        flattener._distributions = self._distributions
+        flattener._flattened = self._flattened
+        flattener._lock = self._lock
+        return flattener
+
+    def flatten(self, chart_name: str) -> FlattenedChart:
+        """
+        Get the flattened table for a chart, building it on first use.
+
+        Args:
+            chart_name: Relative chart name (e.g. 'dmg/magic_items_minor').
+
+        Returns:
+            FlattenedChart for the chain headed by the chart.
+        """
+        flattened = self._flattened.get(chart_name)
+        if flattened is None:
+            with self._lock:
+                flattened = self._flattened.get(chart_name)
+                if flattened is None:
+                    flattened = FlattenedChart(chart_name, self.distribution(chart_name))
+                    self._flattened[chart_name] = flattened
+        return flattened
+
+    def roll_chart(self, chart_name: str) -> Optional[ChartResult]:
+        """Roll on a chart chain with a single draw."""
+        return self.flatten(chart_name).sample(self.dice)
+
+    def distribution(self, chart_name: str) -> Distribution:
+        """
+        Exact distribution of final results for a chart chain.
+
+        Args:
+            chart_name: Relative chart name.
+
+        Returns:
+            Mapping of ChartResult (None for rolls matching no entry) to
+            probability.
+        """
+        with self._lock:
+            return self._distribution(chart_name, set())
+
+    def _distribution(self, chart_name: str, visiting: Set[str]) -> Distribution:
+        """Compute (and memoize) a chart's distribution, rejecting cycles."""
+        if chart_name in self._distributions:
+            return self._distributions[chart_name]
+        if chart_name in visiting:
+            raise ValueError(f"Chart chain cycle through '{chart_name}'")
+        visiting.add(chart_name)
+
+        chart = self.loader.load_chart_by_name(chart_name)
+        die_size = chart.die_size
+        distribution: Distribution = defaultdict(Fraction)
+        covered = 0
+
+        for entry in chart.rows():
+            width = min(entry.max_roll, die_size) - max(entry.min_roll, 1) + 1
+            if width <= 0:
+                continue
+            covered += width
+
+            partial = {(entry.name, entry.value): Fraction(width, die_size)}
+            for keyword in KeywordReplacer.placeholders(entry.name):
+                sub_chart = KeywordReplacer.chart_for(keyword, entry.variables)
+                if sub_chart is None:
+                    continue
+                expression = chart_expression(sub_chart)
+                if expression is None:
+                    sub_distribution = self._distribution(sub_chart, visiting)
+                else:
+                    sub_distribution = {
+                        ChartResult(str(result), 0): probability
+                        for result, probability in expression.distribution().items()
+                    }
+                placeholder = f"{{{keyword}}}"
+                expanded = defaultdict(Fraction)
+                for (name, value), probability in partial.items():
+                    for result, sub_probability in sub_distribution.items():
+                        if result is None:
+                            key = (name.replace(placeholder, f"<{keyword}>"), value)
+                        else:
+                            key = (name.replace(placeholder, result.name), value + result.value)
+                        expanded[key] += probability * sub_probability
+                partial = expanded
+
+            for (name, value), probability in partial.items():
+                distribution[ChartResult(name, value, entry.flag)] += probability
+
+        if covered < die_size:
+            distribution[None] += Fraction(die_size - covered, die_size)
+
+        visiting.discard(chart_name)
+        self._distributions[chart_name] = dict(distribution)
+        return self._distributions[chart_name]
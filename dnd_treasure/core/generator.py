@@ -1,22 +1,103 @@
 """Main treasure generation orchestrator."""
 
+import threading
+from dataclasses import dataclass, replace
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
 
 from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.arms import ARMS_CHART_NAMES, MagicArms
 from dnd_treasure.core.coins import CoinGenerator
+from dnd_treasure.core.flatten import ChartFlattener
+from dnd_treasure.core.items import ItemGenerator
 from dnd_treasure.core.keywords import KeywordReplacer
-from dnd_treasure.core.models import Treasure, TreasureType, Item
+from dnd_treasure.core.mic import MICTreasure
+from dnd_treasure.core.models import HoardOrigin, LazyTreasure, Treasure, TreasureType, Item, Source
+from dnd_treasure.core.provenance import ChartIds, Provenance, TracingReplacer
+from dnd_treasure.core.scrolls import SCROLL_CHART_NAMES, ScrollIndex
+from dnd_treasure.core.sources import SourceSelector
 from dnd_treasure.data.loader import ChartLoader
+from dnd_treasure.data.overlay import ChartOverlay, OverlayLoader
+
+
+# Hoard sections, each rolled on its own stream
+COINS = "coins"
+GOODS = "goods"
+ITEMS = "items"
+SECTIONS = (COINS, GOODS, ITEMS)
+
+
+@dataclass(frozen=True)
+class _SharedState:
+    """
+    What every generator spawned from one generator shares.
+
+    Charts and the indexes built from them are read-only once built, so
+    spawn() hands the same state to each new stream; only the dice and the
+    objects wired around them are per generator.
+    """
+    chart_loader: ChartLoader
+    flattened: bool
+    sources: Optional[Dict[Source, int]]
+    flattener: Optional[ChartFlattener]
+    source_selector: SourceSelector
+    mic_indexes: Dict
+    scrolls: ScrollIndex
+    arms: MagicArms
+    chart_ids: Optional[ChartIds]
+
+    def overlay(self, loader: OverlayLoader, dice: Dice) -> "_SharedState":
+        """
+        State for a loader overlaying this state's charts.
+
+        Indexes built from charts the overlays leave alone are kept; the
+        others are rebuilt over the overlay loader.
+        """
+        touched = set(loader.layers)
+        flattener = self.flattener
+        if flattener is not None and touched:
+            flattener = ChartFlattener(loader, dice)
+        return replace(
+            self,
+            chart_loader=loader,
+            flattener=flattener,
+            source_selector=SourceSelector(loader, sources=self.sources),
+            mic_indexes={} if any(name.startswith("mic/") for name in touched) else self.mic_indexes,
+            scrolls=self.scrolls if touched.isdisjoint(SCROLL_CHART_NAMES) else ScrollIndex(loader),
+            arms=self.arms if touched.isdisjoint(ARMS_CHART_NAMES) else MagicArms(loader),
+            chart_ids=ChartIds(loader) if self.chart_ids is not None else None,
+        )
 
 
 class TreasureGenerator:
-    """Main class for generating D&D treasure hoards."""
+    """
+    Main class for generating D&D treasure hoards.
+
+    A generator can be shared between threads. Charts (and flattened tables)
+    are loaded once and shared read-only; the dice are not. The thread that
+    created the generator rolls its own dice, and every other thread calling
+    generate() gets its own stream derived from the seed. generate_many()
+    gives each hoard its own derived stream, so its results do not depend on
+    the number of threads. Which derived stream a thread gets depends on the
+    order threads first call generate(), so hoards generated by several
+    threads of a seeded generator are only reproducible through
+    generate_many() or spawn() with labels of the caller's choosing.
+
+    Within a hoard, coins, goods, items and every item slot roll their own
+    streams derived from the hoard seed, so reroll() can replace one section
+    and leave the others exactly as they were.
+    """
 
     def __init__(
         self,
         seed: Optional[int] = None,
-        charts_path: Optional[Path] = None
+        charts_path: Optional[Path] = None,
+        flattened: bool = False,
+        sources: Optional[Dict[Source, int]] = None,
+        compact: bool = False,
+        pack: Optional[Path] = None,
+        provenance: bool = False
     ):
         """
         Initialize treasure generator.
@@ -24,11 +105,152 @@ class TreasureGenerator:
         Args:
             seed: Optional random seed for reproducible results.
             charts_path: Optional path to charts directory.
+            flattened: Sample each item chart chain with a single draw from a
+                precomputed alias table instead of rolling it step by step.
+            sources: Percentage share of each source book, adding up to 100
+                (e.g. {Source.DMG: 70, Source.EPH: 30}). Defaults to DMG only.
+            compact: Keep charts in array-backed storage shared by every
+                compact generator in the process.
+            pack: Serve charts from a chart pack mapped read-only, shared by
+                every process using it (see dnd_treasure.data.pack).
+            provenance: Record the rolls behind each item in the hoard's
+                provenance (see dnd_treasure.core.provenance).
+
+        Raises:
+            ValueError: If provenance is asked of a flattened generator.
+        """
+        if provenance and flattened:
+            raise ValueError("Provenance needs chart-by-chart rolls; flattened generators draw whole chains at once")
+        chart_loader = ChartLoader(charts_path, compact=compact, pack=pack)
+        self._wire(_SharedState(
+            chart_loader=chart_loader,
+            flattened=flattened,
+            sources=sources,
+            flattener=ChartFlattener(chart_loader, Dice(seed)) if flattened else None,
+            source_selector=SourceSelector(chart_loader, sources=sources),
+            mic_indexes={},
+            scrolls=ScrollIndex(chart_loader),
+            arms=MagicArms(chart_loader),
+            chart_ids=ChartIds(chart_loader) if provenance else None,
+        ), Dice(seed))
+
+    @property
+    def chart_loader(self) -> ChartLoader:
+        """Loader of the charts this generator rolls on."""
+        return self._shared.chart_loader
+
+    @property
+    def flattened(self) -> bool:
+        """Whether item chart chains are drawn from flattened tables."""
+        return self._shared.flattened
+
+    @property
+    def sources(self) -> Optional[Dict[Source, int]]:
+        """Percentage share of each source book (None for DMG only)."""
+        return self._shared.sources
+
+    @property
+    def source_selector(self) -> SourceSelector:
+        """Source book selector shared by every generator spawned from this one."""
+        return self._shared.source_selector
+
+    @classmethod
+    def _from_state(cls, shared: _SharedState, dice: Dice) -> "TreasureGenerator":
+        """A generator over shared state, rolling its own dice."""
+        generator = object.__new__(cls)
+        generator._wire(shared, dice)
+        return generator
+
+    def _wire(self, shared: _SharedState, dice: Dice) -> None:
+        """Build the per-stream generators around shared state and a dice roller."""
+        self._shared = shared
+        self._flattener = shared.flattener
+        self._owner = threading.get_ident()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._threads = 0
+        self._batches = 0
+        self._hoards = 0
+
+        self.dice = dice
+        self.keyword_replacer = KeywordReplacer(self.chart_loader, dice)
+        self.coin_generator = CoinGenerator(dice)
+        if self._flattener is not None:
+            self.chart_roller = self._flattener.spawn(dice)
+        else:
+            self.chart_roller = self.keyword_replacer
+        self.mic = MICTreasure(self.chart_loader, dice, shared.mic_indexes)
+
+    def spawn(self, *labels) -> "TreasureGenerator":
+        """
+        Create a generator for an independent, deterministic dice stream.
+
+        The new generator shares this one's charts and flattened tables, and
+        rolls dice seeded from this generator's seed and the labels.
+
+        Args:
+            labels: Labels naming the stream (e.g. "task", 0, 3).
+
+        Returns:
+            New TreasureGenerator.
+        """
+        return self._from_state(self._shared, self.dice.spawn(*labels))
+
+    def with_seed(self, seed: Optional[int]) -> "TreasureGenerator":
+        """
+        Create a generator over this one's charts and indexes with another seed.
+
+        It generates what a new TreasureGenerator with that seed and this
+        generator's options would, without loading or indexing anything.
+
+        Args:
+            seed: Random seed of the new generator.
+
+        Returns:
+            New TreasureGenerator.
+        """
+        return self._from_state(self._shared, Dice(seed))
+
+    def with_overlay(self, *overlays: ChartOverlay, seed: Optional[int] = None) -> "TreasureGenerator":
         """
-        self.dice = Dice(seed)
-        self.chart_loader = ChartLoader(charts_path)
-        self.keyword_replacer = KeywordReplacer(self.chart_loader, self.dice)
-        self.coin_generator = CoinGenerator(self.dice)
+        Create a generator reading charts through overlays over this one's.
+
+        The new generator shares this one's loaded charts, and each of its
+        scroll, arms, MIC and flattened indexes unless the overlays change a
+        chart the index is built from, so a generator per tenant costs about
+        as much memory as the tenant's overlays.
+
+        Args:
+            overlays: Overlays to apply, later ones winning.
+            seed: Seed of the new generator (default: this generator's).
+
+        Returns:
+            New TreasureGenerator.
+
+        Raises:
+            ValueError: If an overlay changes a chart or entry that does not exist.
+        """
+        loader = OverlayLoader(self.chart_loader, *overlays)
+        dice = Dice(self.dice.seed if seed is None else seed)
+        return self._from_state(self._shared.overlay(loader, dice), dice)
+
+    def _for_thread(self) -> "TreasureGenerator":
+        """
+        Get the generator whose dice the calling thread rolls.
+
+        Threads other than the owner are numbered in the order they first
+        get here, so their streams are not tied to any task.
+        """
+        if threading.get_ident() == self._owner:
+            return self
+        generator = getattr(self._local, "generator", None)
+        if generator is None:
+            with self._lock:
+                self._threads += 1
+                number = self._threads
+            generator = self.spawn("thread", number)
+            self._local.generator = generator
+        return generator
 
     def generate(
         self,
@@ -36,6 +258,7 @@ class TreasureGenerator:
         coins: TreasureType = TreasureType.STANDARD,
         goods: TreasureType = TreasureType.STANDARD,
         items: TreasureType = TreasureType.STANDARD,
+        lazy: bool = False,
     ) -> Treasure:
         """
         Generate a complete treasure hoard.
@@ -45,17 +268,269 @@ class TreasureGenerator:
             coins: Coin generation type.
             goods: Goods generation type.
             items: Items generation type.
+            lazy: Return a LazyTreasure whose sections are only generated
+                when first read; they equal the eager ones for the same seed.
 
         Returns:
             Generated Treasure object.
         """
+        return self._for_thread()._generate(level, coins, goods, items, lazy)
+
+    def generate_many(
+        self,
+        level: int,
+        count: int,
+        coins: TreasureType = TreasureType.STANDARD,
+        goods: TreasureType = TreasureType.STANDARD,
+        items: TreasureType = TreasureType.STANDARD,
+        threads: int = 1,
+        keys: Optional[Sequence[Hashable]] = None,
+    ) -> List[Treasure]:
+        """
+        Generate several treasure hoards, optionally on a thread pool.
+
+        Hoard i of the n-th call rolls on the stream ("batch", n, i), so for a
+        seeded generator the results are the same for any thread count. With
+        keys, hoard i rolls on ("key", keys[i]) instead, so each hoard depends
+        only on its key, not on which call or batch it was generated in.
+
+        Args:
+            level: Encounter level (1-20).
+            count: Number of hoards.
+            coins: Coin generation type.
+            goods: Goods generation type.
+            items: Items generation type.
+            threads: Worker threads (1 generates in the calling thread).
+            keys: Stream key of each hoard (count of them), e.g. an int or a
+                tuple of ints and strings.
+
+        Returns:
+            Generated hoards in order.
+        """
+        if threads < 1:
+            raise ValueError("threads must be at least 1")
+        if keys is not None and len(keys) != count:
+            raise ValueError("keys must have one key per hoard")
+        with self._lock:
+            batch = self._batches
+            self._batches += 1
+
+        def generate_one(index: int) -> Treasure:
+            if keys is None:
+                generator = self.spawn("batch", batch, index)
+            else:
+                generator = self.spawn("key", keys[index])
+            return generator._generate(level, coins, goods, items)
+
+        if threads == 1:
+            return [generate_one(index) for index in range(count)]
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return list(executor.map(generate_one, range(count)))
+
+    def generate_by_value(
+        self,
+        level: int,
+        goods_value: int,
+        items_value: int,
+        coins: TreasureType = TreasureType.STANDARD,
+    ) -> Treasure:
+        """
+        Generate a hoard whose goods and items are bought to gp budgets.
+
+        Goods come from the Magic Item Compendium gems and art tables, items
+        from the priced DMG magic items; each pick is a single draw among
+        what the remaining budget affords.
+
+        Args:
+            level: Encounter level (1-20).
+            goods_value: Total gp to spend on gems and art objects.
+            items_value: Total gp to spend on magic items.
+            coins: Coin generation type.
+
+        Returns:
+            Generated Treasure object.
+        """
+        generator = self._for_thread()
+        coin_list = generator._generate_coins(level, coins)
+        goods = [good.display() for good in generator.mic.goods(goods_value)]
+        items = generator.mic.items(items_value)
         return Treasure(
             level=level,
-            coins=self._generate_coins(level, coins),
-            goods=self._generate_goods(level, goods),
-            items=self._generate_items(level, items),
+            coins=coin_list,
+            goods=goods or ["No Goods"],
+            items=items or [Item(name="No Items", value=0, item_type="none")],
         )
 
+    def regenerate(self, level: int, origin: HoardOrigin, lazy: bool = False) -> Treasure:
+        """
+        Generate the hoard an origin describes.
+
+        Every section rolls the stream derived from the origin, so this
+        reproduces a hoard from its level and origin alone, given the same
+        generator options and charts.
+
+        Args:
+            level: Encounter level (1-20).
+            origin: Hoard seed, treasure types and re-roll generations.
+            lazy: Return a LazyTreasure.
+
+        Returns:
+            The hoard, with the origin attached.
+        """
+        if lazy:
+            return self._lazy(level, origin)
+        trace = self._new_trace()
+        return Treasure(
+            level=level,
+            coins=self._roll_coins(level, origin),
+            goods=self._roll_goods(level, origin),
+            items=self._roll_items(level, origin, trace),
+            origin=origin,
+            provenance=trace,
+        )
+
+    def reroll(self, treasure: Treasure, section: str, slot: Optional[int] = None) -> Treasure:
+        """
+        Re-roll one section of a hoard, keeping the rest untouched.
+
+        The section gets the next stream of its own; the other sections are
+        reused as they are. Re-rolling a hoard with the generator options it
+        was made with is deterministic.
+
+        Args:
+            treasure: Hoard from generate().
+            section: COINS, GOODS or ITEMS.
+            slot: With ITEMS, re-roll only this item slot (the other items
+                keep their rolls).
+
+        Returns:
+            New Treasure with the section re-rolled.
+        """
+        if treasure.origin is None:
+            raise ValueError("Only hoards from generate() can be re-rolled")
+        if section not in SECTIONS:
+            raise ValueError(f"Unknown section '{section}', expected one of {SECTIONS}")
+        if slot is not None and section != ITEMS:
+            raise ValueError("Only the items section has slots")
+
+        origin = treasure.origin
+        if slot is None:
+            key = section
+            rerolls = {k: v for k, v in origin.rerolls.items() if not k.startswith(f"{section}/")}
+        else:
+            slots = len(self._item_slots(treasure.level, origin))
+            if not 0 <= slot < slots:
+                raise IndexError(f"Item slot {slot} out of range (hoard has {slots})")
+            key = f"{ITEMS}/{slot}"
+            rerolls = dict(origin.rerolls)
+        rerolls[key] = origin.generation(key) + 1
+        origin = replace(origin, rerolls=rerolls)
+
+        if isinstance(treasure, LazyTreasure):
+            kept = {name: getattr(treasure, name) for name in SECTIONS
+                    if name != section and treasure.built(name)}
+            return self._lazy(treasure.level, origin, kept, treasure.provenance if ITEMS in kept else None)
+        if section == COINS:
+            return replace(treasure, coins=self._roll_coins(treasure.level, origin), origin=origin)
+        if section == GOODS:
+            return replace(treasure, goods=self._roll_goods(treasure.level, origin), origin=origin)
+        trace = self._new_trace()
+        return replace(treasure, items=self._roll_items(treasure.level, origin, trace), origin=origin, provenance=trace)
+
+    def _generate(
+        self,
+        level: int,
+        coins: TreasureType,
+        goods: TreasureType,
+        items: TreasureType,
+        lazy: bool = False,
+    ) -> Treasure:
+        """Generate a hoard on the next hoard seed of this generator's stream."""
+        origin = HoardOrigin(
+            seed=Dice.derive_seed(self.dice.seed, "hoard", self._hoards),
+            coins=coins,
+            goods=goods,
+            items=items,
+        )
+        self._hoards += 1
+        return self.regenerate(level, origin, lazy)
+
+    def _lazy(
+        self,
+        level: int,
+        origin: HoardOrigin,
+        values: Optional[Dict[str, list]] = None,
+        trace: Optional[Provenance] = None
+    ) -> LazyTreasure:
+        """Wrap a hoard's sections in a LazyTreasure; an items trace fills when the items are built."""
+        if trace is None:
+            trace = self._new_trace()
+        return LazyTreasure(level, **(values or {}), origin=origin, provenance=trace, builders={
+            COINS: lambda: self._roll_coins(level, origin),
+            GOODS: lambda: self._roll_goods(level, origin),
+            ITEMS: lambda: self._roll_items(level, origin, trace),
+        })
+
+    def _new_trace(self) -> Optional[Provenance]:
+        """An empty trace for a hoard's items, if this generator records provenance."""
+        chart_ids = self._shared.chart_ids
+        return Provenance(chart_ids) if chart_ids is not None else None
+
+    @staticmethod
+    def _stream_seed(origin: HoardOrigin, section: str, *labels) -> int:
+        """Seed of a section's stream of a hoard at its current re-roll generation."""
+        return Dice.derive_seed(origin.seed, section, origin.generation(section), *labels)
+
+    @classmethod
+    def _stream(cls, origin: HoardOrigin, section: str, *labels) -> Dice:
+        """Dice for a section of a hoard at its current re-roll generation."""
+        return Dice(cls._stream_seed(origin, section, *labels))
+
+    def _roll_coins(self, level: int, origin: HoardOrigin) -> List[str]:
+        """Roll a hoard's coins on their own stream."""
+        return CoinGenerator(self._stream(origin, COINS)).generate(level, origin.coins)
+
+    def _roll_goods(self, level: int, origin: HoardOrigin) -> List[str]:
+        """Roll a hoard's goods on their own stream."""
+        return self._generate_goods(level, origin.goods)
+
+    def _item_slots(self, level: int, origin: HoardOrigin) -> List[Tuple[str, str]]:
+        """Roll which items a hoard gets on the items stream."""
+        planner = ItemGenerator(self._stream(origin, ITEMS), self.chart_roller, self.source_selector)
+        return planner.plan(level, origin.items)
+
+    def _roll_items(self, level: int, origin: HoardOrigin, trace: Optional[Provenance] = None) -> List[Item]:
+        """
+        Roll a hoard's items, each slot on its own stream, recording the rolls in a trace if given.
+
+        One roller and item generator plan the hoard on the items stream and
+        roll every slot; their dice are re-seeded to each slot's stream
+        before it is rolled.
+        """
+        dice = self._stream(origin, ITEMS)
+        if self._flattener is not None:
+            roller = self._flattener.spawn(dice)
+        elif trace is not None:
+            roller = TracingReplacer(self.chart_loader, dice, trace)
+        else:
+            roller = KeywordReplacer(self.chart_loader, dice)
+        generator = ItemGenerator(
+            dice, roller, self.source_selector, self._shared.scrolls, self._shared.arms, trace
+        )
+        slots = generator.plan(level, origin.items)
+        if not slots:
+            return [ItemGenerator.no_items()]
+
+        items = []
+        for index, (kind, chart_name) in enumerate(slots):
+            dice.reseed(self._stream_seed(origin, ITEMS, "slot", index, origin.generation(f"{ITEMS}/{index}")))
+            start = trace.size if trace is not None else 0
+            rolled = generator.roll_items(kind, chart_name)
+            if trace is not None:
+                trace.record_items(index, start, len(rolled))
+            items.extend(rolled)
+        return items if items else [ItemGenerator.no_items()]
+
     def _generate_coins(self, level: int, treasure_type: TreasureType) -> List[str]:
         """Generate coins for the treasure."""
         return self.coin_generator.generate(level, treasure_type)
@@ -70,14 +545,3 @@ class TreasureGenerator:
             return ["No Goods"]
         # TODO: Implement goods generation
         return ["No Goods"]
-
-    def _generate_items(self, level: int, treasure_type: TreasureType) -> List[Item]:
-        """
-        Generate magic items for the treasure.
-
-        For now, returns placeholder. Will be implemented in future task.
-        """
-        if treasure_type == TreasureType.NONE:
-            return [Item(name="No Items", value=0, item_type="none")]
-        # TODO: Implement item generation
-        return [Item(name="No Items", value=0, item_type="none")]
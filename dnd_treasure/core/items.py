@@ -0,0 +1,225 @@
+"""Item generation logic for treasure hoards."""
+
+from typing import Dict, List, Optional, Protocol, Tuple
+
+from dnd_treasure.core.arms import ARMS_ENTRIES, MagicArms
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.models import Item, TreasureType
+from dnd_treasure.core.provenance import NO_ENTRY, Provenance
+from dnd_treasure.core.scrolls import SCROLL_ENTRIES, ScrollIndex
+from dnd_treasure.core.sources import SourceSelector
+from dnd_treasure.data.loader import ChartNamespace
+from dnd_treasure.data.models import ChartResult
+
+
+MUNDANE = "mundane"
+MINOR = "minor"
+MEDIUM = "medium"
+MAJOR = "major"
+
+# Chart rolled for one item of each kind, relative to the source's namespace
+ITEM_CHARTS: Dict[str, str] = {
+    MUNDANE: "mundane_items",
+    MINOR: "magic_items_minor",
+    MEDIUM: "magic_items_medium",
+    MAJOR: "magic_items_major",
+}
+
+# DMG Table 3-5 (items column): level -> [(min_roll, max_roll, count die, kind)]
+# A count die of 0 means a single item.
+ITEM_TABLE: Dict[int, List[Tuple[int, int, int, str]]] = {
+    1: [(72, 95, 0, MUNDANE), (96, 100, 0, MINOR)],
+    2: [(50, 85, 0, MUNDANE), (86, 100, 0, MINOR)],
+    3: [(50, 79, 3, MUNDANE), (80, 100, 0, MINOR)],
+    4: [(43, 62, 4, MUNDANE), (63, 100, 0, MINOR)],
+    5: [(58, 67, 4, MUNDANE), (68, 100, 3, MINOR)],
+    6: [(55, 59, 4, MUNDANE), (60, 99, 3, MINOR), (100, 100, 0, MEDIUM)],
+    7: [(52, 97, 3, MINOR), (98, 100, 0, MEDIUM)],
+    8: [(49, 96, 4, MINOR), (97, 100, 0, MEDIUM)],
+    9: [(44, 91, 4, MINOR), (92, 100, 0, MEDIUM)],
+    10: [(41, 88, 4, MINOR), (89, 99, 0, MEDIUM), (100, 100, 0, MAJOR)],
+    11: [(32, 84, 4, MINOR), (85, 98, 0, MEDIUM), (99, 100, 0, MAJOR)],
+    12: [(28, 82, 6, MINOR), (83, 97, 0, MEDIUM), (98, 100, 0, MAJOR)],
+    13: [(20, 73, 6, MINOR), (74, 95, 0, MEDIUM), (96, 100, 0, MAJOR)],
+    14: [(20, 58, 6, MINOR), (59, 92, 0, MEDIUM), (93, 100, 0, MAJOR)],
+    15: [(12, 46, 10, MINOR), (47, 90, 0, MEDIUM), (91, 100, 0, MAJOR)],
+    16: [(41, 46, 10, MINOR), (47, 90, 3, MEDIUM), (91, 100, 0, MAJOR)],
+    17: [(34, 83, 3, MEDIUM), (84, 100, 0, MAJOR)],
+    18: [(25, 80, 4, MEDIUM), (81, 100, 0, MAJOR)],
+    19: [(5, 70, 4, MEDIUM), (71, 100, 0, MAJOR)],
+    20: [(26, 65, 4, MEDIUM), (66, 100, 3, MAJOR)],
+}
+
+
+class ChartRoller(Protocol):
+    """Anything that can roll on a chart chain (KeywordReplacer, ChartFlattener)."""
+
+    def roll_chart(self, chart_name: str) -> Optional[ChartResult]:
+        ...
+
+
+class ItemGenerator:
+    """Generates mundane and magic items based on treasure level and type."""
+
+    def __init__(
+        self,
+        dice: Dice,
+        chart_roller: ChartRoller,
+        sources: Optional[SourceSelector] = None,
+        scrolls: Optional[ScrollIndex] = None,
+        arms: Optional[MagicArms] = None,
+        trace: Optional[Provenance] = None
+    ):
+        """
+        Initialize item generator.
+
+        Args:
+            dice: Dice roller for random generation.
+            chart_roller: Resolves item charts to final items.
+            sources: Picks the source book of each set of items.
+                Defaults to DMG only.
+            scrolls: Draws the spells of scroll entries; without it they
+                stay as rolled (e.g. 'Minor scroll').
+            arms: Draws the magic armor and weapon entries; without it they
+                stay as rolled (e.g. 'Minor magic armor').
+            trace: Records the Table 3-5 and count rolls of each set, and
+                the scroll and magic arms rolls of each item.
+        """
+        self.dice = dice
+        self.chart_roller = chart_roller
+        self.sources = sources
+        self.scrolls = scrolls
+        self.arms = arms
+        self.trace = trace
+
+    def generate(self, level: int, treasure_type: TreasureType) -> List[Item]:
+        """
+        Generate items for a treasure hoard.
+
+        Args:
+            level: Encounter level (1-20).
+            treasure_type: Type of treasure (NONE, STANDARD, DOUBLE, TRIPLE).
+
+        Returns:
+            List of generated items, or a single "No Items" placeholder.
+        """
+        if treasure_type == TreasureType.NONE:
+            return [self.no_items()]
+
+        items = self._generate_single(level)
+
+        # Generate additional sets for double/triple
+        if treasure_type == TreasureType.DOUBLE:
+            items.extend(self._generate_single(level))
+        elif treasure_type == TreasureType.TRIPLE:
+            for _ in range(2):
+                items.extend(self._generate_single(level))
+
+        return items if items else [self.no_items()]
+
+    @staticmethod
+    def no_items() -> Item:
+        """Placeholder item for an empty items section."""
+        return Item(name="No Items", value=0, item_type="none")
+
+    def _generate_single(self, level: int) -> List[Item]:
+        """
+        Generate a single set of items based on level.
+
+        Args:
+            level: Encounter level (1-20).
+
+        Returns:
+            List of items (possibly empty).
+        """
+        kind, chart_name, count = self._plan_single(level)
+        items = []
+        for _ in range(count):
+            items.extend(self.roll_items(kind, chart_name))
+        return items
+
+    def plan(self, level: int, treasure_type: TreasureType) -> List[Tuple[str, str]]:
+        """
+        Roll how many items of which kind a hoard gets, without rolling them.
+
+        Args:
+            level: Encounter level (1-20).
+            treasure_type: Type of treasure (NONE, STANDARD, DOUBLE, TRIPLE).
+
+        Returns:
+            One (kind, chart name) slot per item to roll.
+        """
+        sets = {TreasureType.DOUBLE: 2, TreasureType.TRIPLE: 3}.get(treasure_type, 1)
+        if treasure_type == TreasureType.NONE:
+            sets = 0
+        slots = []
+        for _ in range(sets):
+            kind, chart_name, count = self._plan_single(level)
+            slots.extend([(kind, chart_name)] * count)
+        return slots
+
+    def _plan_single(self, level: int) -> Tuple[str, str, int]:
+        """Roll the source, kind and count of a single set of items."""
+        # Like the legacy generator, the source is picked once per set
+        if self.sources is None:
+            namespace = None
+        else:
+            namespace = self.sources.pick(self.dice)
+
+        level = min(max(level, 1), 20)
+        roll = self.dice.d100()
+        row = ITEM_TABLE[level]
+        for index, (min_roll, max_roll, count_die, kind) in enumerate(row):
+            if min_roll <= roll <= max_roll:
+                count = self.dice.roll(count_die) if count_die else 1
+                if self.trace is not None:
+                    self._trace_set(level, row, roll, index, count)
+                return kind, self.chart_name(kind, namespace), count
+        if self.trace is not None:
+            self._trace_set(level, row, roll, NO_ENTRY, 0)
+        return MUNDANE, self.chart_name(MUNDANE, namespace), 0
+
+    def _trace_set(self, level: int, row: List[Tuple[int, int, int, str]], roll: int, index: int, count: int) -> None:
+        """Record the Table 3-5 roll and item count of a set."""
+        count_die = row[index][2] if index != NO_ENTRY else 0
+        self.trace.record_set(f"items L{level}", [kind for *_, kind in row], roll, index, count_die, count)
+
+    def chart_name(self, kind: str, namespace: Optional[ChartNamespace] = None) -> str:
+        """
+        Get the chart rolled for an item kind.
+
+        Args:
+            kind: One of MUNDANE, MINOR, MEDIUM, MAJOR.
+            namespace: Source namespace picked for the set (None for DMG).
+
+        Returns:
+            Chart name for the chart roller.
+        """
+        if namespace is None:
+            return f"dmg/{ITEM_CHARTS[kind]}"
+        return self.sources.resolve(namespace, ITEM_CHARTS[kind])
+
+    def roll_items(self, kind: str, chart_name: Optional[str] = None) -> List[Item]:
+        """
+        Roll a single item of the given kind.
+
+        A scroll entry is one item slot holding a set of scrolls, so it
+        gives an Item per scroll.
+
+        Args:
+            kind: One of MUNDANE, MINOR, MEDIUM, MAJOR.
+            chart_name: Chart to roll on (defaults to the DMG chart of the kind).
+
+        Returns:
+            The generated items; empty if the chart roll matched nothing.
+        """
+        if chart_name is None:
+            chart_name = self.chart_name(kind)
+        result = self.chart_roller.roll_chart(chart_name)
+        if result is None:
+            return []
+        if self.scrolls is not None and result.name in SCROLL_ENTRIES:
+            return self.scrolls.roll(SCROLL_ENTRIES[result.name], self.dice, self.trace)
+        if self.arms is not None and result.name in ARMS_ENTRIES:
+            return [self.arms.roll(*ARMS_ENTRIES[result.name], self.dice, self.trace)]
+        return [Item(name=result.name, value=result.value, item_type=kind, flag=result.flag)]
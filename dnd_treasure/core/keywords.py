@@ -1,10 +1,15 @@
 """Keyword substitution for dynamic item names."""
 
 import re
-from typing import Dict
+from typing import Dict, List, Optional
 
 from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.expressions import chart_expression
 from dnd_treasure.data.loader import ChartLoader
+from dnd_treasure.data.models import Chart, ChartEntry, ChartResult
+
+
+KEYWORD_PATTERN = re.compile(r'\{(\w+)\}')
 
 
 class KeywordReplacer:
@@ -15,6 +20,7 @@ class KeywordReplacer:
         "alignment": "dmg/alignments",
         "energy": "dmg/energy",
         "creature": "dmg/bane_creature_type",
+        "oil_potion": "dmg/oil_potion",
     }
 
     def __init__(self, chart_loader: ChartLoader, dice: Dice):
@@ -28,6 +34,35 @@ class KeywordReplacer:
         self.loader = chart_loader
         self.dice = dice
 
+    @classmethod
+    def chart_for(
+        cls,
+        keyword: str,
+        variables: Optional[Dict[str, str]] = None
+    ) -> Optional[str]:
+        """
+        Find the chart a placeholder is resolved from.
+
+        Entry variables take precedence over the global keyword charts, which
+        lets a chart entry chain into any other chart (e.g. "+1 {armor}").
+        A variable can also hold a dice expression such as "=50-(1d10)".
+
+        Args:
+            keyword: Placeholder name without braces.
+            variables: Optional entry variables mapping keywords to charts.
+
+        Returns:
+            Chart name (or "=expression"), or None if the keyword is unknown.
+        """
+        if variables and keyword in variables:
+            return variables[keyword]
+        return cls.KEYWORD_CHARTS.get(keyword)
+
+    @staticmethod
+    def placeholders(text: str) -> List[str]:
+        """Return the distinct {keyword} placeholders in text, in order."""
+        return list(dict.fromkeys(KEYWORD_PATTERN.findall(text)))
+
     def replace(self, text: str) -> str:
         """
         Replace all keywords in text with random values.
@@ -39,7 +74,7 @@ class KeywordReplacer:
             Text with keywords replaced.
         """
         # Find all keywords in the text
-        keywords = re.findall(r'\{(\w+)\}', text)
+        keywords = KEYWORD_PATTERN.findall(text)
 
         # Replace each keyword
         result = text
@@ -50,6 +85,57 @@ class KeywordReplacer:
 
         return result
 
+    def roll_chart(self, chart_name: str) -> Optional[ChartResult]:
+        """
+        Roll on a chart and resolve the chain of charts behind the entry.
+
+        Args:
+            chart_name: Relative chart name (e.g. 'dmg/magic_items_minor').
+
+        Returns:
+            Resolved ChartResult, or None if the roll matched no entry.
+        """
+        chart = self.loader.load_chart_by_name(chart_name)
+        entry = chart.find_entry(self.roll(chart))
+        if entry is None:
+            return None
+        return self.resolve(entry)
+
+    def resolve(self, entry: ChartEntry) -> ChartResult:
+        """
+        Resolve every placeholder of an entry by rolling on its chart.
+
+        The values of sub-chart results are added to the entry's value, so
+        "+1 {armor}" (1000 gp) on a Breastplate (350 gp) is worth 1350 gp.
+
+        Args:
+            entry: Chart entry that was rolled.
+
+        Returns:
+            ChartResult with the final name and value.
+        """
+        name = entry.name
+        value = entry.value
+        for keyword in self.placeholders(entry.name):
+            chart_name = self.chart_for(keyword, entry.variables)
+            if chart_name is None:
+                continue
+            expression = chart_expression(chart_name)
+            if expression is not None:
+                name = name.replace(f"{{{keyword}}}", str(expression.evaluate(self.dice)))
+                continue
+            result = self.roll_chart(chart_name)
+            if result is None:
+                name = name.replace(f"{{{keyword}}}", f"<{keyword}>")
+            else:
+                name = name.replace(f"{{{keyword}}}", result.name)
+                value += result.value
+        return ChartResult(name, value, entry.flag)
+
+    def roll(self, chart: Chart) -> int:
+        """Roll the chart's die."""
+        return self.dice.roll(chart.die_size)
+
     def _get_keyword_value(self, keyword: str) -> str:
         """
         Get a random value for a keyword by rolling on its chart.
@@ -60,15 +146,5 @@ class KeywordReplacer:
         Returns:
             Random value from the keyword's chart.
         """
-        chart_name = self.KEYWORD_CHARTS[keyword]
-        chart = self.loader.load_chart_by_name(chart_name)
-
-        # Determine roll based on chart's roll_die
-        if chart.roll_die.startswith('d'):
-            die_size = int(chart.roll_die[1:])
-            roll = self.dice.roll(die_size)
-        else:
-            roll = self.dice.d100()
-
-        entry = chart.find_entry(roll)
-        return entry.name if entry else f"<{keyword}>"
+        result = self.roll_chart(self.KEYWORD_CHARTS[keyword])
+        return result.name if result else f"<{keyword}>"
@@ -0,0 +1,280 @@
+"""Magic Item Compendium style treasure chosen by gp value."""
+
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from fractions import Fraction
+from math import gcd, lcm
+from typing import Dict, Generic, Iterable, List, NamedTuple, Optional, Sequence, Tuple, TypeVar
+
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.expressions import compile_expression
+from dnd_treasure.core.flatten import ChartFlattener
+from dnd_treasure.core.items import ITEM_CHARTS, MAJOR, MEDIUM, MINOR
+from dnd_treasure.core.models import Item
+from dnd_treasure.data.loader import ChartLoader
+
+
+T = TypeVar("T")
+
+_BUILD_LOCK = threading.Lock()
+
+# Goods tags in the MIC charts (written <Gem>, <gem>, <Art>, <art>)
+TAG_PATTERN = re.compile(r'\s*<(gem|art)>\s*', re.IGNORECASE)
+TAG_KINDS: Dict[str, str] = {"gem": "gem", "art": "art object"}
+
+# MIC page 265 gems and art types: type -> gp value dice expression
+GOODS_TYPES: Dict[str, str] = {
+    "A": "4d4",
+    "B": "2d4×10",
+    "C": "4d4×10",
+    "D": "1d4×100",
+    "E": "2d4×100",
+    "F": "4d4×100",
+    "G": "1d4×1000",
+    "H": "2d4×1000",
+    "I": "4d4×1000",
+}
+
+
+def expand_tags(name: str) -> Tuple[str, Optional[str]]:
+    """
+    Split a goods tag off a chart entry name.
+
+    Args:
+        name: Entry name such as 'banded agate<Gem>'.
+
+    Returns:
+        (name without the tag, 'gem' / 'art object' or None if untagged).
+    """
+    match = TAG_PATTERN.search(name)
+    if match is None:
+        return name, None
+    return TAG_PATTERN.sub(" ", name).strip(), TAG_KINDS[match.group(1).lower()]
+
+
+class Good(NamedTuple):
+    """A gem or art object with its tag already expanded."""
+    name: str
+    kind: str
+    value: int
+    goods_type: str
+
+    def display(self) -> str:
+        """Format the good for a Treasure's goods list."""
+        return f"{self.name} ({self.kind}, {self.value} gp)"
+
+
+class ValueIndex(Generic[T]):
+    """
+    Outcomes sorted by gp value, with prefix sums of their integer weights.
+
+    Picking under a budget bisects the values for the affordable prefix and
+    draws once within its total weight. This gives exactly the distribution of
+    rerolling the original chart until something affordable comes up, without
+    the rerolls.
+    """
+
+    def __init__(self, outcomes: Iterable[Tuple[int, int, T]]):
+        """
+        Build the index.
+
+        Args:
+            outcomes: (positive gp value, integer weight, outcome) triples;
+                outcomes without positive weight are dropped.
+
+        Raises:
+            ValueError: If an outcome's value is not positive, since
+                pick_total() would never exhaust its budget on it.
+        """
+        ordered = sorted(outcomes, key=lambda outcome: outcome[0])
+        self.values: List[int] = []
+        self.outcomes: List[T] = []
+        self._cumulative: List[int] = []
+        total = 0
+        for value, weight, outcome in ordered:
+            if weight <= 0:
+                continue
+            if value <= 0:
+                raise ValueError(f"outcome {outcome!r} has non-positive value {value}")
+            total += weight
+            self.values.append(value)
+            self.outcomes.append(outcome)
+            self._cumulative.append(total)
+
+    @classmethod
+    def from_charts(cls, charts: Sequence[Sequence[Tuple[int, Fraction, T]]]) -> "ValueIndex":
+        """
+        Build an index over equally likely charts from their exact probabilities.
+
+        Each chart's probabilities are scaled to the smallest integer weights
+        of its own, and each chart's total weight to the least common
+        multiple of the totals. Weights thus stay as small as the charts' own
+        dice allow, rather than growing with every denominator of every chart.
+
+        Args:
+            charts: Per chart, (gp value, probability, outcome) triples; a
+                chart's probabilities need not add up to 1.
+
+        Returns:
+            ValueIndex of the outcomes of every chart.
+        """
+        scaled = []
+        for outcomes in charts:
+            scale = lcm(*(p.denominator for _, p, _ in outcomes)) if outcomes else 1
+            weights = [int(p * scale) for _, p, _ in outcomes]
+            divisor = gcd(*weights) or 1
+            weights = [weight // divisor for weight in weights]
+            scaled.append((outcomes, weights, sum(weights)))
+        common = lcm(*(total for _, _, total in scaled if total)) if scaled else 1
+        return cls(
+            (value, weight * (common // total), outcome)
+            for outcomes, weights, total in scaled if total
+            for (value, _, outcome), weight in zip(outcomes, weights)
+        )
+
+    def __len__(self) -> int:
+        return len(self.outcomes)
+
+    def affordable(self, budget: int) -> int:
+        """Number of outcomes worth at most budget."""
+        return bisect_right(self.values, budget)
+
+    def pick(self, dice: Dice, budget: int) -> Optional[T]:
+        """
+        Draw an outcome worth at most budget with a single roll.
+
+        Args:
+            dice: Dice roller.
+            budget: Highest acceptable gp value.
+
+        Returns:
+            The outcome, or None if nothing is affordable.
+        """
+        count = self.affordable(budget)
+        if count == 0:
+            return None
+        roll = dice.roll(self._cumulative[count - 1])
+        return self.outcomes[bisect_left(self._cumulative, roll, 0, count)]
+
+    def pick_total(self, dice: Dice, budget: int) -> List[T]:
+        """
+        Draw outcomes until the budget cannot buy anything more.
+
+        Args:
+            dice: Dice roller.
+            budget: Total gp to spend.
+
+        Returns:
+            Outcomes whose values add up to at most budget.
+        """
+        picked = []
+        remaining = budget
+        while True:
+            count = self.affordable(remaining)
+            if count == 0:
+                return picked
+            roll = dice.roll(self._cumulative[count - 1])
+            index = bisect_left(self._cumulative, roll, 0, count)
+            picked.append(self.outcomes[index])
+            remaining -= self.values[index]
+
+
+class MICTreasure:
+    """
+    Picks goods and magic items to a gp budget, Magic Item Compendium style.
+
+    The value indexes (and the tag-expanded goods entries) are built on
+    first use from the charts and kept in a dict that generators spawned
+    from one another share.
+    """
+
+    def __init__(
+        self,
+        chart_loader: ChartLoader,
+        dice: Dice,
+        indexes: Optional[Dict[str, ValueIndex]] = None
+    ):
+        """
+        Initialize MIC treasure picker.
+
+        Args:
+            chart_loader: Chart loader for the goods and item charts.
+            dice: Dice roller for picking.
+            indexes: Shared cache of built value indexes.
+        """
+        self.loader = chart_loader
+        self.dice = dice
+        self.indexes = {} if indexes is None else indexes
+
+    def goods_index(self) -> ValueIndex:
+        """
+        Index of the (goods type, gp value) outcomes of the MIC goods types.
+
+        The nine types are equally likely and each value keeps its exact
+        probability under the type's value roll (e.g. 4d4 for type A), so a
+        pick under a budget rolls the value as the type would, conditioned
+        on it being affordable. The entry is drawn after the pick.
+        """
+        return self._index("goods", self._build_goods_index)
+
+    def item_index(self) -> ValueIndex:
+        """
+        Index of every priced DMG magic item.
+
+        Minor, medium and major items are equally likely; within a kind each
+        item keeps its exact chart chain probability.
+        """
+        return self._index("items", self._build_item_index)
+
+    def _index(self, key: str, build) -> ValueIndex:
+        """Get a shared index, building it on first use."""
+        index = self.indexes.get(key)
+        if index is None:
+            with _BUILD_LOCK:
+                index = self.indexes.get(key)
+                if index is None:
+                    index = self.indexes[key] = build()
+        return index
+
+    def _build_goods_index(self) -> ValueIndex:
+        """Index the value rolls of the nine MIC goods types."""
+        return ValueIndex.from_charts([
+            [
+                (int(value), probability, (goods_type, int(value)))
+                for value, probability in compile_expression(expression).distribution().items()
+            ]
+            for goods_type, expression in GOODS_TYPES.items()
+        ])
+
+    def _goods_entries(self, goods_type: str) -> List[Tuple[str, str]]:
+        """(name, kind) of each entry of a goods type's chart, tags expanded once."""
+        def build() -> List[Tuple[str, str]]:
+            chart = self.loader.load_chart_by_name(f"mic/goods_{goods_type.lower()}")
+            return [(name, kind or "gem") for name, kind in (expand_tags(entry.name) for entry in chart.rows())]
+        return self._index(f"goods/{goods_type}", build)
+
+    def _build_item_index(self) -> ValueIndex:
+        """Index the flattened minor, medium and major item charts."""
+        flattener = ChartFlattener(self.loader, self.dice)
+        charts = []
+        for kind in (MINOR, MEDIUM, MAJOR):
+            distribution = flattener.distribution(f"dmg/{ITEM_CHARTS[kind]}")
+            charts.append([
+                (result.value, probability, Item(result.name, result.value, kind, result.flag))
+                for result, probability in distribution.items() if result and result.value > 0
+            ])
+        return ValueIndex.from_charts(charts)
+
+    def goods(self, budget: int) -> List[Good]:
+        """Pick gems and art objects worth up to budget gp in total."""
+        goods = []
+        for goods_type, value in self.goods_index().pick_total(self.dice, budget):
+            entries = self._goods_entries(goods_type)
+            name, kind = entries[self.dice.roll(len(entries)) - 1]
+            goods.append(Good(name, kind, value, goods_type))
+        return goods
+
+    def items(self, budget: int) -> List[Item]:
+        """Pick magic items worth up to budget gp in total."""
+        return self.item_index().pick_total(self.dice, budget)
@@ -2,7 +2,7 @@
 
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 
 class TreasureType(Enum):
@@ -15,6 +15,21 @@ class TreasureType(Enum):
     TEN_PERCENT = 0.1
 
 
+def check_request(level: int, coins: TreasureType, goods: TreasureType, items: TreasureType) -> None:
+    """
+    Validate the level and treasure types of a hoard request.
+
+    Raises:
+        ValueError: If the level is not an int from 1 to 20 or a type is
+            not a TreasureType.
+    """
+    if isinstance(level, bool) or not isinstance(level, int) or not 1 <= level <= 20:
+        raise ValueError(f"level {level!r} is not between 1 and 20")
+    for section, treasure_type in (("coins", coins), ("goods", goods), ("items", items)):
+        if not isinstance(treasure_type, TreasureType):
+            raise ValueError(f"{section} must be a TreasureType, not {treasure_type!r}")
+
+
 class CoinType(Enum):
     """Coin denominations."""
     CP = 1      # Copper pieces
@@ -50,6 +65,25 @@ class Item:
         return f"{self.name} ({self.value} gp)"
 
 
+@dataclass
+class HoardOrigin:
+    """
+    How a hoard was generated, so any of its sections can be re-rolled.
+
+    Every section (and every item slot) rolls its own stream derived from
+    the hoard seed, the section name and how often it has been re-rolled.
+    """
+    seed: int
+    coins: TreasureType
+    goods: TreasureType
+    items: TreasureType
+    rerolls: Dict[str, int] = field(default_factory=dict)
+
+    def generation(self, section: str) -> int:
+        """How often a section (e.g. 'items' or 'items/2') has been re-rolled."""
+        return self.rerolls.get(section, 0)
+
+
 @dataclass
 class Treasure:
     """Represents a complete treasure hoard."""
@@ -57,6 +91,9 @@ class Treasure:
     coins: List[str] = field(default_factory=list)
     goods: List[str] = field(default_factory=list)
     items: List[Item] = field(default_factory=list)
+    origin: Optional[HoardOrigin] = field(default=None, compare=False, repr=False)
+    # Rolls behind the items, from generators recording provenance
+    provenance: Optional[Any] = field(default=None, compare=False, repr=False)
 
     def is_empty(self) -> bool:
         """Check if treasure is empty."""
@@ -65,3 +102,90 @@ class Treasure:
             len(self.goods) == 0 and
             len(self.items) == 0
         )
+
+
+def _lazy_section(name: str) -> property:
+    """A Treasure section built on first access."""
+
+    def get(self: "LazyTreasure") -> list:
+        value = self._values.get(name)
+        if value is None:
+            builder = self._builders.get(name)
+            value = self._values.setdefault(name, builder() if builder is not None else [])
+        return value
+
+    def set(self: "LazyTreasure", value: list) -> None:
+        self._values[name] = value
+
+    return property(get, set, doc=f"The hoard's {name}, generated on first access.")
+
+
+class LazyTreasure(Treasure):
+    """
+    A Treasure whose sections are generated on first access.
+
+    Each section rolls its own stream derived from the hoard seed, so a
+    section nobody reads is never rolled and the ones that are read come out
+    exactly as eager generation would make them.
+
+    It takes Treasure's fields too, so dataclasses.replace() works on it;
+    the copy reads (and so generates) every section it does not replace.
+    """
+
+    coins = _lazy_section("coins")
+    goods = _lazy_section("goods")
+    items = _lazy_section("items")
+
+    def __init__(
+        self,
+        level: int,
+        coins: Optional[List[str]] = None,
+        goods: Optional[List[str]] = None,
+        items: Optional[List[Item]] = None,
+        origin: Optional[HoardOrigin] = None,
+        provenance: Optional[Any] = None,
+        builders: Optional[Dict[str, Callable[[], list]]] = None
+    ):
+        """
+        Initialize lazy treasure.
+
+        Args:
+            level: Encounter level.
+            coins: Coins, if already known.
+            goods: Goods, if already known.
+            items: Items, if already known.
+            origin: How the hoard is generated.
+            provenance: Rolls behind the items.
+            builders: Section name -> function generating the section; a
+                section that is neither known nor built is empty.
+        """
+        self.level = level
+        self.origin = origin
+        self.provenance = provenance
+        self._builders = dict(builders or {})
+        self._values: Dict[str, list] = {
+            name: value for name, value in (("coins", coins), ("goods", goods), ("items", items))
+            if value is not None
+        }
+
+    def built(self, section: str) -> bool:
+        """Whether a section has been generated yet."""
+        return section in self._values
+
+    def materialize(self) -> Treasure:
+        """Generate every section and return a plain Treasure."""
+        return Treasure(self.level, self.coins, self.goods, self.items, self.origin, self.provenance)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Treasure):
+            return NotImplemented
+        return (self.level, self.coins, self.goods, self.items) == (
+            other.level, other.coins, other.goods, other.items
+        )
+
+    def __repr__(self) -> str:
+        sections = ", ".join(
+            f"{name}={self._values[name]!r}" if name in self._values else f"{name}=<pending>"
+            for name in ("coins", "goods", "items")
+        )
+        return f"LazyTreasure(level={self.level!r}, {sections})"
@@ -0,0 +1,77 @@
+"""Psionic power lookup for EPH items."""
+
+from typing import Dict, Optional
+
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.data.loader import ChartLoader
+
+
+PSION = "psion"
+PSYCHIC_WARRIOR = "psychic_warrior"
+
+# Power lists by class: class -> (chart stem, highest power level)
+POWER_LISTS: Dict[str, tuple] = {
+    PSION: ("eph/psion_powers", 9),
+    PSYCHIC_WARRIOR: ("eph/psychic_warrior_powers", 6),
+}
+
+# Prebuilt index of each power level, mixing the class lists like the legacy
+# generator (70% Psion / 30% Psychic Warrior up to level 6, Psion above)
+POWER_INDEX = "eph/powers"
+
+
+class PowerIndex:
+    """
+    Draws psionic powers by class list and power level.
+
+    Every (class list, level) pair is one chart, loaded once through the
+    chart loader and sampled with a single roll of its die. Psionic items
+    chain to the same charts through their {power} variables.
+    """
+
+    def __init__(self, chart_loader: ChartLoader, dice: Dice):
+        """
+        Initialize power index.
+
+        Args:
+            chart_loader: Chart loader holding the power charts.
+            dice: Dice roller for drawing powers.
+        """
+        self.loader = chart_loader
+        self.dice = dice
+
+    @staticmethod
+    def chart_name(level: int, class_list: Optional[str] = None) -> str:
+        """
+        Get the chart of a power level.
+
+        Args:
+            level: Power level (1-9).
+            class_list: PSION or PSYCHIC_WARRIOR, or None for the mixed index
+                psionic items use.
+
+        Returns:
+            Chart name for the chart loader.
+        """
+        if class_list is None:
+            if not 1 <= level <= 9:
+                raise ValueError(f"No level {level} powers")
+            return f"{POWER_INDEX}_{level}"
+        stem, highest = POWER_LISTS[class_list]
+        if not 1 <= level <= highest:
+            raise ValueError(f"No level {level} {class_list} powers")
+        return f"{stem}_{level}"
+
+    def roll(self, level: int, class_list: Optional[str] = None) -> str:
+        """
+        Draw a power.
+
+        Args:
+            level: Power level (1-9).
+            class_list: PSION or PSYCHIC_WARRIOR, or None for the mixed index.
+
+        Returns:
+            Power name.
+        """
+        chart = self.loader.load_chart_by_name(self.chart_name(level, class_list))
+        return chart.find_entry(self.dice.roll(chart.die_size)).name
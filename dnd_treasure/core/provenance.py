@@ -0,0 +1,271 @@
+"""Provenance of generated items: the charts and rolls behind each one."""
+
+import threading
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.keywords import KeywordReplacer
+from dnd_treasure.data.loader import ChartLoader
+from dnd_treasure.data.models import ChartResult
+
+
+# Entry index of a roll that matched no entry, or of a plain die roll
+NO_ENTRY = -1
+
+# Triples a hoard's buffer holds before it grows
+CAPACITY = 32
+
+
+class ChartIds:
+    """
+    Small integer ids for the charts and tables rolls are recorded against.
+
+    Ids are handed out on first use and shared by every generator spawned
+    from the one that made the registry. Besides charts, the registry holds
+    tables that are not chart files, such as the Table 3-5 row of a level,
+    with a label per row, and plain dice.
+    """
+
+    def __init__(self, chart_loader: ChartLoader):
+        """
+        Initialize chart id registry.
+
+        Args:
+            chart_loader: Chart loader the chart names refer to, for rendering.
+        """
+        self.loader = chart_loader
+        self.names: List[str] = []
+        self.labels: List[Optional[Sequence[str]]] = []
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def chart(self, chart_name: str) -> int:
+        """
+        Get the id of a chart.
+
+        Args:
+            chart_name: Relative chart name (e.g. 'dmg/magic_items_minor').
+
+        Returns:
+            Chart id.
+        """
+        chart_id = self._ids.get(chart_name)
+        if chart_id is None:
+            chart_id = self._add(chart_name, None)
+        return chart_id
+
+    def table(self, name: str, labels: Sequence[str] = ()) -> int:
+        """
+        Get the id of a table that is not a chart file.
+
+        Args:
+            name: Table name (e.g. 'items L7' or 'd3').
+            labels: Label of each row; none for plain dice.
+
+        Returns:
+            Table id.
+        """
+        chart_id = self._ids.get(name)
+        if chart_id is None:
+            chart_id = self._add(name, tuple(labels))
+        return chart_id
+
+    def _add(self, name: str, labels: Optional[Sequence[str]]) -> int:
+        with self._lock:
+            chart_id = self._ids.get(name)
+            if chart_id is None:
+                chart_id = len(self.names)
+                self.names.append(name)
+                self.labels.append(labels)
+                self._ids[name] = chart_id
+        return chart_id
+
+    def describe(self, chart_id: int, roll: int, index: int) -> str:
+        """
+        Render one recorded roll.
+
+        Args:
+            chart_id: Chart or table id.
+            roll: Roll made on it.
+            index: Entry index rolled (NO_ENTRY for none).
+
+        Returns:
+            Text like 'dmg/armor roll 45 → Breastplate'.
+        """
+        name = self.names[chart_id]
+        labels = self.labels[chart_id]
+        text = f"{name} roll {roll}"
+        if index == NO_ENTRY:
+            return text if labels is not None else f"{text} → (no entry)"
+        if labels is not None:
+            return f"{text} → {labels[index]}"
+        return f"{text} → {self.loader.load_chart_by_name(name).view(index).name}"
+
+
+class Provenance:
+    """
+    The rolls behind a hoard's items.
+
+    Rolls are recorded as (chart id, roll, entry index) integer triples in a
+    buffer preallocated per hoard, in the order they were made; nothing is
+    rendered until asked. Each item points at three spans of the buffer:
+    the rolls of its set of items (Table 3-5 row and count), those of its
+    slot's chart chain, and its own. Only items sharing a slot have rolls
+    of their own: the scrolls of a set share the chart chain and count
+    roll, and each has its magic type, spell level and spell rolls.
+    """
+
+    __slots__ = ("charts", "rolls", "size", "spans", "_set", "_set_slots", "_parts")
+
+    def __init__(self, charts: ChartIds, capacity: int = CAPACITY):
+        """
+        Initialize an empty trace.
+
+        Args:
+            charts: Registry the chart ids refer to.
+            capacity: Triples to preallocate.
+        """
+        self.charts = charts
+        self.rolls = array('i', bytes(12 * capacity))
+        self.size = 0
+        # Per item: set start, set end, slot start, slot end, own start, own end (in triples)
+        self.spans = array('i')
+        self._set: List[Tuple[int, int]] = []
+        self._set_slots = 0
+        self._parts: List[Tuple[int, int]] = []
+
+    def record(self, chart_id: int, roll: int, index: int) -> None:
+        """
+        Record one roll.
+
+        Args:
+            chart_id: Chart or table id.
+            roll: Roll made on it.
+            index: Entry index rolled (NO_ENTRY for none).
+        """
+        offset = 3 * self.size
+        if offset == len(self.rolls):
+            self.rolls.extend(bytes(len(self.rolls) * 4))
+        rolls = self.rolls
+        rolls[offset] = chart_id
+        rolls[offset + 1] = roll
+        rolls[offset + 2] = index
+        self.size += 1
+
+    def record_set(self, table: str, labels: Sequence[str], roll: int, index: int, count_die: int, count: int) -> None:
+        """
+        Record the rolls of a set of items, shared by the set's slots.
+
+        Args:
+            table: Name of the table rolled for the set (e.g. 'items L7').
+            labels: Label of each of the table's rows.
+            roll: d100 roll.
+            index: Row rolled (NO_ENTRY for no items).
+            count_die: Die rolled for the number of items (0 for none).
+            count: Number of items.
+        """
+        start = self.size
+        self.record(self.charts.table(table, labels), roll, index)
+        if count_die:
+            self.record(self.charts.table(f"d{count_die}"), count, NO_ENTRY)
+        self._set.extend([(start, self.size)] * count)
+
+    def record_part(self, start: int) -> None:
+        """
+        Mark the rolls since start as the own rolls of the slot's next item.
+
+        Args:
+            start: First triple of the item's own rolls.
+        """
+        self._parts.append((start, self.size))
+
+    def record_items(self, slot: int, start: int, count: int) -> None:
+        """
+        Attach items to the rolls of their slot.
+
+        Rolls before the first part marked by record_part() are shared by
+        every item of the slot.
+
+        Args:
+            slot: Slot index, in plan order.
+            start: First triple of the slot's chart rolls.
+            count: Items the slot gave.
+        """
+        set_start, set_end = self._set[slot] if slot < len(self._set) else (start, start)
+        parts = self._parts
+        self._parts = []
+        end = parts[0][0] if parts else self.size
+        for item in range(count):
+            own_start, own_end = parts[item] if item < len(parts) else (end, end)
+            self.spans.extend((set_start, set_end, start, end, own_start, own_end))
+
+    def triples(self, item: int) -> List[Tuple[int, int, int]]:
+        """
+        The rolls behind an item.
+
+        Args:
+            item: Index of the item in the hoard.
+
+        Returns:
+            (chart id, roll, entry index) triples, in roll order.
+        """
+        if not 0 <= 6 * item < len(self.spans):
+            raise IndexError(f"No provenance for item {item}")
+        rolls = self.rolls
+        spans = self.spans
+        triples = []
+        for offset in range(6 * item, 6 * item + 6, 2):
+            for i in range(3 * spans[offset], 3 * spans[offset + 1], 3):
+                triples.append((rolls[i], rolls[i + 1], rolls[i + 2]))
+        return triples
+
+    def render(self, item: int) -> str:
+        """
+        Render the rolls behind an item.
+
+        Args:
+            item: Index of the item in the hoard.
+
+        Returns:
+            Text like 'items L7 roll 88 → minor → dmg/magic_items_minor roll 23 → ...'.
+        """
+        return " → ".join(self.charts.describe(*triple) for triple in self.triples(item))
+
+    def __len__(self) -> int:
+        """Number of items traced."""
+        return len(self.spans) // 6
+
+
+class TracingReplacer(KeywordReplacer):
+    """A KeywordReplacer recording every chart roll of a chain into a Provenance."""
+
+    def __init__(self, chart_loader: ChartLoader, dice: Dice, trace: Provenance):
+        """
+        Initialize tracing replacer.
+
+        Args:
+            chart_loader: Chart loader for accessing charts.
+            dice: Dice roller for random selection.
+            trace: Trace to record the rolls in.
+        """
+        super().__init__(chart_loader, dice)
+        self.trace = trace
+
+    def roll_chart(self, chart_name: str) -> Optional[ChartResult]:
+        """
+        Roll on a chart chain, recording each roll before resolving its entry.
+
+        Args:
+            chart_name: Relative chart name.
+
+        Returns:
+            Resolved ChartResult, or None if the roll matched no entry.
+        """
+        chart = self.loader.load_chart_by_name(chart_name)
+        roll = self.roll(chart)
+        index = chart.find_index(roll)
+        self.trace.record(self.trace.charts.chart(chart_name), roll, NO_ENTRY if index is None else index)
+        if index is None:
+            return None
+        return self.resolve(chart.view(index))
@@ -0,0 +1,298 @@
+"""Reservoir of hoards generated ahead of unseeded requests."""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from dnd_treasure.core.cache import CompactTreasure, compact_treasure, expand_treasure
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.models import Source, Treasure, TreasureType, check_request
+
+
+# A request the reservoir keeps hoards for: (level, coins, goods, items)
+ReservoirKey = Tuple[int, TreasureType, TreasureType, TreasureType]
+
+# Base generators of worker processes, by generator options
+_process_generators: Dict[tuple, TreasureGenerator] = {}
+
+
+class ReservoirStats(NamedTuple):
+    """Fill levels and request wait times of a HoardReservoir."""
+    hits: int
+    misses: int
+    generated: int
+    fill: Dict[ReservoirKey, int]
+    depth: int
+    low_water: int
+    hit_wait: float
+    miss_wait: float
+    max_wait: float
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of requests served from the reservoir."""
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        """Mean seconds a request waited for its hoard."""
+        requests = self.hits + self.misses
+        return (self.hit_wait + self.miss_wait) / requests if requests else 0.0
+
+
+class HoardReservoir:
+    """
+    Pre-generated hoards for unseeded requests, refilled in the background.
+
+    Each (level, coins, goods, items) request the reservoir has seen keeps
+    a deque of up to depth compact hoards. A request pops one in O(1); when
+    the deque drops below the low-water mark its key is queued for the
+    worker threads, which generate it back up to depth. A request finding
+    its deque empty is generated inline, as without a reservoir. With
+    processes, the workers hand each refill to a process pool, so
+    generation does not compete with request threads for the GIL.
+
+    Hoards are made by a generator of the reservoir's own; worker n rolls
+    the stream ("reservoir", n) and process batch n the stream
+    ("reservoir", "batch", n) of its seed. A seed fixes these streams, not
+    which hoard a request gets: that depends on whether the request finds
+    a pregenerated hoard or is generated inline, on which worker refilled
+    its deque and on the order of requests, all of which vary with timing.
+    Use a seeded TreasureGenerator for reproducible hoards.
+
+    Only valid requests (levels 1-20, TreasureType sections) get a deque,
+    so the number of deques is bounded by the requests that exist.
+    """
+
+    def __init__(
+        self,
+        depth: int = 64,
+        low_water: int = 16,
+        workers: int = 1,
+        processes: bool = False,
+        seed: Optional[int] = None,
+        charts_path: Optional[Path] = None,
+        flattened: bool = False,
+        sources: Optional[Dict[Source, int]] = None
+    ):
+        """
+        Initialize reservoir and start its workers.
+
+        Args:
+            depth: Hoards kept per request.
+            low_water: Refill a request's hoards when fewer remain.
+            workers: Worker threads (or processes) refilling the reservoir.
+            processes: Generate refills in worker processes.
+            seed: Seed of the reservoir's generator (default: random); it
+                does not make the hoards handed out reproducible.
+            charts_path: Optional path to charts directory.
+            flattened: Generate with flattened chart chains.
+            sources: Percentage share of each source book.
+
+        Raises:
+            ValueError: If the depth, mark or worker count is out of range.
+        """
+        if depth < 1:
+            raise ValueError("depth must be at least 1")
+        if not 0 <= low_water <= depth:
+            raise ValueError("low_water must be between 0 and depth")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.depth = depth
+        self.low_water = low_water
+        self.generator = TreasureGenerator(
+            seed=seed, charts_path=charts_path, flattened=flattened, sources=sources, compact=True
+        )
+        source_key = None if sources is None else tuple((source.name, percent) for source, percent in sources.items())
+        self._options = (self.generator.dice.seed, charts_path, flattened, source_key)
+
+        self._pools: Dict[ReservoirKey, Deque[CompactTreasure]] = {}
+        self._pending: set = set()
+        self._refills: "queue.Queue[Optional[ReservoirKey]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._generated = 0
+        self._batches = 0
+        self._hit_wait = 0.0
+        self._miss_wait = 0.0
+        self._max_wait = 0.0
+        self._closed = False
+
+        self._executor = ProcessPoolExecutor(max_workers=workers) if processes else None
+        self._workers: List[threading.Thread] = [
+            threading.Thread(target=self._work, args=(number,), name=f"reservoir-{number}", daemon=True)
+            for number in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def __enter__(self) -> "HoardReservoir":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def get(
+        self,
+        level: int,
+        coins: TreasureType = TreasureType.STANDARD,
+        goods: TreasureType = TreasureType.STANDARD,
+        items: TreasureType = TreasureType.STANDARD
+    ) -> Treasure:
+        """
+        Get a hoard, from the reservoir if it holds one.
+
+        Args:
+            level: Encounter level (1-20).
+            coins: Coin generation type.
+            goods: Goods generation type.
+            items: Items generation type.
+
+        Returns:
+            A hoard for the request, as generate() would make it.
+
+        Raises:
+            ValueError: If the level or a treasure type is invalid.
+        """
+        start = time.perf_counter()
+        key = (level, coins, goods, items)
+        pool = self._pools.get(key)
+        if pool is None:
+            check_request(*key)
+            with self._lock:
+                pool = self._pools.setdefault(key, deque())
+        try:
+            compact = pool.popleft()
+        except IndexError:
+            compact = None
+        if len(pool) < self.low_water or compact is None:
+            self._schedule(key)
+
+        if compact is not None:
+            treasure = expand_treasure(compact)
+        else:
+            treasure = self.generator.generate(level, coins, goods, items)
+        wait = time.perf_counter() - start
+        with self._lock:
+            if compact is not None:
+                self._hits += 1
+                self._hit_wait += wait
+            else:
+                self._misses += 1
+                self._miss_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+        return treasure
+
+    def prime(
+        self,
+        level: int,
+        coins: TreasureType = TreasureType.STANDARD,
+        goods: TreasureType = TreasureType.STANDARD,
+        items: TreasureType = TreasureType.STANDARD
+    ) -> None:
+        """
+        Start filling the reservoir for a request before it is first made.
+
+        Args:
+            level: Encounter level (1-20).
+            coins: Coin generation type.
+            goods: Goods generation type.
+            items: Items generation type.
+
+        Raises:
+            ValueError: If the level or a treasure type is invalid.
+        """
+        key = (level, coins, goods, items)
+        check_request(*key)
+        with self._lock:
+            self._pools.setdefault(key, deque())
+        self._schedule(key)
+
+    def join(self) -> None:
+        """Wait until every queued refill is done."""
+        self._refills.join()
+
+    @property
+    def stats(self) -> ReservoirStats:
+        """Current fill levels, counters and wait times."""
+        with self._lock:
+            return ReservoirStats(
+                hits=self._hits,
+                misses=self._misses,
+                generated=self._generated,
+                fill={key: len(pool) for key, pool in self._pools.items()},
+                depth=self.depth,
+                low_water=self.low_water,
+                hit_wait=self._hit_wait,
+                miss_wait=self._miss_wait,
+                max_wait=self._max_wait,
+            )
+
+    def close(self) -> None:
+        """Stop the workers, abandoning queued refills."""
+        self._closed = True
+        for _ in self._workers:
+            self._refills.put(None)
+        for worker in self._workers:
+            worker.join()
+        if self._executor is not None:
+            self._executor.shutdown()
+        self._workers = []
+
+    def _schedule(self, key: ReservoirKey) -> None:
+        """Queue a refill of a request's hoards, unless one is queued already."""
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        self._refills.put(key)
+
+    def _work(self, number: int) -> None:
+        """Worker loop: refill queued requests up to depth."""
+        generator = self.generator.spawn("reservoir", number)
+        while True:
+            key = self._refills.get()
+            try:
+                if key is None:
+                    return
+                pool = self._pools[key]
+                while len(pool) < self.depth and not self._closed:
+                    hoards = self._refill(generator, key, self.depth - len(pool))
+                    pool.extend(hoards)
+                    with self._lock:
+                        self._generated += len(hoards)
+                with self._lock:
+                    self._pending.discard(key)
+                # Requests popping during the refill saw it pending
+                if len(pool) < self.low_water and not self._closed:
+                    self._schedule(key)
+            finally:
+                self._refills.task_done()
+
+    def _refill(self, generator: TreasureGenerator, key: ReservoirKey, count: int) -> List[CompactTreasure]:
+        """Generate hoards for a request, in this thread or in a worker process."""
+        if self._executor is None:
+            return [compact_treasure(generator.generate(*key))]
+        with self._lock:
+            batch = self._batches
+            self._batches += 1
+        return self._executor.submit(_generate_batch, self._options, batch, key, count).result()
+
+
+def _generate_batch(options: tuple, batch: int, key: ReservoirKey, count: int) -> List[CompactTreasure]:
+    """Generate a batch of compact hoards in a worker process."""
+    generator = _process_generators.get(options)
+    if generator is None:
+        seed, charts_path, flattened, source_key = options
+        sources = None if source_key is None else {Source[name]: percent for name, percent in source_key}
+        generator = _process_generators[options] = TreasureGenerator(
+            seed=seed, charts_path=charts_path, flattened=flattened, sources=sources, compact=True
+        )
+    batch_generator = generator.spawn("reservoir", "batch", batch)
+    return [compact_treasure(batch_generator.generate(*key)) for _ in range(count)]
@@ -0,0 +1,172 @@
+"""Spell scroll generation for DMG magic items."""
+
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.keywords import KeywordReplacer
+from dnd_treasure.core.models import Item
+from dnd_treasure.core.provenance import NO_ENTRY, Provenance, TracingReplacer
+from dnd_treasure.data.loader import ChartLoader
+
+
+ARCANE = "arcane"
+DIVINE = "divine"
+MAGIC_TYPES = (ARCANE, DIVINE)
+
+# Spell charts of each magic type: dmg/arcane_scrolls_0 ... dmg/divine_scrolls_9
+SCROLL_CHARTS = "dmg/{}_scrolls_{}"
+SPELL_LEVELS = range(10)
+
+# Charts a ScrollIndex reads: the spell charts and the placeholder charts
+SCROLL_CHART_NAMES = frozenset(
+    [SCROLL_CHARTS.format(magic_type, level) for magic_type in MAGIC_TYPES for level in SPELL_LEVELS]
+    + list(KeywordReplacer.KEYWORD_CHARTS.values())
+)
+
+# Magic item chart entries standing for a set of scrolls, by power
+SCROLL_ENTRIES: Dict[str, str] = {
+    "Minor scroll": "minor",
+    "Medium scroll": "medium",
+    "Major scroll": "major",
+}
+
+# Scrolls of a set are arcane on d100 1-70 and divine on 71-100
+ARCANE_SHARE = 70
+MAGIC_TYPE_TABLE = "scroll magic type"
+
+# DMG Table 7-23/7-24 scroll sets by power: (count die, [(max d100 roll, spell level)])
+SCROLL_TABLE: Dict[str, Tuple[int, List[Tuple[int, int]]]] = {
+    "minor": (3, [(5, 0), (50, 1), (95, 2), (100, 3)]),
+    "medium": (4, [(5, 2), (65, 3), (95, 4), (100, 5)]),
+    "major": (6, [(5, 4), (50, 5), (70, 6), (85, 7), (95, 8), (100, 9)]),
+}
+
+# A spell of the index: (name, gp value, additional sp value)
+Spell = Tuple[str, int, int]
+
+
+class ScrollIndex:
+    """
+    Draws sets of spell scrolls.
+
+    On first use every spell chart is expanded into one flat table with a
+    row per d100 result, so the spell for (magic type, spell level, roll)
+    is a single list lookup; the spell-level bands of each power are
+    expanded the same way. A set of n scrolls then costs its count roll and
+    three batched d100 draws of n, whatever the power. An index is
+    immutable once built and shared by every generator spawned from the
+    one that made it.
+    """
+
+    def __init__(self, chart_loader: ChartLoader):
+        """
+        Initialize scroll index.
+
+        Args:
+            chart_loader: Chart loader holding the spell charts.
+        """
+        self.loader = chart_loader
+        self._spells: Optional[List[Spell]] = None
+        self._offsets: Dict[Tuple[str, int], int] = {}
+        self._levels: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def spell(self, magic_type: str, level: int, roll: int) -> Spell:
+        """
+        Look up a spell.
+
+        Args:
+            magic_type: ARCANE or DIVINE.
+            level: Spell level (0-9).
+            roll: d100 roll.
+
+        Returns:
+            (name, gp value, additional sp value).
+        """
+        self._build()
+        return self._spells[self._offsets[(magic_type, level)] + roll - 1]
+
+    def roll(self, power: str, dice: Dice, trace: Optional[Provenance] = None) -> List[Item]:
+        """
+        Draw a set of scrolls.
+
+        Args:
+            power: 'minor', 'medium' or 'major'.
+            dice: Dice roller.
+            trace: Records the count roll, then each scroll's magic type,
+                spell level, spell and placeholder rolls as its own part.
+
+        Returns:
+            One Item per scroll, named like 'Arcane Scroll of fireball';
+            the additional silver value is kept in the item's flag.
+            Placeholders such as 'protection from {alignment}' are rolled
+            after the set's spells.
+        """
+        self._build()
+        count_die, bands = SCROLL_TABLE[power]
+        count = dice.roll(count_die)
+        types = dice.roll_many(100, count)
+        levels = dice.roll_many(100, count)
+        spells = dice.roll_many(100, count)
+
+        spell_levels = self._levels[power]
+        if trace is None:
+            replacer = KeywordReplacer(self.loader, dice)
+        else:
+            replacer = TracingReplacer(self.loader, dice, trace)
+            trace.record(trace.charts.table(f"d{count_die}"), count, NO_ENTRY)
+            type_table = trace.charts.table(MAGIC_TYPE_TABLE, MAGIC_TYPES)
+            level_table = trace.charts.table(f"{power} scroll level", [f"level {level}" for _, level in bands])
+            band_ends = [max_roll for max_roll, _ in bands]
+        items = []
+        for type_roll, level_roll, spell_roll in zip(types, levels, spells):
+            magic_type = ARCANE if type_roll <= ARCANE_SHARE else DIVINE
+            spell_level = spell_levels[level_roll - 1]
+            offset = self._offsets[(magic_type, spell_level)]
+            name, value, silver = self._spells[offset + spell_roll - 1]
+            if trace is not None:
+                start = trace.size
+                chart_name = SCROLL_CHARTS.format(magic_type, spell_level)
+                trace.record(type_table, type_roll, MAGIC_TYPES.index(magic_type))
+                trace.record(level_table, level_roll, bisect_left(band_ends, level_roll))
+                index = self.loader.load_chart_by_name(chart_name).find_index(spell_roll)
+                trace.record(trace.charts.chart(chart_name), spell_roll, index)
+            items.append(Item(
+                name=f"{magic_type.capitalize()} Scroll of {replacer.replace(name)}",
+                value=value,
+                item_type=power,
+                flag=silver,
+            ))
+            if trace is not None:
+                trace.record_part(start)
+        return items
+
+    def _build(self) -> None:
+        """Expand the spell charts and level bands, once."""
+        if self._spells is not None:
+            return
+        with self._lock:
+            if self._spells is not None:
+                return
+            spells: List[Spell] = []
+            offsets: Dict[Tuple[str, int], int] = {}
+            for magic_type in MAGIC_TYPES:
+                for level in SPELL_LEVELS:
+                    chart = self.loader.load_chart_by_name(SCROLL_CHARTS.format(magic_type, level))
+                    offsets[(magic_type, level)] = len(spells)
+                    for roll in range(1, 101):
+                        entry = chart.find_entry(roll)
+                        if entry is None:
+                            raise ValueError(f"{chart.name} has no entry for {roll}")
+                        spells.append((entry.name, entry.value, entry.flag))
+            levels = {}
+            for power, (_, bands) in SCROLL_TABLE.items():
+                expanded: List[int] = []
+                for max_roll, level in bands:
+                    expanded.extend([level] * (max_roll - len(expanded)))
+                levels[power] = expanded
+            self._offsets = offsets
+            self._levels = levels
+            self._spells = spells
@@ -0,0 +1,100 @@
+"""Source book selection for multi-source treasure generation."""
+
+from typing import Dict, List, Optional, Tuple
+
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.models import Source
+from dnd_treasure.data.loader import ChartLoader, ChartNamespace
+
+
+class SourceSelector:
+    """
+    Picks the source book for each roll, like the legacy multi-source mode.
+
+    Source percentages are turned into d100 bands, and only the namespaces of
+    sources with a non-zero share are requested, once, when the selector is
+    created. Charts of unused sources are never indexed or read. A selector
+    can be shared by generators rolling their own dice, passed to pick().
+    """
+
+    def __init__(
+        self,
+        chart_loader: ChartLoader,
+        dice: Optional[Dice] = None,
+        sources: Optional[Dict[Source, int]] = None
+    ):
+        """
+        Initialize source selector.
+
+        Args:
+            chart_loader: Chart loader providing the source namespaces.
+            dice: Dice roller for picking a source when pick() is given none.
+            sources: Percentage share of each source, adding up to 100.
+                Defaults to DMG only.
+        """
+        if sources is None:
+            sources = {Source.DMG: 100}
+        shares = {source: percent for source, percent in sources.items() if percent > 0}
+        if not shares or sum(shares.values()) != 100:
+            raise ValueError("Source percentages must add up to 100")
+
+        self.loader = chart_loader
+        self.dice = dice
+        self.namespaces: Dict[Source, ChartNamespace] = {
+            source: chart_loader.namespace(source) for source in shares
+        }
+
+        # (highest d100 roll, namespace) in source order
+        self._bands: List[Tuple[int, ChartNamespace]] = []
+        upper = 0
+        for source, percent in shares.items():
+            upper += percent
+            self._bands.append((upper, self.namespaces[source]))
+
+        self._resolved: Dict[Tuple[Source, str], str] = {}
+
+    def pick(self, dice: Optional[Dice] = None) -> ChartNamespace:
+        """
+        Pick the source namespace for the next roll.
+
+        A single source is returned without rolling, so DMG-only generation
+        draws exactly the same dice as before sources existed.
+
+        Args:
+            dice: Dice roller to pick with (default: the selector's).
+
+        Returns:
+            Namespace of the chosen source.
+        """
+        if len(self._bands) == 1:
+            return self._bands[0][1]
+        roll = (dice or self.dice).d100()
+        for upper, namespace in self._bands:
+            if roll <= upper:
+                return namespace
+        return self._bands[-1][1]
+
+    def resolve(self, namespace: ChartNamespace, name: str) -> str:
+        """
+        Resolve a namespace-relative chart to a loader chart name.
+
+        Sources without their own version of a chart use the DMG one, as the
+        legacy generator did for mundane items. Each (source, chart) pair is
+        resolved once per selector.
+
+        Args:
+            namespace: Namespace picked for the roll.
+            name: Chart name relative to the namespace (e.g. 'mundane_items').
+
+        Returns:
+            Chart name for ChartLoader.load_chart_by_name.
+        """
+        key = (namespace.source, name)
+        chart_name = self._resolved.get(key)
+        if chart_name is None:
+            if namespace.source == Source.DMG or name in namespace:
+                chart_name = namespace.qualify(name)
+            else:
+                chart_name = self.loader.namespace(Source.DMG).qualify(name)
+            self._resolved[key] = chart_name
+        return chart_name
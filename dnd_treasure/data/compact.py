@@ -0,0 +1,328 @@
+"""Compact, array-backed chart storage."""
+
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from dnd_treasure.data.models import Chart, ChartEntry, die_size
+
+
+class StringPool:
+    """Interned strings addressed by integer id, shared between charts."""
+
+    def __init__(self):
+        """Initialize an empty pool."""
+        self._strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def intern(self, text: str) -> int:
+        """
+        Add a string to the pool.
+
+        Args:
+            text: String to intern.
+
+        Returns:
+            Id of the (possibly already pooled) string.
+        """
+        string_id = self._ids.get(text)
+        if string_id is None:
+            with self._lock:
+                string_id = self._ids.get(text)
+                if string_id is None:
+                    string_id = len(self._strings)
+                    self._strings.append(text)
+                    self._ids[text] = string_id
+        return string_id
+
+    def __getitem__(self, string_id: int) -> str:
+        """Look up a string by id."""
+        return self._strings[string_id]
+
+    def __len__(self) -> int:
+        """Number of distinct strings in the pool."""
+        return len(self._strings)
+
+
+# Entry names repeat heavily across charts (spell names on scroll and wand
+# charts, keyword values), so all compact charts share one pool.
+NAME_POOL = StringPool()
+
+
+class EntryView:
+    """Read-only view of one row of a CompactChart."""
+
+    __slots__ = ("_chart", "_index")
+
+    def __init__(self, chart: "CompactChart", index: int):
+        """
+        Initialize entry view.
+
+        Args:
+            chart: Chart holding the row.
+            index: Row index.
+        """
+        self._chart = chart
+        self._index = index
+
+    @property
+    def index(self) -> int:
+        """Row index within the chart."""
+        return self._index
+
+    @property
+    def min_roll(self) -> int:
+        return self._chart._min_rolls[self._index]
+
+    @property
+    def max_roll(self) -> int:
+        return self._chart._max_rolls[self._index]
+
+    @property
+    def name(self) -> str:
+        return self._chart.pool[self._chart._name_ids[self._index]]
+
+    @property
+    def value(self) -> int:
+        return self._chart._values[self._index]
+
+    @property
+    def flag(self) -> int:
+        return self._chart._flags[self._index]
+
+    @property
+    def variables(self) -> Optional[Dict[str, str]]:
+        return self._chart._variables.get(self._index)
+
+    def matches_roll(self, roll: int) -> bool:
+        """Check if a roll falls within this entry's range."""
+        return self.min_roll <= roll <= self.max_roll
+
+    def to_entry(self) -> ChartEntry:
+        """Build a standalone ChartEntry with this row's data."""
+        variables = self.variables
+        return ChartEntry(
+            min_roll=self.min_roll,
+            max_roll=self.max_roll,
+            name=self.name,
+            value=self.value,
+            flag=self.flag,
+            variables=dict(variables) if variables else None,
+        )
+
+    def __repr__(self) -> str:
+        return f"EntryView({self._chart.name!r}, {self._index}, {self.name!r})"
+
+
+class CompactChart:
+    """
+    Chart stored as typed integer columns plus ids into a shared name pool.
+
+    Behaves like Chart for lookups. find_entry returns EntryView rows; the
+    ``entries`` list of ChartEntry objects is only built if something asks
+    for it.
+    """
+
+    __slots__ = (
+        "name", "source", "page", "table", "roll_die", "pool",
+        "_min_rolls", "_max_rolls", "_values", "_flags", "_name_ids",
+        "_variables", "_sorted", "_entries",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        source: str,
+        rows: Iterable[Mapping[str, Any]],
+        page: Optional[int] = None,
+        table: Optional[str] = None,
+        roll_die: str = "d100",
+        pool: StringPool = NAME_POOL
+    ):
+        """
+        Initialize compact chart.
+
+        Args:
+            name: Chart name.
+            source: Source book.
+            rows: Entry mappings with min_roll, max_roll, name, value and
+                optional flag and variables (the YAML entry format).
+            page: Optional page reference.
+            table: Optional table reference.
+            roll_die: Die rolled against the chart.
+            pool: String pool for entry names.
+        """
+        self.name = name
+        self.source = source
+        self.page = page
+        self.table = table
+        self.roll_die = roll_die
+        self.pool = pool
+        self._min_rolls = array('i')
+        self._max_rolls = array('i')
+        self._values = array('i')
+        self._flags = array('i')
+        self._name_ids = array('i')
+        self._variables: Dict[int, Dict[str, str]] = {}
+        self._entries: Optional[List[ChartEntry]] = None
+
+        for index, row in enumerate(rows):
+            self._min_rolls.append(row["min_roll"])
+            self._max_rolls.append(row["max_roll"])
+            self._values.append(row["value"])
+            self._flags.append(row.get("flag") or 0)
+            self._name_ids.append(pool.intern(row["name"]))
+            if row.get("variables"):
+                self._variables[index] = dict(row["variables"])
+
+        # Bisect lookups need ascending, non-overlapping bands
+        self._sorted = all(
+            self._max_rolls[i] < self._min_rolls[i + 1]
+            for i in range(len(self._min_rolls) - 1)
+        )
+
+    @classmethod
+    def from_chart(cls, chart: Chart, pool: StringPool = NAME_POOL) -> "CompactChart":
+        """
+        Build a compact copy of a Chart.
+
+        Args:
+            chart: Chart to convert.
+            pool: String pool for entry names.
+
+        Returns:
+            Equivalent CompactChart.
+        """
+        rows = (
+            {
+                "min_roll": entry.min_roll,
+                "max_roll": entry.max_roll,
+                "name": entry.name,
+                "value": entry.value,
+                "flag": entry.flag,
+                "variables": entry.variables,
+            }
+            for entry in chart.entries
+        )
+        return cls(chart.name, chart.source, rows, chart.page, chart.table, chart.roll_die, pool)
+
+    @classmethod
+    def from_columns(
+        cls,
+        name: str,
+        source: str,
+        page: Optional[int],
+        table: Optional[str],
+        roll_die: str,
+        pool: Any,
+        min_rolls: Sequence[int],
+        max_rolls: Sequence[int],
+        values: Sequence[int],
+        flags: Sequence[int],
+        name_ids: Sequence[int],
+        variables: Dict[int, Dict[str, str]],
+        is_sorted: bool
+    ) -> "CompactChart":
+        """
+        Wrap existing columns without copying them (e.g. views of a pack).
+
+        Args:
+            name: Chart name.
+            source: Source book.
+            page: Optional page reference.
+            table: Optional table reference.
+            roll_die: Die rolled against the chart.
+            pool: String pool the name ids refer to.
+            min_rolls: Lowest roll of each row.
+            max_rolls: Highest roll of each row.
+            values: Value of each row.
+            flags: Flag of each row.
+            name_ids: Pool id of each row's name.
+            variables: Variables by row index, for rows that have any.
+            is_sorted: Whether the bands ascend without overlapping.
+
+        Returns:
+            CompactChart over the columns.
+        """
+        chart = object.__new__(cls)
+        chart.name = name
+        chart.source = source
+        chart.page = page
+        chart.table = table
+        chart.roll_die = roll_die
+        chart.pool = pool
+        chart._min_rolls = min_rolls
+        chart._max_rolls = max_rolls
+        chart._values = values
+        chart._flags = flags
+        chart._name_ids = name_ids
+        chart._variables = variables
+        chart._sorted = is_sorted
+        chart._entries = None
+        return chart
+
+    @property
+    def die_size(self) -> int:
+        """Number of sides on the die rolled against this chart."""
+        return die_size(self.roll_die)
+
+    @property
+    def entries(self) -> List[ChartEntry]:
+        """ChartEntry objects for every row, created on first access."""
+        if self._entries is None:
+            self._entries = [self.view(i).to_entry() for i in range(len(self))]
+        return self._entries
+
+    def __len__(self) -> int:
+        """Number of rows."""
+        return len(self._min_rolls)
+
+    def view(self, index: int) -> EntryView:
+        """Get a view of one row."""
+        return EntryView(self, index)
+
+    def rows(self) -> List[EntryView]:
+        """Views of every row, without building ChartEntry objects."""
+        return [EntryView(self, i) for i in range(len(self))]
+
+    def find_entry(self, roll: int) -> Optional[EntryView]:
+        """
+        Find the row matching a given roll.
+
+        Args:
+            roll: The dice roll value.
+
+        Returns:
+            The matching EntryView, or None if not found.
+        """
+        if self._sorted:
+            index = bisect_left(self._max_rolls, roll)
+            if index < len(self) and self._min_rolls[index] <= roll:
+                return EntryView(self, index)
+            return None
+        for index in range(len(self)):
+            if self._min_rolls[index] <= roll <= self._max_rolls[index]:
+                return EntryView(self, index)
+        return None
+
+    def find_index(self, roll: int) -> Optional[int]:
+        """
+        Find the index of the row matching a given roll.
+
+        Args:
+            roll: The dice roll value.
+
+        Returns:
+            Index of the matching row, or None if not found.
+        """
+        if self._sorted:
+            index = bisect_left(self._max_rolls, roll)
+            if index < len(self) and self._min_rolls[index] <= roll:
+                return index
+            return None
+        for index in range(len(self)):
+            if self._min_rolls[index] <= roll <= self._max_rolls[index]:
+                return index
+        return None
@@ -1,28 +1,230 @@
 """Chart loading and caching utilities."""
 
+import hashlib
+import os
+import threading
 import yaml
 from pathlib import Path
-from typing import Dict, Union
+from typing import Dict, List, Optional, Tuple, Union
 
+from dnd_treasure.core.models import Source
+from dnd_treasure.data.compact import CompactChart
 from dnd_treasure.data.models import Chart, ChartEntry
+from dnd_treasure.data.pack import ChartPack, open_pack
+from dnd_treasure.data.search import SearchIndex, load_index, save_index
+
+
+# Chart subdirectory holding each source book's charts
+SOURCE_DIRECTORIES: Dict[Source, str] = {
+    Source.DMG: "dmg",
+    Source.EPH: "eph",
+    Source.MIC: "mic",
+}
+
+# Compact charts are immutable, so every compact loader in the process shares
+# them, keyed by (resolved path, modification time)
+_COMPACT_CHARTS: Dict[Tuple[str, int], CompactChart] = {}
+_COMPACT_LOCK = threading.Lock()
+
+
+def chart_from_data(data: Dict) -> Chart:
+    """
+    Build a Chart from parsed chart YAML.
+
+    Args:
+        data: Mapping with name, source, entries and optional page, table
+            and roll_die, as in the chart files.
+
+    Returns:
+        Chart object.
+    """
+    entries = [
+        ChartEntry(
+            min_roll=entry["min_roll"],
+            max_roll=entry["max_roll"],
+            name=entry["name"],
+            value=entry["value"],
+            flag=entry.get("flag", 0),
+            variables=entry.get("variables")
+        )
+        for entry in data["entries"]
+    ]
+    return Chart(
+        name=data["name"],
+        source=data["source"],
+        entries=entries,
+        page=data.get("page"),
+        table=data.get("table"),
+        roll_die=data.get("roll_die", "d100")
+    )
 
 
 class ChartLoader:
-    """Loads and caches treasure generation charts."""
+    """
+    Loads and caches treasure generation charts.
 
-    def __init__(self, charts_base_path: Union[str, Path, None] = None):
+    A loader can be shared between threads: cache misses are filled under a
+    lock and loaded charts are never modified afterwards.
+    """
+
+    def __init__(
+        self,
+        charts_base_path: Union[str, Path, None] = None,
+        compact: bool = False,
+        pack: Union[str, Path, None] = None
+    ):
         """
         Initialize the chart loader.
 
         Args:
             charts_base_path: Base path for chart files. Defaults to package data/charts.
+            compact: Load charts as array-backed CompactCharts shared across
+                loaders instead of per-loader Chart objects.
+            pack: Chart pack (see write_pack) to serve charts from, as
+                zero-copy views shared by every process mapping it. Charts
+                missing from the pack are read from their files.
+
+        Raises:
+            ValueError: If the pack was built from other chart contents than
+                the files under the base path.
         """
         if charts_base_path is None:
             charts_base_path = Path(__file__).parent / "charts"
         self.charts_base_path = Path(charts_base_path)
-        self._cache: Dict[str, Chart] = {}
+        self.compact = compact
+        self.pack: Optional[ChartPack] = None if pack is None else open_pack(pack)
+        self._cache: Dict[str, Union[Chart, CompactChart]] = {}
+        self._by_name: Dict[str, Union[Chart, CompactChart]] = {}
+        self._namespaces: Dict[Source, "ChartNamespace"] = {}
+        self._lock = threading.RLock()
+        self._hash: Optional[str] = None
+        self._signature: Optional[Tuple[Tuple[str, int, int], ...]] = None
+        self._search_index: Optional[Tuple[str, SearchIndex]] = None
+        self._check_pack()
+
+    def content_hash(self) -> str:
+        """
+        Hash the contents of every chart file under the base path.
+
+        The files are hashed on the first call and the digest is kept, like
+        the loaded charts, until invalidate(); later calls cost nothing.
+        stale() tells whether the files changed since.
+
+        Returns:
+            Hex sha256 digest identifying the chart set.
+        """
+        content_hash = self._hash
+        if content_hash is None:
+            with self._lock:
+                if self._hash is None:
+                    # Taken before reading, so an edit during hashing makes the hash stale
+                    self._signature = self.file_signature()
+                    digest = hashlib.sha256()
+                    for path in sorted(self.charts_base_path.rglob("*.yaml")):
+                        digest.update(str(path.relative_to(self.charts_base_path)).encode("utf-8") + b"\0")
+                        digest.update(path.read_bytes() + b"\0")
+                    self._hash = digest.hexdigest()
+                content_hash = self._hash
+        return content_hash
+
+    def file_signature(self) -> Tuple[Tuple[str, int, int], ...]:
+        """
+        Path, modification time and size of every chart file under the base path.
+
+        Taking it costs a directory walk, not a read of any file.
+
+        Returns:
+            Sorted (relative path, mtime in ns, size) triples.
+        """
+        signature = []
+        directories = [self.charts_base_path]
+        while directories:
+            with os.scandir(directories.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        directories.append(Path(entry.path))
+                    elif entry.name.endswith(".yaml"):
+                        stat = entry.stat()
+                        relative = os.path.relpath(entry.path, self.charts_base_path)
+                        signature.append((relative, stat.st_mtime_ns, stat.st_size))
+        return tuple(sorted(signature))
+
+    def stale(self) -> bool:
+        """
+        Tell whether chart files were added, removed or edited since content_hash().
+
+        Returns:
+            True if the file signature differs from the one taken when the
+            content hash was computed (False before any hash was taken).
+        """
+        signature = self._signature
+        return signature is not None and self.file_signature() != signature
+
+    def invalidate(self) -> None:
+        """
+        Forget the loaded charts and the content hash.
+
+        Call this after editing chart files, so the next lookups read the
+        files again and content_hash() describes the edited set.
+
+        Raises:
+            ValueError: If the loader serves a pack built from the charts
+                as they were before the edit.
+        """
+        with self._lock:
+            self._cache.clear()
+            self._by_name.clear()
+            self._namespaces.clear()
+            self._hash = None
+            self._signature = None
+        self._check_pack()
+
+    def _check_pack(self) -> None:
+        """Refuse a pack that was not built from the current chart files."""
+        if self.pack is not None and self.pack.content_hash != self.content_hash():
+            raise ValueError(
+                f"Chart pack {self.pack.path} was packed from other chart contents "
+                f"than {self.charts_base_path}; rebuild it"
+            )
+
+    def search_index(self, path: Union[str, Path, None] = None) -> SearchIndex:
+        """
+        Get the search index over every chart entry.
+
+        The index is kept by the loader for its content hash, so repeated
+        calls cost a string comparison. With a path, it is read from that
+        file if the file was saved for the same chart contents, and
+        otherwise built from the charts and saved there, so a new process
+        does not have to parse every chart again.
+
+        Args:
+            path: File the index is saved in (see default_index_path).
+
+        Returns:
+            SearchIndex of all charts under the base path.
+        """
+        content_hash = self.content_hash()
+        search_index = self._search_index
+        if search_index is not None and search_index[0] == content_hash:
+            return search_index[1]
+        with self._lock:
+            if self._search_index is None or self._search_index[0] != content_hash:
+                index = None if path is None else load_index(path, content_hash, self.charts_base_path)
+                if index is None:
+                    charts = []
+                    for chart_path in sorted(self.charts_base_path.rglob("*.yaml")):
+                        name = chart_path.relative_to(self.charts_base_path).with_suffix("").as_posix()
+                        charts.append((name, chart_path, self.load_chart_by_name(name)))
+                    index = SearchIndex(charts)
+                    if path is not None:
+                        try:
+                            save_index(index, path, content_hash, self.charts_base_path)
+                        except OSError:
+                            pass  # an unwritable cache only costs the next process a rebuild
+                self._search_index = (content_hash, index)
+            return self._search_index[1]
 
-    def load_chart(self, file_path: Union[str, Path]) -> Chart:
+    def load_chart(self, file_path: Union[str, Path]) -> Union[Chart, CompactChart]:
         """
         Load a chart from a YAML file.
 
@@ -30,47 +232,65 @@ class ChartLoader:
             file_path: Path to the chart YAML file.
 
         Returns:
-            Loaded Chart object.
+            Loaded Chart object (CompactChart for compact loaders).
         """
+        # Key by the resolved path, so 'charts/dmg/../dmg/armor.yaml', relative
+        # and absolute spellings of one file share a single cache entry
         file_path = Path(file_path)
-        cache_key = str(file_path)
+        cache_key = str(file_path.resolve())
 
         # Return cached chart if available
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        chart = self._cache.get(cache_key)
+        if chart is not None:
+            return chart
+
+        with self._lock:
+            chart = self._cache.get(cache_key)
+            if chart is None:
+                chart = self._read_chart(file_path)
+                self._cache[cache_key] = chart
+        return chart
+
+    def _read_chart(self, file_path: Path) -> Union[Chart, CompactChart]:
+        """Read a chart file in the loader's storage format."""
+        if self.pack is not None:
+            try:
+                name = file_path.relative_to(self.charts_base_path).with_suffix("").as_posix()
+            except ValueError:
+                name = None
+            if name in self.pack:
+                return self.pack.chart(name)
+        if self.compact:
+            return self._load_compact(file_path)
 
         # Load from file
         with open(file_path, 'r') as f:
             data = yaml.safe_load(f)
+        return chart_from_data(data)
 
-        # Convert entries to ChartEntry objects
-        entries = [
-            ChartEntry(
-                min_roll=entry["min_roll"],
-                max_roll=entry["max_roll"],
-                name=entry["name"],
-                value=entry["value"],
-                flag=entry.get("flag", 0),
-                variables=entry.get("variables")
+    @staticmethod
+    def _load_compact(file_path: Path) -> CompactChart:
+        """Load a CompactChart straight from YAML, reusing the shared copy."""
+        resolved = file_path.resolve()
+        shared_key = (str(resolved), resolved.stat().st_mtime_ns)
+        with _COMPACT_LOCK:
+            chart = _COMPACT_CHARTS.get(shared_key)
+        if chart is None:
+            with open(resolved, 'r') as f:
+                data = yaml.safe_load(f)
+            chart = CompactChart(
+                name=data["name"],
+                source=data["source"],
+                rows=data["entries"],
+                page=data.get("page"),
+                table=data.get("table"),
+                roll_die=data.get("roll_die", "d100")
             )
-            for entry in data["entries"]
-        ]
-
-        # Create Chart object
-        chart = Chart(
-            name=data["name"],
-            source=data["source"],
-            entries=entries,
-            page=data.get("page"),
-            table=data.get("table"),
-            roll_die=data.get("roll_die", "d100")
-        )
-
-        # Cache and return
-        self._cache[cache_key] = chart
+            with _COMPACT_LOCK:
+                chart = _COMPACT_CHARTS.setdefault(shared_key, chart)
         return chart
 
-    def load_chart_by_name(self, chart_name: str) -> Chart:
+    def load_chart_by_name(self, chart_name: str) -> Union[Chart, CompactChart]:
         """
         Load a chart by its relative name (e.g., 'dmg/armor').
 
@@ -80,5 +300,80 @@ class ChartLoader:
         Returns:
             Loaded Chart object.
         """
-        file_path = self.charts_base_path / f"{chart_name}.yaml"
-        return self.load_chart(file_path)
+        # Chain rolls look charts up by name on every step, so skip the
+        # path handling once a name has been loaded
+        chart = self._by_name.get(chart_name)
+        if chart is None:
+            chart = self.load_chart(self.charts_base_path / f"{chart_name}.yaml")
+            self._by_name[chart_name] = chart
+        return chart
+
+    def namespace(self, source: Source) -> "ChartNamespace":
+        """
+        Get the chart namespace of a source book.
+
+        Namespaces are created on first request, so sources that are never
+        used cost nothing.
+
+        Args:
+            source: Source book.
+
+        Returns:
+            The source's ChartNamespace.
+        """
+        namespace = self._namespaces.get(source)
+        if namespace is None:
+            with self._lock:
+                namespace = self._namespaces.setdefault(source, ChartNamespace(self, source))
+        return namespace
+
+
+class ChartNamespace:
+    """The charts of one source book, indexed and loaded lazily."""
+
+    def __init__(self, loader: ChartLoader, source: Source):
+        """
+        Initialize the namespace.
+
+        Args:
+            loader: Chart loader that reads and caches the chart files.
+            source: Source book the namespace covers.
+        """
+        self.loader = loader
+        self.source = source
+        self.directory = SOURCE_DIRECTORIES[source]
+        self._names: Optional[List[str]] = None
+
+    def names(self) -> List[str]:
+        """
+        List the charts in this namespace.
+
+        The source's directory is only scanned on the first call.
+
+        Returns:
+            Sorted chart names relative to the namespace (e.g. 'armor').
+        """
+        if self._names is None:
+            path = self.loader.charts_base_path / self.directory
+            self._names = sorted(p.stem for p in path.glob("*.yaml"))
+        return self._names
+
+    def __contains__(self, name: str) -> bool:
+        """Check if the namespace has a chart of this name."""
+        return name in self.names()
+
+    def qualify(self, name: str) -> str:
+        """Turn a namespace-relative chart name into a loader chart name."""
+        return f"{self.directory}/{name}"
+
+    def load(self, name: str) -> Union[Chart, CompactChart]:
+        """
+        Load a chart of this namespace.
+
+        Args:
+            name: Chart name relative to the namespace (e.g. 'armor').
+
+        Returns:
+            Loaded Chart object.
+        """
+        return self.loader.load_chart_by_name(self.qualify(name))
@@ -1,7 +1,14 @@
 """Data models for chart structures."""
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Dict, List, NamedTuple, Optional
+
+
+def die_size(roll_die: str) -> int:
+    """Number of sides of a chart die such as 'd100' (defaults to 100)."""
+    if roll_die.startswith('d'):
+        return int(roll_die[1:])
+    return 100
 
 
 @dataclass
@@ -29,6 +36,15 @@ class Chart:
     table: Optional[str] = None
     roll_die: str = "d100"
 
+    @property
+    def die_size(self) -> int:
+        """Number of sides on the die rolled against this chart."""
+        return die_size(self.roll_die)
+
+    def rows(self) -> List[ChartEntry]:
+        """Entries to iterate over (row views for compact charts)."""
+        return self.entries
+
     def find_entry(self, roll: int) -> Optional[ChartEntry]:
         """
         Find the chart entry matching a given roll.
@@ -43,3 +59,29 @@ class Chart:
             if entry.matches_roll(roll):
                 return entry
         return None
+
+    def find_index(self, roll: int) -> Optional[int]:
+        """
+        Find the index of the chart entry matching a given roll.
+
+        Args:
+            roll: The dice roll value.
+
+        Returns:
+            Index of the matching entry, or None if not found.
+        """
+        for index, entry in enumerate(self.entries):
+            if entry.matches_roll(roll):
+                return index
+        return None
+
+    def view(self, index: int) -> ChartEntry:
+        """Get the entry at an index."""
+        return self.entries[index]
+
+
+class ChartResult(NamedTuple):
+    """The final outcome of rolling on a chart and resolving its placeholders."""
+    name: str
+    value: int
+    flag: int = 0
@@ -0,0 +1,262 @@
+"""Copy-on-write chart overlays layered over a shared chart set."""
+
+import hashlib
+import json
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Tuple, Union
+
+import yaml
+
+from dnd_treasure.data.compact import CompactChart
+from dnd_treasure.data.loader import ChartLoader, chart_from_data
+from dnd_treasure.data.models import Chart, ChartEntry
+
+
+# Entry fields a patch may change
+PATCH_FIELDS = ("min_roll", "max_roll", "name", "value", "flag", "variables")
+
+AnyChart = Union[Chart, CompactChart]
+
+
+class ChartOverlay:
+    """
+    Changes to a few charts of a chart set, such as one group's house rules.
+
+    An overlay replaces whole charts or patches single entries; every chart
+    it does not mention is read from the set underneath. Overlays only hold
+    their changes, and are applied by an OverlayLoader.
+    """
+
+    def __init__(self, name: str = "overlay"):
+        """
+        Initialize an empty overlay.
+
+        Args:
+            name: Name of the overlay, for messages.
+        """
+        self.name = name
+        self.charts: Dict[str, Chart] = {}
+        self.patches: Dict[str, List[Tuple[Union[int, str], Dict[str, Any]]]] = {}
+
+    @classmethod
+    def from_data(cls, data: Mapping[str, Any], name: str = "overlay") -> "ChartOverlay":
+        """
+        Build an overlay from parsed YAML.
+
+        The mapping holds 'charts' (chart name -> full chart, in the chart
+        file format) and 'patches' (chart name -> list of changes, each
+        naming its 'entry' by index or name next to the fields to set).
+
+        Args:
+            data: Overlay mapping.
+            name: Name used when the mapping has none.
+
+        Returns:
+            ChartOverlay.
+        """
+        overlay = cls(data.get("name", name))
+        for chart_name, chart in (data.get("charts") or {}).items():
+            overlay.replace(chart_name, chart)
+        for chart_name, changes in (data.get("patches") or {}).items():
+            for change in changes:
+                fields = dict(change)
+                overlay.patch(chart_name, fields.pop("entry"), **fields)
+        return overlay
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "ChartOverlay":
+        """
+        Load an overlay from a YAML file (see from_data).
+
+        Args:
+            path: Overlay file.
+
+        Returns:
+            ChartOverlay named after the file unless it names itself.
+        """
+        path = Path(path)
+        with open(path, 'r') as f:
+            return cls.from_data(yaml.safe_load(f) or {}, path.stem)
+
+    def replace(self, chart_name: str, chart: Union[Chart, Mapping[str, Any]]) -> "ChartOverlay":
+        """
+        Replace a whole chart.
+
+        Args:
+            chart_name: Relative chart name (e.g. 'dmg/bane_creature_type').
+            chart: New chart, or its mapping in the chart file format.
+
+        Returns:
+            This overlay, for chaining.
+        """
+        self.charts[chart_name] = chart if isinstance(chart, Chart) else chart_from_data(chart)
+        return self
+
+    def patch(self, chart_name: str, entry: Union[int, str], **fields: Any) -> "ChartOverlay":
+        """
+        Change fields of one chart entry.
+
+        Args:
+            chart_name: Relative chart name (e.g. 'dmg/potions_minor').
+            entry: Entry index, or the name of the first entry so called.
+            fields: New values of any of PATCH_FIELDS.
+
+        Returns:
+            This overlay, for chaining.
+
+        Raises:
+            ValueError: If a field is not patchable.
+        """
+        unknown = set(fields) - set(PATCH_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot patch {', '.join(sorted(unknown))} of a chart entry")
+        self.patches.setdefault(chart_name, []).append((entry, fields))
+        return self
+
+    def digest(self) -> str:
+        """
+        Hash the overlay's changes.
+
+        Returns:
+            Hex sha256 digest, equal for overlays making the same changes.
+        """
+        data = {
+            "charts": {name: asdict(chart) for name, chart in self.charts.items()},
+            "patches": {name: [[entry, fields] for entry, fields in changes] for name, changes in self.patches.items()},
+        }
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def patch_chart(chart: AnyChart, changes: List[Tuple[Union[int, str], Dict[str, Any]]], overlay: str) -> Chart:
+    """
+    Copy a chart with some entries changed.
+
+    Unchanged entries of a Chart are shared with it, not copied.
+
+    Args:
+        chart: Chart to patch.
+        changes: (entry index or name, fields) pairs, applied in order.
+        overlay: Name of the overlay, for messages.
+
+    Returns:
+        Patched Chart.
+
+    Raises:
+        ValueError: If an entry does not exist.
+    """
+    entries: List[ChartEntry] = [
+        row if isinstance(row, ChartEntry) else row.to_entry() for row in chart.rows()
+    ]
+    for entry, fields in changes:
+        if isinstance(entry, int):
+            index = entry if 0 <= entry < len(entries) else None
+        else:
+            index = next((i for i, row in enumerate(entries) if row.name == entry), None)
+        if index is None:
+            raise ValueError(f"Overlay {overlay}: {chart.name} has no entry {entry!r}")
+        entries[index] = replace(entries[index], **fields)
+    return Chart(
+        name=chart.name,
+        source=chart.source,
+        entries=entries,
+        page=chart.page,
+        table=chart.table,
+        roll_die=chart.roll_die,
+    )
+
+
+class OverlayLoader(ChartLoader):
+    """
+    A chart loader reading through overlays over a shared base loader.
+
+    The charts the overlays touch are built once, when the loader is made,
+    into a layer map from chart name to chart. A lookup is one probe of that
+    map and, for every other chart, the base loader's cache, however many
+    overlays are stacked: an OverlayLoader over another one copies its map
+    rather than chaining to it. Patched charts share their unchanged entries
+    with the base chart, so a loader costs memory for the charts its
+    overlays touch and nothing for the rest.
+    """
+
+    def __init__(self, base: ChartLoader, *overlays: ChartOverlay):
+        """
+        Layer overlays over a loader, later overlays winning.
+
+        Args:
+            base: Loader of the shared chart set (or another OverlayLoader).
+            overlays: Overlays to apply, in order.
+
+        Raises:
+            ValueError: If an overlay names a chart the base set lacks or
+                patches an entry that does not exist.
+        """
+        super().__init__(base.charts_base_path, compact=base.compact)
+        if isinstance(base, OverlayLoader):
+            layers = dict(base.layers)
+            digest = base.overlay_digest
+            base = base.base
+        else:
+            layers = {}
+            digest = ""
+        self.base = base
+        self.pack = base.pack
+
+        for overlay in overlays:
+            for chart_name, chart in overlay.charts.items():
+                self._check_exists(chart_name, overlay)
+                layers[chart_name] = chart
+            for chart_name, changes in overlay.patches.items():
+                chart = layers.get(chart_name)
+                if chart is None:
+                    self._check_exists(chart_name, overlay)
+                    chart = base.load_chart_by_name(chart_name)
+                layers[chart_name] = patch_chart(chart, changes, overlay.name)
+            digest = hashlib.sha256((digest + overlay.digest()).encode("utf-8")).hexdigest()
+        self.layers: Dict[str, Chart] = layers
+        self.overlay_digest = digest
+
+    def _check_exists(self, chart_name: str, overlay: ChartOverlay) -> None:
+        """Make sure an overlay only changes charts of the base set."""
+        if not (self.charts_base_path / f"{chart_name}.yaml").is_file():
+            raise ValueError(f"Overlay {overlay.name}: no chart {chart_name} to change")
+
+    def content_hash(self) -> str:
+        """
+        Hash the base chart set together with the overlays.
+
+        Returns:
+            Hex sha256 digest identifying the layered chart set.
+        """
+        base_hash = self.base.content_hash()
+        return hashlib.sha256(f"{base_hash}:{self.overlay_digest}".encode("utf-8")).hexdigest()
+
+    def load_chart(self, file_path: Union[str, Path]) -> AnyChart:
+        """
+        Load a chart by file path, through the layer map.
+
+        Args:
+            file_path: Path to the chart YAML file.
+
+        Returns:
+            Overlay chart if one replaces the file, else the base chart.
+        """
+        try:
+            name = Path(file_path).resolve().relative_to(self.charts_base_path.resolve()).with_suffix("").as_posix()
+        except ValueError:
+            name = None
+        chart = self.layers.get(name)
+        return chart if chart is not None else self.base.load_chart(file_path)
+
+    def load_chart_by_name(self, chart_name: str) -> AnyChart:
+        """
+        Load a chart by its relative name, through the layer map.
+
+        Args:
+            chart_name: Relative path without .yaml extension.
+
+        Returns:
+            Overlay chart if the overlays touch it, else the base chart.
+        """
+        chart = self.layers.get(chart_name)
+        return chart if chart is not None else self.base.load_chart_by_name(chart_name)
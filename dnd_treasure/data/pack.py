@@ -0,0 +1,240 @@
+"""Chart packs: every chart compiled into one file that processes map read-only."""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Tuple, Union
+
+from dnd_treasure.data.compact import CompactChart, StringPool
+
+
+MAGIC = b"DNDPACK\0"
+VERSION = 1
+
+# magic, version, header length; the JSON header follows, then the data
+_PREAMBLE = struct.Struct("<8sII")
+
+# Columns of every chart, in file order
+COLUMNS = ("min_rolls", "max_rolls", "values", "flags", "name_ids")
+
+# Packs are read-only, so each is mapped once per process, keyed by
+# (resolved path, modification time)
+_PACKS: Dict[Tuple[str, int], "ChartPack"] = {}
+_PACKS_LOCK = threading.Lock()
+
+PathLike = Union[str, Path]
+
+
+class PackedStringPool:
+    """Read-only string pool decoding names straight from a pack's buffer."""
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        """
+        Initialize packed pool.
+
+        Args:
+            offsets: count + 1 byte offsets into blob.
+            blob: UTF-8 bytes of every string.
+        """
+        self._offsets = offsets
+        self._blob = blob
+
+    def __getitem__(self, string_id: int) -> str:
+        """Look up a string by id."""
+        return str(self._blob[self._offsets[string_id]:self._offsets[string_id + 1]], "utf-8")
+
+    def __len__(self) -> int:
+        """Number of strings in the pool."""
+        return len(self._offsets) - 1
+
+
+def write_pack(loader: Any, path: PathLike) -> Dict[str, Any]:
+    """
+    Compile every chart of a loader into a pack file.
+
+    The file is written next to its final path and renamed into place, so
+    processes mapping the old pack keep a consistent view.
+
+    Args:
+        loader: ChartLoader whose charts are packed.
+        path: Pack file to write.
+
+    Returns:
+        The pack header (chart layout and the charts' content hash).
+    """
+    path = Path(path)
+    base = loader.charts_base_path
+    names = sorted(p.relative_to(base).with_suffix("").as_posix() for p in base.rglob("*.yaml"))
+
+    pool = StringPool()
+    data = bytearray()
+    charts: Dict[str, Dict[str, Any]] = {}
+    for name in names:
+        chart = loader.load_chart_by_name(name)
+        rows = chart.rows()
+        columns = {
+            "min_rolls": array("i", (row.min_roll for row in rows)),
+            "max_rolls": array("i", (row.max_roll for row in rows)),
+            "values": array("i", (row.value for row in rows)),
+            "flags": array("i", (row.flag for row in rows)),
+            "name_ids": array("i", (pool.intern(row.name) for row in rows)),
+        }
+        charts[name] = {
+            "name": chart.name,
+            "source": chart.source,
+            "page": chart.page,
+            "table": chart.table,
+            "roll_die": chart.roll_die,
+            "rows": len(rows),
+            "offset": len(data),
+            "sorted": all(rows[i].max_roll < rows[i + 1].min_roll for i in range(len(rows) - 1)),
+            "variables": {str(i): dict(row.variables) for i, row in enumerate(rows) if row.variables},
+        }
+        for column in COLUMNS:
+            data += columns[column].tobytes()
+
+    encoded = [pool[i].encode("utf-8") for i in range(len(pool))]
+    offsets = array("I", [0])
+    for text in encoded:
+        offsets.append(offsets[-1] + len(text))
+    strings_offset = len(data)
+    data += offsets.tobytes()
+    blob_offset = len(data)
+    data += b"".join(encoded)
+
+    header = {
+        "version": VERSION,
+        "content_hash": loader.content_hash(),
+        "byteorder": sys.byteorder,
+        "itemsize": array("i").itemsize,
+        "strings": {"count": len(encoded), "offset": strings_offset, "blob": blob_offset,
+                    "size": len(data) - blob_offset},
+        "charts": charts,
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    padding = -(_PREAMBLE.size + len(header_bytes)) % 8
+
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temporary, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)))
+        f.write(header_bytes + b"\0" * padding)
+        f.write(data)
+    os.replace(temporary, path)
+    return header
+
+
+class ChartPack:
+    """
+    A pack file mapped read-only into memory.
+
+    Charts are CompactCharts whose columns are memoryviews over the mapping,
+    so every process attached to a pack shares the same physical pages and
+    attaching costs only the JSON header parse.
+    """
+
+    def __init__(self, path: PathLike):
+        """
+        Map a pack file.
+
+        Args:
+            path: Pack written by write_pack().
+
+        Raises:
+            ValueError: If the file is not a pack this build can read.
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        magic, version, header_length = _PREAMBLE.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} chart pack")
+        self.header: Dict[str, Any] = json.loads(bytes(view[_PREAMBLE.size:_PREAMBLE.size + header_length]))
+        if self.header["byteorder"] != sys.byteorder or self.header["itemsize"] != array("i").itemsize:
+            raise ValueError(f"{self.path} was packed on an incompatible platform")
+
+        start = _PREAMBLE.size + header_length
+        self._data = view[start + (-start % 8):]
+        strings = self.header["strings"]
+        self.pool = PackedStringPool(
+            self._data[strings["offset"]:strings["blob"]].cast("I"),
+            self._data[strings["blob"]:strings["blob"] + strings["size"]],
+        )
+        self._charts: Dict[str, CompactChart] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def content_hash(self) -> str:
+        """Content hash of the chart files the pack was built from."""
+        return self.header["content_hash"]
+
+    def names(self) -> List[str]:
+        """Names of the packed charts (e.g. 'dmg/rings_minor')."""
+        return list(self.header["charts"])
+
+    def __contains__(self, name: str) -> bool:
+        """Check if the pack has a chart of this name."""
+        return name in self.header["charts"]
+
+    def chart(self, name: str) -> CompactChart:
+        """
+        Get a packed chart as zero-copy views.
+
+        Args:
+            name: Chart name such as 'dmg/rings_minor'.
+
+        Returns:
+            CompactChart reading from the mapping.
+        """
+        chart = self._charts.get(name)
+        if chart is None:
+            with self._lock:
+                chart = self._charts.get(name)
+                if chart is None:
+                    chart = self._charts[name] = self._view(name)
+        return chart
+
+    def _view(self, name: str) -> CompactChart:
+        """Build the CompactChart of a packed chart."""
+        meta = self.header["charts"][name]
+        rows = meta["rows"]
+        size = rows * array("i").itemsize
+        columns = {}
+        for position, column in enumerate(COLUMNS):
+            start = meta["offset"] + position * size
+            columns[column] = self._data[start:start + size].cast("i")
+        return CompactChart.from_columns(
+            name=meta["name"],
+            source=meta["source"],
+            page=meta["page"],
+            table=meta["table"],
+            roll_die=meta["roll_die"],
+            pool=self.pool,
+            variables={int(i): variables for i, variables in meta["variables"].items()},
+            is_sorted=meta["sorted"],
+            **columns,
+        )
+
+
+def open_pack(path: PathLike) -> ChartPack:
+    """
+    Map a pack, reusing the process's mapping if it is already open.
+
+    Args:
+        path: Pack file.
+
+    Returns:
+        Shared ChartPack.
+    """
+    resolved = Path(path).resolve()
+    key = (str(resolved), resolved.stat().st_mtime_ns)
+    with _PACKS_LOCK:
+        pack = _PACKS.get(key)
+        if pack is None:
+            pack = _PACKS[key] = ChartPack(resolved)
+    return pack
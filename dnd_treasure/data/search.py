@@ -0,0 +1,253 @@
+"""Inverted index over the entries of every chart."""
+
+import hashlib
+import json
+import os
+import re
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from dnd_treasure.data.models import Chart
+
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+# Format of saved index files; files of another version are rebuilt
+INDEX_VERSION = 1
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into case-folded word tokens ('Ring of {ring}' -> ring, of, ring)."""
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+class SearchHit(NamedTuple):
+    """A chart entry found by a search."""
+    chart: str
+    source: str
+    min_roll: int
+    max_roll: int
+    roll_die: str
+    name: str
+    value: int
+    flag: int
+    path: Path
+
+    @property
+    def roll_range(self) -> str:
+        """The entry's rolls, e.g. '51-56' or '7'."""
+        if self.min_roll == self.max_roll:
+            return str(self.min_roll)
+        return f"{self.min_roll}-{self.max_roll}"
+
+
+class SearchIndex:
+    """
+    Inverted index of chart entries.
+
+    Entry names are tokenized and case-folded into postings (token -> entry
+    ids); source, chart and flag have postings of their own and values are
+    kept sorted for range filters. A query intersects the postings, smallest
+    first, so lookups touch only the entries that can match.
+    """
+
+    def __init__(self, charts: Iterable[Tuple[str, Path, Chart]]):
+        """
+        Build the index.
+
+        Args:
+            charts: (chart name such as 'dmg/rings_medium', file path, chart)
+                triples; compact charts work too.
+        """
+        self._index([
+            SearchHit(
+                chart=chart_name,
+                source=chart_name.partition("/")[0],
+                min_roll=entry.min_roll,
+                max_roll=entry.max_roll,
+                roll_die=chart.roll_die,
+                name=entry.name,
+                value=entry.value,
+                flag=entry.flag,
+                path=path,
+            )
+            for chart_name, path, chart in charts
+            for entry in chart.rows()
+        ])
+
+    @classmethod
+    def from_hits(cls, hits: Iterable[SearchHit]) -> "SearchIndex":
+        """
+        Build the index over entries already read, e.g. from a saved index.
+
+        Args:
+            hits: Every chart entry, in chart and roll order.
+
+        Returns:
+            SearchIndex of the entries.
+        """
+        index = cls.__new__(cls)
+        index._index(list(hits))
+        return index
+
+    def _index(self, hits: List[SearchHit]) -> None:
+        """Build the postings and value order of the entries."""
+        self.hits = hits
+        self._tokens: Dict[str, Set[int]] = {}
+        self._sources: Dict[str, Set[int]] = {}
+        self._charts: Dict[str, Set[int]] = {}
+        self._flags: Dict[int, Set[int]] = {}
+        for hit_id, hit in enumerate(hits):
+            for token in tokenize(hit.name):
+                self._tokens.setdefault(token, set()).add(hit_id)
+            self._sources.setdefault(hit.source, set()).add(hit_id)
+            self._charts.setdefault(hit.chart, set()).add(hit_id)
+            self._flags.setdefault(hit.flag, set()).add(hit_id)
+
+        self._vocabulary = sorted(self._tokens)
+        by_value = sorted(range(len(self.hits)), key=lambda hit_id: self.hits[hit_id].value)
+        self._values = [self.hits[hit_id].value for hit_id in by_value]
+        self._by_value = by_value
+
+    def __len__(self) -> int:
+        return len(self.hits)
+
+    def search(
+        self,
+        query: str = "",
+        source: Optional[str] = None,
+        chart: Optional[str] = None,
+        flag: Optional[int] = None,
+        min_value: Optional[int] = None,
+        max_value: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[SearchHit]:
+        """
+        Find chart entries.
+
+        Every query word must appear in the entry name; the last word also
+        matches as a prefix ('ring of prot' finds 'Ring of protection +1').
+
+        Args:
+            query: Words to look for in entry names.
+            source: Only entries of this source book (e.g. 'dmg').
+            chart: Only entries of charts whose name contains this text.
+            flag: Only entries with this flag.
+            min_value: Only entries worth at least this much gp.
+            max_value: Only entries worth at most this much gp.
+            limit: Return at most this many hits.
+
+        Returns:
+            Matching entries ordered by chart and roll.
+        """
+        candidates: List[Set[int]] = []
+        tokens = tokenize(query)
+        for token in tokens[:-1]:
+            candidates.append(self._tokens.get(token, set()))
+        if tokens:
+            candidates.append(self._prefix_postings(tokens[-1]))
+        if source is not None:
+            candidates.append(self._sources.get(source.casefold(), set()))
+        if chart is not None:
+            needle = chart.casefold()
+            candidates.append(set().union(
+                *(ids for name, ids in self._charts.items() if needle in name)
+            ))
+        if flag is not None:
+            candidates.append(self._flags.get(flag, set()))
+        if min_value is not None or max_value is not None:
+            low = 0 if min_value is None else bisect_left(self._values, min_value)
+            high = len(self._values) if max_value is None else bisect_right(self._values, max_value)
+            candidates.append(set(self._by_value[low:high]))
+
+        if not candidates:
+            found: Iterable[int] = range(len(self.hits))
+        else:
+            candidates.sort(key=len)
+            found = set(candidates[0]).intersection(*candidates[1:])
+        hits = [self.hits[hit_id] for hit_id in sorted(found)]
+        return hits if limit is None else hits[:limit]
+
+    def _prefix_postings(self, prefix: str) -> Set[int]:
+        """Entry ids of every token starting with prefix."""
+        start = bisect_left(self._vocabulary, prefix)
+        matched = set()
+        for token in self._vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            matched |= self._tokens[token]
+        return matched
+
+
+def default_index_path(charts_base_path: Path) -> Path:
+    """
+    Where the search index of a chart directory is saved by default.
+
+    Args:
+        charts_base_path: Chart directory the index covers.
+
+    Returns:
+        A file under $XDG_CACHE_HOME (or ~/.cache)/dnd_treasure, one per
+        chart directory.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    directory = hashlib.sha256(str(Path(charts_base_path).resolve()).encode("utf-8")).hexdigest()[:16]
+    return Path(cache_home) / "dnd_treasure" / f"search-{directory}.json"
+
+
+def save_index(index: SearchIndex, path: Path, content_hash: str, charts_base_path: Path) -> None:
+    """
+    Save a search index, tagged with the content hash of the charts it covers.
+
+    The file is written next to its final path and renamed into place, so
+    concurrent readers see either the old index or the new one.
+
+    Args:
+        index: Index to save.
+        path: Index file to write.
+        content_hash: Content hash of the chart set.
+        charts_base_path: Chart directory; entry paths are saved relative to it.
+    """
+    path = Path(path)
+    base = Path(charts_base_path)
+    rows = []
+    for hit in index.hits:
+        try:
+            hit_path = hit.path.relative_to(base).as_posix()
+        except ValueError:
+            hit_path = str(hit.path)
+        rows.append([hit.chart, hit.min_roll, hit.max_roll, hit.roll_die, hit.name, hit.value, hit.flag, hit_path])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(json.dumps(
+        {"version": INDEX_VERSION, "content_hash": content_hash, "hits": rows},
+        separators=(",", ":"),
+    ))
+    os.replace(temporary, path)
+
+
+def load_index(path: Path, content_hash: str, charts_base_path: Path) -> Optional[SearchIndex]:
+    """
+    Load a saved search index if it covers the given chart set.
+
+    Args:
+        path: Index file.
+        content_hash: Content hash of the current chart set.
+        charts_base_path: Chart directory entry paths are relative to.
+
+    Returns:
+        The index, or None if the file is missing, unreadable, of another
+        format version or saved for other chart contents.
+    """
+    try:
+        data = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION or data.get("content_hash") != content_hash:
+        return None
+    base = Path(charts_base_path)
+    return SearchIndex.from_hits(
+        SearchHit(chart, chart.partition("/")[0], min_roll, max_roll, roll_die, name, value, flag, base / hit_path)
+        for chart, min_roll, max_roll, roll_die, name, value, flag, hit_path in data["hits"]
+    )
@@ -1,6 +1,8 @@
 """Base formatter interface."""
 
 from abc import ABC, abstractmethod
+from typing import Optional
+
 from dnd_treasure.core.models import Treasure
 
 
@@ -19,3 +21,21 @@ class BaseFormatter(ABC):
             Formatted string representation.
         """
         pass
+
+    @staticmethod
+    def provenance(treasure: Treasure, index: int) -> Optional[str]:
+        """
+        Render the rolls behind an item, if the hoard recorded them.
+
+        Args:
+            treasure: The treasure holding the item.
+            index: Index of the item.
+
+        Returns:
+            Text like 'items L7 roll 88 → minor → ...', or None without a
+            recorded provenance.
+        """
+        trace = treasure.provenance
+        if trace is None or index >= len(trace):
+            return None
+        return trace.render(index)
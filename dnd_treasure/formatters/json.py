@@ -0,0 +1,65 @@
+"""JSON formatter."""
+
+import json
+from typing import Any, Dict
+
+from dnd_treasure.core.models import Treasure
+from dnd_treasure.formatters.base import BaseFormatter
+
+
+class JsonFormatter(BaseFormatter):
+    """Formats treasure as JSON."""
+
+    def __init__(self, indent: int = 2):
+        """
+        Initialize JSON formatter.
+
+        Args:
+            indent: Indentation of the output (None for a single line).
+        """
+        self.indent = indent
+
+    def format(self, treasure: Treasure) -> str:
+        """
+        Format treasure as a JSON document.
+
+        Args:
+            treasure: The treasure to format.
+
+        Returns:
+            JSON text.
+        """
+        return json.dumps(self.to_dict(treasure), indent=self.indent)
+
+    @staticmethod
+    def to_dict(treasure: Treasure) -> Dict[str, Any]:
+        """
+        Convert treasure to JSON-compatible data.
+
+        Args:
+            treasure: The treasure to convert.
+
+        Returns:
+            Dictionary with level, coins, goods and items; items carry
+            their 'provenance' when the hoard recorded it.
+        """
+        data = {
+            "level": treasure.level,
+            "coins": list(treasure.coins),
+            "goods": list(treasure.goods),
+            "items": [
+                {
+                    "name": item.name,
+                    "value": item.value,
+                    "item_type": item.item_type,
+                    "flag": item.flag,
+                }
+                for item in treasure.items
+            ],
+        }
+        if treasure.provenance is not None:
+            for index, item in enumerate(data["items"]):
+                provenance = JsonFormatter.provenance(treasure, index)
+                if provenance is not None:
+                    item["provenance"] = provenance
+        return data
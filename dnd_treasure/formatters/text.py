@@ -35,7 +35,10 @@ class TextFormatter(BaseFormatter):
 
         # Items
         lines.append("ITEMS:")
-        for item in treasure.items:
+        for index, item in enumerate(treasure.items):
             lines.append(f"  {item.display()}")
+            provenance = self.provenance(treasure, index)
+            if provenance is not None:
+                lines.append(f"    from {provenance}")
 
         return "\n".join(lines)
@@ -0,0 +1,397 @@
+"""Resumable, sharded batch jobs on a shared filesystem."""
+
+import json
+import os
+import socket
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.models import Source, TreasureType
+from dnd_treasure.data.loader import ChartLoader
+from dnd_treasure.data.pack import write_pack
+from dnd_treasure.formatters.json import JsonFormatter
+
+
+MANIFEST_VERSION = 2
+MANIFEST_FILE = "manifest.json"
+SHARDS_DIR = "shards"
+CLAIMS_DIR = "claims"
+DONE_DIR = "done"
+PACK_FILE = "charts.pack"
+
+PathLike = Union[str, Path]
+
+
+def plan_job(
+    directory: PathLike,
+    seed: int,
+    count: int,
+    levels: Dict[int, int],
+    shard_size: int = 10_000,
+    coins: TreasureType = TreasureType.STANDARD,
+    goods: TreasureType = TreasureType.STANDARD,
+    items: TreasureType = TreasureType.STANDARD,
+    flattened: bool = False,
+    sources: Optional[Dict[Source, int]] = None
+) -> Dict[str, Any]:
+    """
+    Write the manifest of a new job.
+
+    The hoards are split into shards of shard_size; every shard gets its own
+    seed derived from the job seed, so shards can run anywhere, in any order,
+    and still produce the same hoards. The content hash of the chart set is
+    recorded too, and shards are only run against the same charts.
+
+    Args:
+        directory: Job directory (created if missing, must not hold a job).
+        seed: Job seed.
+        count: Total number of hoards.
+        levels: Level mix as level -> weight (e.g. {5: 1} or {5: 3, 10: 1}).
+        shard_size: Hoards per shard.
+        coins: Coin generation type.
+        goods: Goods generation type.
+        items: Items generation type.
+        flattened: Use flattened chart sampling.
+        sources: Percentage share of each source book.
+
+    Returns:
+        The manifest.
+    """
+    if count < 1 or shard_size < 1:
+        raise ValueError("count and shard_size must be at least 1")
+    if not levels or any(not 1 <= level <= 20 or weight < 1 for level, weight in levels.items()):
+        raise ValueError("levels must map levels 1-20 to positive weights")
+
+    directory = Path(directory)
+    if (directory / MANIFEST_FILE).exists():
+        raise FileExistsError(f"{directory} already holds a job")
+
+    shards = []
+    for shard_id, start in enumerate(range(0, count, shard_size)):
+        shards.append({
+            "id": shard_id,
+            "start": start,
+            "count": min(shard_size, count - start),
+            "seed": Dice.derive_seed(seed, "shard", shard_id),
+        })
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "seed": seed,
+        "count": count,
+        "shard_size": shard_size,
+        "levels": {str(level): weight for level, weight in sorted(levels.items())},
+        "coins": coins.name,
+        "goods": goods.name,
+        "items": items.name,
+        "flattened": flattened,
+        "sources": None if sources is None else {s.name: p for s, p in sources.items()},
+        "chart_hash": ChartLoader(compact=True).content_hash(),
+        "shards": shards,
+    }
+    for subdirectory in (SHARDS_DIR, CLAIMS_DIR, DONE_DIR):
+        (directory / subdirectory).mkdir(parents=True, exist_ok=True)
+    _write_atomic(directory / MANIFEST_FILE, json.dumps(manifest, indent=2).encode("utf-8"))
+    return manifest
+
+
+def load_manifest(directory: PathLike) -> Dict[str, Any]:
+    """Read a job's manifest."""
+    with open(Path(directory) / MANIFEST_FILE, "r") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version {manifest.get('version')}")
+    return manifest
+
+
+def shard_name(shard_id: int) -> str:
+    """File stem of a shard."""
+    return f"shard-{shard_id:06d}"
+
+
+def pending_shards(directory: PathLike) -> List[int]:
+    """Ids of shards without a completion checkpoint."""
+    directory = Path(directory)
+    manifest = load_manifest(directory)
+    return [
+        shard["id"] for shard in manifest["shards"]
+        if not (directory / DONE_DIR / f"{shard_name(shard['id'])}.json").exists()
+    ]
+
+
+def run_job(
+    directory: PathLike,
+    workers: int = 1,
+    shard_ids: Optional[List[int]] = None,
+    stale_after: float = 3600.0
+) -> List[int]:
+    """
+    Process the job's pending shards.
+
+    Shards are claimed by creating a claim file exclusively, so any number of
+    runs on machines sharing the directory can work on one job. Claims older
+    than stale_after seconds are taken over (the run holding them is assumed
+    dead). Shard output is deterministic, so a shard that does end up being
+    processed twice is merely wasted work.
+
+    With several workers the charts are compiled once into a chart pack in
+    the job directory, which every worker maps read-only instead of loading
+    its own copy.
+
+    Args:
+        directory: Job directory.
+        workers: Local worker processes.
+        shard_ids: Only process these shards (default: all pending).
+        stale_after: Age in seconds after which a claim is abandoned.
+
+    Returns:
+        Ids of the shards this call completed.
+
+    Raises:
+        ValueError: If the local charts differ from those the job was
+            planned with.
+    """
+    directory = Path(directory)
+    loader = ChartLoader(compact=True)
+    _check_charts(load_manifest(directory), loader)
+    pending = pending_shards(directory)
+    if shard_ids is not None:
+        pending = [shard_id for shard_id in pending if shard_id in set(shard_ids)]
+
+    if workers <= 1:
+        return [
+            shard_id for shard_id in pending
+            if _claim_and_run(str(directory), shard_id, stale_after)
+        ]
+    pack = directory / PACK_FILE
+    write_pack(loader, pack)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        done = executor.map(
+            _claim_and_run,
+            [str(directory)] * len(pending),
+            pending,
+            [stale_after] * len(pending),
+            [str(pack)] * len(pending),
+        )
+        return [shard_id for shard_id, completed in zip(pending, done) if completed]
+
+
+def run_shard(directory: PathLike, shard_id: int, pack: Optional[PathLike] = None) -> Dict[str, Any]:
+    """
+    Generate one shard and checkpoint it.
+
+    Hoards are streamed to a temporary file that is renamed into place once
+    complete; the completion checkpoint is written (atomically) last. An
+    interrupted shard leaves no checkpoint and is simply run again.
+
+    Args:
+        directory: Job directory.
+        shard_id: Shard to run.
+        pack: Chart pack to read the charts from.
+
+    Returns:
+        The shard's completion checkpoint.
+
+    Raises:
+        ValueError: If the charts differ from those the job was planned with.
+    """
+    directory = Path(directory)
+    manifest = load_manifest(directory)
+    _check_charts(manifest, ChartLoader(compact=True, pack=pack))
+    shard = manifest["shards"][shard_id]
+    name = shard_name(shard_id)
+
+    output = directory / SHARDS_DIR / f"{name}.jsonl"
+    temporary = _temporary_path(output)
+    with open(temporary, "w") as f:
+        for record in _shard_records(manifest, shard, pack):
+            f.write(json.dumps(record, separators=(",", ":")))
+            f.write("\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, output)
+
+    checkpoint = {
+        "id": shard_id,
+        "count": shard["count"],
+        "output": f"{SHARDS_DIR}/{output.name}",
+        "chart_hash": manifest["chart_hash"],
+        "host": socket.gethostname(),
+        "finished": time.time(),
+    }
+    _write_atomic(directory / DONE_DIR / f"{name}.json", json.dumps(checkpoint).encode("utf-8"))
+    (directory / CLAIMS_DIR / f"{name}.claim").unlink(missing_ok=True)
+    return checkpoint
+
+
+def merge_job(directory: PathLike) -> Iterator[Dict[str, Any]]:
+    """
+    Stream every hoard of a finished job in index order.
+
+    Args:
+        directory: Job directory.
+
+    Returns:
+        Iterator over the hoard records (index, level, coins, goods, items).
+
+    Raises:
+        RuntimeError: If any shard is not finished.
+        ValueError: If a shard was generated from other charts than the job
+            was planned with.
+    """
+    directory = Path(directory)
+    missing = pending_shards(directory)
+    if missing:
+        raise RuntimeError(f"{len(missing)} shard(s) not finished: {missing[:10]}")
+    manifest = load_manifest(directory)
+    for shard in manifest["shards"]:
+        with open(directory / DONE_DIR / f"{shard_name(shard['id'])}.json", "r") as f:
+            if json.load(f).get("chart_hash") != manifest["chart_hash"]:
+                raise ValueError(
+                    f"Shard {shard['id']} was generated from other charts than the job was planned with; "
+                    f"run it again"
+                )
+    return _merged_records(directory, manifest)
+
+
+def _merged_records(directory: Path, manifest: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Stream the hoard records of every shard in order."""
+    for shard in manifest["shards"]:
+        with open(directory / SHARDS_DIR / f"{shard_name(shard['id'])}.jsonl", "r") as f:
+            for line in f:
+                yield json.loads(line)
+
+
+def aggregate(records: Iterator[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Summarize hoard records.
+
+    Args:
+        records: Hoard records, e.g. from merge_job.
+
+    Returns:
+        Hoard counts per level, coin totals per coin type, and item counts
+        and values per item type.
+    """
+    hoards = 0
+    levels: Counter = Counter()
+    coins: Counter = Counter()
+    item_counts: Counter = Counter()
+    item_values: Counter = Counter()
+    for record in records:
+        hoards += 1
+        levels[record["level"]] += 1
+        for coin in record["coins"]:
+            amount, _, coin_type = coin.partition(" ")
+            if amount.isdigit():
+                coins[coin_type] += int(amount)
+        for item in record["items"]:
+            if item["item_type"] != "none":
+                item_counts[item["item_type"]] += 1
+                item_values[item["item_type"]] += item["value"]
+    return {
+        "hoards": hoards,
+        "levels": {str(level): levels[level] for level in sorted(levels)},
+        "coins": dict(sorted(coins.items())),
+        "items": {
+            kind: {"count": item_counts[kind], "value": item_values[kind]}
+            for kind in sorted(item_counts)
+        },
+    }
+
+
+def _shard_records(
+    manifest: Dict[str, Any],
+    shard: Dict[str, Any],
+    pack: Optional[PathLike] = None
+) -> Iterator[Dict[str, Any]]:
+    """Generate the hoard records of a shard."""
+    sources = manifest["sources"]
+    generator = TreasureGenerator(
+        seed=shard["seed"],
+        flattened=manifest["flattened"],
+        sources=None if sources is None else {Source[s]: p for s, p in sources.items()},
+        compact=True,
+        pack=pack,
+    )
+    coins = TreasureType[manifest["coins"]]
+    goods = TreasureType[manifest["goods"]]
+    items = TreasureType[manifest["items"]]
+
+    levels = [(int(level), weight) for level, weight in manifest["levels"].items()]
+    total_weight = sum(weight for _, weight in levels)
+    level_dice = generator.dice.spawn("levels")
+
+    for offset in range(shard["count"]):
+        level = levels[0][0]
+        if len(levels) > 1:
+            roll = level_dice.roll(total_weight)
+            for level, weight in levels:
+                roll -= weight
+                if roll <= 0:
+                    break
+        treasure = generator.generate(level, coins, goods, items)
+        yield {"index": shard["start"] + offset, **JsonFormatter.to_dict(treasure)}
+
+
+def _check_charts(manifest: Dict[str, Any], loader: ChartLoader) -> None:
+    """Refuse to generate a job's hoards from other charts than it was planned with."""
+    if loader.content_hash() != manifest["chart_hash"]:
+        raise ValueError(
+            f"Charts under {loader.charts_base_path} differ from those the job was planned with; "
+            f"run it where the charts match"
+        )
+
+
+def _claim_and_run(directory: str, shard_id: int, stale_after: float, pack: Optional[str] = None) -> bool:
+    """Claim a shard and run it; False if another run holds the claim."""
+    directory = Path(directory)
+    if not _claim(directory, shard_id, stale_after):
+        return False
+    name = shard_name(shard_id)
+    if (directory / DONE_DIR / f"{name}.json").exists():
+        # Finished by another run between listing and claiming
+        (directory / CLAIMS_DIR / f"{name}.claim").unlink(missing_ok=True)
+        return False
+    run_shard(directory, shard_id, pack)
+    return True
+
+
+def _claim(directory: Path, shard_id: int, stale_after: float) -> bool:
+    """Claim a shard with an exclusively created claim file."""
+    claim = directory / CLAIMS_DIR / f"{shard_name(shard_id)}.claim"
+    owner = json.dumps({"host": socket.gethostname(), "pid": os.getpid(), "claimed": time.time()})
+    try:
+        fd = os.open(claim, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            age = time.time() - claim.stat().st_mtime
+        except FileNotFoundError:
+            return _claim(directory, shard_id, stale_after)
+        if age < stale_after:
+            return False
+        _write_atomic(claim, owner.encode("utf-8"))
+        return True
+    with os.fdopen(fd, "w") as f:
+        f.write(owner)
+    return True
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write a file so readers see either the old or the complete new content."""
+    temporary = _temporary_path(path)
+    with open(temporary, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def _temporary_path(path: Path) -> Path:
+    """Temporary sibling of a file, unique to this host and process."""
+    return path.with_name(f"{path.name}.{socket.gethostname()}.{os.getpid()}.tmp")
@@ -0,0 +1,267 @@
+"""Campaign wealth planning over a list of encounters."""
+
+import re
+from collections import Counter
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+from dnd_treasure.batch import EncounterRequest
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.models import Treasure, TreasureType, check_request
+
+
+# gp worth of one coin of each denomination
+COIN_VALUES = {"cp": 0.01, "sp": 0.1, "gp": 1, "pp": 10}
+
+COIN_PATTERN = re.compile(r'^(\d+) (cp|sp|gp|pp)$')
+# Goods listed with their worth, e.g. 'Silver pearl (100 gp)'
+GOODS_VALUE_PATTERN = re.compile(r'\((\d+) gp\)$')
+
+
+def hoard_value(treasure: Treasure) -> float:
+    """
+    Total gp value of a hoard.
+
+    Args:
+        treasure: The hoard.
+
+    Returns:
+        Value of its coins, priced goods and items in gp.
+    """
+    value = 0.0
+    for coin in treasure.coins:
+        match = COIN_PATTERN.match(coin)
+        if match:
+            value += int(match.group(1)) * COIN_VALUES[match.group(2)]
+    for good in treasure.goods:
+        match = GOODS_VALUE_PATTERN.search(good)
+        if match:
+            value += int(match.group(1))
+    return value + sum(item.value for item in treasure.items)
+
+
+def _check_encounter(position: int, encounter: EncounterRequest) -> None:
+    """Validate an encounter's level and treasure types."""
+    try:
+        check_request(encounter.level, encounter.coins, encounter.goods, encounter.items)
+    except ValueError as e:
+        raise ValueError(f"encounter {position}: {e}") from None
+
+
+class LevelWealth(NamedTuple):
+    """Planned wealth of one level of a campaign against its target."""
+    level: int
+    encounters: int
+    wealth: float
+    budget: float
+    cumulative: float
+    target: float
+
+    @property
+    def deviation(self) -> float:
+        """Relative difference of the level's wealth from its budget."""
+        return (self.wealth - self.budget) / self.budget if self.budget else 0.0
+
+
+class CampaignPlan:
+    """
+    Hoards for every encounter of a campaign, tuned toward wealth targets.
+
+    Targets give the party wealth (gp) expected once the encounters of a
+    level are done; the budget of a level is its target minus the previous
+    target's. Encounters are generated in one batched pass grouped by
+    (level, types), each on its own stream keyed by the encounter's id (or
+    position) and revision, so regenerating or re-tuning one encounter
+    leaves every other hoard as it was. Without ids or revisions the hoards
+    are those `dnd-treasure batch` makes for the same list and seed.
+    """
+
+    def __init__(
+        self,
+        encounters: Sequence[EncounterRequest],
+        targets: Mapping[int, float],
+        generator: Optional[TreasureGenerator] = None,
+        threads: int = 1
+    ):
+        """
+        Plan a campaign, generating every encounter's hoard.
+
+        Args:
+            encounters: Encounters in campaign order.
+            targets: Cumulative party wealth (gp) after each level.
+            generator: Generator to spawn the hoard streams from.
+            threads: Worker threads of the batched passes.
+
+        Raises:
+            ValueError: If an encounter's level is not 1-20 or a type is
+                not a TreasureType, or two encounters have the same id.
+        """
+        self.encounters: List[EncounterRequest] = list(encounters)
+        for position, encounter in enumerate(self.encounters):
+            _check_encounter(position, encounter)
+        ids = Counter(encounter.id for encounter in self.encounters if encounter.id is not None)
+        duplicates = sorted(name for name, uses in ids.items() if uses > 1)
+        if duplicates:
+            raise ValueError(f"Duplicate encounter ids: {', '.join(duplicates)}")
+        self.targets: Dict[int, float] = dict(sorted(targets.items()))
+        self.generator = generator if generator is not None else TreasureGenerator()
+        self.threads = threads
+        self.revisions: List[int] = [0] * len(self.encounters)
+        self._next_revision: List[int] = [1] * len(self.encounters)
+        self.hoards: List[Optional[Treasure]] = [None] * len(self.encounters)
+        self.values: List[float] = [0.0] * len(self.encounters)
+        self._accept(self._generate(range(len(self.encounters))))
+
+    def curve(self) -> List[LevelWealth]:
+        """
+        The campaign's wealth by level against the targets.
+
+        Returns:
+            One LevelWealth per level with encounters or a target, in
+            level order; levels without a target get the previous one.
+        """
+        wealth: Dict[int, float] = {}
+        counts: Dict[int, int] = {}
+        for encounter, value in zip(self.encounters, self.values):
+            wealth[encounter.level] = wealth.get(encounter.level, 0.0) + value
+            counts[encounter.level] = counts.get(encounter.level, 0) + 1
+
+        curve = []
+        cumulative = 0.0
+        previous_target = 0.0
+        for level in sorted(set(wealth) | set(self.targets)):
+            target = self.targets.get(level, previous_target)
+            cumulative += wealth.get(level, 0.0)
+            curve.append(LevelWealth(
+                level=level,
+                encounters=counts.get(level, 0),
+                wealth=wealth.get(level, 0.0),
+                budget=target - previous_target,
+                cumulative=cumulative,
+                target=target,
+            ))
+            previous_target = target
+        return curve
+
+    def retune(self, position: int, **changes: Union[int, TreasureType]) -> Treasure:
+        """
+        Change one encounter and regenerate only its hoard.
+
+        Args:
+            position: Position of the encounter in the campaign.
+            changes: New level, coins, goods or items of the encounter.
+
+        Returns:
+            The encounter's new hoard.
+
+        Raises:
+            ValueError: If a change is not one of those fields, or the new
+                level is not 1-20 or a new type not a TreasureType.
+        """
+        unknown = set(changes) - {"level", "coins", "goods", "items"}
+        if unknown:
+            raise ValueError(f"Cannot change {', '.join(sorted(unknown))} of an encounter")
+        encounter = self.encounters[position]._replace(**changes)
+        _check_encounter(position, encounter)
+        self.encounters[position] = encounter
+        self._accept(self._generate([position]))
+        return self.hoards[position]
+
+    def rebalance(self, tolerance: float = 0.25, max_rounds: int = 50) -> List[int]:
+        """
+        Regenerate hoards of levels off budget until they are within tolerance.
+
+        Each round picks, in every level whose wealth is off its budget by
+        more than the tolerance, the hoard pulling it furthest the wrong
+        way (the richest of a level over budget, the poorest of one under)
+        and regenerates all picks in one batched pass on their next
+        revision. A new hoard is kept only if it brings its level closer to
+        budget. Levels within tolerance, and levels without a budget, are
+        never touched.
+
+        Args:
+            tolerance: Allowed relative deviation of a level from its budget.
+            max_rounds: Most batched passes to make.
+
+        Returns:
+            Positions of the encounters whose hoards were replaced.
+        """
+        changed = set()
+        for _ in range(max_rounds):
+            picks = self._picks(tolerance)
+            if not picks:
+                break
+            budgets = {entry.level: entry for entry in self.curve()}
+            candidates = self._generate(picks, [self._next_revision[position] for position in picks])
+            kept = []
+            for position, revision, hoard in candidates:
+                self._next_revision[position] = revision + 1
+                level = budgets[self.encounters[position].level]
+                new_wealth = level.wealth - self.values[position] + hoard_value(hoard)
+                if abs(new_wealth - level.budget) < abs(level.wealth - level.budget):
+                    kept.append((position, revision, hoard))
+                    changed.add(position)
+            self._accept(kept)
+        return sorted(changed)
+
+    def _picks(self, tolerance: float) -> List[int]:
+        """The encounter to regenerate in every level off budget."""
+        picks = []
+        for entry in self.curve():
+            if entry.budget <= 0 or not entry.encounters or abs(entry.deviation) <= tolerance:
+                continue
+            positions = [i for i, encounter in enumerate(self.encounters) if encounter.level == entry.level]
+            if entry.deviation > 0:
+                picks.append(max(positions, key=lambda i: self.values[i]))
+            else:
+                picks.append(min(positions, key=lambda i: self.values[i]))
+        return picks
+
+    def stream_key(self, position: int, revision: Optional[int] = None) -> Tuple[str, Union[int, str], int]:
+        """
+        Stream key of an encounter's hoard.
+
+        Ids and input indexes are tagged, so id '3' and row 3 (or id 'a#1'
+        and revision 1 of id 'a') never share a stream.
+
+        Args:
+            position: Position of the encounter in the campaign.
+            revision: Revision of the hoard (default: the current one).
+
+        Returns:
+            ("id", id, revision), or ("row", input index, revision) for an
+            encounter without an id.
+        """
+        encounter = self.encounters[position]
+        if revision is None:
+            revision = self.revisions[position]
+        if encounter.id is not None:
+            return "id", encounter.id, revision
+        return "row", encounter.index, revision
+
+    def _generate(
+        self,
+        positions: Sequence[int],
+        revisions: Optional[Sequence[int]] = None
+    ) -> List[Tuple[int, int, Treasure]]:
+        """Generate hoards of some encounters in one pass grouped by (level, types)."""
+        if revisions is None:
+            revisions = [self.revisions[position] for position in positions]
+        groups: Dict[Tuple, List[Tuple[int, int]]] = {}
+        for position, revision in zip(positions, revisions):
+            groups.setdefault(self.encounters[position].group, []).append((position, revision))
+
+        generated = []
+        for (level, coins, goods, items), members in groups.items():
+            keys = [self.stream_key(position, revision) for position, revision in members]
+            hoards = self.generator.generate_many(
+                level, len(members), coins, goods, items, threads=self.threads, keys=keys
+            )
+            generated.extend((position, revision, hoard) for (position, revision), hoard in zip(members, hoards))
+        return generated
+
+    def _accept(self, generated: Sequence[Tuple[int, int, Treasure]]) -> None:
+        """Make generated hoards the encounters' current ones."""
+        for position, revision, hoard in generated:
+            self.revisions[position] = revision
+            self.hoards[position] = hoard
+            self.values[position] = hoard_value(hoard)
@@ -0,0 +1,515 @@
+"""Compact binary wire format for hoards."""
+
+import re
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+from dnd_treasure.core.expressions import chart_expression
+from dnd_treasure.core.keywords import KEYWORD_PATTERN, KeywordReplacer
+from dnd_treasure.core.models import Item, Treasure
+from dnd_treasure.data.loader import ChartLoader
+
+
+MAGIC = b"DNDW"
+VERSION = 1
+
+# magic, version, sha256 of the chart set; the body follows
+_PREAMBLE = struct.Struct("<4sB32s")
+
+# Coin codes: 0 is "No Coins", 1-4 a denomination with a varint amount,
+# LITERAL a string the generator made some other way
+DENOMINATIONS = ("cp", "sp", "gp", "pp")
+NO_COINS = "No Coins"
+NO_GOODS = "No Goods"
+LITERAL = 7
+
+# Item type codes, 3 bits of an item's first byte; LITERAL is a string
+ITEM_TYPES = ("none", "mundane", "minor", "medium", "major")
+
+# Low bit of an item's first byte: name as a chart reference or a string
+_REFERENCE = 1
+
+# Error for a payload that ends inside a field
+TRUNCATED = "Truncated hoard payload"
+
+# Item names kept per catalog (least recently used dropped first), to skip
+# matching names already seen
+MEMO_SIZE = 4096
+
+# A chart entry reference: (chart id, entry index, ((chart id, entry index) per placeholder))
+Reference = Tuple[int, int, Tuple[Tuple[int, int], ...]]
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def _varint(number: int, out: bytearray) -> None:
+    """Append an unsigned LEB128 varint."""
+    while number > 0x7F:
+        out.append(number & 0x7F | 0x80)
+        number >>= 7
+    out.append(number)
+
+
+def _zigzag(number: int, out: bytearray) -> None:
+    """Append a signed number as a zigzag varint."""
+    _varint(number << 1 if number >= 0 else (-number << 1) - 1, out)
+
+
+def _string(text: str, out: bytearray) -> None:
+    """Append a length-prefixed UTF-8 string."""
+    encoded = text.encode("utf-8")
+    _varint(len(encoded), out)
+    out += encoded
+
+
+def _read_varint(data: memoryview, position: int) -> Tuple[int, int]:
+    """Read a varint; returns (number, next position)."""
+    byte = data[position]
+    if byte < 0x80:
+        return byte, position + 1
+    number = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        number |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return number, position
+        shift += 7
+
+
+def _read_bytes(data: memoryview, position: int) -> Tuple[memoryview, int]:
+    """Read a length-prefixed byte string; returns (view, next position)."""
+    length, position = _read_varint(data, position)
+    end = position + length
+    if end > len(data):
+        raise ValueError(TRUNCATED)
+    return data[position:end], end
+
+
+def _unzigzag(number: int) -> int:
+    """Decode a zigzag varint's number."""
+    return number >> 1 if not number & 1 else -((number + 1) >> 1)
+
+
+class WireCatalog:
+    """
+    Maps item names to chart entry references and back.
+
+    Chart ids are positions in the sorted list of chart names, the order
+    chart packs use, so both ends agree on them as long as they hold the
+    same chart set; payloads carry the set's hash to make sure. The
+    name index is built on first encode, which loads every chart; decoding
+    only looks entries up. Names are matched back to entries (a dictionary
+    lookup, or a few template matches for names with placeholders), and the
+    most recently seen names are memoized.
+    """
+
+    def __init__(self, chart_loader: ChartLoader):
+        """
+        Initialize catalog.
+
+        Args:
+            chart_loader: Chart loader (possibly pack-backed) of the chart set.
+        """
+        self.loader = chart_loader
+        base = chart_loader.charts_base_path
+        self.charts: List[str] = sorted(
+            p.relative_to(base).with_suffix("").as_posix() for p in base.rglob("*.yaml")
+        )
+        self.chart_ids: Dict[str, int] = {name: i for i, name in enumerate(self.charts)}
+        self.chart_hash = bytes.fromhex(chart_loader.content_hash())
+        self._exact: Optional[Dict[str, Tuple[int, int]]] = None
+        self._entries: List[Dict[str, int]] = []
+        self._templates: Dict[str, List[Tuple[re.Pattern, int, int, List[Tuple[str, int]]]]] = {}
+        self._prefix_lengths: List[int] = []
+        self._names: Dict[Tuple[int, int], str] = {}
+        self._memo: "OrderedDict[str, Optional[Reference]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def entry_name(self, chart_id: int, index: int) -> str:
+        """
+        Name of a chart entry.
+
+        Args:
+            chart_id: Chart id.
+            index: Entry index within the chart.
+
+        Returns:
+            The entry's name, placeholders included.
+        """
+        name = self._names.get((chart_id, index))
+        if name is None:
+            rows = self.loader.load_chart_by_name(self.charts[chart_id]).rows()
+            name = self._names.setdefault((chart_id, index), rows[index].name)
+        return name
+
+    def resolve(self, reference: Reference) -> str:
+        """
+        Build the item name a reference stands for.
+
+        Args:
+            reference: (chart id, entry index, substitutions).
+
+        Returns:
+            Entry name with each placeholder replaced by its substitution.
+        """
+        chart_id, index, substitutions = reference
+        name = self.entry_name(chart_id, index)
+        if substitutions:
+            keywords = KeywordReplacer.placeholders(name)
+            for keyword, (sub_chart, sub_index) in zip(keywords, substitutions):
+                name = name.replace(f"{{{keyword}}}", self.entry_name(sub_chart, sub_index))
+        return name
+
+    def reference(self, name: str) -> Optional[Reference]:
+        """
+        Find the chart entry an item name came from.
+
+        Names with placeholders match an entry whose placeholders were
+        each filled with an entry of the placeholder's chart.
+
+        Args:
+            name: Item name.
+
+        Returns:
+            Reference that resolves to exactly this name, or None if the
+            name was not taken from a chart (e.g. enchanted arms).
+        """
+        with self._lock:
+            if name in self._memo:
+                self._memo.move_to_end(name)
+                return self._memo[name]
+        self._build()
+        reference = None
+        exact = self._exact.get(name)
+        if exact is not None:
+            reference = (exact[0], exact[1], ())
+        else:
+            for length in self._prefix_lengths:
+                for pattern, chart_id, index, charts in self._templates.get(name[:length], ()):
+                    match = pattern.fullmatch(name)
+                    if match is None:
+                        continue
+                    substitutions = []
+                    for text, (keyword, sub_chart) in zip(match.groups(), charts):
+                        found = self._entries[sub_chart].get(text)
+                        if found is None:
+                            break
+                        substitutions.append((sub_chart, found))
+                    else:
+                        candidate = (chart_id, index, tuple(substitutions))
+                        if self.resolve(candidate) == name:
+                            reference = candidate
+                            break
+                if reference is not None:
+                    break
+        with self._lock:
+            self._memo[name] = reference
+            self._memo.move_to_end(name)
+            while len(self._memo) > MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return reference
+
+    def _build(self) -> None:
+        """Index every entry name and placeholder template, once."""
+        if self._exact is not None:
+            return
+        with self._lock:
+            if self._exact is not None:
+                return
+            exact: Dict[str, Tuple[int, int]] = {}
+            entries: List[Dict[str, int]] = []
+            templates: Dict[str, List[Tuple[re.Pattern, int, int, List[Tuple[str, int]]]]] = {}
+            for chart_id, chart_name in enumerate(self.charts):
+                names: Dict[str, int] = {}
+                entries.append(names)
+                for index, row in enumerate(self.loader.load_chart_by_name(chart_name).rows()):
+                    names.setdefault(row.name, index)
+                    keywords = KeywordReplacer.placeholders(row.name)
+                    if not keywords:
+                        exact.setdefault(row.name, (chart_id, index))
+                        continue
+                    charts = []
+                    for keyword in keywords:
+                        sub_chart = KeywordReplacer.chart_for(keyword, row.variables)
+                        if sub_chart is None or chart_expression(sub_chart) is not None \
+                                or sub_chart not in self.chart_ids:
+                            break
+                        charts.append((keyword, self.chart_ids[sub_chart]))
+                    else:
+                        parts = KEYWORD_PATTERN.split(row.name)
+                        # Later occurrences of a placeholder repeat its first match
+                        seen: Dict[str, int] = {}
+                        pattern = re.escape(parts[0])
+                        for position in range(1, len(parts), 2):
+                            keyword = parts[position]
+                            if keyword in seen:
+                                pattern += f"(?P={keyword})"
+                            else:
+                                seen[keyword] = position
+                                pattern += f"(?P<{keyword}>.+?)"
+                            pattern += re.escape(parts[position + 1])
+                        templates.setdefault(parts[0], []).append((re.compile(pattern), chart_id, index, charts))
+            self._templates = templates
+            self._entries = entries
+            self._prefix_lengths = sorted({len(prefix) for prefix in templates}, reverse=True)
+            self._exact = exact
+
+
+def encode(treasure: Treasure, catalog: WireCatalog) -> bytes:
+    """
+    Encode a hoard.
+
+    Coins become a denomination code and a varint amount, and items taken
+    from a chart a reference to their entry (and to the entries that
+    filled their placeholders). Other strings are written as they are.
+
+    Args:
+        treasure: Hoard to encode.
+        catalog: Catalog of the chart set the hoard was generated from.
+
+    Returns:
+        Payload starting with the format version and chart-set hash.
+    """
+    out = bytearray(_PREAMBLE.pack(MAGIC, VERSION, catalog.chart_hash))
+    _varint(treasure.level, out)
+
+    _varint(len(treasure.coins), out)
+    for coins in treasure.coins:
+        amount, _, denomination = coins.partition(" ")
+        if coins == NO_COINS:
+            out.append(0)
+        elif denomination in DENOMINATIONS and amount.isdigit() and str(int(amount)) == amount:
+            out.append(DENOMINATIONS.index(denomination) + 1)
+            _varint(int(amount), out)
+        else:
+            out.append(LITERAL)
+            _string(coins, out)
+
+    _varint(len(treasure.goods), out)
+    for goods in treasure.goods:
+        if goods == NO_GOODS:
+            out.append(0)
+        else:
+            out.append(LITERAL)
+            _string(goods, out)
+
+    _varint(len(treasure.items), out)
+    for item in treasure.items:
+        reference = catalog.reference(item.name)
+        type_code = ITEM_TYPES.index(item.item_type) if item.item_type in ITEM_TYPES else LITERAL
+        out.append(type_code << 1 | (reference is not None))
+        if type_code == LITERAL:
+            _string(item.item_type, out)
+        _zigzag(item.value, out)
+        _zigzag(item.flag, out)
+        if reference is None:
+            _string(item.name, out)
+        else:
+            chart_id, index, substitutions = reference
+            _varint(chart_id, out)
+            _varint(index, out)
+            _varint(len(substitutions), out)
+            for sub_chart, sub_index in substitutions:
+                _varint(sub_chart, out)
+                _varint(sub_index, out)
+    return bytes(out)
+
+
+class WireItem:
+    """An item of a decoded hoard; its name is only built when read."""
+
+    __slots__ = ("value", "item_type", "flag", "_catalog", "_reference", "_name")
+
+    def __init__(
+        self,
+        value: int,
+        item_type: str,
+        flag: int,
+        catalog: WireCatalog,
+        reference: Optional[Reference],
+        name: Union[str, memoryview]
+    ):
+        self.value = value
+        self.item_type = item_type
+        self.flag = flag
+        self._catalog = catalog
+        self._reference = reference
+        self._name = name
+
+    @property
+    def reference(self) -> Optional[Reference]:
+        """Chart entry reference, or None for a name sent as a string."""
+        return self._reference
+
+    @property
+    def name(self) -> str:
+        """Item name, resolved from the charts or decoded on first read."""
+        if not isinstance(self._name, str):
+            if self._reference is not None:
+                self._name = self._catalog.resolve(self._reference)
+            else:
+                self._name = str(self._name, "utf-8")
+        return self._name
+
+    def to_item(self) -> Item:
+        """Convert to a plain Item."""
+        return Item(name=self.name, value=self.value, item_type=self.item_type, flag=self.flag)
+
+
+class HoardView:
+    """
+    A decoded hoard reading straight from the payload.
+
+    Opening a view only checks the header. The body is walked on first
+    access to a section, and strings are decoded and item names resolved
+    only when read.
+    """
+
+    def __init__(self, payload: Buffer, catalog: WireCatalog):
+        """
+        Open a payload.
+
+        Args:
+            payload: Bytes written by encode().
+            catalog: Catalog of the same chart set.
+
+        Raises:
+            ValueError: If the payload is not this version, was encoded
+                against a different chart set or is truncated.
+        """
+        data = memoryview(payload)
+        if len(data) < _PREAMBLE.size + 1:
+            raise ValueError("Not a hoard payload")
+        magic, version, chart_hash = _PREAMBLE.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a version {VERSION} hoard payload")
+        if chart_hash != catalog.chart_hash:
+            raise ValueError("Hoard was encoded against a different chart set")
+        self._data = data
+        self._catalog = catalog
+        try:
+            self.level, self._body = _read_varint(data, _PREAMBLE.size)
+        except IndexError:
+            raise ValueError(TRUNCATED) from None
+        self._coins: Optional[List[Tuple[int, Union[int, memoryview]]]] = None
+        self._goods: List[Optional[memoryview]] = []
+        self._items: List[WireItem] = []
+
+    def _scan(self) -> None:
+        """Find every field of the body, raising ValueError if it is cut short."""
+        try:
+            self._scan_fields()
+        except IndexError:
+            raise ValueError(TRUNCATED) from None
+
+    def _scan_fields(self) -> None:
+        """Walk the body; reads past its end raise IndexError."""
+        data = self._data
+        position = self._body
+        read = _read_varint
+
+        coins = []
+        count, position = read(data, position)
+        for _ in range(count):
+            code = data[position]
+            position += 1
+            if code == LITERAL:
+                literal, position = _read_bytes(data, position)
+                coins.append((code, literal))
+            elif code:
+                amount, position = read(data, position)
+                coins.append((code, amount))
+            else:
+                coins.append((code, 0))
+
+        count, position = read(data, position)
+        for _ in range(count):
+            code = data[position]
+            position += 1
+            if code == LITERAL:
+                literal, position = _read_bytes(data, position)
+                self._goods.append(literal)
+            else:
+                self._goods.append(None)
+
+        catalog = self._catalog
+        count, position = read(data, position)
+        for _ in range(count):
+            head = data[position]
+            position += 1
+            type_code = head >> 1
+            if type_code == LITERAL:
+                literal, position = _read_bytes(data, position)
+                item_type = str(literal, "utf-8")
+            else:
+                item_type = ITEM_TYPES[type_code]
+            value, position = read(data, position)
+            flag, position = read(data, position)
+            if head & _REFERENCE:
+                chart_id, position = read(data, position)
+                index, position = read(data, position)
+                subs, position = read(data, position)
+                substitutions = []
+                for _ in range(subs):
+                    sub_chart, position = read(data, position)
+                    sub_index, position = read(data, position)
+                    substitutions.append((sub_chart, sub_index))
+                reference, name = (chart_id, index, tuple(substitutions)), b""
+            else:
+                name, position = _read_bytes(data, position)
+                reference = None
+            self._items.append(WireItem(_unzigzag(value), item_type, _unzigzag(flag), catalog, reference, name))
+        if position != len(data):
+            raise ValueError("Hoard payload has trailing bytes")
+        self._coins = coins
+
+    @property
+    def coins(self) -> List[str]:
+        """Coin strings, e.g. '130 gp'."""
+        if self._coins is None:
+            self._scan()
+        return [
+            str(amount, "utf-8") if code == LITERAL else f"{amount} {DENOMINATIONS[code - 1]}" if code else NO_COINS
+            for code, amount in self._coins
+        ]
+
+    @property
+    def goods(self) -> List[str]:
+        """Goods strings."""
+        if self._coins is None:
+            self._scan()
+        return [NO_GOODS if goods is None else str(goods, "utf-8") for goods in self._goods]
+
+    @property
+    def items(self) -> List[WireItem]:
+        """Items, with names resolved on read."""
+        if self._coins is None:
+            self._scan()
+        return self._items
+
+    def treasure(self) -> Treasure:
+        """Convert to a plain Treasure."""
+        return Treasure(
+            level=self.level,
+            coins=self.coins,
+            goods=self.goods,
+            items=[item.to_item() for item in self.items],
+        )
+
+
+def decode(payload: Buffer, catalog: WireCatalog) -> HoardView:
+    """
+    Decode a hoard payload without copying it.
+
+    Args:
+        payload: Bytes written by encode().
+        catalog: Catalog of the same chart set.
+
+    Returns:
+        HoardView over the payload.
+    """
+    return HoardView(payload, catalog)
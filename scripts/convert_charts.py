@@ -1,12 +1,59 @@
 """Convert VB chart files to YAML format."""
 
+import re
 import yaml
+from functools import reduce
+from math import gcd, lcm
 from pathlib import Path
 
 
-def parse_chart_file(file_path: Path) -> dict:
+# Legacy <Keyword> markers and the {keyword} placeholders KeywordReplacer expects
+LEGACY_KEYWORDS = {
+    "<Alignment>": "{alignment}",
+    "<Energy>": "{energy}",
+    "<Creature>": "{creature}",
+    "<OilPotion>": "{oil_potion}",
+}
+
+
+# Band corrections for mis-ported legacy charts: output file -> {entry name: (min, max)}
+BAND_CORRECTIONS = {
+    # DMG Table 7-18: Animal friendship 47-50, Minor energy resistance 51-56
+    "dmg/rings_medium.yaml": {
+        "Ring of Animal friendship": (47, 50),
+        "Ring of Minor Energy resistance": (51, 56),
+    },
+    # DMG Table 7-15: Roll again twice 91-100 (the legacy chart leaves 91-95 empty)
+    "dmg/ranged_weapon_abilities_major.yaml": {
+        "ROLLTWICE": (91, 100),
+    },
+}
+
+
+# Entry name corrections for legacy spelling slips: output file -> {legacy name: name}
+NAME_CORRECTIONS = {
+    "dmg/armor_abilities_major.yaml": {
+        "Slick, greater": "GreaterSlick",
+        "ShadowGreater": "GreaterShadow",
+        "SilentMovesGreater": "GreaterSilentMoves",
+        "SpelResistance19": "SpellResistance19",
+    },
+    "dmg/melee_weapon_abilities_major.yaml": {
+        "Brilliant energy": "BrilliantEnergy",
+    },
+}
+
+
+def convert_keywords(name: str) -> str:
+    """Translate legacy <Keyword> markers into {keyword} placeholders."""
+    for legacy, placeholder in LEGACY_KEYWORDS.items():
+        name = name.replace(legacy, placeholder)
+    return name
+
+
+def parse_chart_file(file_path: Path, source: str = "DMG") -> dict:
     """Parse a VB chart .txt file into a dictionary."""
-    with open(file_path, 'r') as f:
+    with open(file_path, 'r', encoding='cp1252', errors='replace') as f:
         all_lines = [line.strip() for line in f if line.strip()]
 
     # Separate data lines from comment lines
@@ -21,7 +68,7 @@ def parse_chart_file(file_path: Path) -> dict:
         entry = {
             "min_roll": int(parts[0]),
             "max_roll": int(parts[1]),
-            "name": parts[2],
+            "name": convert_keywords(parts[2].strip()),
             "value": int(parts[3])
         }
         if len(parts) > 4:
@@ -30,20 +77,17 @@ def parse_chart_file(file_path: Path) -> dict:
         entries.append(entry)
 
     # Extract metadata from comments
-    source = "DMG"
     page = None
     table = None
 
     for line in comment_lines:
         if "Page" in line:
             # Extract numbers from "Page 216"
-            import re
             match = re.search(r'Page\s+(\d+)', line)
             if match:
                 page = int(match.group(1))
         if "Table" in line:
             # Extract "7-3" from "Table 7-3:Random Armor Type"
-            import re
             match = re.search(r'Table\s+([\d\-]+)', line)
             if match:
                 table = match.group(1)
@@ -56,11 +100,43 @@ def parse_chart_file(file_path: Path) -> dict:
     }
 
 
-def convert_chart(input_path: Path, output_path: Path, chart_name: str):
-    """Convert a single chart file to YAML."""
-    data = parse_chart_file(input_path)
+def convert_chart(
+    input_path: Path,
+    output_path: Path,
+    chart_name: str,
+    roll_die: str = "d100",
+    name_prefix: str = "",
+):
+    """
+    Convert a single chart file to YAML.
+
+    Args:
+        input_path: Legacy .txt chart.
+        output_path: Destination YAML file.
+        chart_name: Display name of the chart.
+        roll_die: Die rolled against the chart ("" for a die with one face
+            per entry, as for the power lists).
+        name_prefix: Prefix added to entry names that do not already contain it
+            (the legacy code did this at roll time, e.g. "Rod of ").
+
+    The chart's source book is taken from its directory (dmg/, eph/, mic/).
+    """
+    data = parse_chart_file(input_path, output_path.parent.name.upper())
     data["name"] = chart_name
-    data["roll_die"] = "d100"
+    data["roll_die"] = roll_die or f"d{len(data['entries'])}"
+
+    relative = f"{output_path.parent.name}/{output_path.name}"
+    names = NAME_CORRECTIONS.get(relative, {})
+    corrections = BAND_CORRECTIONS.get(relative, {})
+    for entry in data["entries"]:
+        entry["name"] = names.get(entry["name"], entry["name"])
+        if entry["name"] in corrections:
+            entry["min_roll"], entry["max_roll"] = corrections[entry["name"]]
+
+    if name_prefix:
+        for entry in data["entries"]:
+            if name_prefix.split()[0] not in entry["name"]:
+                entry["name"] = name_prefix + entry["name"]
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
     with open(output_path, 'w') as f:
@@ -69,20 +145,143 @@ def convert_chart(input_path: Path, output_path: Path, chart_name: str):
     print(f"Converted {input_path.name} -> {output_path}")
 
 
+# Share of Psion powers when the legacy EPHPowerStruct.GetPower picks a class
+# list (d100: 1-70 Psion, 71-100 Psychic Warrior; Psion only above level 6)
+PSION_SHARE = 70
+PSYCHIC_WARRIOR_LEVELS = 6
+
+
+def build_power_index(output_base: Path, level: int):
+    """
+    Build the power index chart of a power level.
+
+    The legacy generator rolled d100 for the class list and then the list's
+    own die. The index folds both rolls into one chart whose die gives every
+    power its exact probability, so a power is drawn with a single roll.
+
+    Args:
+        output_base: Charts directory holding eph/psion_powers_N.yaml and
+            eph/psychic_warrior_powers_N.yaml.
+        level: Power level (1-9).
+    """
+    lists = [("psion_powers", PSION_SHARE if level <= PSYCHIC_WARRIOR_LEVELS else 100)]
+    if level <= PSYCHIC_WARRIOR_LEVELS:
+        lists.append(("psychic_warrior_powers", 100 - PSION_SHARE))
+
+    charts = []
+    for stem, share in lists:
+        with open(output_base / "eph" / f"{stem}_{level}.yaml") as f:
+            charts.append((yaml.safe_load(f)["entries"], share))
+
+    # Width of each power's band: share / list size, scaled to integers
+    scale = lcm(*(len(entries) for entries, _ in charts))
+    widths = [share * scale // len(entries) for entries, share in charts]
+    divisor = reduce(gcd, widths)
+
+    entries = []
+    roll = 1
+    for (powers, _), width in zip(charts, widths):
+        width //= divisor
+        for power in powers:
+            entries.append({
+                "min_roll": roll,
+                "max_roll": roll + width - 1,
+                "name": power["name"],
+                "value": power["value"],
+            })
+            roll += width
+
+    data = {
+        "entries": entries,
+        "source": "EPH",
+        "page": None,
+        "table": None,
+        "name": f"EPH Level {level} Powers",
+        "roll_die": f"d{roll - 1}",
+    }
+    output_path = output_base / "eph" / f"powers_{level}.yaml"
+    with open(output_path, 'w') as f:
+        yaml.dump(data, f, default_flow_style=False, sort_keys=False)
+
+    print(f"Built power index {output_path} ({data['roll_die']})")
+
+
 if __name__ == "__main__":
-    # Convert sample charts
     charts_base = Path("Treasure_Generator/bin/Debug/Charts")
-    output_base = Path("dnd_treasure/data/charts/dmg")
+    output_base = Path("dnd_treasure/data/charts")
 
+    # (legacy file, output file, chart name, roll die, name prefix)
+    # dmg/alignments.yaml is maintained by hand and not converted
     conversions = [
-        ("DMGArmor.txt", "armor.yaml", "DMG Armor Types"),
-        ("DMGPotionsMin.txt", "potions_minor.yaml", "DMG Minor Potions"),
-        ("DMGAlignments.txt", "alignments.yaml", "DMG Alignments"),
+        ("DMGArmor.txt", "dmg/armor.yaml", "DMG Armor Types", "d100", ""),
+        ("DMGPotionsMin.txt", "dmg/potions_minor.yaml", "DMG Minor Potions", "d100", ""),
+        ("DMGPotionsMed.txt", "dmg/potions_medium.yaml", "DMG Medium Potions", "d100", ""),
+        ("DMGPotionsMaj.txt", "dmg/potions_major.yaml", "DMG Major Potions", "d100", ""),
+        ("DMGEnergy.txt", "dmg/energy.yaml", "DMG Energy Types", "d5", ""),
+        ("DMGBaneCreatureType.txt", "dmg/bane_creature_type.yaml", "DMG Bane Creature Types", "d100", ""),
+        ("DMGComMeleeWeapons.txt", "dmg/common_melee_weapons.yaml", "DMG Common Melee Weapons", "d100", ""),
+        ("DMGUncMeleeWeapons.txt", "dmg/uncommon_melee_weapons.yaml", "DMG Uncommon Melee Weapons", "d100", ""),
+        ("DMGRangedWeapons.txt", "dmg/ranged_weapons.yaml", "DMG Common Ranged Weapons", "d100", ""),
+        ("DMGRingsMin.txt", "dmg/rings_minor.yaml", "DMG Minor Rings", "d100", ""),
+        ("DMGRingsMed.txt", "dmg/rings_medium.yaml", "DMG Medium Rings", "d100", ""),
+        ("DMGRingsMaj.txt", "dmg/rings_major.yaml", "DMG Major Rings", "d100", ""),
+        ("DMGRodsMed.txt", "dmg/rods_medium.yaml", "DMG Medium Rods", "d100", "Rod of "),
+        ("DMGRodsMaj.txt", "dmg/rods_major.yaml", "DMG Major Rods", "d100", "Rod of "),
+        ("DMGStaffsMed.txt", "dmg/staffs_medium.yaml", "DMG Medium Staffs", "d100", ""),
+        ("DMGStaffsMaj.txt", "dmg/staffs_major.yaml", "DMG Major Staffs", "d100", ""),
+        ("DMGWandsMin.txt", "dmg/wands_minor.yaml", "DMG Minor Wands", "d100", ""),
+        ("DMGWandsMed.txt", "dmg/wands_medium.yaml", "DMG Medium Wands", "d100", ""),
+        ("DMGWandsMaj.txt", "dmg/wands_major.yaml", "DMG Major Wands", "d100", ""),
+        ("DMGWonderousMin.txt", "dmg/wondrous_minor.yaml", "DMG Minor Wondrous Items", "d100", ""),
+        ("DMGWonderousMed.txt", "dmg/wondrous_medium.yaml", "DMG Medium Wondrous Items", "d100", ""),
+        ("DMGWonderousMaj.txt", "dmg/wondrous_major.yaml", "DMG Major Wondrous Items", "d100", ""),
+        ("XPHCogCrysMin.txt", "eph/cognizance_crystals_minor.yaml", "EPH Minor Cognizance Crystals", "d100", ""),
+        ("XPHCogCrysMed.txt", "eph/cognizance_crystals_medium.yaml", "EPH Medium Cognizance Crystals", "d100", ""),
+        ("XPHCogCrysMaj.txt", "eph/cognizance_crystals_major.yaml", "EPH Major Cognizance Crystals", "d100", ""),
+        ("XPHPsicrownMed.txt", "eph/psicrowns_medium.yaml", "EPH Medium Psicrowns", "d100", ""),
+        ("XPHPsicrownMaj.txt", "eph/psicrowns_major.yaml", "EPH Major Psicrowns", "d100", ""),
+        ("XPHUniversalMin.txt", "eph/universal_items_minor.yaml", "EPH Minor Universal Items", "d100", ""),
+        ("XPHUniversalMed.txt", "eph/universal_items_medium.yaml", "EPH Medium Universal Items", "d100", ""),
+        ("XPHUniversalMaj.txt", "eph/universal_items_major.yaml", "EPH Major Universal Items", "d100", ""),
+    ]
+    conversions += [
+        (f"XPHPsion{level}.txt", f"eph/psion_powers_{level}.yaml", f"EPH Psion Powers (Level {level})", "", "")
+        for level in range(1, 10)
+    ]
+    conversions += [
+        (f"XPHPsychicWarrior{level}.txt", f"eph/psychic_warrior_powers_{level}.yaml",
+         f"EPH Psychic Warrior Powers (Level {level})", "", "")
+        for level in range(1, PSYCHIC_WARRIOR_LEVELS + 1)
+    ]
+    conversions += [
+        (f"DMG{kind}Scroll{level}.txt", f"dmg/{kind.lower()}_scrolls_{level}.yaml",
+         f"DMG {kind} Scroll Spells (Level {level})", "d100", "")
+        for kind in ("Arcane", "Divine")
+        for level in range(10)
+    ]
+    conversions += [
+        (f"DMG{legacy}{column}.txt", f"dmg/{stem}_abilities_{power}.yaml",
+         f"DMG {power.capitalize()} {title} Special Abilities", "d100", "")
+        for legacy, stem, title in (
+            ("Armor", "armor", "Armor"),
+            ("MeleeWep", "melee_weapon", "Melee Weapon"),
+            ("RangedWep", "ranged_weapon", "Ranged Weapon"),
+        )
+        for column, power in (("Min", "minor"), ("Med", "medium"), ("Maj", "major"))
+    ]
+    conversions += [
+        (f"MICGoods{kind}.txt", f"mic/goods_{kind.lower()}.yaml", f"MIC Type {kind} Gems and Art", "", "")
+        for kind in "ABCDEFGHI"
     ]
 
-    for input_file, output_file, name in conversions:
+    for input_file, output_file, name, roll_die, prefix in conversions:
         convert_chart(
             charts_base / input_file,
             output_base / output_file,
-            name
+            name,
+            roll_die,
+            prefix,
         )
+
+    for level in range(1, 10):
+        build_power_index(output_base, level)
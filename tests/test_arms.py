@@ -0,0 +1,139 @@
+from collections import Counter
+
+from dnd_treasure.analysis.stats import chi2_sf
+from dnd_treasure.core.arms import (
+    ABILITY_CHARTS, ARMOR, ARMOR_ABILITIES, ARMS_ENTRIES, BLUDGEONING, BONUS_TABLE, MAX_BONUS, MELEE,
+    PIERCING, RANGED, ROLL_AGAIN, SLASHING, WEAPON, WEAPON_ABILITIES, Enchantment, MagicArms,
+)
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.models import TreasureType
+from dnd_treasure.data.loader import ChartLoader
+
+
+class CountingDice(Dice):
+    """Dice counting their rolls."""
+
+    def __init__(self, seed):
+        super().__init__(seed)
+        self.rolls = 0
+
+    def roll(self, num_sides, num_dice=1):
+        self.rolls += 1
+        return super().roll(num_sides, num_dice)
+
+
+class HighDice(Dice):
+    """Dice that always roll their highest face."""
+
+    def roll(self, num_sides, num_dice=1):
+        return num_sides * num_dice
+
+
+def reroll_enchant(loader, kind, power, damage, dice):
+    """The DMG procedure: roll d100 on the charts, rolling again on any incompatible result."""
+    chart = loader.load_chart_by_name(ABILITY_CHARTS.format(kind, power))
+    abilities = ARMOR_ABILITIES if kind == ARMOR else WEAPON_ABILITIES
+    bonuses = BONUS_TABLE[ARMOR if kind == ARMOR else WEAPON][power]
+    min_bonus = min(bonus for _, bonus in bonuses if bonus is not None)
+    rows = [entry.name for entry in chart.entries if entry.name != ROLL_AGAIN]
+    enchantment = Enchantment(damage)
+
+    def fitting():
+        return [name for name in rows if enchantment.fits(abilities[name], min_bonus)]
+
+    while True:
+        roll = dice.d100()
+        bonus = next(bonus for max_roll, bonus in bonuses if roll <= max_roll)
+        if bonus is not None:
+            if enchantment.bonus + bonus <= MAX_BONUS:
+                return bonus, frozenset(enchantment.names())
+            continue
+        if not fitting():
+            continue
+        pending = 1
+        while pending and fitting():
+            name = chart.find_entry(dice.d100()).name
+            if name == ROLL_AGAIN:
+                pending += 1
+            elif enchantment.fits(abilities[name], min_bonus):
+                enchantment.add(rows.index(name), abilities[name])
+                pending -= 1
+
+
+def homogeneity(first, second):
+    """Two-sample chi-square p-value, pooling outcomes seen fewer than 20 times."""
+    pooled = Counter()
+    for outcome in set(first) | set(second):
+        key = outcome if first[outcome] + second[outcome] >= 20 else "rare"
+        pooled[key, 0] += first[outcome]
+        pooled[key, 1] += second[outcome]
+    totals = (sum(first.values()), sum(second.values()))
+    statistic = 0.0
+    keys = {key for key, _ in pooled}
+    for key in keys:
+        both = pooled[key, 0] + pooled[key, 1]
+        for sample in (0, 1):
+            expected = both * totals[sample] / sum(totals)
+            statistic += (pooled[key, sample] - expected) ** 2 / expected
+    return chi2_sf(statistic, len(keys) - 1)
+
+
+def test_sampler_matches_rerolling():
+    """Test that conditional draws give the outcomes of rolling again until compatible."""
+    loader = ChartLoader()
+    arms = MagicArms(loader)
+    for kind, power, damage in ((ARMOR, "medium", 0), (MELEE, "major", SLASHING), (RANGED, "major", PIERCING)):
+        dice = Dice(seed=21)
+        sampled = Counter()
+        rerolled = Counter()
+        for _ in range(10000):
+            enchantment = Enchantment(damage)
+            bonus = arms.enchant(kind, power, enchantment, dice)
+            sampled[bonus, frozenset(enchantment.names())] += 1
+            rerolled[reroll_enchant(loader, kind, power, damage, dice)] += 1
+        assert homogeneity(sampled, rerolled) > 0.001, (kind, power)
+
+
+def test_draws_are_bounded():
+    """Test that an item never costs more than a few draws per ability row."""
+    arms = MagicArms(ChartLoader())
+    dice = CountingDice(seed=5)
+    for kind, power in ARMS_ENTRIES.values():
+        rows = max(len(arms.table(table, power).weights) for table in (ARMOR, MELEE, RANGED))
+        for _ in range(2000):
+            dice.rolls = 0
+            arms.roll(kind, power, dice)
+            assert dice.rolls <= 3 * rows + 5
+
+    # Always rolling "roll again twice" would never end an item by rerolling
+    item = arms.roll(WEAPON, "major", HighDice(seed=0))
+    assert item.name.startswith("+")
+
+
+def test_items_respect_dmg_limits():
+    """Test the +10 cap, exclusive abilities and weapon damage types."""
+    arms = MagicArms(ChartLoader())
+    dice = Dice(seed=8)
+    for _ in range(3000):
+        enchantment = Enchantment(BLUDGEONING)
+        bonus = arms.enchant(MELEE, "major", enchantment, dice)
+        names = enchantment.names()
+        assert bonus + enchantment.bonus <= MAX_BONUS
+        assert not {"Holy", "Unholy"} <= set(names)
+        assert not {"Flaming", "Flaming Burst"} <= set(names)
+        assert "Keen" not in names and "Vorpal" not in names
+
+
+def test_generator_replaces_arms_entries():
+    """Test that hoards list enchanted arms and armor, reproducibly, in both modes."""
+    for flattened in (False, True):
+        first = TreasureGenerator(seed=11, flattened=flattened)
+        second = TreasureGenerator(seed=11, flattened=flattened)
+        names = []
+        for level in range(10, 21):
+            hoard = first.generate(level, items=TreasureType.TRIPLE)
+            assert hoard == second.generate(level, items=TreasureType.TRIPLE)
+            names.extend(item.name for item in hoard.items)
+        assert not ARMS_ENTRIES.keys() & set(names)
+        assert any(name.startswith("+") for name in names)
@@ -0,0 +1,154 @@
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from click.testing import CliRunner
+
+from dnd_treasure import audit
+from dnd_treasure.audit import FRAME, AuditLog, AuditWriter
+from dnd_treasure.cli import main
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.models import TreasureType
+from dnd_treasure.formatters.text import TextFormatter
+
+
+def write_log(path, count=40, **options):
+    generator = TreasureGenerator(seed=11, **options)
+    with AuditWriter(path, generator) as writer:
+        return [writer.generate(index % 20 + 1, items=TreasureType.DOUBLE, timestamp=1000 + index)
+                for index in range(count)]
+
+
+def test_replay_matches_generated(tmp_path):
+    """Test that every logged hoard replays exactly."""
+    path = tmp_path / "hoards.audit"
+    hoards = write_log(path)
+    with AuditLog(path) as log:
+        assert len(log) == len(hoards)
+        record = log[7]
+        assert (record.index, record.timestamp, record.level, record.items) == (7, 1007, 8, TreasureType.DOUBLE)
+        assert [log.replay(record) for record in log] == hoards
+        assert log.records(-3 + len(log)) == [log[-3], log[-2], log[-1]]
+
+
+def test_log_is_compact(tmp_path):
+    """Test that a record costs a fixed frame, far less than its text."""
+    path = tmp_path / "hoards.audit"
+    hoards = write_log(path, count=200)
+    frames = path.stat().st_size
+    text = sum(len(TextFormatter().format(hoard).encode("utf-8")) for hoard in hoards)
+    assert frames < 200 * FRAME.size + 512
+    assert text > 10 * frames
+
+
+def test_append_continues_streams(tmp_path):
+    """Test that reopening a log keeps its seed and drops a torn frame."""
+    path = tmp_path / "hoards.audit"
+    write_log(path, count=5)
+    with open(path, "ab") as f:
+        f.write(b"\x01\x02\x03")
+    with AuditWriter(path, TreasureGenerator()) as writer:
+        hoard = writer.generate(12)
+    with AuditLog(path) as log:
+        assert len(log) == 6
+        assert log[5].index == 5
+        assert log.replay(log[5]) == hoard
+
+
+
+def test_writers_share_a_log(tmp_path):
+    """Test that writers appending to one log get distinct streams."""
+    path = tmp_path / "hoards.audit"
+    with AuditWriter(path, TreasureGenerator(seed=11)) as first, AuditWriter(path, TreasureGenerator()) as second:
+        hoards = [writer.generate(15, timestamp=1000) for _ in range(10) for writer in (first, second)]
+    with AuditLog(path) as log:
+        assert [record.index for record in log] == list(range(20))
+        assert [log.replay(record) for record in log] == hoards
+    assert hoards[0] != hoards[1]
+
+
+def append_hoards(path, count):
+    with AuditWriter(path, TreasureGenerator()) as writer:
+        return [writer.generate(10) for _ in range(count)]
+
+
+def test_writer_processes_share_a_log(tmp_path):
+    """Test that writer processes appending to one log never reuse an index."""
+    path = tmp_path / "hoards.audit"
+    AuditWriter(path, TreasureGenerator(seed=11)).close()
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        hoards = [hoard for batch in pool.map(append_hoards, [path] * 4, [25] * 4) for hoard in batch]
+    with AuditLog(path) as log:
+        assert sorted(record.index for record in log) == list(range(100))
+        replayed = [log.replay(record) for record in log]
+    assert sorted(map(repr, replayed)) == sorted(map(repr, hoards))
+
+def test_mismatched_settings_rejected(tmp_path):
+    """Test that a log only takes hoards made under its own settings."""
+    path = tmp_path / "hoards.audit"
+    write_log(path, count=1)
+    with pytest.raises(ValueError, match="flattened"):
+        AuditWriter(path, TreasureGenerator(flattened=True))
+
+
+@pytest.mark.parametrize("content", [
+    b"not a log at all",
+    struct.pack("<8sII", audit.MAGIC, audit.VERSION, 5) + b"{bad}",
+])
+def test_foreign_file_closed(tmp_path, monkeypatch, content):
+    """Test that a writer refusing a foreign file does not leak its handle."""
+    opened = []
+
+    def tracking_open(*args, **kwargs):
+        opened.append(open(*args, **kwargs))
+        return opened[-1]
+
+    path = tmp_path / "hoards.audit"
+    path.write_bytes(content)
+    monkeypatch.setattr(audit, "open", tracking_open, raising=False)
+    with pytest.raises(ValueError):
+        AuditWriter(path, TreasureGenerator())
+    assert opened and all(handle.closed for handle in opened)
+
+
+def test_replay_checks_backend_first(tmp_path, monkeypatch):
+    """Test that a log from another RNG backend is refused before loading charts."""
+    path = tmp_path / "hoards.audit"
+    record, = write_log(path, count=1)
+    monkeypatch.setattr(audit, "TreasureGenerator", None)
+    with AuditLog(path) as log:
+        log.header["backend"] = "other"
+        with pytest.raises(ValueError, match="other RNG backend"):
+            log.replay(log[0])
+
+
+def test_corrupt_record_detected(tmp_path):
+    """Test that a damaged frame is refused instead of replayed wrongly."""
+    path = tmp_path / "hoards.audit"
+    write_log(path, count=3)
+    data = bytearray(path.read_bytes())
+    data[-FRAME.size - 4] ^= 0xFF
+    path.write_bytes(bytes(data))
+    with AuditLog(path) as log:
+        log[2]
+        with pytest.raises(ValueError):
+            log[1]
+
+
+def test_cli_replay(tmp_path):
+    """Test logging from the CLI and replaying records and ranges."""
+    path = str(tmp_path / "hoards.audit")
+    runner = CliRunner()
+    generated = [runner.invoke(main, ['--level', str(level), '--seed', '3', '--audit-log', path]).output
+                 for level in (4, 9, 15)]
+
+    result = runner.invoke(main, ['replay', path, '1'])
+    assert result.exit_code == 0
+    assert result.output.startswith("Record 1 (")
+    assert result.output.split("\n", 1)[1] == generated[1]
+
+    result = runner.invoke(main, ['replay', path, '1:', '--format', 'json'])
+    assert result.exit_code == 0
+    assert len(result.output.splitlines()) == 2
+
+    assert runner.invoke(main, ['replay', path, '7']).exit_code == 2
@@ -0,0 +1,86 @@
+import io
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from dnd_treasure.batch import generate_stream, read_requests
+from dnd_treasure.cli import main
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.models import TreasureType
+
+
+CSV_INPUT = "id,level,coins,items\na,3,double,\nb,12,,triple\nc,3,double,standard\nd,7,none,none\n"
+
+
+def test_read_csv_and_jsonl():
+    """Test that both input formats give the same requests."""
+    jsonl = "\n".join(json.dumps(row) for row in [
+        {"id": "a", "level": 3, "coins": "double"},
+        {"id": "b", "level": 12, "items": "triple"},
+        {"id": "c", "level": 3, "coins": "double", "items": "standard"},
+        {"id": "d", "level": 7, "coins": "none", "items": "none"},
+    ])
+    from_csv = list(read_requests(io.StringIO(CSV_INPUT), "csv"))
+    assert from_csv == list(read_requests(io.StringIO(jsonl), "jsonl"))
+    assert from_csv[1].items == TreasureType.TRIPLE
+    assert from_csv[0].group == from_csv[2].group
+
+
+@pytest.mark.parametrize("text", ["level\n25\n", "level,coins\n3,lots\n", "coins\nnone\n"])
+def test_invalid_rows_name_their_line(text):
+    """Test that bad rows are reported with their line number."""
+    with pytest.raises(ValueError, match="line 2"):
+        list(read_requests(io.StringIO(text), "csv"))
+
+
+@pytest.mark.parametrize("level", [[5], {"n": 5}, 5.7, True, "5.7", "five"])
+def test_non_integral_levels_rejected(level):
+    """Test that a JSON level that is not a whole number is a line error."""
+    with pytest.raises(ValueError, match="line 1: level"):
+        list(read_requests(io.StringIO(json.dumps({"level": level})), "jsonl"))
+
+
+def test_integral_levels_accepted():
+    """Test that whole-number levels are read from any JSON spelling."""
+    rows = "\n".join(json.dumps({"level": level}) for level in (5, 5.0, "5", " 5 "))
+    assert {request.level for request in read_requests(io.StringIO(rows), "jsonl")} == {5}
+
+
+def test_stream_independent_of_chunking():
+    """Test that output is in input order and independent of chunk size and threads."""
+    def run(chunk_size, threads):
+        requests = read_requests(io.StringIO(CSV_INPUT), "csv")
+        generator = TreasureGenerator(seed=4)
+        return [(r.id, t) for r, t in generate_stream(requests, generator, chunk_size, threads)]
+
+    whole = run(1000, 1)
+    assert [encounter_id for encounter_id, _ in whole] == ["a", "b", "c", "d"]
+    assert run(1, 1) == whole
+    assert run(3, 2) == whole
+    assert whole[3][1].coins == ["No Coins"]
+
+
+def test_stream_reads_lazily():
+    """Test that requests are only pulled one chunk at a time."""
+    pulled = []
+
+    def requests():
+        for request in read_requests(io.StringIO("level\n" + "5\n" * 10), "csv"):
+            pulled.append(request.index)
+            yield request
+
+    stream = generate_stream(requests(), TreasureGenerator(seed=1), chunk_size=2)
+    next(stream)
+    assert pulled == [0, 1]
+
+
+def test_cli_batch(tmp_path):
+    """Test the batch command end to end."""
+    path = tmp_path / "encounters.csv"
+    path.write_text(CSV_INPUT)
+    result = CliRunner().invoke(main, ['batch', '--input', str(path), '--seed', '2'])
+    assert result.exit_code == 0
+    records = [json.loads(line) for line in result.output.splitlines()]
+    assert [record["id"] for record in records] == ["a", "b", "c", "d"]
+    assert records[1]["level"] == 12
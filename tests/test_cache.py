@@ -0,0 +1,114 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from dnd_treasure.core.cache import ResultCache, compact_treasure, expand_treasure
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.models import TreasureType
+from dnd_treasure.formatters.text import TextFormatter
+
+
+CHARTS = Path(__file__).parent.parent / "dnd_treasure" / "data" / "charts"
+
+
+def test_cache_matches_generator():
+    """Test that cached hoards equal freshly generated ones."""
+    cache = ResultCache()
+    expected = TreasureGenerator(seed=5).generate(level=14, items=TreasureType.DOUBLE)
+
+    assert cache.generate(5, 14, items=TreasureType.DOUBLE) == expected
+    assert cache.generate(5, 14, items=TreasureType.DOUBLE) == expected
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+
+
+def test_hits_skip_generation(monkeypatch):
+    """Test that a hit does not generate anything."""
+    cache = ResultCache()
+    cache.generate(9, 6)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("generated on a cache hit")
+
+    monkeypatch.setattr(TreasureGenerator, "_generate", fail)
+    cache.generate(9, 6)
+    assert cache.stats.hits == 1
+
+
+def test_key_includes_options():
+    """Test that treasure types and generator options are part of the key."""
+    cache = ResultCache()
+    cache.generate(1, 10)
+    cache.generate(1, 10, coins=TreasureType.DOUBLE)
+    cache.generate(1, 10, flattened=True)
+    cache.generate(1, 11)
+
+    assert cache.stats.misses == 4
+    assert cache.stats.hits == 0
+
+
+def test_lru_eviction():
+    """Test that the least recently used hoard is evicted first."""
+    cache = ResultCache(max_size=2)
+    cache.generate(1, 5)
+    cache.generate(2, 5)
+    cache.generate(1, 5)  # 1 is now most recent
+    cache.generate(3, 5)  # evicts 2
+
+    assert cache.stats.size == 2
+    cache.generate(1, 5)
+    assert cache.stats.hits == 2
+    cache.generate(2, 5)
+    assert cache.stats.misses == 4
+
+
+def test_unseeded_requests_not_cached():
+    """Test that unseeded requests bypass the cache."""
+    cache = ResultCache()
+    cache.generate(None, 5)
+    assert cache.stats == (0, 0, 0, cache.max_size)
+
+
+def test_chart_edit_invalidates(tmp_path):
+    """Test that changing a chart file changes the key without an invalidate() call."""
+    charts = tmp_path / "charts"
+    shutil.copytree(CHARTS, charts)
+    cache = ResultCache()
+    before = cache.key(1, 20, TreasureType.STANDARD, TreasureType.STANDARD,
+                       TreasureType.STANDARD, charts_path=charts)
+    cache.generate(1, 20, charts_path=charts)
+
+    chart = charts / "dmg" / "potions_minor.yaml"
+    chart.write_text(chart.read_text().replace("Potion of", "Draught of"))
+    after = cache.key(1, 20, TreasureType.STANDARD, TreasureType.STANDARD,
+                      TreasureType.STANDARD, charts_path=charts)
+
+    assert before != after
+    hoard = cache.generate(1, 20, charts_path=charts)
+    assert cache.stats.misses == 2
+    assert hoard == TreasureGenerator(seed=1, charts_path=charts).generate(level=20)
+
+
+def test_render_hit_uses_formatter():
+    """Test that rendering a cached hoard matches formatting a fresh one."""
+    cache = ResultCache()
+    expected = TextFormatter().format(TreasureGenerator(seed=4).generate(level=9))
+
+    assert cache.render(TextFormatter(), 4, 9) == expected
+    assert cache.render(TextFormatter(), 4, 9) == expected
+    assert cache.stats.hits == 1
+
+
+def test_compact_round_trip():
+    """Test that compact results rebuild the same Treasure."""
+    treasure = TreasureGenerator(seed=2).generate(level=17)
+    rebuilt = expand_treasure(compact_treasure(treasure))
+    assert rebuilt == treasure
+    assert rebuilt.origin == treasure.origin
+
+
+def test_invalid_size():
+    """Test that an empty cache is rejected."""
+    with pytest.raises(ValueError):
+        ResultCache(max_size=0)
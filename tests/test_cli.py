@@ -47,3 +47,79 @@ def test_cli_invalid_level():
     result = runner.invoke(main, ['--level', '25'])
 
     assert result.exit_code != 0
+
+
+def test_cli_with_sources():
+    """Test CLI with a mixed source split."""
+    runner = CliRunner()
+    result = runner.invoke(main, [
+        '--level', '12',
+        '--source', 'dmg=60',
+        '--source', 'eph=40'
+    ])
+
+    assert result.exit_code == 0
+    assert "Level 12" in result.output
+
+
+def test_cli_invalid_source_split():
+    """Test CLI with source shares not adding up to 100."""
+    runner = CliRunner()
+    result = runner.invoke(main, ['--level', '5', '--source', 'dmg=50'])
+
+    assert result.exit_code != 0
+
+
+def test_cli_negative_source_share():
+    """Test CLI with a negative source share that still adds up to 100."""
+    runner = CliRunner()
+    result = runner.invoke(main, ['--level', '5', '--source', 'dmg=150', '--source', 'eph=-50'])
+
+    assert result.exit_code == 2
+    assert "from 0 to 100" in result.output
+
+
+def test_cli_missing_level():
+    """Test CLI without a level or subcommand."""
+    runner = CliRunner()
+    result = runner.invoke(main, [])
+
+    assert result.exit_code != 0
+    assert "--level" in result.output
+
+
+def test_cli_json_format():
+    """Test CLI JSON output."""
+    import json
+
+    runner = CliRunner()
+    result = runner.invoke(main, ['--level', '6', '--seed', '3', '--format', 'json'])
+
+    assert result.exit_code == 0
+    assert json.loads(result.output)["level"] == 6
+
+
+def test_cli_job_workflow(tmp_path):
+    """Test planning, running and merging a job from the CLI."""
+    import json
+
+    job_dir = str(tmp_path / "job")
+    runner = CliRunner()
+
+    result = runner.invoke(main, [
+        'job', 'plan', job_dir, '--seed', '1', '--count', '30',
+        '--level', '4=2', '--level', '9', '--shard-size', '8'
+    ])
+    assert result.exit_code == 0
+    assert "4 shards" in result.output
+
+    result = runner.invoke(main, ['job', 'merge', job_dir])
+    assert result.exit_code != 0
+
+    result = runner.invoke(main, ['job', 'run', job_dir])
+    assert result.exit_code == 0
+    assert "Completed 4 shards, 0 remaining" in result.output
+
+    result = runner.invoke(main, ['job', 'merge', job_dir, '--aggregate'])
+    assert result.exit_code == 0
+    assert json.loads(result.output)["hoards"] == 30
@@ -0,0 +1,101 @@
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.data.compact import NAME_POOL, CompactChart, EntryView, StringPool
+from dnd_treasure.data.loader import ChartLoader
+from dnd_treasure.data.models import Chart, ChartEntry
+
+
+def test_string_pool_interns():
+    """Test that equal strings get the same id."""
+    pool = StringPool()
+    first = pool.intern("Potion of cure light wounds")
+    assert pool.intern("Potion of cure light wounds") == first
+    assert pool.intern("Potion of jump") != first
+    assert pool[first] == "Potion of cure light wounds"
+    assert len(pool) == 2
+
+
+def test_compact_matches_chart_for_every_roll():
+    """Test that compact lookups agree with Chart for every roll."""
+    chart = ChartLoader().load_chart_by_name("dmg/wondrous_major")
+    compact = ChartLoader(compact=True).load_chart_by_name("dmg/wondrous_major")
+
+    assert isinstance(compact, CompactChart)
+    assert len(compact) == len(chart.entries)
+    for roll in range(0, chart.die_size + 2):
+        expected = chart.find_entry(roll)
+        found = compact.find_entry(roll)
+        if expected is None:
+            assert found is None
+        else:
+            assert found.to_entry() == expected
+
+
+def test_compact_unsorted_chart():
+    """Test that out-of-order bands fall back to a linear scan."""
+    chart = Chart(
+        name="Unsorted",
+        source="DMG",
+        roll_die="d4",
+        entries=[
+            ChartEntry(min_roll=3, max_roll=4, name="High", value=2),
+            ChartEntry(min_roll=1, max_roll=2, name="Low", value=1,
+                       variables={"wand": "dmg/wands_minor"}),
+        ],
+    )
+    compact = CompactChart.from_chart(chart)
+
+    assert compact.find_entry(1).name == "Low"
+    assert compact.find_entry(4).name == "High"
+    assert compact.find_entry(5) is None
+    assert compact.find_entry(2).variables == {"wand": "dmg/wands_minor"}
+    assert compact.entries == chart.entries
+
+
+def test_entry_views_are_slotted():
+    """Test that row views carry no per-instance dict."""
+    compact = ChartLoader(compact=True).load_chart_by_name("dmg/potions_minor")
+    view = compact.find_entry(1)
+
+    assert isinstance(view, EntryView)
+    assert not hasattr(view, "__dict__")
+
+
+def test_entries_built_lazily():
+    """Test that the ChartEntry list is only built on request and then reused."""
+    compact = CompactChart.from_chart(ChartLoader().load_chart_by_name("dmg/rings_minor"))
+
+    assert compact._entries is None
+    entries = compact.entries
+    assert all(isinstance(entry, ChartEntry) for entry in entries)
+    assert compact.entries is entries
+
+
+def test_names_shared_across_charts():
+    """Test that names repeated across charts are stored once."""
+    loader = ChartLoader(compact=True)
+    minor = loader.load_chart_by_name("dmg/potions_minor")
+    medium = loader.load_chart_by_name("dmg/potions_medium")
+
+    shared = set(minor._name_ids) & set(medium._name_ids)
+    assert shared
+    assert all(NAME_POOL[name_id] for name_id in shared)
+
+
+def test_compact_charts_shared_between_loaders():
+    """Test that compact loaders reuse one copy of each chart."""
+    first = ChartLoader(compact=True).load_chart_by_name("dmg/wands_minor")
+    second = ChartLoader(compact=True).load_chart_by_name("dmg/wands_minor")
+
+    assert first is second
+
+
+def test_compact_generator_matches_default():
+    """Test that compact storage does not change seeded output."""
+    for level in (1, 8, 15, 20):
+        default = TreasureGenerator(seed=11).generate(level=level)
+        compact = TreasureGenerator(seed=11, compact=True).generate(level=level)
+        assert compact == default
+
+    flattened = TreasureGenerator(seed=5, flattened=True).generate(level=12)
+    compact = TreasureGenerator(seed=5, flattened=True, compact=True).generate(level=12)
+    assert compact == flattened
@@ -0,0 +1,149 @@
+from collections import Counter
+
+import pytest
+import yaml
+
+from dnd_treasure.analysis.conformance import (
+    check_bands,
+    check_chart,
+    check_coins,
+    check_coins_bulk,
+    check_die,
+    check_flattened,
+    run_conformance,
+)
+from dnd_treasure.analysis.stats import chi2_sf, chi_square, dice_sum_distribution, kolmogorov_sf
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.flatten import AliasTable, ChartFlattener
+from dnd_treasure.core.keywords import KeywordReplacer
+from dnd_treasure.data.loader import ChartLoader
+from dnd_treasure.data.models import Chart, ChartEntry
+
+
+def make_chart(*bands):
+    """Build a d10 chart from (min_roll, max_roll) bands."""
+    return Chart(
+        name="Test",
+        source="DMG",
+        roll_die="d10",
+        entries=[
+            ChartEntry(min_roll=low, max_roll=high, name=f"Entry {i}", value=i)
+            for i, (low, high) in enumerate(bands)
+        ],
+    )
+
+
+def write_chart(charts, name, *bands):
+    """Write a d10 chart of (min_roll, max_roll) bands as charts/test/NAME.yaml."""
+    (charts / "test").mkdir(parents=True, exist_ok=True)
+    (charts / "test" / f"{name}.yaml").write_text(yaml.dump({
+        "name": name,
+        "source": "DMG",
+        "roll_die": "d10",
+        "entries": [
+            {"min_roll": low, "max_roll": high, "name": f"Entry {i}", "value": i}
+            for i, (low, high) in enumerate(bands)
+        ],
+    }))
+
+
+def roll_counts(die_size, samples, seed):
+    """Roll a die one call at a time, as generation does."""
+    dice = Dice(seed=seed)
+    return Counter(dice.roll(die_size) for _ in range(samples))
+
+
+def test_chi2_sf_known_values():
+    """Test the chi-square survival function against table values."""
+    assert chi2_sf(3.841, 1) == pytest.approx(0.05, abs=1e-3)
+    assert chi2_sf(18.307, 10) == pytest.approx(0.05, abs=1e-3)
+    assert chi2_sf(124.342, 100) == pytest.approx(0.05, abs=1e-3)
+    assert chi2_sf(0.0, 5) == 1.0
+
+
+def test_kolmogorov_sf_known_value():
+    """Test the Kolmogorov survival function at its 5% critical value."""
+    assert kolmogorov_sf(1.358) == pytest.approx(0.05, abs=1e-3)
+
+
+def test_dice_sum_distribution():
+    """Test the exact distribution of 2d6."""
+    distribution = dice_sum_distribution(2, 6)
+    assert distribution[7] * 36 == 6
+    assert sum(distribution.values()) == 1
+
+
+def test_impossible_outcome_fails():
+    """Test that outcomes with zero probability fail the chi-square test."""
+    _, _, p_value = chi_square({"a": 10, "b": 1}, {"a": 1})
+    assert p_value == 0.0
+
+
+def test_shifted_band_detected(tmp_path):
+    """Test that a band shifted into its neighbour fails both checks."""
+    write_chart(tmp_path, "good", (1, 5), (6, 10))
+    write_chart(tmp_path, "shifted", (1, 6), (6, 10))
+    loader = ChartLoader(tmp_path)
+    replacer = KeywordReplacer(loader, Dice(seed=1))
+    flattener = ChartFlattener(loader, Dice(seed=1))
+
+    assert check_bands(make_chart((1, 5), (6, 10)), "good").p_value == 1.0
+    assert check_chart("test/good", replacer, flattener, 20_000).p_value > 1e-6
+    assert check_bands(make_chart((1, 6), (6, 10)), "shifted").p_value == 0.0
+    assert check_chart("test/shifted", replacer, flattener, 20_000).p_value < 1e-6
+
+
+def test_gap_detected(tmp_path):
+    """Test that rolls no band covers fail the band check only."""
+    write_chart(tmp_path, "gapped", (1, 4), (6, 10))
+    loader = ChartLoader(tmp_path)
+    result = check_chart("test/gapped", KeywordReplacer(loader, Dice(seed=1)), ChartFlattener(loader, Dice(seed=1)), 5_000)
+    assert result.p_value > 1e-6  # gap is expected by the bands
+    assert check_bands(make_chart((1, 4), (6, 10)), "gapped").p_value == 0.0
+
+
+def test_wrong_chain_detected(tmp_path):
+    """Test that a chain rolled against other odds than its bands fails."""
+    write_chart(tmp_path, "fair", (1, 5), (6, 10))
+    loader = ChartLoader(tmp_path)
+
+    class LoadedReplacer(KeywordReplacer):
+        def roll(self, chart):
+            return min(super().roll(chart) + 1, chart.die_size)
+
+    result = check_chart("test/fair", LoadedReplacer(loader, Dice(seed=1)), ChartFlattener(loader, Dice(seed=1)), 20_000)
+    assert result.p_value < 1e-6
+
+
+def test_wrong_alias_table_detected(tmp_path):
+    """Test that bulk draws from a mis-built flattened table fail."""
+    write_chart(tmp_path, "fair", (1, 5), (6, 10))
+    flattener = ChartFlattener(ChartLoader(tmp_path), Dice(seed=1))
+
+    assert check_flattened("test/fair", flattener, Dice(seed=2), 1_000_000).p_value > 1e-6
+    flattener.flatten("test/fair").table = AliasTable([51, 49])
+    assert check_flattened("test/fair", flattener, Dice(seed=2), 1_000_000).p_value < 1e-6
+
+
+def test_biased_die_detected():
+    """Test that a loaded die fails the dice checks."""
+    fair = roll_counts(20, 100_000, seed=2)
+    loaded = fair + Counter({20: 2_000})
+
+    assert all(result.p_value > 1e-6 for result in check_die(20, fair))
+    assert all(result.p_value < 1e-6 for result in check_die(20, loaded))
+
+
+def test_coin_sampling_conforms():
+    """Test that generated coin sets match the coin table bands."""
+    for level in (1, 3, 12):
+        for result in check_coins(level, Dice(seed=level), 20_000):
+            assert result.p_value > 1e-6, result
+        for result in check_coins_bulk(level, Dice(seed=level), 20_000):
+            assert result.p_value > 1e-6, result
+
+
+def test_packaged_charts_conform():
+    """Test that every packaged chart passes a small conformance run."""
+    report = run_conformance(samples=50_000, coin_samples=2_000, chart_samples=100_000, scalar_samples=500)
+    assert report.passed, report.failures
@@ -39,3 +39,32 @@ def test_d20():
     for _ in range(100):
         result = dice.d20()
         assert 1 <= result <= 20
+
+
+def test_spawned_streams_are_deterministic():
+    """Test that spawned streams depend only on the seed and labels."""
+    first = Dice(seed=42).spawn("task", 1)
+    second = Dice(seed=42).spawn("task", 1)
+    other = Dice(seed=42).spawn("task", 2)
+
+    rolls = [first.d100() for _ in range(20)]
+    assert rolls == [second.d100() for _ in range(20)]
+    assert rolls != [other.d100() for _ in range(20)]
+
+
+def test_spawn_does_not_consume_rolls():
+    """Test that spawning leaves the parent stream untouched."""
+    parent = Dice(seed=42)
+    parent.spawn("task", 1)
+    fresh = Dice(seed=42)
+    assert [parent.d100() for _ in range(5)] == [fresh.d100() for _ in range(5)]
+
+
+def test_reseed_restarts_stream():
+    """Test that a reseeded roller rolls the stream of a new one."""
+    dice = Dice(seed=1)
+    dice.d100()
+    dice.reseed(42)
+    assert dice.seed == 42
+    fresh = Dice(seed=42)
+    assert [dice.d100() for _ in range(20)] == [fresh.d100() for _ in range(20)]
@@ -0,0 +1,102 @@
+from collections import Counter
+from fractions import Fraction
+
+import pytest
+import yaml
+
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.expressions import compile_expression
+from dnd_treasure.core.flatten import ChartFlattener
+from dnd_treasure.core.keywords import KeywordReplacer
+from dnd_treasure.data.loader import ChartLoader
+from dnd_treasure.data.models import ChartEntry
+
+
+def test_parse_forms():
+    """Test the ranges of the notations used by the rules."""
+    cases = {
+        "2d8×10": (20, 160),
+        "2d8x10": (20, 160),
+        "1d4+1 scrolls": (2, 5),
+        "50−(1d10)": (40, 49),
+        "d%": (1, 100),
+        "-2 + 1d6 * 2": (0, 10),
+        "7": (7, 7),
+    }
+    for text, (low, high) in cases.items():
+        distribution = compile_expression(text).distribution()
+        assert (min(distribution), max(distribution)) == (low, high), text
+    assert compile_expression("1d4+1 scrolls").label == "scrolls"
+    assert compile_expression("3 * (2 + 1)").is_constant
+
+
+@pytest.mark.parametrize("text", ["", "2d", "1+", "(1d4", "4/0", "0d6", "xyz", "1d6/(1d2-1)", "10/(1d4-2)/2"])
+def test_invalid_expressions(text):
+    """Test that malformed expressions are rejected with ValueError."""
+    with pytest.raises(ValueError):
+        compile_expression(text)
+
+
+def test_divisors_checked_for_zero():
+    """Test that only divisors that can roll zero are refused, whatever their bounds."""
+    with pytest.raises(ValueError, match="divisor can roll zero"):
+        compile_expression("1d6/(1d2-1)")
+    expression = compile_expression("12/(2*1d3-3)")
+    assert set(expression.distribution()) == {-12, 4, 12}
+    assert set(expression.sample(Dice(seed=1), 200)) == {-12, 4, 12}
+
+
+def test_evaluate_matches_plain_rolls():
+    """Test that evaluation draws exactly what the equivalent roll() calls do."""
+    expression = compile_expression("2d8×10 + 1d4")
+    dice, plain = Dice(seed=5), Dice(seed=5)
+    for _ in range(100):
+        assert expression.evaluate(dice) == plain.roll(8, 2) * 10 + plain.roll(4)
+
+
+def test_exact_distribution_and_mean():
+    """Test the exact distribution of a subtraction."""
+    expression = compile_expression("50-(1d10)")
+    assert expression.distribution() == {50 - face: Fraction(1, 10) for face in range(1, 11)}
+    assert expression.mean() == Fraction(89, 2)
+
+
+def test_batch_sampling_stays_in_range():
+    """Test bulk sampling against the exact distribution's support."""
+    expression = compile_expression("4d4×100 - 50")
+    samples = expression.sample(Dice(seed=1), 5_000)
+    assert len(samples) == 5_000
+    assert set(samples) <= set(expression.distribution())
+    assert abs(sum(samples) / len(samples) - float(expression.mean())) < 20
+
+
+def test_compilation_is_cached():
+    """Test that the same text compiles to the same shared object."""
+    assert compile_expression("3d6+2") is compile_expression("3d6+2")
+    assert compile_expression.cache_info().hits > 0
+
+
+def test_chart_variable_expression(tmp_path):
+    """Test that chart variables can hold expressions, stepwise and flattened."""
+    charts_dir = tmp_path / "test"
+    charts_dir.mkdir()
+    wands = {
+        "name": "Wands",
+        "source": "DMG",
+        "roll_die": "d1",
+        "entries": [{"min_roll": 1, "max_roll": 1, "name": "Wand ({charges} charges)", "value": 750,
+                     "variables": {"charges": "=50-(1d10)"}}],
+    }
+    (charts_dir / "wands.yaml").write_text(yaml.dump(wands))
+    loader = ChartLoader(tmp_path)
+
+    entry = ChartEntry(**{k: v for k, v in wands["entries"][0].items()})
+    result = KeywordReplacer(loader, Dice(seed=1)).resolve(entry)
+    assert 40 <= int(result.name.split("(")[1].split()[0]) <= 49
+    assert result.value == 750
+
+    distribution = ChartFlattener(loader, Dice(seed=1)).distribution("test/wands")
+    assert len(distribution) == 10
+    assert set(distribution.values()) == {Fraction(1, 10)}
+    counts = Counter(ChartFlattener(loader, Dice(seed=2)).roll_chart("test/wands") for _ in range(200))
+    assert set(counts) <= set(distribution)
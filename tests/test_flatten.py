@@ -0,0 +1,160 @@
+import pytest
+import yaml
+from collections import Counter
+from fractions import Fraction
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.flatten import AliasTable, ChartFlattener
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.keywords import KeywordReplacer
+from dnd_treasure.data.loader import ChartLoader
+from dnd_treasure.data.models import ChartResult
+
+
+class FixedDice:
+    """Dice stub returning a preset roll."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def roll(self, num_sides, num_dice=1):
+        return self.value
+
+
+@pytest.fixture
+def chain_charts(tmp_path):
+    """Create a two-level chart chain with a gap in the top chart."""
+    charts_dir = tmp_path / "charts" / "test"
+    charts_dir.mkdir(parents=True)
+
+    weapons = {
+        "name": "Weapons",
+        "source": "DMG",
+        "roll_die": "d4",
+        "entries": [
+            {"min_roll": 1, "max_roll": 2, "name": "Sword of {element}", "value": 100,
+             "variables": {"element": "test/elements"}},
+            {"min_roll": 3, "max_roll": 3, "name": "Plain Club", "value": 5},
+        ]
+    }
+    elements = {
+        "name": "Elements",
+        "source": "DMG",
+        "roll_die": "d3",
+        "entries": [
+            {"min_roll": 1, "max_roll": 2, "name": "Fire", "value": 10},
+            {"min_roll": 3, "max_roll": 3, "name": "Cold", "value": 20},
+        ]
+    }
+    with open(charts_dir / "weapons.yaml", 'w') as f:
+        yaml.dump(weapons, f)
+    with open(charts_dir / "elements.yaml", 'w') as f:
+        yaml.dump(elements, f)
+    return ChartLoader(tmp_path / "charts")
+
+
+def test_alias_table_is_exact():
+    """Test that every roll of the single draw maps to the weights exactly."""
+    weights = [1, 7, 2, 5]
+    table = AliasTable(weights)
+
+    counts = Counter(
+        table.sample(FixedDice(roll))
+        for roll in range(1, table.size * table.total + 1)
+    )
+    assert [counts[i] for i in range(len(weights))] == [w * len(weights) for w in weights]
+
+
+def test_alias_table_sample_counts():
+    """Test that bulk draws follow the weights and are reproducible."""
+    weights = [1, 7, 2, 5]
+    table = AliasTable(weights)
+
+    counts = table.sample_counts(Dice(seed=3), 300_000)
+    assert sum(counts) == 300_000
+    for count, weight in zip(counts, weights):
+        assert count / 300_000 == pytest.approx(weight / sum(weights), abs=0.005)
+    assert table.sample_counts(Dice(seed=3), 1_000) == table.sample_counts(Dice(seed=3), 1_000)
+    assert AliasTable([3]).sample_counts(Dice(seed=3), 10) == [10]
+
+
+def test_alias_table_rejects_empty_weights():
+    """Test that an alias table needs positive weights."""
+    with pytest.raises(ValueError):
+        AliasTable([])
+
+
+def test_flattened_distribution(chain_charts):
+    """Test the exact distribution of a flattened chain."""
+    flattener = ChartFlattener(chain_charts, Dice(seed=1))
+    flat = flattener.flatten("test/weapons")
+
+    assert flat.probability(ChartResult("Sword of Fire", 110)) == Fraction(1, 3)
+    assert flat.probability(ChartResult("Sword of Cold", 120)) == Fraction(1, 6)
+    assert flat.probability(ChartResult("Plain Club", 5)) == Fraction(1, 4)
+    assert flat.probability(None) == Fraction(1, 4)
+    assert sum(flat.probabilities) == 1
+
+
+def test_flattened_matches_step_by_step(chain_charts):
+    """Test that single-draw sampling follows the step-by-step distribution."""
+    samples = 20000
+    flattener = ChartFlattener(chain_charts, Dice(seed=7))
+    replacer = KeywordReplacer(chain_charts, Dice(seed=8))
+    flat = flattener.flatten("test/weapons")
+
+    flat_counts = Counter(flattener.roll_chart("test/weapons") for _ in range(samples))
+    step_counts = Counter(replacer.roll_chart("test/weapons") for _ in range(samples))
+
+    for outcome, probability in zip(flat.outcomes, flat.probabilities):
+        tolerance = 4 * (float(probability) * (1 - float(probability)) / samples) ** 0.5
+        assert abs(flat_counts[outcome] / samples - probability) < tolerance
+        assert abs(step_counts[outcome] / samples - probability) < tolerance
+
+
+def test_flattened_dmg_chain_matches_step_by_step():
+    """Test the packaged minor magic item chain in both modes."""
+    samples = 20000
+    loader = ChartLoader()
+    flattener = ChartFlattener(loader, Dice(seed=11))
+    replacer = KeywordReplacer(loader, Dice(seed=12))
+    flat = flattener.flatten("dmg/magic_items_minor")
+
+    step_counts = Counter(replacer.roll_chart("dmg/magic_items_minor") for _ in range(samples))
+
+    assert set(step_counts) <= set(flat.outcomes)
+    for outcome, probability in zip(flat.outcomes, flat.probabilities):
+        if probability < Fraction(1, 100):
+            continue
+        tolerance = 4 * (float(probability) * (1 - float(probability)) / samples) ** 0.5
+        assert abs(step_counts[outcome] / samples - probability) < tolerance
+
+
+def test_flatten_rejects_cycles(tmp_path):
+    """Test that a chart chain referencing itself is rejected."""
+    charts_dir = tmp_path / "charts" / "test"
+    charts_dir.mkdir(parents=True)
+    chart_data = {
+        "name": "Loop",
+        "source": "DMG",
+        "roll_die": "d2",
+        "entries": [
+            {"min_roll": 1, "max_roll": 2, "name": "{again}", "value": 0,
+             "variables": {"again": "test/loop"}},
+        ]
+    }
+    with open(charts_dir / "loop.yaml", 'w') as f:
+        yaml.dump(chart_data, f)
+
+    flattener = ChartFlattener(ChartLoader(tmp_path / "charts"), Dice(seed=1))
+    with pytest.raises(ValueError):
+        flattener.flatten("test/loop")
+
+
+def test_generator_flattened_mode():
+    """Test generating a hoard with flattened item chains."""
+    generator = TreasureGenerator(seed=42, flattened=True)
+
+    treasure = generator.generate(level=15)
+
+    assert treasure.items
+    assert all("{" not in item.name for item in treasure.items)
@@ -55,3 +55,24 @@ def test_format_treasure_with_items():
     assert "Potion of Healing" in output
     assert "+1 Longsword" in output
     assert "Gem worth 100 gp" in output
+
+
+def test_json_formatter():
+    """Test formatting treasure as JSON."""
+    import json
+    from dnd_treasure.formatters.json import JsonFormatter
+
+    treasure = Treasure(
+        level=7,
+        coins=["300 gp"],
+        goods=["No Goods"],
+        items=[Item(name="Wand of light", value=375, item_type="minor")]
+    )
+
+    data = json.loads(JsonFormatter().format(treasure))
+
+    assert data["level"] == 7
+    assert data["coins"] == ["300 gp"]
+    assert data["items"] == [
+        {"name": "Wand of light", "value": 375, "item_type": "minor", "flag": 0}
+    ]
@@ -1,3 +1,5 @@
+from dataclasses import replace
+
 import pytest
 from dnd_treasure.core.generator import TreasureGenerator
 from dnd_treasure.core.models import Treasure, TreasureType
@@ -53,3 +55,136 @@ def test_generate_full_treasure():
     assert treasure.coins is not None
     assert treasure.goods is not None
     assert treasure.items is not None
+
+
+def test_generate_many_independent_of_thread_count():
+    """Test that batch results do not depend on the number of threads."""
+    serial = TreasureGenerator(seed=7).generate_many(level=12, count=16)
+    threaded = TreasureGenerator(seed=7).generate_many(level=12, count=16, threads=4)
+
+    assert len(serial) == 16
+    assert threaded == serial
+
+
+def test_generate_many_batches_differ():
+    """Test that consecutive batches roll on different streams."""
+    generator = TreasureGenerator(seed=7)
+    first = generator.generate_many(level=12, count=4)
+    second = generator.generate_many(level=12, count=4)
+    assert first != second
+
+
+def test_generate_many_flattened_threads():
+    """Test that threaded flattened generation shares tables and stays deterministic."""
+    serial = TreasureGenerator(seed=3, flattened=True, compact=True).generate_many(level=18, count=12)
+    threaded = TreasureGenerator(seed=3, flattened=True, compact=True).generate_many(
+        level=18, count=12, threads=3
+    )
+    assert threaded == serial
+
+
+def test_owner_thread_stream_unchanged_by_other_threads():
+    """Test that other threads do not disturb the creating thread's dice."""
+    import threading
+
+    shared = TreasureGenerator(seed=21)
+    worker = threading.Thread(target=lambda: [shared.generate(level=10) for _ in range(5)])
+    worker.start()
+    worker.join()
+
+    assert shared.generate(level=10) == TreasureGenerator(seed=21).generate(level=10)
+
+
+def test_spawned_generators_share_state():
+    """Test that spawned streams share charts and indexes but not dice."""
+    generator = TreasureGenerator(seed=5, flattened=True, provenance=False)
+    spawned = generator.spawn("task", 1)
+
+    assert spawned._shared is generator._shared
+    assert spawned.chart_loader is generator.chart_loader
+    assert spawned.dice is not generator.dice
+    assert spawned.generate(level=9) == generator.spawn("task", 1).generate(level=9)
+
+
+def find_hoard(generator, level, predicate):
+    """Generate hoards until one satisfies predicate."""
+    for _ in range(200):
+        treasure = generator.generate(level=level)
+        if predicate(treasure):
+            return treasure
+    raise AssertionError("no matching hoard")
+
+
+def test_reroll_section_keeps_the_rest():
+    """Test that re-rolling items leaves coins and goods untouched."""
+    generator = TreasureGenerator(seed=11)
+    treasure = find_hoard(generator, 15, lambda t: len(t.items) > 1)
+    rerolled = generator.reroll(treasure, "items")
+
+    assert rerolled.coins is treasure.coins
+    assert rerolled.goods is treasure.goods
+    assert rerolled.items != treasure.items
+    assert rerolled.origin.generation("items") == 1
+    assert generator.reroll(treasure, "items") == rerolled
+
+
+def test_reroll_item_slot():
+    """Test that re-rolling one item slot keeps the other items."""
+    generator = TreasureGenerator(seed=12)
+    treasure = find_hoard(generator, 15, lambda t: len(t.items) > 2)
+    rerolled = generator.reroll(treasure, "items", slot=1)
+
+    assert rerolled.items[0] == treasure.items[0]
+    assert rerolled.items[2:] == treasure.items[2:]
+    assert rerolled.items[1].item_type == treasure.items[1].item_type
+    with pytest.raises(IndexError):
+        generator.reroll(treasure, "items", slot=len(treasure.items))
+
+
+def test_sections_roll_independent_streams():
+    """Test that a hoard's sections do not depend on each other's rolls."""
+    with_items = TreasureGenerator(seed=13).generate(level=9)
+    without_items = TreasureGenerator(seed=13).generate(level=9, items=TreasureType.NONE)
+    assert with_items.coins == without_items.coins
+
+
+def test_reroll_needs_origin():
+    """Test that hand-built hoards and unknown sections are rejected."""
+    generator = TreasureGenerator(seed=14)
+    with pytest.raises(ValueError):
+        generator.reroll(Treasure(level=1), "coins")
+    with pytest.raises(ValueError):
+        generator.reroll(generator.generate(level=1), "gems")
+
+
+def test_lazy_matches_eager():
+    """Test that lazy sections equal eager generation for the same seed."""
+    eager = TreasureGenerator(seed=15).generate(level=14)
+    lazy = TreasureGenerator(seed=15).generate(level=14, lazy=True)
+    assert lazy.items == eager.items
+    assert lazy == eager and eager == lazy
+    assert lazy.materialize() == eager
+
+
+
+def test_lazy_treasure_supports_replace():
+    """Test that dataclasses.replace copies a lazy hoard like a Treasure."""
+    eager = TreasureGenerator(seed=15).generate(level=14)
+    lazy = TreasureGenerator(seed=15).generate(level=14, lazy=True)
+    moved = replace(lazy, level=6)
+    assert moved.level == 6 and lazy.level == 14
+    assert (moved.coins, moved.goods, moved.items) == (eager.coins, eager.goods, eager.items)
+    assert moved.origin is lazy.origin
+    assert replace(lazy, items=[]).items == []
+
+def test_lazy_sections_only_built_on_access(monkeypatch):
+    """Test that unread sections are never generated."""
+    generator = TreasureGenerator(seed=16)
+    lazy = generator.generate(level=8, lazy=True)
+    monkeypatch.setattr(generator, "_roll_items", lambda *args: pytest.fail("items rolled"))
+
+    assert lazy.coins
+    assert lazy.built("coins") and not lazy.built("items")
+    rerolled = generator.reroll(lazy, "coins")
+    assert not rerolled.built("items")
+    assert rerolled.coins == generator.reroll(TreasureGenerator(seed=16).generate(level=8), "coins").coins
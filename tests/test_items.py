@@ -0,0 +1,49 @@
+import pytest
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.items import ITEM_TABLE, ItemGenerator
+from dnd_treasure.core.keywords import KeywordReplacer
+from dnd_treasure.core.models import TreasureType
+from dnd_treasure.data.loader import ChartLoader
+
+
+def make_generator(seed):
+    dice = Dice(seed=seed)
+    return ItemGenerator(dice, KeywordReplacer(ChartLoader(), dice))
+
+
+def test_no_items():
+    """Test generating no items."""
+    generator = make_generator(42)
+
+    result = generator.generate(level=5, treasure_type=TreasureType.NONE)
+    assert len(result) == 1
+    assert result[0].name == "No Items"
+
+
+def test_item_table_bands():
+    """Test that every level's item bands are ordered and within d100."""
+    assert sorted(ITEM_TABLE) == list(range(1, 21))
+    for bands in ITEM_TABLE.values():
+        previous = 0
+        for min_roll, max_roll, _, _ in bands:
+            assert previous < min_roll <= max_roll <= 100
+            previous = max_roll
+
+
+def test_high_level_items_are_resolved():
+    """Test that generated items have no unresolved placeholders."""
+    generator = make_generator(3)
+
+    for _ in range(50):
+        for item in generator.generate(level=20, treasure_type=TreasureType.STANDARD):
+            assert "{" not in item.name
+            assert item.item_type in ("medium", "major", "none")
+
+
+def test_mundane_items_at_low_level():
+    """Test that low levels only produce mundane or minor items."""
+    generator = make_generator(5)
+
+    for _ in range(50):
+        for item in generator.generate(level=3, treasure_type=TreasureType.TRIPLE):
+            assert item.item_type in ("mundane", "minor", "none")
@@ -0,0 +1,124 @@
+import json
+import os
+import time
+
+import pytest
+
+from dnd_treasure import jobs
+from dnd_treasure.core.models import TreasureType
+
+
+def plan(directory, **options):
+    """Plan a small job."""
+    defaults = dict(seed=11, count=25, levels={3: 1, 12: 2}, shard_size=10)
+    defaults.update(options)
+    return jobs.plan_job(directory, **defaults)
+
+
+def test_plan_derives_shard_seeds(tmp_path):
+    """Test that shards cover the count with distinct derived seeds."""
+    manifest = plan(tmp_path / "job")
+
+    assert [shard["count"] for shard in manifest["shards"]] == [10, 10, 5]
+    assert [shard["start"] for shard in manifest["shards"]] == [0, 10, 20]
+    assert len({shard["seed"] for shard in manifest["shards"]}) == 3
+    assert jobs.load_manifest(tmp_path / "job") == manifest
+    assert plan(tmp_path / "other")["shards"] == manifest["shards"]
+
+
+def test_plan_refuses_existing_job(tmp_path):
+    """Test that planning over an existing job fails."""
+    plan(tmp_path / "job")
+    with pytest.raises(FileExistsError):
+        plan(tmp_path / "job")
+
+
+def test_plan_validates_levels(tmp_path):
+    """Test that invalid level mixes are rejected."""
+    with pytest.raises(ValueError):
+        plan(tmp_path / "job", levels={25: 1})
+
+
+def test_run_and_merge(tmp_path):
+    """Test that a full run merges every hoard in index order."""
+    directory = tmp_path / "job"
+    plan(directory, items=TreasureType.DOUBLE)
+
+    assert jobs.run_job(directory) == [0, 1, 2]
+    records = list(jobs.merge_job(directory))
+
+    assert [record["index"] for record in records] == list(range(25))
+    assert {record["level"] for record in records} <= {3, 12}
+    assert not list((directory / jobs.CLAIMS_DIR).iterdir())
+
+
+def test_other_charts_refused(tmp_path):
+    """Test that shards are neither run nor merged against other charts than planned."""
+    directory = tmp_path / "job"
+    manifest = plan(directory)
+    manifest_path = directory / jobs.MANIFEST_FILE
+    manifest_path.write_text(json.dumps(dict(manifest, chart_hash="0" * 64)))
+    with pytest.raises(ValueError, match="planned with"):
+        jobs.run_job(directory)
+    with pytest.raises(ValueError, match="planned with"):
+        jobs.run_shard(directory, 0)
+
+    manifest_path.write_text(json.dumps(manifest))
+    jobs.run_job(directory)
+    checkpoint = directory / jobs.DONE_DIR / f"{jobs.shard_name(1)}.json"
+    checkpoint.write_text(json.dumps(dict(json.loads(checkpoint.read_text()), chart_hash="0" * 64)))
+    with pytest.raises(ValueError, match="Shard 1"):
+        jobs.merge_job(directory)
+
+
+def test_resumed_job_matches_uninterrupted(tmp_path):
+    """Test that running shards separately, in any order, gives the same result."""
+    plan(tmp_path / "whole")
+    jobs.run_job(tmp_path / "whole")
+
+    plan(tmp_path / "resumed")
+    jobs.run_job(tmp_path / "resumed", shard_ids=[2])
+    assert jobs.pending_shards(tmp_path / "resumed") == [0, 1]
+    with pytest.raises(RuntimeError):
+        list(jobs.merge_job(tmp_path / "resumed"))
+    assert jobs.run_job(tmp_path / "resumed") == [0, 1]
+
+    assert list(jobs.merge_job(tmp_path / "resumed")) == list(jobs.merge_job(tmp_path / "whole"))
+
+
+def test_worker_processes_match_serial(tmp_path):
+    """Test that local worker processes produce the same shards."""
+    plan(tmp_path / "serial")
+    jobs.run_job(tmp_path / "serial")
+    plan(tmp_path / "parallel")
+    jobs.run_job(tmp_path / "parallel", workers=2)
+
+    assert list(jobs.merge_job(tmp_path / "parallel")) == list(jobs.merge_job(tmp_path / "serial"))
+
+
+def test_claimed_shards_skipped_until_stale(tmp_path):
+    """Test that live claims are respected and stale ones taken over."""
+    directory = tmp_path / "job"
+    plan(directory)
+    claim = directory / jobs.CLAIMS_DIR / f"{jobs.shard_name(1)}.claim"
+    claim.write_text("{}")
+
+    assert jobs.run_job(directory) == [0, 2]
+    assert jobs.pending_shards(directory) == [1]
+
+    old = time.time() - 7200
+    os.utime(claim, (old, old))
+    assert jobs.run_job(directory) == [1]
+    assert jobs.pending_shards(directory) == []
+
+
+def test_aggregate_totals(tmp_path):
+    """Test that aggregation counts every hoard."""
+    directory = tmp_path / "job"
+    plan(directory)
+    jobs.run_job(directory)
+    summary = jobs.aggregate(jobs.merge_job(directory))
+
+    assert summary["hoards"] == 25
+    assert sum(summary["levels"].values()) == 25
+    json.dumps(summary)
@@ -81,3 +81,38 @@ def test_multiple_keywords(tmp_path):
     result = replacer.replace("Ring of {alignment} {energy}")
     assert "{alignment}" not in result
     assert "{energy}" not in result
+
+
+def test_roll_chart_resolves_variables(tmp_path):
+    """Test that entry variables chain into other charts and add values."""
+    import yaml
+    charts_dir = tmp_path / "charts" / "dmg"
+    charts_dir.mkdir(parents=True)
+
+    armor_data = {
+        "name": "Armor",
+        "source": "DMG",
+        "roll_die": "d1",
+        "entries": [
+            {"min_roll": 1, "max_roll": 1, "name": "Breastplate", "value": 350},
+        ]
+    }
+    magic_data = {
+        "name": "Magic Armor",
+        "source": "DMG",
+        "roll_die": "d1",
+        "entries": [
+            {"min_roll": 1, "max_roll": 1, "name": "+1 {armor}", "value": 1000,
+             "variables": {"armor": "dmg/armor"}},
+        ]
+    }
+    with open(charts_dir / "armor.yaml", 'w') as f:
+        yaml.dump(armor_data, f)
+    with open(charts_dir / "magic_armor.yaml", 'w') as f:
+        yaml.dump(magic_data, f)
+
+    replacer = KeywordReplacer(ChartLoader(tmp_path / "charts"), Dice(seed=42))
+
+    result = replacer.roll_chart("dmg/magic_armor")
+    assert result.name == "+1 Breastplate"
+    assert result.value == 1350
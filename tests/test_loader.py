@@ -46,6 +46,17 @@ def test_chart_caching(test_chart_file):
     assert chart1 is chart2
 
 
+def test_cache_key_is_normalized(test_chart_file, monkeypatch):
+    """Test that every spelling of a chart's path shares one cache entry."""
+    loader = ChartLoader()
+    monkeypatch.chdir(test_chart_file.parent)
+    chart = loader.load_chart(test_chart_file)
+    assert loader.load_chart("test_potions.yaml") is chart
+    assert loader.load_chart(f"../{test_chart_file.parent.name}/test_potions.yaml") is chart
+    assert loader.load_chart(str(test_chart_file)) is chart
+    assert len(loader._cache) == 1
+
+
 def test_load_chart_by_name(tmp_path):
     """Test loading a chart by name from charts directory."""
     charts_dir = tmp_path / "charts" / "dmg"
@@ -66,3 +77,24 @@ def test_load_chart_by_name(tmp_path):
     chart = loader.load_chart_by_name("dmg/armor")
 
     assert chart.name == "DMG Armor"
+
+
+def test_load_chart_by_name_reuses_chart():
+    """Test that name lookups return the cached chart object."""
+    loader = ChartLoader()
+    assert loader.load_chart_by_name("dmg/energy") is loader.load_chart_by_name("dmg/energy")
+
+
+def test_content_hash_kept_until_invalidate(test_chart_file):
+    """Test that the chart set is hashed once and re-read only after invalidate()."""
+    loader = ChartLoader(test_chart_file.parent)
+    before = loader.content_hash()
+    chart = loader.load_chart_by_name("test_potions")
+
+    test_chart_file.write_text(test_chart_file.read_text().replace("Potion A", "Potion C"))
+    assert loader.content_hash() == before
+    assert loader.load_chart_by_name("test_potions") is chart
+
+    loader.invalidate()
+    assert loader.content_hash() != before
+    assert loader.load_chart_by_name("test_potions").entries[0].name == "Potion C"
@@ -0,0 +1,115 @@
+from collections import Counter
+
+import pytest
+
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.expressions import compile_expression
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.mic import GOODS_TYPES, MICTreasure, ValueIndex, expand_tags
+from dnd_treasure.data.loader import ChartLoader
+
+
+class CountingDice(Dice):
+    """Dice that count their rolls."""
+
+    def __init__(self, seed):
+        super().__init__(seed=seed)
+        self.rolls = 0
+
+    def roll(self, num_sides, num_dice=1):
+        self.rolls += 1
+        return super().roll(num_sides, num_dice)
+
+
+class SequenceDice(Dice):
+    """Dice that return fixed rolls in order."""
+
+    def __init__(self, rolls):
+        super().__init__(seed=0)
+        self.rolls = iter(rolls)
+
+    def roll(self, num_sides, num_dice=1):
+        return next(self.rolls)
+
+
+def test_expand_tags():
+    """Test that goods tags are stripped and classified in any case."""
+    assert expand_tags("banded agate<Gem>") == ("banded agate", "gem")
+    assert expand_tags("alexandrite<gem>") == ("alexandrite", "gem")
+    assert expand_tags("silver chalice<Art>") == ("silver chalice", "art object")
+    assert expand_tags("plain name") == ("plain name", None)
+
+
+def test_non_positive_values_rejected():
+    """Test that an index refuses outcomes pick_total() could pick forever."""
+    for value in (0, -5):
+        with pytest.raises(ValueError, match="non-positive value"):
+            ValueIndex([(10, 1, "a"), (value, 1, "free")])
+    assert len(ValueIndex([(10, 1, "a"), (0, 0, "never")])) == 1
+
+
+def test_pick_is_conditional_distribution():
+    """Test that a pick over every roll gives each affordable outcome its weight."""
+    index = ValueIndex([(30, 2, "c"), (10, 1, "a"), (20, 3, "b"), (50, 4, "d")])
+    counts = Counter(index.pick(SequenceDice([roll]), 25) for roll in range(1, 5))
+    assert counts == {"a": 1, "b": 3}
+    assert index.pick(Dice(seed=1), 5) is None
+
+
+def test_pick_total_stays_within_budget():
+    """Test that budget picks take one roll each and leave no affordable change."""
+    index = ValueIndex([(10, 1, 10), (25, 1, 25), (40, 1, 40)])
+    dice = CountingDice(seed=4)
+    for budget in range(0, 300, 7):
+        dice.rolls = 0
+        picked = index.pick_total(dice, budget)
+        assert dice.rolls == len(picked)
+        assert sum(picked) <= budget < sum(picked) + 10
+
+
+def test_goods_index_keeps_value_rolls():
+    """Test that the goods index holds every value each type can roll, at its odds."""
+    index = MICTreasure(ChartLoader(), Dice(seed=1)).goods_index()
+    assert {goods_type for goods_type, _ in index.outcomes} == set(GOODS_TYPES)
+    type_a = [value for goods_type, value in index.outcomes if goods_type == "A"]
+    assert sorted(type_a) == list(range(4, 17))
+
+    weights = dict(zip(index.outcomes, (b - a for a, b in zip([0] + index._cumulative, index._cumulative))))
+    # 4d4 rolls 10 in 44 of 256 ways and 4 in 1; 1d4×1000 rolls each value in 1 of 4
+    assert weights[("A", 10)] == 44 * weights[("A", 4)]
+    assert weights[("G", 1000)] == 64 * weights[("A", 4)]
+
+
+def test_goods_values_vary():
+    """Test that picked goods keep their type's rolled value, not its average."""
+    mic = MICTreasure(ChartLoader(), Dice(seed=3))
+    goods = [good for _ in range(50) for good in mic.goods(5000)]
+    assert all("<" not in good.name for good in goods)
+    assert all(sum(good.value for good in mic.goods(500)) <= 500 for _ in range(50))
+    type_a = {good.value for good in goods if good.goods_type == "A"}
+    assert len(type_a) > 3
+    averages = {int(compile_expression(expression).mean()) for expression in GOODS_TYPES.values()}
+    assert {good.value for good in goods} - averages
+
+
+def test_item_weights_stay_small():
+    """Test that per-chart weights keep the item index's integers small."""
+    index = MICTreasure(ChartLoader(), Dice(seed=1)).item_index()
+    assert index._cumulative[-1].bit_length() < 32
+
+
+def test_indexes_shared_by_spawned_generators():
+    """Test that value indexes are built once per generator family."""
+    generator = TreasureGenerator(seed=1)
+    index = generator.mic.item_index()
+    assert generator.spawn("x").mic.item_index() is index
+    assert all(item.value > 0 for item in index.outcomes)
+
+
+def test_generate_by_value_is_reproducible():
+    """Test budget hoards stay within budget and repeat for a seed."""
+    first = TreasureGenerator(seed=9).generate_by_value(5, goods_value=1200, items_value=3000)
+    second = TreasureGenerator(seed=9).generate_by_value(5, goods_value=1200, items_value=3000)
+    assert first == second
+    assert sum(item.value for item in first.items) <= 3000
+    assert first.goods != ["No Goods"]
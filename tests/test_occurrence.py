@@ -0,0 +1,121 @@
+import math
+from fractions import Fraction
+
+import pytest
+from click.testing import CliRunner
+
+from dnd_treasure.analysis.occurrence import NameMatch, OccurrenceEngine
+from dnd_treasure.cli import main
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.items import ITEM_TABLE
+from dnd_treasure.core.models import Source, TreasureType
+from dnd_treasure.core.scrolls import SCROLL_ENTRIES
+from dnd_treasure.data.models import ChartResult
+
+
+# Matches every item, magic arms of any abilities included
+anything = NameMatch("")
+
+
+def test_slot_sums_chart_chain():
+    """Test that a slot's odds are the chart chain's probability mass."""
+    engine = OccurrenceEngine()
+    rings = NameMatch("^Ring of")
+    distribution = engine.flattener.distribution("dmg/magic_items_medium")
+    mass = sum(p for result, p in distribution.items() if result is not None and result.name.startswith("Ring of"))
+    assert engine.slot("dmg/magic_items_medium", rings) == (mass, mass)
+    assert engine.slot("dmg/mundane_items", rings).probability == 0
+
+
+def test_bands_and_sets():
+    """Test level 1 odds by hand and the combination of several sets."""
+    engine = OccurrenceEngine()
+    (mundane_min, mundane_max, _, _), (minor_min, minor_max, _, _) = ITEM_TABLE[1]
+    single = engine.hoard(1, TreasureType.STANDARD, anything)
+    assert single.probability == Fraction(minor_max - mundane_min + 1, 100)
+    # Minor scroll entries hold 1d3 scrolls each
+    assert single.expected > single.probability
+
+    triple = engine.hoard(1, TreasureType.TRIPLE, anything)
+    assert triple.probability == 1 - (1 - single.probability) ** 3
+    assert triple.expected == 3 * single.expected
+    assert engine.hoard(1, TreasureType.NONE, anything) == (0, 0)
+
+
+def test_scroll_sets_count_each_scroll():
+    """Test that a scroll entry adds its expected 1dN matching scrolls."""
+    engine = OccurrenceEngine()
+    scrolls = NameMatch(" Scroll of ")
+    distribution = engine.flattener.distribution("dmg/magic_items_major")
+    entry = sum(p for result, p in distribution.items() if result is not None and result.name == "Major scroll")
+    slot = engine.slot("dmg/magic_items_major", scrolls)
+    assert slot.probability == entry
+    assert slot.expected == entry * Fraction(7, 2)
+    assert engine.slot("dmg/magic_items_major", NameMatch("^Major scroll$")) == (0, 0)
+
+
+def test_matches_generated_hoards():
+    """Test the exact odds against the frequencies of generated hoards."""
+    engine = OccurrenceEngine()
+    generator = TreasureGenerator(seed=31)
+    hoards = [
+        [item.name for item in generator.generate(12, coins=TreasureType.NONE, goods=TreasureType.NONE).items]
+        for _ in range(10000)
+    ]
+    for pattern in ("^Ring of", "^Potion of", "^Arcane Scroll of ", "Longsword", r"^\+\d", "magic weapon"):
+        predicate = NameMatch(pattern)
+        exact = engine.hoard(12, TreasureType.STANDARD, predicate)
+        counts = [sum(predicate(ChartResult(name, 0, 0)) for name in names) for names in hoards]
+        observed = sum(1 for count in counts if count) / len(counts)
+        p = float(exact.probability)
+        assert abs(observed - p) < 5 * math.sqrt(p * (1 - p) / len(counts)), pattern
+        mean = sum(counts) / len(counts)
+        variance = sum((count - mean) ** 2 for count in counts) / len(counts)
+        assert abs(mean - float(exact.expected)) < 5 * math.sqrt(variance / len(counts)) + 1e-9, pattern
+    assert not SCROLL_ENTRIES.keys() & {name for names in hoards for name in names}
+
+
+def test_magic_arms_count_as_generated():
+    """Test that magic armor and weapons count by the names the generator gives them."""
+    engine = OccurrenceEngine()
+    assert engine.slot("dmg/magic_items_medium", NameMatch("^Medium magic weapon$")) == (0, 0)
+    plain = engine.slot("dmg/magic_items_medium", NameMatch(r"^\+2 Longsword$")).probability
+    enchanted = engine.slot("dmg/magic_items_medium", NameMatch(r"^\+\d .*Longsword$")).probability
+    assert 0 < plain < enchanted
+
+
+def test_ability_dependent_patterns_refused():
+    """Test that patterns whose odds depend on special abilities raise instead of answering wrongly."""
+    engine = OccurrenceEngine()
+    for pattern in (r"^\+2 ", "Flaming", "Bane \\(dragons\\)", r"(?<=\+)2"):
+        with pytest.raises(ValueError, match="not modeled"):
+            engine.hoard(12, TreasureType.STANDARD, NameMatch(pattern))
+    with pytest.raises(ValueError, match="NameMatch"):
+        engine.hoard(12, TreasureType.STANDARD, lambda result: result.name.startswith("Ring of"))
+    assert engine.hoard(1, TreasureType.STANDARD, NameMatch("^Ring of")).probability > 0
+
+
+def test_sources_and_memoization():
+    """Test source shares mixing per-source odds, and reuse of slot results."""
+    rings = NameMatch("^Ring of")
+    dmg = OccurrenceEngine().item_set(14, rings)
+    eph = OccurrenceEngine(sources={Source.EPH: 100}).item_set(14, rings)
+    mixed = OccurrenceEngine(sources={Source.DMG: 50, Source.EPH: 50})
+    assert mixed.item_set(14, rings).expected == (dmg.expected + eph.expected) / 2
+    slots = len(mixed._slots)
+    mixed.hoard(14, TreasureType.TRIPLE, NameMatch("^Ring of"))
+    assert len(mixed._slots) == slots
+
+
+def test_cli_odds():
+    """Test the odds command."""
+    result = CliRunner().invoke(main, ['odds', '^Ring of', '--level', '12', '--items', 'double'])
+    assert result.exit_code == 0
+    assert result.output.startswith("level 12: P(at least one) = ")
+    result = CliRunner().invoke(main, ['odds', 'Flaming', '--level', '12'])
+    assert result.exit_code == 2
+    assert "not modeled" in result.output
+    result = CliRunner().invoke(main, ['odds', '(', '--level', '5'])
+    assert result.exit_code == 2
+    assert "invalid regular expression" in result.output
+    assert result.exception is None or isinstance(result.exception, SystemExit)
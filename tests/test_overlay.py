@@ -0,0 +1,100 @@
+import pytest
+
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.models import Source, TreasureType
+from dnd_treasure.data.loader import ChartLoader
+from dnd_treasure.data.overlay import ChartOverlay, OverlayLoader
+
+
+BANE_CHART = {
+    "name": "House Bane Creature Types",
+    "source": "DMG",
+    "entries": [
+        {"min_roll": 1, "max_roll": 50, "name": "Dragons", "value": 0},
+        {"min_roll": 51, "max_roll": 100, "name": "Kobolds", "value": 0},
+    ],
+}
+
+
+def test_patch_shares_untouched_charts_and_entries():
+    """Test that a patched chart copies only its changed entries and other charts are the base's."""
+    base = ChartLoader()
+    potions = base.load_chart_by_name("dmg/potions_minor")
+    overlay = ChartOverlay("house").patch("dmg/potions_minor", potions.entries[0].name, name="Potion of Gravy", value=1)
+    loader = OverlayLoader(base, overlay)
+
+    patched = loader.load_chart_by_name("dmg/potions_minor")
+    assert patched.entries[0].name == "Potion of Gravy"
+    assert potions.entries[0].name != "Potion of Gravy"
+    assert all(a is b for a, b in zip(patched.entries[1:], potions.entries[1:]))
+    assert loader.load_chart_by_name("dmg/armor") is base.load_chart_by_name("dmg/armor")
+    assert loader.namespace(Source.DMG).load("potions_minor") is patched
+
+
+def test_layers_stack_into_one_map():
+    """Test that stacked overlays resolve through a single map over the shared base."""
+    base = ChartLoader()
+    first = OverlayLoader(base, ChartOverlay("a").replace("dmg/bane_creature_type", BANE_CHART))
+    second = OverlayLoader(first, ChartOverlay("b").patch("dmg/bane_creature_type", "Kobolds", name="Goblins"))
+
+    assert second.base is base
+    names = [entry.name for entry in second.load_chart_by_name("dmg/bane_creature_type").entries]
+    assert names == ["Dragons", "Goblins"]
+    assert [entry.name for entry in first.load_chart_by_name("dmg/bane_creature_type").entries] == ["Dragons", "Kobolds"]
+    assert base.load_chart_by_name("dmg/bane_creature_type").entries[0].name == "Aberrations"
+
+
+def test_content_hash_identifies_layers():
+    """Test that equal overlays hash alike and differ from the base and each other."""
+    base = ChartLoader()
+    house = ChartOverlay().patch("dmg/potions_minor", 0, value=1)
+    hashes = {
+        base.content_hash(),
+        OverlayLoader(base, house).content_hash(),
+        OverlayLoader(base, ChartOverlay().patch("dmg/potions_minor", 0, value=2)).content_hash(),
+    }
+    assert len(hashes) == 3
+    assert OverlayLoader(base, house).content_hash() == OverlayLoader(base, house).content_hash()
+
+
+def test_rejects_unknown_targets():
+    """Test errors for missing charts, entries and fields."""
+    base = ChartLoader()
+    with pytest.raises(ValueError, match="no chart"):
+        OverlayLoader(base, ChartOverlay().replace("dmg/homebrew", BANE_CHART))
+    with pytest.raises(ValueError, match="no entry"):
+        OverlayLoader(base, ChartOverlay().patch("dmg/potions_minor", "Potion of Nothing", value=1))
+    with pytest.raises(ValueError, match="Cannot patch"):
+        ChartOverlay().patch("dmg/potions_minor", 0, colour="red")
+
+
+def test_overlay_file(tmp_path):
+    """Test loading an overlay from YAML."""
+    path = tmp_path / "house.yaml"
+    path.write_text(
+        "patches:\n"
+        "  dmg/armor:\n"
+        "    - entry: Full plate\n"
+        "      value: 2000\n"
+    )
+    overlay = ChartOverlay.from_file(path)
+    assert overlay.name == "house"
+    chart = OverlayLoader(ChartLoader(), overlay).load_chart_by_name("dmg/armor")
+    assert next(entry.value for entry in chart.entries if entry.name == "Full plate") == 2000
+
+
+def test_generator_with_overlay():
+    """Test per-tenant generators: overlay results, shared indexes and reproducibility."""
+    base = TreasureGenerator(seed=4)
+    potions = base.with_overlay(ChartOverlay().patch("dmg/potions_minor", 0, value=1))
+    assert potions._shared.scrolls is base._shared.scrolls and potions._shared.arms is base._shared.arms
+    tenant = base.with_overlay(ChartOverlay().replace("dmg/bane_creature_type", BANE_CHART))
+    assert tenant._shared.arms is not base._shared.arms
+    assert tenant.chart_loader.base is base.chart_loader
+
+    other = base.with_overlay(ChartOverlay().replace("dmg/bane_creature_type", BANE_CHART))
+    for level in range(12, 21):
+        assert tenant.generate(level, items=TreasureType.TRIPLE) == other.generate(level, items=TreasureType.TRIPLE)
+    names = [tenant._shared.arms.roll("weapon", "medium", tenant.dice).name for _ in range(500)]
+    banes = [name for name in names if "Bane (" in name]
+    assert banes and all("Bane (Dragons)" in name or "Bane (Kobolds)" in name for name in banes)
@@ -0,0 +1,100 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from click.testing import CliRunner
+
+from dnd_treasure.cli import main
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.data.loader import ChartLoader
+from dnd_treasure.data.pack import ChartPack, open_pack, write_pack
+
+
+@pytest.fixture(scope="module")
+def pack_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("pack") / "charts.pack"
+    write_pack(ChartLoader(), path)
+    return path
+
+
+def rows_of(chart):
+    return [
+        (row.min_roll, row.max_roll, row.name, row.value, row.flag, row.variables)
+        for row in chart.rows()
+    ]
+
+
+def test_pack_matches_chart_files(pack_path):
+    """Test that every packed chart has exactly the rows of its YAML file."""
+    loader = ChartLoader()
+    pack = open_pack(pack_path)
+    assert pack.content_hash == loader.content_hash()
+    for name in pack.names():
+        packed = pack.chart(name)
+        chart = loader.load_chart_by_name(name)
+        assert rows_of(packed) == rows_of(chart), name
+        assert (packed.roll_die, packed.page) == (chart.roll_die, chart.page)
+        for roll in (1, packed.die_size // 2, packed.die_size):
+            found, expected = packed.find_entry(roll), chart.find_entry(roll)
+            assert (found and found.name) == (expected and expected.name)
+
+
+def test_pack_charts_are_views(pack_path):
+    """Test that packed columns read the mapping instead of copying it."""
+    chart = open_pack(pack_path).chart("dmg/rings_minor")
+    assert isinstance(chart._values, memoryview)
+    assert open_pack(pack_path) is open_pack(pack_path)
+
+
+def test_loader_serves_pack(pack_path):
+    """Test that a loader with a pack returns the packed charts."""
+    loader = ChartLoader(pack=pack_path)
+    assert loader.load_chart_by_name("dmg/rings_minor") is loader.pack.chart("dmg/rings_minor")
+
+
+def test_rejects_other_files(tmp_path):
+    """Test that files that are not packs are refused."""
+    path = tmp_path / "bogus.pack"
+    path.write_bytes(b"not a pack at all")
+    with pytest.raises(ValueError):
+        ChartPack(path)
+
+
+
+def test_stale_pack_refused(tmp_path):
+    """Test that a pack built before a chart edit is not served."""
+    charts = tmp_path / "charts"
+    (charts / "test").mkdir(parents=True)
+    chart = charts / "test" / "chart.yaml"
+    chart.write_text("name: Chart\nsource: DMG\nroll_die: d4\nentries:\n- {min_roll: 1, max_roll: 4, name: Old, value: 1}\n")
+    path = tmp_path / "charts.pack"
+    write_pack(ChartLoader(charts), path)
+    loader = ChartLoader(charts, pack=path)
+    assert loader.load_chart_by_name("test/chart").find_entry(2).name == "Old"
+
+    chart.write_text(chart.read_text().replace("Old", "New"))
+    with pytest.raises(ValueError, match="rebuild"):
+        loader.invalidate()
+    with pytest.raises(ValueError, match="rebuild"):
+        ChartLoader(charts, pack=path)
+
+def generate_with_pack(pack_path):
+    generator = TreasureGenerator(seed=8, pack=pack_path)
+    return [generator.generate(level) for level in range(1, 21)]
+
+
+def test_workers_match_file_charts(pack_path):
+    """Test that worker processes on the pack generate what file charts do."""
+    generator = TreasureGenerator(seed=8)
+    expected = [generator.generate(level) for level in range(1, 21)]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(generate_with_pack, [str(pack_path)] * 2))
+    assert results == [expected, expected]
+
+
+def test_cli_pack(tmp_path):
+    """Test the pack command."""
+    path = tmp_path / "charts.pack"
+    result = CliRunner().invoke(main, ['pack', str(path)])
+    assert result.exit_code == 0
+    assert "Packed" in result.output
+    assert "dmg/rings_minor" in ChartPack(path)
@@ -0,0 +1,48 @@
+import re
+from itertools import product
+
+from dnd_treasure.analysis.patterns import ALL, NONE, SOME, NameLanguage
+
+BONUSES = ["+1 ", "+2 "]
+ABILITIES = ["Keen", "Flaming", "Bane (Dragons)"]
+BASES = [" Longsword", " Dagger"]
+
+
+def language():
+    return NameLanguage().then(BONUSES).then(ABILITIES, separator=", ")
+
+
+def names(*endings):
+    """The names of the test language with up to four abilities, with each ending."""
+    return [
+        bonus + ", ".join(chosen) + ending
+        for bonus in BONUSES
+        for size in range(1, 5)
+        for chosen in product(ABILITIES, repeat=size)
+        for ending in endings
+    ]
+
+
+def expected(pattern, *endings):
+    found = {re.search(pattern, name, re.IGNORECASE) is not None for name in names(*endings)}
+    return SOME if len(found) > 1 else ALL if found == {True} else NONE
+
+
+def test_extent_agrees_with_search():
+    """Test the automaton's answers against searching every name."""
+    patterns = [
+        "", "^Ring of", r"^\+2 ", "magic weapon", "Longsword", "sword|dagger", r"^\+\d .* \w+$",
+        "keen, flaming", "^.{3,4}$", r"[^a-z +,()\d]", r"(Dragons|Giants)\) Dagger$", r"^\+[12] \w", "a{2}",
+        r"\d\s\S", "e?n D", r"(?-i:longsword)", "^(?:[^,]*, ){3}",
+    ]
+    for pattern in patterns:
+        answers = language().extents(pattern, BASES, re.IGNORECASE)
+        assert answers == [expected(pattern, ending) for ending in BASES], pattern
+        whole = language().then(BASES)
+        assert whole.extent(pattern, re.IGNORECASE) == expected(pattern, *BASES), pattern
+
+
+def test_unsupported_constructs_give_some():
+    """Test that constructs the automaton does not model are never answered ALL or NONE."""
+    for pattern in (r"(?<=\+)1", r"\bKeen", r"(a)\1", "(?=x)", "x{100}"):
+        assert language().extent(pattern) == SOME
@@ -0,0 +1,138 @@
+import pytest
+
+from click.testing import CliRunner
+
+from dnd_treasure import batch as batch_mode
+from dnd_treasure.batch import EncounterRequest
+from dnd_treasure.cli import main
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.models import Item, Treasure, TreasureType
+from dnd_treasure.planner import CampaignPlan, hoard_value
+
+
+# Party of four, DMG Table 5-1 wealth at the start of the next level
+TARGETS = {1: 3600, 2: 10800, 3: 21600, 4: 36000, 5: 52000, 6: 76000, 7: 108000, 8: 144000}
+
+
+def campaign(per_level=6, ids=False):
+    return [
+        EncounterRequest(index=i, level=1 + i // per_level, id=f"e{i}" if ids else None)
+        for i in range(per_level * len(TARGETS))
+    ]
+
+
+def test_hoard_value():
+    """Test the gp value of coins, priced goods and items."""
+    hoard = Treasure(
+        level=3,
+        coins=["250 cp", "30 sp", "12 gp", "2 pp", "No Coins"],
+        goods=["Silver pearl (100 gp)", "No Goods"],
+        items=[Item("Potion of Cure light wounds", 50, "minor")],
+    )
+    assert hoard_value(hoard) == 2.5 + 3 + 12 + 20 + 100 + 50
+
+
+def test_batched_pass_matches_batch_mode():
+    """Test that a new plan's hoards are the batch command's for the same list and seed."""
+    encounters = campaign()
+    plan = CampaignPlan(encounters, TARGETS, TreasureGenerator(seed=9, compact=True))
+    streamed = batch_mode.generate_stream(encounters, TreasureGenerator(seed=9, compact=True))
+    assert plan.hoards == [hoard for _, hoard in streamed]
+
+
+def test_curve_against_targets():
+    """Test budgets, cumulative wealth and deviations of the curve."""
+    plan = CampaignPlan(campaign(), TARGETS, TreasureGenerator(seed=4))
+    curve = plan.curve()
+    assert [entry.level for entry in curve] == list(TARGETS)
+    assert [entry.budget for entry in curve] == [3600, 7200, 10800, 14400, 16000, 24000, 32000, 36000]
+    assert curve[-1].cumulative == sum(plan.values)
+    assert curve[2].deviation == (curve[2].wealth - 10800) / 10800
+
+
+def test_retune_keeps_other_hoards():
+    """Test that changing one encounter regenerates only its hoard."""
+    plan = CampaignPlan(campaign(ids=True), TARGETS, TreasureGenerator(seed=6))
+    before = list(plan.hoards)
+    hoard = plan.retune(7, items=TreasureType.TRIPLE)
+    assert plan.hoards[:7] == before[:7] and plan.hoards[8:] == before[8:]
+    assert hoard is plan.hoards[7]
+
+    # Ids key the streams, so inserting an encounter shifts no hoard either
+    encounters = campaign(ids=True)
+    encounters.insert(3, EncounterRequest(index=99, level=1, id="ambush"))
+    inserted = CampaignPlan(encounters, TARGETS, TreasureGenerator(seed=6))
+    assert inserted.hoards[:3] + inserted.hoards[4:] == before
+
+
+def test_rebalance_regenerates_only_levels_off_budget():
+    """Test that rebalancing touches only off-budget levels and is reproducible."""
+    plan = CampaignPlan(campaign(), TARGETS, TreasureGenerator(seed=12))
+    before = list(plan.hoards)
+    off = {entry.level for entry in plan.curve() if abs(entry.deviation) > 0.25}
+    changed = plan.rebalance(tolerance=0.25)
+
+    assert changed and {plan.encounters[i].level for i in changed} <= off
+    assert all(plan.hoards[i] == before[i] for i in range(len(before)) if i not in changed)
+    assert all(plan.revisions[i] > 0 for i in changed)
+    deviation = sum(abs(entry.deviation) for entry in plan.curve())
+    assert deviation < sum(abs(entry.deviation) for entry in CampaignPlan(campaign(), TARGETS, TreasureGenerator(seed=12)).curve())
+
+    again = CampaignPlan(campaign(), TARGETS, TreasureGenerator(seed=12))
+    assert again.rebalance(tolerance=0.25) == changed
+    assert again.hoards == plan.hoards and again.revisions == plan.revisions
+
+
+def test_cli_plan(tmp_path):
+    """Test the plan command's curve and output."""
+    encounters = tmp_path / "campaign.csv"
+    encounters.write_text("level,id\n1,a\n1,b\n2,c\n2,d\n")
+    output = tmp_path / "hoards.jsonl"
+    result = CliRunner().invoke(main, [
+        'plan', '--input', str(encounters), '--seed', '3',
+        '--target', '1=3600', '--target', '2=10800', '-o', str(output),
+    ])
+    assert result.exit_code == 0, result.output
+    assert result.output.startswith("level  1:   2 encounters")
+    assert len(output.read_text().splitlines()) == 4
+
+
+def test_ids_and_rows_key_separate_streams():
+    """Test that an id spelling a row index does not share that row's stream."""
+    plan = CampaignPlan(
+        [EncounterRequest(index=3, level=12), EncounterRequest(index=4, level=12, id="3")],
+        TARGETS, TreasureGenerator(seed=5)
+    )
+    assert plan.stream_key(0) == ("row", 3, 0) and plan.stream_key(1) == ("id", "3", 0)
+    assert plan.hoards[0] != plan.hoards[1]
+
+
+def test_duplicate_ids_rejected():
+    """Test that two encounters with the same id are refused."""
+    encounters = [EncounterRequest(index=0, level=1, id="lair"), EncounterRequest(index=1, level=2, id="lair")]
+    with pytest.raises(ValueError, match="lair"):
+        CampaignPlan(encounters, TARGETS, TreasureGenerator(seed=5))
+
+
+def test_revisions_key_separate_streams_from_ids():
+    """Test that id 'a#1' does not share the stream of revision 1 of id 'a'."""
+    plan = CampaignPlan(
+        [EncounterRequest(index=0, level=12, id="a"), EncounterRequest(index=1, level=12, id="a#1")],
+        TARGETS, TreasureGenerator(seed=5)
+    )
+    assert plan.stream_key(0, 1) != plan.stream_key(1)
+    revised = plan.generator.generate_many(12, 1, keys=[plan.stream_key(0, 1)])[0]
+    assert revised != plan.hoards[1]
+
+
+def test_invalid_encounters_rejected():
+    """Test that bad levels and types are refused when planning and re-tuning."""
+    with pytest.raises(ValueError, match="encounter 1"):
+        CampaignPlan([EncounterRequest(index=0, level=1), EncounterRequest(index=1, level=21)], TARGETS)
+
+    plan = CampaignPlan(campaign(per_level=1), TARGETS, TreasureGenerator(seed=3))
+    before = list(plan.hoards)
+    for change in ({"level": 0}, {"level": 25}, {"level": True}, {"coins": "double"}):
+        with pytest.raises(ValueError):
+            plan.retune(3, **change)
+    assert plan.hoards == before and plan.encounters == campaign(per_level=1)
@@ -0,0 +1,72 @@
+from fractions import Fraction
+
+import pytest
+
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.flatten import ChartFlattener
+from dnd_treasure.core.powers import PSION, PSYCHIC_WARRIOR, PowerIndex
+from dnd_treasure.data.loader import ChartLoader
+
+
+def power_names(loader, chart_name):
+    return [entry.name for entry in loader.load_chart_by_name(chart_name).entries]
+
+
+def test_power_index_matches_class_mix():
+    """Test that the level 3 index gives each power its 70/30 class share."""
+    loader = ChartLoader()
+    distribution = ChartFlattener(loader, Dice(seed=1)).distribution("eph/powers_3")
+    psion = power_names(loader, "eph/psion_powers_3")
+    warrior = power_names(loader, "eph/psychic_warrior_powers_3")
+
+    expected = {}
+    for names, share in ((psion, Fraction(70, 100)), (warrior, Fraction(30, 100))):
+        for name in names:
+            expected[name] = expected.get(name, 0) + share / len(names)
+
+    observed = {}
+    for result, probability in distribution.items():
+        observed[result.name] = observed.get(result.name, 0) + probability
+    assert observed == expected
+
+
+def test_high_level_powers_are_psion_only():
+    """Test that levels above 6 only draw Psion powers."""
+    loader = ChartLoader()
+    for level in (7, 8, 9):
+        index = set(power_names(loader, f"eph/powers_{level}"))
+        assert index == set(power_names(loader, f"eph/psion_powers_{level}"))
+
+
+def test_power_index_roll():
+    """Test drawing powers by class list and level."""
+    loader = ChartLoader()
+    index = PowerIndex(loader, Dice(seed=4))
+
+    assert index.roll(2, PSION) in power_names(loader, "eph/psion_powers_2")
+    assert index.roll(2, PSYCHIC_WARRIOR) in power_names(loader, "eph/psychic_warrior_powers_2")
+    assert index.roll(9) in power_names(loader, "eph/psion_powers_9")
+    with pytest.raises(ValueError):
+        index.roll(7, PSYCHIC_WARRIOR)
+
+
+def test_psionic_items_name_powers():
+    """Test that dorjes, power stones and tattoos resolve to named powers."""
+    loader = ChartLoader()
+    flattener = ChartFlattener(loader, Dice(seed=1))
+    for stem, prefix in (("dorjes", "Dorje of "), ("power_stones", "Power stone of "),
+                         ("psionic_tattoos", "Psionic tattoo of ")):
+        for power in ("minor", "medium", "major"):
+            distribution = flattener.distribution(f"eph/{stem}_{power}")
+            assert sum(distribution.values()) == 1
+            assert all(result.name.startswith(prefix) for result in distribution)
+            assert all("{" not in result.name for result in distribution)
+
+
+def test_eph_items_have_no_power_placeholders():
+    """Test that the EPH item charts chain to real dorjes, stones and tattoos."""
+    loader = ChartLoader()
+    flattener = ChartFlattener(loader, Dice(seed=1))
+    for power in ("minor", "medium", "major"):
+        names = {result.name for result in flattener.distribution(f"eph/magic_items_{power}")}
+        assert not any(name.endswith(("dorje", "power stone", "psionic tattoo")) for name in names)
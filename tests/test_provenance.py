@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+from dnd_treasure.core.arms import ARMOR, BASE_CHARTS, MELEE, RANGED
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.models import TreasureType
+from dnd_treasure.core.provenance import NO_ENTRY, ChartIds, Provenance
+from dnd_treasure.core.scrolls import MAGIC_TYPE_TABLE
+from dnd_treasure.data.loader import ChartLoader
+from dnd_treasure.formatters.json import JsonFormatter
+from dnd_treasure.formatters.text import TextFormatter
+
+
+def test_recording_keeps_hoards():
+    """Test that recording provenance rolls exactly the hoards of a plain generator."""
+    traced = TreasureGenerator(seed=21, provenance=True)
+    plain = TreasureGenerator(seed=21)
+    for level in range(1, 21):
+        hoard = traced.generate(level, items=TreasureType.TRIPLE)
+        assert hoard == plain.generate(level, items=TreasureType.TRIPLE)
+        assert hoard.provenance is not None
+    assert plain.generate(5).provenance is None
+
+
+def test_triples_are_chart_rolls():
+    """Test that each item's triples start at Table 3-5 and name the rolled chart rows."""
+    generator = TreasureGenerator(seed=8, provenance=True)
+    loader = generator.chart_loader
+    traced = 0
+    for level in range(5, 21):
+        hoard = generator.generate(level, items=TreasureType.TRIPLE)
+        trace = hoard.provenance
+        for index, item in enumerate(hoard.items):
+            if item.name == "No Items":
+                continue
+            triples = trace.triples(index)
+            assert trace.charts.names[triples[0][0]] == f"items L{level}"
+            charts = [(trace.charts.names[chart_id], roll, row) for chart_id, roll, row in triples]
+            for name, roll, row in charts:
+                if "/" in name and row != NO_ENTRY:
+                    entry = loader.load_chart_by_name(name).view(row)
+                    assert entry.min_roll <= roll <= entry.max_roll
+            name, _, row = charts[-1]
+            if "/" in name:
+                entry = loader.load_chart_by_name(name).view(row).name
+                assert entry in item.name and trace.render(index).endswith(f"→ {entry}")
+            traced += 1
+    assert traced > 50
+
+
+def test_arms_and_scrolls_trace_their_rolls():
+    """Test that magic arms and scrolls record the rolls that made them, each scroll its own."""
+    generator = TreasureGenerator(seed=5, provenance=True)
+    loader = generator.chart_loader
+    arms = scrolls = shared = 0
+    for _ in range(40):
+        hoard = generator.generate(15, items=TreasureType.TRIPLE)
+        trace = hoard.provenance
+        prefixes = []
+        for index, item in enumerate(hoard.items):
+            triples = trace.triples(index)
+            named = [(trace.charts.names[chart_id], roll, row) for chart_id, roll, row in triples]
+            if item.name.startswith("+"):
+                bases = [loader.load_chart_by_name(name).view(row).name
+                         for name, _, row in named if name in BASE_CHARTS[ARMOR] + BASE_CHARTS[MELEE] + BASE_CHARTS[RANGED]]
+                assert len(bases) == 1 and item.name.endswith(bases[0])
+                assert any(name.endswith(" bonus") for name, _, _ in named)
+                for name, _, row in named:
+                    if name.endswith(" ability"):
+                        label = trace.charts.labels[trace.charts.table(name)][row]
+                        assert label == "roll again twice" or label in item.name
+                arms += 1
+            elif " Scroll of " in item.name:
+                split = next(i for i, (name, _, _) in enumerate(named) if name == MAGIC_TYPE_TABLE)
+                magic_type = item.name.split(" ", 1)[0].lower()
+                assert trace.charts.labels[triples[split][0]][triples[split][2]] == magic_type
+                assert named[split + 2][0].startswith(f"dmg/{magic_type}_scrolls_")
+                prefixes.append((triples[:split], triples[split:]))
+                scrolls += 1
+        # Scrolls of one set share the set's rolls but have their own
+        for (prefix, own), (other_prefix, other_own) in zip(prefixes, prefixes[1:]):
+            if prefix == other_prefix:
+                assert own != other_own
+                shared += 1
+    assert arms and scrolls and shared
+
+
+def test_lazy_and_rerolled_hoards():
+    """Test that lazy hoards trace on first access and re-rolled items get a new trace."""
+    generator = TreasureGenerator(seed=3, provenance=True)
+    eager = generator.generate(15, items=TreasureType.TRIPLE)
+    lazy = generator.regenerate(15, eager.origin, lazy=True)
+    assert lazy.provenance is not None and len(lazy.provenance) == 0
+    assert lazy.items == eager.items
+    assert len(eager.provenance) == len(eager.items)
+    assert [lazy.provenance.render(i) for i in range(len(lazy.items))] == [
+        eager.provenance.render(i) for i in range(len(eager.items))
+    ]
+
+    rerolled = generator.reroll(eager, "items")
+    assert rerolled.provenance is not eager.provenance
+    assert len(rerolled.provenance) == len([item for item in rerolled.items if item.name != "No Items"])
+    assert generator.reroll(eager, "coins").provenance is eager.provenance
+
+
+def test_buffer_grows_past_capacity():
+    """Test the preallocated buffer and its growth."""
+    trace = Provenance(ChartIds(ChartLoader()), capacity=2)
+    assert len(trace.rolls) == 6
+    chart_id = trace.charts.chart("dmg/alignments")
+    for roll in range(1, 6):
+        trace.record(chart_id, roll, 0)
+    trace.record_items(0, 0, 1)
+    assert trace.size == 5 and len(trace.rolls) >= 15
+    assert trace.render(0).startswith("dmg/alignments roll 1 → ")
+    with pytest.raises(IndexError):
+        trace.triples(1)
+
+
+def test_formatters_render_on_demand():
+    """Test that formatters show provenance only for hoards that recorded it."""
+    traced = TreasureGenerator(seed=2, provenance=True).generate(12, items=TreasureType.DOUBLE)
+    plain = TreasureGenerator(seed=2).generate(12, items=TreasureType.DOUBLE)
+    assert "    from items L12 roll " in TextFormatter().format(traced)
+    assert "    from " not in TextFormatter().format(plain)
+    items = json.loads(JsonFormatter().format(traced))["items"]
+    assert all(item["provenance"].startswith("items L12") for item in items)
+    assert "provenance" not in JsonFormatter.to_dict(plain)["items"][0]
+
+
+def test_flattened_generators_cannot_trace():
+    """Test that provenance is refused where chart chains are drawn at once."""
+    with pytest.raises(ValueError, match="Provenance"):
+        TreasureGenerator(flattened=True, provenance=True)
@@ -0,0 +1,82 @@
+import pytest
+
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.models import TreasureType
+from dnd_treasure.core.reservoir import HoardReservoir
+
+
+KEY = (9, TreasureType.STANDARD, TreasureType.STANDARD, TreasureType.DOUBLE)
+
+
+def test_primed_requests_pop_pregenerated_hoards():
+    """Test that a primed request is served from the worker's stream, in order."""
+    with HoardReservoir(depth=6, low_water=0, seed=17) as reservoir:
+        reservoir.prime(*KEY)
+        reservoir.join()
+        assert reservoir.stats.fill[KEY] == 6
+        hoards = [reservoir.get(*KEY) for _ in range(6)]
+        stats = reservoir.stats
+
+    worker = TreasureGenerator(seed=17, compact=True).spawn("reservoir", 0)
+    assert hoards == [worker.generate(*KEY) for _ in range(6)]
+    assert (stats.hits, stats.misses, stats.fill[KEY]) == (6, 0, 0)
+    assert stats.hit_rate == 1.0 and stats.max_wait >= stats.mean_wait > 0
+
+
+def test_empty_reservoir_generates_inline():
+    """Test the fallback to inline generation, which also schedules a refill."""
+    with HoardReservoir(depth=3, low_water=1, seed=2) as reservoir:
+        hoard = reservoir.get(4)
+        assert hoard.level == 4 and hoard.items
+        reservoir.join()
+        stats = reservoir.stats
+    assert (stats.hits, stats.misses) == (0, 1)
+    assert stats.fill[(4, TreasureType.STANDARD, TreasureType.STANDARD, TreasureType.STANDARD)] == 3
+    assert stats.miss_wait > 0
+
+
+def test_refills_below_low_water():
+    """Test that popping below the low-water mark refills to depth, and not before."""
+    with HoardReservoir(depth=8, low_water=4, workers=2, seed=5) as reservoir:
+        reservoir.prime(*KEY)
+        reservoir.join()
+        for _ in range(4):
+            reservoir.get(*KEY)
+        reservoir.join()
+        assert reservoir.stats.generated == 8
+        reservoir.get(*KEY)
+        reservoir.join()
+        stats = reservoir.stats
+    assert stats.fill[KEY] == 8
+    assert stats.generated == 13
+
+
+def test_process_workers():
+    """Test refills generated in a worker process."""
+    with HoardReservoir(depth=4, low_water=0, processes=True, seed=11) as reservoir:
+        reservoir.prime(*KEY)
+        reservoir.join()
+        hoards = [reservoir.get(*KEY) for _ in range(4)]
+    batch = TreasureGenerator(seed=11, compact=True).spawn("reservoir", "batch", 0)
+    assert hoards == [batch.generate(*KEY) for _ in range(4)]
+
+
+def test_rejects_bad_settings():
+    """Test validation of depth, low-water mark and workers."""
+    with pytest.raises(ValueError, match="depth"):
+        HoardReservoir(depth=0)
+    with pytest.raises(ValueError, match="low_water"):
+        HoardReservoir(depth=4, low_water=5)
+    with pytest.raises(ValueError, match="workers"):
+        HoardReservoir(workers=0)
+
+
+def test_rejects_bad_requests():
+    """Test that invalid requests are refused without a deque of their own."""
+    with HoardReservoir(depth=2, low_water=0) as reservoir:
+        for bad in ((25,), (0,), (5, "standard"), (5, TreasureType.STANDARD, TreasureType.STANDARD, None)):
+            with pytest.raises(ValueError):
+                reservoir.get(*bad)
+            with pytest.raises(ValueError):
+                reservoir.prime(*bad)
+        assert reservoir.stats.fill == {}
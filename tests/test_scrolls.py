@@ -0,0 +1,69 @@
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.models import TreasureType
+from dnd_treasure.core.scrolls import ARCANE, DIVINE, SCROLL_ENTRIES, SCROLL_TABLE, ScrollIndex
+from dnd_treasure.data.loader import ChartLoader
+
+
+def spell_names(loader, magic_type, levels):
+    alignments = [entry.name for entry in loader.load_chart_by_name("dmg/alignments").entries]
+    return {
+        entry.name.replace("{alignment}", alignment)
+        for level in levels
+        for entry in loader.load_chart_by_name(f"dmg/{magic_type}_scrolls_{level}").entries
+        for alignment in alignments
+    }
+
+
+def test_index_matches_spell_charts():
+    """Test that every index row is the chart entry of its roll."""
+    loader = ChartLoader()
+    index = ScrollIndex(loader)
+    for magic_type in (ARCANE, DIVINE):
+        for level in range(10):
+            chart = loader.load_chart_by_name(f"dmg/{magic_type}_scrolls_{level}")
+            for roll in range(1, 101):
+                entry = chart.find_entry(roll)
+                assert index.spell(magic_type, level, roll) == (entry.name, entry.value, entry.flag)
+
+
+def test_sets_follow_power_tables():
+    """Test scroll counts and that spells come from the power's levels."""
+    loader = ChartLoader()
+    index = ScrollIndex(loader)
+    dice = Dice(seed=4)
+    for power, (count_die, bands) in SCROLL_TABLE.items():
+        levels = [level for _, level in bands]
+        allowed = {
+            f"{magic_type.capitalize()} Scroll of {name}"
+            for magic_type in (ARCANE, DIVINE)
+            for name in spell_names(loader, magic_type, levels)
+        }
+        counts = set()
+        for _ in range(300):
+            scrolls = index.roll(power, dice)
+            counts.add(len(scrolls))
+            assert all(scroll.name in allowed and scroll.item_type == power for scroll in scrolls)
+        assert counts == set(range(1, count_die + 1))
+
+
+def test_zero_level_scrolls_keep_silver():
+    """Test that the additional silver value ends up in the item flag."""
+    index = ScrollIndex(ChartLoader())
+    name, value, silver = index.spell(ARCANE, 0, 1)
+    assert (name, value, silver) == ("acid splash", 12, 5)
+
+
+def test_generator_replaces_scroll_entries():
+    """Test that hoards list scrolls by spell, reproducibly, in both modes."""
+    for flattened in (False, True):
+        first = TreasureGenerator(seed=6, flattened=flattened)
+        second = TreasureGenerator(seed=6, flattened=flattened)
+        names = []
+        for level in range(10, 21):
+            hoard = first.generate(level, items=TreasureType.TRIPLE)
+            assert hoard == second.generate(level, items=TreasureType.TRIPLE)
+            names.extend(item.name for item in hoard.items)
+        assert not SCROLL_ENTRIES.keys() & set(names)
+        assert any(" Scroll of " in name for name in names)
+        assert not any("{" in name for name in names)
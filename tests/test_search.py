@@ -0,0 +1,91 @@
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from dnd_treasure.cli import main
+from dnd_treasure.data.loader import ChartLoader
+from dnd_treasure.data.models import Chart, ChartEntry
+from dnd_treasure.data.search import SearchIndex, default_index_path, load_index, tokenize
+
+
+def make_index():
+    chart = Chart(
+        name="Rings",
+        source="DMG",
+        entries=[
+            ChartEntry(min_roll=1, max_roll=18, name="Ring of Protection +1", value=2000),
+            ChartEntry(min_roll=19, max_roll=40, name="Ring of Feather Falling", value=2200, flag=1),
+            ChartEntry(min_roll=41, max_roll=100, name="Ring of {ring}", value=0,
+                       variables={"ring": "dmg/rings_minor"}),
+        ],
+    )
+    return SearchIndex([("dmg/rings", Path("dmg/rings.yaml"), chart)])
+
+
+def test_tokenize_case_folds():
+    """Test that tokens are case-folded words without punctuation."""
+    assert tokenize("Ring of Protection +1") == ["ring", "of", "protection", "1"]
+
+
+def test_search_words_and_prefix():
+    """Test that every word must match and the last word matches as a prefix."""
+    index = make_index()
+    assert [hit.name for hit in index.search("ring prot")] == ["Ring of Protection +1"]
+    assert len(index.search("RING")) == 3
+    assert index.search("protection falling") == []
+
+
+def test_search_filters():
+    """Test the source, chart, flag and value filters."""
+    index = make_index()
+    assert len(index.search(source="dmg")) == 3
+    assert index.search(source="eph") == []
+    assert len(index.search(chart="ring")) == 3
+    assert [hit.value for hit in index.search(flag=1)] == [2200]
+    assert [hit.value for hit in index.search("ring", min_value=1, max_value=2100)] == [2000]
+
+
+def test_hit_has_roll_range_and_path():
+    """Test that hits carry the roll range and chart file."""
+    hit = make_index().search("feather")[0]
+    assert hit.roll_range == "19-40"
+    assert hit.path == Path("dmg/rings.yaml")
+    assert hit.chart == "dmg/rings"
+
+
+def test_loader_search_index_is_cached():
+    """Test that the packaged index covers the charts and is built once."""
+    loader = ChartLoader()
+    index = loader.search_index()
+    assert loader.search_index() is index
+    charts = {hit.chart for hit in index.search("ring of protection")}
+    assert {"dmg/rings_minor", "dmg/rings_medium", "dmg/rings_major"} <= charts
+
+
+def test_saved_index_reused_until_charts_change(tmp_path):
+    """Test that a saved index is read back for the same charts only."""
+    charts = tmp_path / "charts" / "dmg"
+    charts.mkdir(parents=True)
+    chart = charts / "rings.yaml"
+    chart.write_text((Path(__file__).parent.parent / "dnd_treasure/data/charts/dmg/rings_minor.yaml").read_text())
+    path = tmp_path / "search.json"
+
+    built = ChartLoader(tmp_path / "charts").search_index(path)
+    loaded = load_index(path, ChartLoader(tmp_path / "charts").content_hash(), tmp_path / "charts")
+    assert loaded is not None and loaded.hits == built.hits
+
+    chart.write_text(chart.read_text().replace("Protection", "Warding"))
+    loader = ChartLoader(tmp_path / "charts")
+    assert load_index(path, loader.content_hash(), tmp_path / "charts") is None
+    assert loader.search_index(path).search("warding")
+    assert load_index(path, loader.content_hash(), tmp_path / "charts") is not None
+
+
+def test_cli_search(tmp_path, monkeypatch):
+    """Test the search command's text output."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    result = CliRunner().invoke(main, ['search', 'ring', 'of', 'protection', '--chart', 'rings_minor'])
+    assert default_index_path(ChartLoader().charts_base_path).is_file()
+    result = CliRunner().invoke(main, ['search', 'ring', 'of', 'protection', '--chart', 'rings_minor'])
+    assert result.exit_code == 0
+    assert "dmg/rings_minor d100 1-18: Ring of Protection +1 (2000 gp)" in result.output
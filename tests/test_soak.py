@@ -0,0 +1,60 @@
+import pytest
+from click.testing import CliRunner
+
+from dnd_treasure.analysis.soak import SoakReport, SoakSample, run_soak, subsystem
+from dnd_treasure.cli import main
+from dnd_treasure.core.generator import TreasureGenerator
+
+
+def test_run_soak_samples():
+    """Test that a soak samples memory and throughput after the warm-up."""
+    seen = []
+    report = run_soak(TreasureGenerator(seed=3), count=300, interval=0, levels=[1, 10, 20],
+                      warmup=100, progress=seen.append)
+    assert report.hoards == 300
+    assert report.samples[0].hoards == 0
+    assert report.samples[1:] == seen
+    assert all(sample.traced > 0 and sample.rate > 0 for sample in seen)
+    assert report.failures(max_growth=10 ** 9, max_drift=10) == []
+
+
+def test_run_soak_needs_a_limit():
+    """Test that an endless soak is refused."""
+    with pytest.raises(ValueError):
+        run_soak(TreasureGenerator(seed=3))
+
+
+def test_report_failures():
+    """Test growth and drift limits."""
+    report = SoakReport(warmup=0, samples=[
+        SoakSample(0.0, 0, None, 1000, 0.0),
+        SoakSample(1.0, 100, None, 2000, 100.0),
+        SoakSample(2.0, 200, None, 3000, 80.0),
+        SoakSample(3.0, 250, None, 5000, 50.0),
+    ])
+    assert report.growth == 4000
+    assert report.rss_growth is None
+    assert report.drift == pytest.approx(-0.5)
+    assert report.failures(max_growth=10000, max_drift=0.6) == []
+    assert len(report.failures(max_growth=1000, max_drift=0.6)) == 1
+    assert len(report.failures(max_growth=1000, max_drift=0.1)) == 2
+
+
+def test_subsystem_names():
+    """Test that package allocations are named by module."""
+    import dnd_treasure.core.generator as generator_module
+    assert subsystem(generator_module.__file__) == "core.generator"
+    assert subsystem("/usr/lib/python3/site-packages/yaml/constructor.py") == "yaml"
+
+
+def test_cli_soak_fails_on_growth():
+    """Test that the soak command exits non-zero past its growth limit."""
+    runner = CliRunner()
+    passed = runner.invoke(main, ['soak', '--count', '200', '--warmup', '50', '--interval', '0',
+                                  '--max-growth', '100000', '--max-drift', '100'])
+    assert passed.exit_code == 0
+    assert "Traced growth" in passed.output
+    failed = runner.invoke(main, ['soak', '--count', '200', '--warmup', '0', '--interval', '0',
+                                  '--max-growth', '0', '--max-drift', '100'])
+    assert failed.exit_code == 1
+    assert "traced memory grew" in failed.output
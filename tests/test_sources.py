@@ -0,0 +1,101 @@
+import pytest
+import yaml
+from dnd_treasure.core.dice import Dice
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.models import Source, TreasureType
+from dnd_treasure.core.sources import SourceSelector
+from dnd_treasure.data.loader import ChartLoader
+
+
+def write_chart(path, name, item_name):
+    """Write a one-entry d1 chart."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    chart_data = {
+        "name": name,
+        "source": "DMG",
+        "roll_die": "d1",
+        "entries": [
+            {"min_roll": 1, "max_roll": 1, "name": item_name, "value": 10},
+        ]
+    }
+    with open(path, 'w') as f:
+        yaml.dump(chart_data, f)
+
+
+@pytest.fixture
+def source_charts(tmp_path):
+    """Create minimal DMG, EPH and MIC item charts."""
+    charts = tmp_path / "charts"
+    for kind in ("mundane_items", "magic_items_minor", "magic_items_medium", "magic_items_major"):
+        write_chart(charts / "dmg" / f"{kind}.yaml", kind, f"DMG {kind}")
+    for kind in ("magic_items_minor", "magic_items_medium", "magic_items_major"):
+        write_chart(charts / "eph" / f"{kind}.yaml", kind, f"EPH {kind}")
+    write_chart(charts / "mic" / "magic_items_minor.yaml", "mic", "MIC item")
+    return charts
+
+
+def test_namespace_is_lazy(source_charts):
+    """Test that namespaces are created and indexed only when used."""
+    loader = ChartLoader(source_charts)
+    assert loader._namespaces == {}
+
+    namespace = loader.namespace(Source.EPH)
+    assert namespace._names is None
+    assert "magic_items_minor" in namespace
+    assert "mundane_items" not in namespace
+    assert loader.namespace(Source.EPH) is namespace
+
+
+def test_dmg_only_never_touches_other_sources(source_charts, monkeypatch):
+    """Test that a DMG-only hoard reads no EPH or MIC charts."""
+    loaded = []
+    original_load = ChartLoader.load_chart
+
+    def recording_load(self, file_path):
+        loaded.append(str(file_path))
+        return original_load(self, file_path)
+
+    monkeypatch.setattr(ChartLoader, "load_chart", recording_load)
+    generator = TreasureGenerator(seed=42, charts_path=source_charts)
+
+    for level in range(1, 21):
+        generator.generate(level=level, items=TreasureType.TRIPLE)
+
+    assert loaded
+    assert all("/dmg/" in path for path in loaded)
+    assert set(generator.chart_loader._namespaces) == {Source.DMG}
+
+
+def test_mixed_sources_resolve_once(source_charts):
+    """Test that mixed-source hoards draw from both sources and resolve charts once."""
+    generator = TreasureGenerator(
+        seed=7,
+        charts_path=source_charts,
+        sources={Source.DMG: 50, Source.EPH: 50},
+    )
+
+    names = set()
+    for _ in range(100):
+        treasure = generator.generate(level=12, items=TreasureType.STANDARD)
+        names.update(item.name.split()[0] for item in treasure.items)
+
+    assert {"DMG", "EPH"} <= names
+    resolved = generator.source_selector._resolved
+    assert len(resolved) <= 2 * 4
+    assert Source.MIC not in generator.chart_loader._namespaces
+
+
+def test_missing_source_chart_falls_back_to_dmg(source_charts):
+    """Test that EPH uses the DMG chart when it has no chart of its own."""
+    loader = ChartLoader(source_charts)
+    selector = SourceSelector(loader, Dice(seed=1), {Source.EPH: 100})
+
+    namespace = selector.pick()
+    assert selector.resolve(namespace, "magic_items_minor") == "eph/magic_items_minor"
+    assert selector.resolve(namespace, "mundane_items") == "dmg/mundane_items"
+
+
+def test_source_percentages_must_total_100():
+    """Test that invalid source shares are rejected."""
+    with pytest.raises(ValueError):
+        SourceSelector(ChartLoader(), Dice(), {Source.DMG: 60, Source.EPH: 30})
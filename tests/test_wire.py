@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from dnd_treasure.core.generator import TreasureGenerator
+from dnd_treasure.core.models import Item, Source, Treasure, TreasureType
+from dnd_treasure.data.loader import ChartLoader
+from dnd_treasure.data.pack import write_pack
+from dnd_treasure.formatters.json import JsonFormatter
+from dnd_treasure.wire import WireCatalog, decode, encode
+
+
+def sample_hoards(count=150):
+    generator = TreasureGenerator(seed=13, sources={Source.DMG: 50, Source.EPH: 25, Source.MIC: 25})
+    return generator, [
+        generator.generate(level % 20 + 1, coins=TreasureType.DOUBLE, items=TreasureType.TRIPLE)
+        for level in range(count)
+    ]
+
+
+def test_round_trip():
+    """Test that every hoard decodes to what was encoded, in a fraction of the JSON size."""
+    generator, hoards = sample_hoards()
+    catalog = WireCatalog(generator.chart_loader)
+    wire_size = json_size = 0
+    for hoard in hoards:
+        payload = encode(hoard, catalog)
+        assert decode(payload, catalog).treasure() == hoard
+        wire_size += len(payload)
+        json_size += len(json.dumps(JsonFormatter.to_dict(hoard), separators=(",", ":")))
+    assert wire_size * 2 < json_size
+
+
+def test_items_are_chart_references():
+    """Test that chart items, placeholders included, travel as entry references."""
+    loader = ChartLoader()
+    catalog = WireCatalog(loader)
+    potions = catalog.chart_ids["dmg/potions_minor"]
+    name = next(row.name for row in loader.load_chart_by_name("dmg/potions_minor").rows() if "{" not in row.name)
+    assert catalog.reference(name)[0] == potions
+
+    hoard = Treasure(level=3, coins=["120 gp", "No Coins"], goods=["No Goods"], items=[
+        Item(name="Potion of Protection from Evil", value=50, item_type="minor"),
+        Item(name="+2 Flaming Longsword", value=18315, item_type="medium"),
+    ])
+    view = decode(encode(hoard, catalog), catalog)
+    first, second = view.items
+    chart_id, _, ((sub_chart, _),) = first.reference
+    assert (chart_id, sub_chart) == (potions, catalog.chart_ids["dmg/alignments"])
+    assert second.reference is None
+    assert view.treasure() == hoard
+
+
+def test_names_resolve_on_read():
+    """Test that decoding leaves item names alone until they are read."""
+    generator, hoards = sample_hoards(50)
+    catalog = WireCatalog(generator.chart_loader)
+    payloads = [encode(hoard, catalog) for hoard in hoards]
+
+    reader = WireCatalog(generator.chart_loader)
+    views = [decode(memoryview(payload), reader) for payload in payloads]
+    assert [item.value for view in views for item in view.items]
+    assert not reader._names
+    assert [view.treasure() for view in views] == hoards
+
+
+def test_rejects_other_chart_sets(tmp_path):
+    """Test that payloads only decode against the chart set they were made with."""
+    generator, hoards = sample_hoards(5)
+    payload = encode(hoards[0], WireCatalog(generator.chart_loader))
+
+    charts = tmp_path / "charts"
+    (charts / "dmg").mkdir(parents=True)
+    (charts / "dmg" / "armor.yaml").write_text(
+        (generator.chart_loader.charts_base_path / "dmg" / "armor.yaml").read_text()
+    )
+    with pytest.raises(ValueError, match="different chart set"):
+        decode(payload, WireCatalog(ChartLoader(charts)))
+    with pytest.raises(ValueError, match="version"):
+        decode(b"JSON" + payload[4:], WireCatalog(generator.chart_loader))
+
+
+def test_pack_backed_catalog(tmp_path):
+    """Test that a catalog over a chart pack decodes the same references."""
+    generator, hoards = sample_hoards(50)
+    payloads = [encode(hoard, WireCatalog(generator.chart_loader)) for hoard in hoards]
+    write_pack(generator.chart_loader, tmp_path / "charts.pack")
+    catalog = WireCatalog(ChartLoader(pack=tmp_path / "charts.pack"))
+    assert [decode(payload, catalog).treasure() for payload in payloads] == hoards
+
+
+def test_truncated_payload_rejected():
+    """Test that a payload cut short anywhere fails with ValueError."""
+    generator, hoards = sample_hoards(20)
+    catalog = WireCatalog(generator.chart_loader)
+    hoard = Treasure(level=300, coins=["12 gp", "a bag of teeth"], goods=["jade idol"],
+                     items=[Item("Odd Thing", 5, "odd")] + max(hoards, key=lambda h: len(h.items)).items)
+    payload = encode(hoard, catalog)
+    assert decode(payload, catalog).treasure() == hoard
+    for end in range(len(payload)):
+        with pytest.raises(ValueError):
+            decode(payload[:end], catalog).treasure()
+    with pytest.raises(ValueError, match="Truncated"):
+        decode(payload[:-3], catalog).items
+
+
+def test_memo_drops_least_recently_used(monkeypatch):
+    """Test that a full name memo evicts the oldest name, not every name."""
+    monkeypatch.setattr("dnd_treasure.wire.MEMO_SIZE", 2)
+    catalog = WireCatalog(ChartLoader())
+    for name in ("Longsword", "Dagger", "Longsword", "Greataxe"):
+        catalog.reference(name)
+    assert list(catalog._memo) == ["Longsword", "Greataxe"]